@@ -0,0 +1,152 @@
+"""
+Giriş/çıkış aktivite akışı (/recent-activities).
+
+Her park kaydı bir giriş olayı (entry_time), kapanmışsa ayrıca bir çıkış olayı
+(exit_time) üretir. Akış tek bir sorguyla oluşturulur: giriş ve çıkış olayları
+ayrı dallarda, her biri kendi indeksinden (bkz. models.ParkingRecord) sıralı ve
+limit kadar okunur, plaka aynı sorguda join edilir; dallar UNION ALL ile
+birleştirilip olay zamanına göre sıralanır ve limitlenir. Python tarafında
+ilişki yüklemesi (N+1) veya sıralama yapılmaz.
+
+Olaylar (olay zamanı, olay anahtarı) ile sıralanır; olay anahtarı kayıt ID'si
+* 2 (+1 çıkış için) olduğundan her olay için benzersizdir. Her öğe bu değerden
+oluşan opak bir cursor taşır: panel `cursor` ile en eski gördüğü olaydan daha
+eski olayları (en yeniden eskiye) ister. `since` ile yoklamada ise en son
+gördüğü olaydan yeni olaylar eskiden yeniye döner; iki yoklama arasında limitten
+fazla olay olduysa (ör. toplu olay aktarımı) has_more ile bildirilir ve panel
+son öğenin cursor'ıyla devam ederek arada kalan olayları atlamadan alır.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import String, literal, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from .history import decode_cursor, encode_cursor
+from .models import ParkingRecord, Vehicle
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+ENTRY = "entry"
+EXIT = "exit"
+
+
+def _branch(action: str, limit: int, parking_id: Optional[int] = None,
+            before: Optional[tuple] = None, after: Optional[tuple] = None, ascending: bool = False):
+    """Tek olay türünün en yeni (ascending ise en eski) `limit` olayını seçen dal"""
+    is_exit = action == EXIT
+    event_time = ParkingRecord.exit_time if is_exit else ParkingRecord.entry_time
+    event_key = ParkingRecord.id * 2 + (1 if is_exit else 0)
+    statement = (
+        select(event_time.label("event_time"),
+               event_key.label("event_key"),
+               literal(action, String).label("action"),
+               ParkingRecord.id.label("record_id"),
+               ParkingRecord.vehicle_id,
+               Vehicle.license_plate,
+               ParkingRecord.parking_id,
+               ParkingRecord.entry_time,
+               ParkingRecord.exit_time,
+               ParkingRecord.parking_fee)
+        .join(Vehicle, ParkingRecord.vehicle_id == Vehicle.id)
+    )
+    if is_exit:
+        statement = statement.where(ParkingRecord.exit_time != None)
+    if parking_id is not None:
+        statement = statement.where(ParkingRecord.parking_id == parking_id)
+    if before is not None:
+        statement = statement.where(tuple_(event_time, event_key) < tuple_(*before))
+    if after is not None:
+        statement = statement.where(tuple_(event_time, event_key) > tuple_(*after))
+    if ascending:
+        return statement.order_by(event_time, ParkingRecord.id).limit(limit)
+    return statement.order_by(event_time.desc(), ParkingRecord.id.desc()).limit(limit)
+
+
+def activity_feed_statement(limit: int = 20, parking_id: Optional[int] = None,
+                            cursor: Optional[str] = None, since: Optional[str] = None):
+    """
+    Giriş ve çıkış olaylarını tek sorguda döndüren ifade: en yeniden eskiye,
+    since verilmişse since'ten sonraki en eski olaylardan başlayarak eskiden yeniye.
+
+    Args:
+        cursor: Bu öğeden daha eski olaylar (sonraki sayfa)
+        since: Bu öğeden daha yeni olaylar (artımlı yoklama)
+
+    Raises:
+        ValueError: Cursor geçersizse
+    """
+    before = decode_cursor(cursor) if cursor else None
+    after = decode_cursor(since) if since else None
+    ascending = after is not None
+    entries = _branch(ENTRY, limit, parking_id, before, after, ascending).subquery("entries")
+    exits = _branch(EXIT, limit, parking_id, before, after, ascending).subquery("exits")
+    feed = union_all(select(entries), select(exits)).subquery("activities")
+    if ascending:
+        return select(feed).order_by(feed.c.event_time, feed.c.event_key).limit(limit)
+    return select(feed).order_by(feed.c.event_time.desc(), feed.c.event_key.desc()).limit(limit)
+
+
+def activity_to_dict(row) -> Dict[str, Any]:
+    """Akış satırını /recent-activities öğesine çevirir (mevcut yanıt biçimiyle aynı)"""
+    (event_time, event_key, action, record_id, vehicle_id, license_plate,
+     parking_id, entry_time, exit_time, parking_fee) = row
+    item = {
+        "vehicle_id": vehicle_id,
+        "license_plate": license_plate,
+        "action": action,
+        "entry_time": entry_time.isoformat(),
+    }
+    if action == EXIT:
+        # Park süresini hesapla (saat olarak); ücret kuruştan TL'ye çevrilir
+        duration = (exit_time - entry_time).total_seconds() / 3600
+        fee_tl = float(parking_fee) / 100.0 if parking_fee else 0
+        item.update({
+            "id": record_id,
+            "exit_time": exit_time.isoformat(),
+            "duration_hours": round(duration, 2),
+            "parking_fee": round(fee_tl, 2),
+            "message": f"Araç çıkışı: {license_plate}",
+        })
+    else:
+        # Kapanmış kaydın giriş olayı, çıkış olayıyla aynı ID'yi taşımasın
+        item["id"] = record_id if exit_time is None else f"{record_id}_entry"
+        item["message"] = f"Araç girişi: {license_plate}"
+    item["parking_id"] = parking_id or 1  # Default 1 olarak ayarla
+    item["cursor"] = encode_cursor(event_time, event_key)
+    return item
+
+
+def recent_activities(db: Session, limit: int = 20, parking_id: Optional[int] = None,
+                      cursor: Optional[str] = None, since: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Son giriş/çıkış olaylarını en yeniden eskiye (since verilmişse since'ten
+    sonraki olayları eskiden yeniye) döndürür (bkz. activity_feed_statement).
+
+    Raises:
+        ValueError: Cursor geçersizse
+    """
+    rows = db.execute(activity_feed_statement(limit, parking_id, cursor, since)).all()
+    return [activity_to_dict(row) for row in rows]
+
+
+def activities_since(db: Session, since: str, limit: int = 20,
+                     parking_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Yoklama: since'ten sonraki en eski `limit` olayı eskiden yeniye döndürür.
+
+    Returns:
+        {"items": [...], "has_more": daha yeni olay kaldı mı,
+         "next_cursor": sonraki yoklamada since olarak kullanılacak cursor
+         (yeni olay yoksa verilen since)}
+
+    Raises:
+        ValueError: Cursor geçersizse
+    """
+    # Bir fazla olay okunur; varsa arada kalan olaylar vardır
+    items = recent_activities(db, limit=limit + 1, parking_id=parking_id, since=since)
+    has_more = len(items) > limit
+    items = items[:limit]
+    return {"items": items, "has_more": has_more, "next_cursor": items[-1]["cursor"] if items else since}
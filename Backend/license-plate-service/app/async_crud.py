@@ -0,0 +1,176 @@
+"""
+Async endpoint'ler için CRUD işlemleri.
+
+Fonksiyonlar AsyncSession ile sorguları event loop'u bloklamadan çalıştırır;
+böylece plaka tanıma ve WebSocket yayınları veritabanı beklenirken devam eder.
+Async sürücü kurulu değilse (AsyncSessionLocal None) get_async_db senkron
+Session verir ve aynı fonksiyonlar app.crud karşılıklarını thread havuzunda
+çalıştırır. Dönen nesneler oturumdan bağımsız kullanılabilir (commit sonrası
+yeniden yükleme yapılmaz).
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import crud, models, schemas
+from .occupancy import occupancy
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+DbSession = Union[AsyncSession, Session]
+
+
+async def get_vehicle_by_license_plate(db: DbSession, license_plate: str) -> Optional[models.Vehicle]:
+    if not isinstance(db, AsyncSession):
+        return await run_in_threadpool(crud.get_vehicle_by_license_plate, db, license_plate)
+    result = await db.scalars(select(models.Vehicle).where(models.Vehicle.license_plate == license_plate).limit(1))
+    return result.first()
+
+
+async def get_parking_record(db: DbSession, record_id: int) -> Optional[models.ParkingRecord]:
+    if not isinstance(db, AsyncSession):
+        return await run_in_threadpool(crud.get_parking_record, db, record_id)
+    return await db.get(models.ParkingRecord, record_id)
+
+
+async def get_active_parking_record_by_vehicle(db: DbSession, vehicle_id: int,
+                                               parking_id: int = None) -> Optional[models.ParkingRecord]:
+    """
+    Aracın aktif park kaydını getirir (bkz. crud.get_active_parking_record_by_vehicle).
+    """
+    if not isinstance(db, AsyncSession):
+        return await run_in_threadpool(crud.get_active_parking_record_by_vehicle, db, vehicle_id, parking_id)
+    statement = select(models.ParkingRecord).where(
+        models.ParkingRecord.vehicle_id == vehicle_id,
+        models.ParkingRecord.is_active == True
+    )
+    if parking_id is not None:
+        statement = statement.where(models.ParkingRecord.parking_id == parking_id)
+    result = await db.scalars(statement.limit(1))
+    return result.first()
+
+
+async def register_entry(db: DbSession, license_plate: str,
+                         parking_id: int = 1) -> Tuple[models.Vehicle, models.ParkingRecord, bool]:
+    """
+    Araç girişini tek bir işlemde kaydeder (bkz. crud.register_entry).
+
+    Upsert ifadeleri lehçeye özgü olduğundan aynı uygulama async oturumda
+    run_sync ile çalıştırılır; sorgular yine async sürücü üzerinden gider.
+    """
+    if not isinstance(db, AsyncSession):
+        return await run_in_threadpool(crud.register_entry, db, license_plate, parking_id)
+    return await db.run_sync(crud.register_entry, license_plate, parking_id)
+
+
+async def apply_vehicle_events(db: DbSession, events: List[schemas.VehicleEvent], start_index: int = 0,
+                               rates: Optional[Dict[int, Optional[float]]] = None) -> List[Dict[str, Any]]:
+    """
+    Giriş/çıkış olaylarını tek bir işlemde uygular (bkz. crud.apply_vehicle_events).
+
+    Toplu upsert lehçeye özgü olduğundan okuma ve yazma adımları async oturumda
+    run_sync ile, yani event loop thread'inde çalışır. Bu yüzden run_sync
+    içinde yalnızca sorgular yapılır: ücretler (verilmemişse) önceden, olayların
+    işlenmesi (ücret hesabı) ve sonuçların oluşturulması ise aynı işlem açıkken
+    thread havuzunda yapılır.
+    """
+    if rates is None:
+        rates = await run_in_threadpool(crud.exit_parking_rates, events)
+    if not isinstance(db, AsyncSession):
+        return await run_in_threadpool(crud.apply_vehicle_events, db, events, start_index, rates)
+    try:
+        vehicle_ids, active = await db.run_sync(crud.load_vehicle_event_state, events)
+        plan = await run_in_threadpool(crud.plan_vehicle_events, events, vehicle_ids, active, rates)
+        await db.run_sync(crud.write_vehicle_events, plan)
+    except Exception as e:
+        logger.error(f"Toplu olaylar uygulanırken hata: {str(e)}")
+        await db.rollback()
+        raise
+
+    logger.info(f"Toplu olaylar uygulandı: {len(events)} olay, {len(plan.new_records)} yeni kayıt, {len(plan.closed)} kapatılan kayıt")
+    return await run_in_threadpool(crud.vehicle_event_results, plan, start_index)
+
+
+async def close_parking_record(db: DbSession, record_id: int, parking_id: int = 1,
+                               entry_time: Optional[datetime] = None) -> Optional[models.ParkingRecord]:
+    """
+    Park kaydını tek bir UPDATE ... RETURNING ile kapatır (bkz. crud.close_parking_record).
+
+    Ücret önbellekte yoksa otopark servisine senkron istek atılabileceğinden
+    ücret hesaplaması thread havuzunda yapılır.
+
+    Returns:
+        Kapatılan park kaydı; kayıt bulunamadıysa veya zaten kapatılmışsa None
+    """
+    if not isinstance(db, AsyncSession):
+        return await run_in_threadpool(crud.close_parking_record, db, record_id, parking_id, entry_time)
+    if not crud.supports_update_returning(db.sync_session):
+        return await _close_parking_record_fallback(db, record_id, parking_id)
+
+    logger.info(f"===> Park kaydı kapama başlatılıyor. Kayıt ID: {record_id}, Otopark ID: {parking_id}")
+    if entry_time is None:
+        db_record = await get_parking_record(db, record_id)
+        if not db_record or not db_record.is_active:
+            logger.warning(f"Kapatılacak aktif kayıt bulunamadı! ID: {record_id}")
+            return None
+        entry_time = db_record.entry_time
+
+    exit_time = crud.exit_time_for(entry_time)
+    fee = await run_in_threadpool(crud.parking_fee_for, entry_time, exit_time, parking_id)
+
+    try:
+        result = await db.scalars(crud.close_parking_record_statement(record_id, exit_time, fee),
+                                  execution_options={"populate_existing": True})
+        db_record = result.one_or_none()
+        if db_record is not None:
+            occupancy.stage(db, db_record.parking_id, -1)
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Kayıt kapatılırken hata: {str(e)}")
+        await db.rollback()
+        raise
+
+    if db_record is None:
+        logger.warning(f"Kayıt zaten kapatılmış veya bulunamadı (eşzamanlı çıkış olabilir)! ID: {record_id}")
+        return None
+
+    logger.info(f"✅ Park kaydı başarıyla kapatıldı. Kayıt ID: {db_record.id}, Ücret: {fee/100:.2f} TL")
+    return db_record
+
+
+async def _close_parking_record_fallback(db: AsyncSession, record_id: int,
+                                         parking_id: int = 1) -> Optional[models.ParkingRecord]:
+    """UPDATE ... RETURNING desteklemeyen veritabanları için okuyup güncelleyen kayıt kapatma"""
+    logger.info(f"===> Park kaydı kapama başlatılıyor. Kayıt ID: {record_id}, Otopark ID: {parking_id}")
+    db_record = await get_parking_record(db, record_id)
+    if not db_record:
+        logger.error(f"Kayıt bulunamadı! ID: {record_id}")
+        return None
+
+    if not db_record.is_active:
+        logger.warning(f"Kayıt zaten kapatılmış! ID: {record_id}")
+        return db_record
+
+    exit_time = crud.exit_time_for(db_record.entry_time)
+    fee = await run_in_threadpool(crud.parking_fee_for, db_record.entry_time, exit_time, parking_id)
+
+    db_record.exit_time = exit_time
+    db_record.is_active = False
+    db_record.parking_fee = fee
+    occupancy.stage(db, db_record.parking_id, -1)
+    try:
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Kayıt kapatılırken hata: {str(e)}")
+        await db.rollback()
+        raise
+
+    logger.info(f"✅ Park kaydı başarıyla kapatıldı. Kayıt ID: {db_record.id}, Ücret: {fee/100:.2f} TL")
+    return db_record
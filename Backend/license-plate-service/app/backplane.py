@@ -0,0 +1,394 @@
+"""
+Çok worker'lı WebSocket yayını için pub/sub backplane'i.
+
+Her worker sürecinin kendi ConnectionManager'ı ve yalnızca kendisine bağlı
+istemcileri vardır. Bir worker'da yayınlanan broadcast/fan-out olayı yerel
+istemcilere gönderilir ve backplane üzerinden diğer worker'lara iletilir; her
+worker aldığı olayı yalnızca kendi yerel istemcilerine gönderir. Kendi
+yayınladığı olay worker'a geri dönmez (origin ile filtrelenir).
+
+WS_BACKPLANE_URL ile seçilir:
+    memory://                          Tek süreç (varsayılan); diğer worker'lara iletim yok
+    redis://redis:6379/0               Redis pub/sub (çok worker ve çok sunucu; redis paketi gerekir)
+    unix:///tmp/license-plate-ws.sock  Unix soket broker'ı (aynı makinedeki worker'lar)
+
+Unix soket broker'ı ayrı bir süreç olarak çalıştırılabilir
+(python -m app.backplane /tmp/license-plate-ws.sock) ya da worker'lardan ilki
+tarafından otomatik olarak barındırılır; barındıran worker kapanırsa diğerleri
+yeniden bağlanırken broker'ı devralır.
+"""
+
+import os
+import sys
+import json
+import uuid
+import socket
+import struct
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from urllib.parse import urlparse
+
+from .config import WS_BACKPLANE_URL, WS_BACKPLANE_CHANNEL
+from .monitoring import WS_BACKPLANE_MESSAGES
+from .websocket import encode_message
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # İsteğe bağlı; yalnızca redis:// backplane'i için gerekir
+    aioredis = None
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Unix soket çerçevesi: 4 baytlık uzunluk + JSON gövde
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+RECONNECT_DELAY_SECONDS = (0.1, 2.0)  # İlk ve en uzun yeniden bağlanma beklemesi
+DEFAULT_SOCKET_PATH = "/tmp/license-plate-ws.sock"
+
+
+class Backplane:
+    """Worker'lar arası olay iletimi için temel sınıf (tek süreç: iletim yok)"""
+
+    name = "memory"
+
+    def __init__(self):
+        # Bu worker'ın yayınlarını tanımak için benzersiz kimlik
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handler: Optional[Handler] = None
+        self.published = 0
+        self.received = 0
+        self.failed = 0
+
+    async def start(self, handler: Handler) -> None:
+        """Diğer worker'lardan gelen olaylar için handler'ı kaydeder ve dinlemeye başlar"""
+        self._handler = handler
+
+    async def stop(self) -> None:
+        self._handler = None
+
+    async def publish(self, envelope: Dict[str, Any]) -> bool:
+        """
+        Olayı diğer worker'lara iletir.
+
+        Returns:
+            Olay en az bir taşıyıcıya aktarıldıysa True
+        """
+        data = encode_message({**envelope, "origin": self.origin}).encode("utf-8")
+        try:
+            sent = await self._send(data)
+        except Exception as e:
+            self.failed += 1
+            WS_BACKPLANE_MESSAGES.labels(backplane=self.name, direction="failed").inc()
+            logger.error(f"Backplane'e olay gönderilemedi ({self.name}): {str(e)}")
+            return False
+        if sent:
+            self.published += 1
+            WS_BACKPLANE_MESSAGES.labels(backplane=self.name, direction="published").inc()
+        return sent
+
+    async def _send(self, data: bytes) -> bool:
+        return False
+
+    async def _receive(self, data: bytes) -> None:
+        """Gelen olayı çözer ve kendi yayınımız değilse handler'a verir"""
+        try:
+            envelope = json.loads(data)
+        except ValueError:
+            logger.warning(f"Backplane'den geçersiz olay alındı ({self.name})")
+            return
+        if envelope.get("origin") == self.origin or self._handler is None:
+            return
+        self.received += 1
+        WS_BACKPLANE_MESSAGES.labels(backplane=self.name, direction="received").inc()
+        try:
+            await self._handler(envelope)
+        except Exception as e:
+            logger.error(f"Backplane olayı işlenirken hata ({self.name}): {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backplane": self.name,
+            "origin": self.origin,
+            "published": self.published,
+            "received": self.received,
+            "failed": self.failed,
+        }
+
+
+class InMemoryBackplane(Backplane):
+    """
+    Aynı süreçteki backplane'ler arasında iletim. Tek worker için varsayılandır;
+    hub paylaşılarak birden fazla ConnectionManager birbirine bağlanabilir.
+    """
+
+    def __init__(self, hub: Optional[Set["InMemoryBackplane"]] = None):
+        super().__init__()
+        self.hub: Set[InMemoryBackplane] = hub if hub is not None else set()
+
+    async def start(self, handler: Handler) -> None:
+        await super().start(handler)
+        self.hub.add(self)
+
+    async def stop(self) -> None:
+        self.hub.discard(self)
+        await super().stop()
+
+    async def _send(self, data: bytes) -> bool:
+        peers = [peer for peer in self.hub if peer is not self]
+        for peer in peers:
+            await peer._receive(data)
+        return bool(peers)
+
+
+class RedisBackplane(Backplane):
+    """Redis pub/sub üzerinden iletim (worker'lar farklı sunucularda olabilir)"""
+
+    name = "redis"
+
+    def __init__(self, url: str, channel: str = WS_BACKPLANE_CHANNEL):
+        if aioredis is None:
+            raise RuntimeError("redis:// backplane'i için redis paketi kurulu değil (pip install redis)")
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self._client = None
+        self._pubsub = None
+        self._task: Optional["asyncio.Task"] = None
+
+    async def start(self, handler: Handler) -> None:
+        await super().start(handler)
+        self._client = aioredis.from_url(self.url)
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen())
+        logger.info(f"Redis backplane'i başlatıldı: kanal={self.channel}")
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") == "message":
+                        await self._receive(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis backplane'i dinlenirken hata: {str(e)}")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS[1])
+
+    async def _send(self, data: bytes) -> bool:
+        # Dönen abone sayısı bu worker'ı da içerir
+        return await self._client.publish(self.channel, data) > 1
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.close()
+            self._pubsub = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+        await super().stop()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ConnectionError(f"Çerçeve çok büyük: {length} bayt")
+    return await reader.readexactly(length)
+
+
+class UnixSocketBroker:
+    """Her çerçeveyi gönderen dışındaki tüm bağlı worker'lara ileten Unix soket sunucusu"""
+
+    def __init__(self, path: str, max_buffer: int = 4 * 1024 * 1024):
+        self.path = path
+        self.max_buffer = max_buffer  # Bu kadar okunmamış veri biriken worker bağlantısı kesilir
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        logger.info(f"WebSocket backplane broker'ı başlatıldı: {self.path}")
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                payload = await _read_frame(reader)
+                frame = FRAME_HEADER.pack(len(payload)) + payload
+                for peer in list(self._writers):
+                    if peer is writer:
+                        continue
+                    if peer.transport.get_write_buffer_size() > self.max_buffer:
+                        logger.warning("Backplane broker'ı: okumayan worker bağlantısı kesildi")
+                        self._writers.discard(peer)
+                        peer.close()
+                        continue
+                    peer.write(frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+class UnixSocketBackplane(Backplane):
+    """Aynı makinedeki worker'lar arasında Unix soket broker'ı üzerinden iletim"""
+
+    name = "unix"
+
+    def __init__(self, path: str, host_broker: bool = True):
+        super().__init__()
+        self.path = path
+        self.host_broker = host_broker  # Broker yoksa bu worker barındırır
+        self.broker: Optional[UnixSocketBroker] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional["asyncio.Task"] = None
+        self._connected: Optional[asyncio.Event] = None
+
+    async def start(self, handler: Handler) -> None:
+        await super().start(handler)
+        self._connected = asyncio.Event()
+        reader = await self._connect()
+        self._task = asyncio.create_task(self._run(reader))
+
+    async def _connect(self) -> asyncio.StreamReader:
+        try:
+            reader, self._writer = await asyncio.open_unix_connection(self.path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not self.host_broker:
+                raise
+            await self._host_broker()
+            reader, self._writer = await asyncio.open_unix_connection(self.path)
+        self._connected.set()
+        logger.info(f"Unix soket backplane'ine bağlanıldı: {self.path}")
+        return reader
+
+    async def _host_broker(self) -> None:
+        """Broker'ı bu süreçte başlatır; dosya kilidi aynı anda iki worker'ın başlatmasını önler"""
+        import fcntl
+
+        with open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Kilidi beklerken başka bir worker broker'ı başlatmış olabilir
+                _, writer = await asyncio.open_unix_connection(self.path)
+                writer.close()
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                pass
+            try:
+                os.unlink(self.path)  # Kapanmış broker'dan kalan soket dosyası
+            except FileNotFoundError:
+                pass
+            self.broker = UnixSocketBroker(self.path)
+            await self.broker.start()
+
+    async def _run(self, reader: asyncio.StreamReader) -> None:
+        delay = RECONNECT_DELAY_SECONDS[0]
+        while True:
+            try:
+                while True:
+                    await self._receive(await _read_frame(reader))
+            except asyncio.CancelledError:
+                raise
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                logger.warning(f"Unix soket backplane bağlantısı koptu: {str(e) or type(e).__name__}")
+            self._connected.clear()
+            self._writer = None
+            while True:
+                await asyncio.sleep(delay)
+                try:
+                    reader = await self._connect()
+                    delay = RECONNECT_DELAY_SECONDS[0]
+                    break
+                except OSError as e:
+                    logger.warning(f"Unix soket backplane'ine yeniden bağlanılamadı: {str(e)}")
+                    delay = min(delay * 2, RECONNECT_DELAY_SECONDS[1])
+
+    async def _send(self, data: bytes) -> bool:
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            raise ConnectionError("Unix soket backplane'ine bağlı değil")
+        writer.write(FRAME_HEADER.pack(len(data)) + data)
+        await writer.drain()
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.broker is not None:
+            await self.broker.stop()
+            self.broker = None
+        await super().stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "path": self.path,
+            "connected": self._connected is not None and self._connected.is_set(),
+            "hosting_broker": self.broker is not None,
+        }
+
+
+def create_backplane(url: str = WS_BACKPLANE_URL) -> Backplane:
+    """WS_BACKPLANE_URL şemasına göre backplane oluşturur"""
+    parsed = urlparse(url)
+    if parsed.scheme in ("", "memory"):
+        return InMemoryBackplane()
+    if parsed.scheme in ("redis", "rediss"):
+        return RedisBackplane(url)
+    if parsed.scheme == "unix":
+        return UnixSocketBackplane(parsed.path)
+    raise ValueError(f"Geçersiz WebSocket backplane adresi: {url} (memory://, redis:// veya unix://)")
+
+
+async def _serve(path: str) -> None:
+    broker = UnixSocketBroker(path)
+    await broker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.stop()
+
+
+if __name__ == "__main__":
+    # Ayrı süreç olarak broker: python -m app.backplane /tmp/license-plate-ws.sock
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(sys.argv[1] if len(sys.argv) > 1 else urlparse(WS_BACKPLANE_URL).path or DEFAULT_SOCKET_PATH))
+    except KeyboardInterrupt:
+        pass
@@ -3,6 +3,7 @@ Uygulama konfigürasyon ayarları
 """
 
 import os
+import json
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 
@@ -25,6 +26,18 @@ else:
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     print(f"Bileşenlerden oluşturulan DATABASE_URL: {DATABASE_URL}")
 
+# Veritabanı bağlantı havuzu ayarları
+# Her uvicorn worker'ı kendi havuzunu açar: en fazla bağlantı = worker sayısı * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# Async motor açıldığında bu bütçe senkron ve async motor arasında paylaştırılır (bkz. ASYNC_DB_POOL_SHARE)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))  # Havuzda sürekli açık tutulan bağlantı sayısı
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))  # Yoğunlukta pool_size üzerine açılabilecek geçici bağlantı sayısı
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # Boş bağlantı için en fazla bekleme süresi (saniye)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Bu süreden eski bağlantılar yenilenir (saniye, -1: kapalı)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() in ("true", "1", "t")  # Kopmuş bağlantıları kullanmadan önce tespit et
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))  # PostgreSQL statement_timeout (0: kapalı)
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "True").lower() in ("true", "1", "t")  # Async endpoint'lerde AsyncSession kullan (asyncpg/aiosqlite gerekir)
+ASYNC_DB_POOL_SHARE = float(os.getenv("ASYNC_DB_POOL_SHARE", "0.5"))  # Havuz bütçesinden async motora ayrılan pay (0-1)
+
 # RabbitMQ bağlantı bilgileri
 RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
 RABBITMQ_PORT = os.getenv("RABBITMQ_PORT", "5672")
@@ -54,6 +67,108 @@ MODEL_DIR = os.getenv("MODEL_DIR", "./app/model")
 USE_GPU = os.getenv("USE_GPU", "False").lower() in ("true", "1", "t")
 DEVICE = "cuda" if USE_GPU else "cpu"
 
+def _json_env(name: str, default: Any) -> Any:
+    """JSON biçimindeki çevre değişkenini okur; geçersizse varsayılanı döndürür"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return json.loads(value)
+    except ValueError:
+        print(f"UYARI: {name} geçerli bir JSON değil, varsayılan kullanılıyor")
+        return default
+
+# Araç tespit modu: full (araç + plaka), plate_only (yalnızca plaka),
+# lazy (araç tespiti yalnızca birden fazla plaka bulunduğunda)
+DETECTION_MODE = os.getenv("DETECTION_MODE", "full")
+# Otopark bazında tespit modu, ör. '{"1": "plate_only", "2": "lazy"}'
+DETECTION_MODE_BY_PARKING: Dict[str, str] = _json_env("DETECTION_MODE_BY_PARKING", {})
+
+# Dedektör girişinin en uzun kenarı (0: küçültme yapılmaz)
+INFERENCE_MAX_SIZE = int(os.getenv("INFERENCE_MAX_SIZE", "640"))
+# Küçültülmüş çözülen karede plaka kırpıntısı bu genişlikten (piksel) darsa OCR için
+# görüntü tam çözünürlükte yeniden çözülür
+INGEST_OCR_MIN_WIDTH = int(os.getenv("INGEST_OCR_MIN_WIDTH", "200"))
+# Otopark veya kapı bazında şerit bölgesi, ör. '{"1": {"box": [0.2, 0.4, 0.8, 1.0]}, "1:exit": {"polygon": [[100, 400], ...]}}'
+# "<otopark>:<kapı>" anahtarı kapının kamerası için kullanılır; kapı tanımı yoksa otoparkın ROI'sine düşülür
+ROI_BY_PARKING: Dict[str, Dict[str, Any]] = _json_env("ROI_BY_PARKING", {})
+
+# OCR kaskad ayarları
+# Denenecek ön işleme varyantları (başlangıç sırası; uyarlamalı modda geçmiş isabet oranına göre yeniden sıralanır)
+OCR_CASCADE_VARIANTS = [v.strip() for v in os.getenv(
+    "OCR_CASCADE_VARIANTS", "gray,thresh_neg,thresh_pos,adaptive,equalized"
+).split(",") if v.strip()]
+OCR_CASCADE_ADAPTIVE = os.getenv("OCR_CASCADE_ADAPTIVE", "True").lower() in ("true", "1", "t")
+OCR_EARLY_EXIT_CONFIDENCE = float(os.getenv("OCR_EARLY_EXIT_CONFIDENCE", "0.6"))  # Türk plaka formatında bu güvenin üstü yeterli
+OCR_MIN_TEXT_CONFIDENCE = float(os.getenv("OCR_MIN_TEXT_CONFIDENCE", "0.3"))  # Bu değerin altındaki metin parçaları yok sayılır
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "16"))  # Toplu OCR'da tanıma modeline tek seferde verilen metin kutusu sayısı
+OCR_LEGACY_FALLBACK = os.getenv("OCR_LEGACY_FALLBACK", "True").lower() in ("true", "1", "t")  # Hiç metin okunamazsa eski okuyucuyu dene
+
+# Mikro-toplu çıkarım zamanlayıcısı ayarları
+INFERENCE_SCHEDULER_ENABLED = os.getenv("INFERENCE_SCHEDULER_ENABLED", "True").lower() in ("true", "1", "t")
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "15"))  # İlk istekten sonra toplu iş için beklenen süre
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))  # Bu sayıya ulaşınca beklemeden çalıştır
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "32"))  # Bu kadar istek beklerken yenileri 429 ile reddedilir
+
+# Parking Management Service ve ücret önbelleği ayarları
+PARKING_MANAGEMENT_SERVICE_URL = os.getenv("PARKING_MANAGEMENT_SERVICE_URL", "http://parking-management-service:8081")
+PARKING_SERVICE_TIMEOUT_SECONDS = float(os.getenv("PARKING_SERVICE_TIMEOUT_SECONDS", "2"))  # Çıkışta servis bu süreden uzun beklenmez
+PARKING_SERVICE_POOL_SIZE = int(os.getenv("PARKING_SERVICE_POOL_SIZE", "10"))  # Yeniden kullanılan HTTP bağlantı sayısı
+PARKING_RATE_TTL_SECONDS = float(os.getenv("PARKING_RATE_TTL_SECONDS", "300"))  # Ücret bu süre boyunca servise sorulmadan kullanılır
+PARKING_RATE_STALE_SECONDS = float(os.getenv("PARKING_RATE_STALE_SECONDS", "3600"))  # TTL sonrası eski ücret arka planda yenilenirken bu süre daha kullanılır
+PARKING_RATE_PRELOAD = os.getenv("PARKING_RATE_PRELOAD", "True").lower() in ("true", "1", "t")  # Açılışta tüm otoparkların ücretlerini yükle
+
+# Tekrarlanan kareler için tanıma sonucu önbelleği
+# Varsayılan olarak kapalı: yanlış eşleşme çıkışta başka aracın kaydını kapatır
+RECOGNITION_CACHE_ENABLED = os.getenv("RECOGNITION_CACHE_ENABLED", "False").lower() in ("true", "1", "t")
+RECOGNITION_CACHE_SIZE = int(os.getenv("RECOGNITION_CACHE_SIZE", "256"))  # En fazla saklanan sonuç sayısı (LRU)
+RECOGNITION_CACHE_TTL_SECONDS = float(os.getenv("RECOGNITION_CACHE_TTL_SECONDS", "5"))  # Sonuç bu süreden sonra yeniden tanınır
+RECOGNITION_CACHE_MAX_DISTANCE = int(os.getenv("RECOGNITION_CACHE_MAX_DISTANCE", "0"))  # 64 bitlik kare dHash'inde kabul edilen en fazla farklı bit
+RECOGNITION_CACHE_PLATE_MAX_CHANGE = float(os.getenv("RECOGNITION_CACHE_PLATE_MAX_CHANGE", "0.005"))  # Plaka kırpıntısında belirgin değişen piksel oranı bunu aşarsa önbellek kullanılmaz
+
+# WebSocket bildirimleri için uygulama içi olay kuyruğu
+EVENT_BUS_MAX_PENDING = int(os.getenv("EVENT_BUS_MAX_PENDING", "10000"))  # Teslim bekleyen en fazla olay sayısı
+EVENT_BUS_BATCH_SIZE = int(os.getenv("EVENT_BUS_BATCH_SIZE", "100"))  # Tüketicinin tek uyanışta teslim ettiği en fazla olay
+EVENT_BUS_OVERFLOW_POLICY = os.getenv("EVENT_BUS_OVERFLOW_POLICY", "drop_oldest")  # Kuyruk doluysa: drop_oldest veya drop_new
+
+# WebSocket istemci başına giden mesaj kuyruğu
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))  # İstemci başına bekleyen en fazla mesaj
+WS_SEND_OVERFLOW_POLICY = os.getenv("WS_SEND_OVERFLOW_POLICY", "drop_oldest")  # Kuyruk doluysa: drop_oldest, coalesce veya disconnect
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))  # Tek gönderim bu süreyi aşarsa istemci çıkarılır
+
+# WebSocket canlılık kontrolü (istemciler ping mesajı gönderir)
+WS_PING_TIMEOUT_SECONDS = float(os.getenv("WS_PING_TIMEOUT_SECONDS", "90"))  # Bu süre mesaj/ping gelmezse istemci çıkarılır (0: kapalı)
+WS_SWEEP_INTERVAL_SECONDS = float(os.getenv("WS_SWEEP_INTERVAL_SECONDS", "15"))  # Süresi dolan bağlantıları tarama aralığı
+
+# Çok worker'lı WebSocket yayını (her worker yalnızca kendi istemcilerine gönderir)
+WS_BACKPLANE_URL = os.getenv("WS_BACKPLANE_URL", "memory://")  # memory://, redis://redis:6379/0 veya unix:///tmp/license-plate-ws.sock
+WS_BACKPLANE_CHANNEL = os.getenv("WS_BACKPLANE_CHANNEL", "license-plate-ws")  # Redis pub/sub kanalı
+
+# Toplu giriş/çıkış olayları (/vehicle/events:batch)
+VEHICLE_EVENT_BATCH_MAX_EVENTS = int(os.getenv("VEHICLE_EVENT_BATCH_MAX_EVENTS", "10000"))  # Tek istekte kabul edilen en fazla olay
+VEHICLE_EVENT_BATCH_CHUNK_SIZE = int(os.getenv("VEHICLE_EVENT_BATCH_CHUNK_SIZE", "500"))  # Tek veritabanı işleminde uygulanan en fazla olay
+
+# Park kayıtları geçmişi (/parking-records, /parking-records/export)
+HISTORY_PAGE_MAX_LIMIT = int(os.getenv("HISTORY_PAGE_MAX_LIMIT", "1000"))  # Tek sayfada dönebilecek en fazla kayıt
+HISTORY_EXPORT_YIELD_PER = int(os.getenv("HISTORY_EXPORT_YIELD_PER", "1000"))  # Dışa aktarmada sunucu tarafı cursor'dan tek seferde okunan satır
+
+# Otopark doluluk sayaçları (/occupancy)
+OCCUPANCY_SUMMARY_TABLE = os.getenv("OCCUPANCY_SUMMARY_TABLE", "False").lower() in ("true", "1", "t")  # Sayılar parking_occupancy tablosunda da tutulur (çok worker'lı kurulumlar için)
+OCCUPANCY_RESYNC_SECONDS = float(os.getenv("OCCUPANCY_RESYNC_SECONDS", "30"))  # Bellekteki sayıların veritabanıyla eşitlenme aralığı (0: kapalı)
+
+# Plaka tanıma süreç havuzu (0: tanıma API sürecindeki bir thread'de yapılır)
+RECOGNITION_WORKERS = int(os.getenv("RECOGNITION_WORKERS", "0"))
+RECOGNITION_POOL_START_METHOD = os.getenv("RECOGNITION_POOL_START_METHOD", "spawn")  # torch/OpenCV fork ile güvenli değil
+
+# Debug görüntü kaydı ayarları (varsayılan olarak kapalı)
+DEBUG_CAPTURE_ENABLED = os.getenv("DEBUG_CAPTURE_ENABLED", "False").lower() in ("true", "1", "t")
+DEBUG_CAPTURE_DIR = os.getenv("DEBUG_CAPTURE_DIR", "./debug_plates")
+DEBUG_CAPTURE_SAMPLE_RATE = int(os.getenv("DEBUG_CAPTURE_SAMPLE_RATE", "100"))  # Her N istekten biri
+DEBUG_CAPTURE_LOW_CONFIDENCE = float(os.getenv("DEBUG_CAPTURE_LOW_CONFIDENCE", "0.5"))  # Bu değerin altındaki okumalar her zaman kaydedilir
+DEBUG_CAPTURE_QUEUE_SIZE = int(os.getenv("DEBUG_CAPTURE_QUEUE_SIZE", "64"))
+DEBUG_CAPTURE_MAX_MB = int(os.getenv("DEBUG_CAPTURE_MAX_MB", "200"))
+DEBUG_CAPTURE_MAX_AGE_HOURS = float(os.getenv("DEBUG_CAPTURE_MAX_AGE_HOURS", "24"))
+
 # Log ayarları
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
@@ -66,5 +181,6 @@ if DEBUG:
     print(f"API: {API_HOST}:{API_PORT}")
     print(f"Model Dizini: {MODEL_DIR}")
     print(f"Cihaz: {DEVICE}")
+    print(f"Debug görüntü kaydı: {'açık' if DEBUG_CAPTURE_ENABLED else 'kapalı'} ({DEBUG_CAPTURE_DIR})")
     print(f"Log Seviyesi: {LOG_LEVEL}")
     print("======================") 
\ No newline at end of file
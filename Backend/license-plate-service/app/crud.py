@@ -1,10 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from datetime import datetime
-from typing import List, Optional
-import requests
-import os
+from sqlalchemy import and_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 from . import models, schemas
+from .occupancy import occupancy
+from .parking_rates import rate_cache
 import logging
 
 # Vehicle CRUD operations
@@ -76,13 +77,101 @@ def get_parking_records(db: Session, skip: int = 0, limit: int = 100):
 def create_parking_record(db: Session, parking_record: schemas.ParkingRecordCreate):
     db_record = models.ParkingRecord(**parking_record.dict())
     db.add(db_record)
+    occupancy.stage(db, db_record.parking_id, 1)
     db.commit()
     db.refresh(db_record)
     return db_record
 
+def register_entry(db: Session, license_plate: str, parking_id: int = 1) -> Tuple[models.Vehicle, models.ParkingRecord, bool]:
+    """
+    Araç girişini tek bir işlemde kaydeder.
+
+    PostgreSQL ve SQLite'ta araç `INSERT ... ON CONFLICT DO UPDATE ... RETURNING`
+    ile upsert edilir, park kaydı ise "aracın otoparktaki tek aktif kaydı" kısmi
+    benzersiz indeksine karşı `ON CONFLICT DO NOTHING ... RETURNING` ile eklenir;
+    önce okuyup sonra yazmaya gerek kalmaz ve eşzamanlı girişlerde çift kayıt
+    oluşmaz. Diğer veritabanlarında mevcut CRUD fonksiyonlarına geri dönülür.
+
+    Args:
+        db: Veritabanı oturumu
+        license_plate: Plaka
+        parking_id: Otopark ID'si
+
+    Returns:
+        (araç, park kaydı, yeni kayıt oluşturuldu mu); araç zaten bu otoparkta
+        park halindeyse mevcut aktif kayıt ve False döner. Nesneler oturumdan
+        ayrılmış (detached) olarak döner.
+    """
+    insert = _upsert_insert(db)
+    if insert is None:
+        return _register_entry_fallback(db, license_plate, parking_id)
+
+    try:
+        vehicle_stmt = (
+            insert(models.Vehicle)
+            .values(license_plate=license_plate)
+            .on_conflict_do_update(index_elements=[models.Vehicle.license_plate],
+                                   set_={"license_plate": license_plate})
+            .returning(models.Vehicle)
+        )
+        db_vehicle = db.scalars(vehicle_stmt, execution_options={"populate_existing": True}).one()
+
+        record_stmt = (
+            insert(models.ParkingRecord)
+            .values(vehicle_id=db_vehicle.id, parking_id=parking_id, is_active=True)
+            .on_conflict_do_nothing(index_elements=[models.ParkingRecord.vehicle_id, models.ParkingRecord.parking_id],
+                                    index_where=(models.ParkingRecord.is_active == True))
+            .returning(models.ParkingRecord)
+        )
+        db_record = db.scalars(record_stmt).one_or_none()
+        created = db_record is not None
+        if not created:
+            # Çakışma: araç zaten bu otoparkta park halinde
+            db_record = db.scalars(
+                select(models.ParkingRecord).where(
+                    models.ParkingRecord.vehicle_id == db_vehicle.id,
+                    models.ParkingRecord.parking_id == parking_id,
+                    models.ParkingRecord.is_active == True,
+                )
+            ).first()
+        # RETURNING ile gelen değerler yeterli; commit sonrası nesneler yeniden
+        # yüklenmesin (her biri ek bir SELECT olurdu) diye oturumdan ayrılır
+        db.expunge(db_vehicle)
+        if db_record is not None:
+            db.expunge(db_record)
+        if created:
+            occupancy.stage(db, parking_id, 1)
+        db.commit()
+        return db_vehicle, db_record, created
+    except Exception:
+        db.rollback()
+        raise
+
+def _upsert_insert(db: Session):
+    """ON CONFLICT destekleyen lehçenin insert yapısı (PostgreSQL, SQLite); diğerlerinde None"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+def _register_entry_fallback(db: Session, license_plate: str, parking_id: int) -> Tuple[models.Vehicle, models.ParkingRecord, bool]:
+    """ON CONFLICT desteklemeyen veritabanları için okuyup yazan giriş kaydı"""
+    db_vehicle = get_vehicle_by_license_plate(db, license_plate)
+    if not db_vehicle:
+        db_vehicle = create_vehicle(db, schemas.VehicleCreate(license_plate=license_plate))
+    active_record = get_active_parking_record_by_vehicle(db, db_vehicle.id, parking_id)
+    if active_record:
+        return db_vehicle, active_record, False
+    new_record = create_parking_record(db, schemas.ParkingRecordCreate(vehicle_id=db_vehicle.id, parking_id=parking_id))
+    return db_vehicle, new_record, True
+
 def update_parking_record(db: Session, record_id: int, parking_record: schemas.ParkingRecordUpdate):
     db_record = get_parking_record(db, record_id)
     if db_record:
+        if db_record.is_active:
+            occupancy.stage(db, db_record.parking_id, -1)
         for key, value in parking_record.dict().items():
             setattr(db_record, key, value)
         db_record.is_active = False  # Çıkış yapıldığında aktif değil
@@ -90,16 +179,19 @@ def update_parking_record(db: Session, record_id: int, parking_record: schemas.P
         db.refresh(db_record)
     return db_record
 
-def calculate_parking_fee(entry_time: datetime, exit_time: datetime, parking_id: int = 1) -> int:
+def calculate_parking_fee(entry_time: datetime, exit_time: datetime, parking_id: int = 1,
+                          hourly_rate: Optional[float] = None) -> int:
     """
     Park süresine göre ücret hesaplar (kuruş cinsinden)
     
-    Parking Management Service'ten ilgili otoparkın ücret bilgisini çeker.
+    İlgili otoparkın ücret bilgisini ücret önbelleğinden alır (bkz. parking_rates);
+    önbellekte yoksa Parking Management Service'ten çeker.
     
     Args:
         entry_time: Giriş zamanı
         exit_time: Çıkış zamanı
         parking_id: Otopark ID'si
+        hourly_rate: Önceden alınmış saatlik ücret (TL); verilirse önbelleğe/servise bakılmaz
         
     Returns:
         Hesaplanan ücret (kuruş cinsinden, int)
@@ -121,40 +213,9 @@ def calculate_parking_fee(entry_time: datetime, exit_time: datetime, parking_id:
             exit_time = pytz.UTC.localize(exit_time)
             logger.info(f"Çıkış zamanı timezone'a lokalize edildi: {exit_time}")
     
-    # API ile ücret bilgisini çek
-    logger.info(f"Otopark (ID={parking_id}) için API üzerinden ücret bilgisi çekiliyor...")
-    
-    # Parking Management Service'ten ücret bilgisini çek
-    parking_service_url = os.getenv("PARKING_MANAGEMENT_SERVICE_URL", "http://parking-management-service:8081")
-    
-    # Docker compose için kontrol etmeye gerek yok, varsayılan olarak doğru URL'yi kullanacak
-    logger.info(f"Kullanılacak otopark servisi URL: {parking_service_url}")
-    
-    # Saatlik ücret bilgisini al (TL/saat)
-    hourly_rate = None
-    
-    try:
-        response = requests.get(f"{parking_service_url}/api/parkings/{parking_id}")
-        logger.info(f"API yanıtı - Status: {response.status_code}")
-        
-        if response.status_code == 200:
-            parking_data = response.json()
-            
-            if "rate" in parking_data and parking_data["rate"] is not None:
-                try:
-                    hourly_rate = float(parking_data["rate"])  # String olarak gelirse float'a çevir
-                    logger.info(f"API'den alınan ücret: {hourly_rate} TL/saat")
-                except (ValueError, TypeError) as e:
-                    logger.error(f"Rate değeri float'a çevrilemedi: {str(e)}")
-                    hourly_rate = None
-            else:
-                logger.warning(f"API yanıtında 'rate' alanı bulunamadı/null.")
-        else:
-            # Servis erişilemiyorsa hata ver
-            logger.error(f"Otopark servisi erişilemedi. Status code: {response.status_code}")
-    except Exception as e:
-        # Hata durumda bildir
-        logger.error(f"Parking service error: {str(e)}")
+    # Saatlik ücret bilgisini al (TL/saat); önbellekte yoksa Parking Management Service'ten çekilir
+    if hourly_rate is None:
+        hourly_rate = rate_cache.get_rate(parking_id)
     
     # Eğer API'den ücret alınamadıysa, hata ver
     if hourly_rate is None:
@@ -184,19 +245,111 @@ def calculate_parking_fee(entry_time: datetime, exit_time: datetime, parking_id:
     logger.info(f"Döndürülen ücret: {final_fee} kuruş ({final_fee/100:.2f} TL)")
     return final_fee
 
-def close_parking_record(db: Session, record_id: int, parking_id: int = 1):
+def exit_time_for(entry_time: datetime) -> datetime:
+    """
+    Çıkış zamanını giriş zamanıyla uyumlu olarak oluşturur: entry_time timezone
+    bilgisi içeriyorsa UTC, içermiyorsa timezone'suz yerel zaman döner.
+    """
+    if entry_time.tzinfo is not None:
+        import pytz
+        exit_time = datetime.now(pytz.UTC)
+        logging.getLogger(__name__).info(f"entry_time timezone bilgisi içeriyor, exit_time de aynı timezone kullanacak: {exit_time}")
+        return exit_time
+    return datetime.now()
+
+def supports_update_returning(db: Session) -> bool:
+    """Kayıt kapatma tek bir UPDATE ... RETURNING ifadesiyle yapılabilir mi (PostgreSQL, SQLite 3.35+)"""
+    dialect = db.get_bind().dialect
+    return dialect.name in ("postgresql", "sqlite") and dialect.update_returning is True
+
+def close_parking_record_statement(record_id: int, exit_time: datetime, fee: int):
+    """
+    Aktif park kaydını kapatan ifade: yalnızca kayıt hâlâ aktifse günceller ve
+    güncellenen satırı döndürür. Aynı araç için eşzamanlı iki çıkıştan yalnızca
+    biri satırı günceller; diğeri satır bulamaz.
+    """
+    return (
+        update(models.ParkingRecord)
+        .where(models.ParkingRecord.id == record_id, models.ParkingRecord.is_active == True)
+        .values(exit_time=exit_time, is_active=False, parking_fee=fee)
+        .returning(models.ParkingRecord)
+    )
+
+def parking_fee_for(entry_time: datetime, exit_time: datetime, parking_id: int) -> int:
+    """Ücreti hesaplar; ücret bilgisi alınamazsa işlemi iptal eden ValueError fırlatır"""
+    logger = logging.getLogger(__name__)
+    try:
+        # Ücret hesaplama - ücret önbelleğinden (gerekirse API'den) alınır
+        fee = calculate_parking_fee(entry_time, exit_time, parking_id)
+        logger.info(f"Hesaplanan ücret: {fee/100:.2f} TL ({fee} kuruş)")
+        return fee
+    except ValueError as e:
+        # API'den ücret alamadıysak hatayı göster ve işlemi durdur
+        logger.error(f"Ücret hesaplanamadı: {str(e)}")
+        raise ValueError(f"Otopark ID={parking_id} için ücret bilgisi alınamadı. İşlem iptal edildi.")
+
+def close_parking_record(db: Session, record_id: int, parking_id: int = 1,
+                         entry_time: Optional[datetime] = None) -> Optional[models.ParkingRecord]:
     """
     Park kaydını kapatır ve park ücretini hesaplar.
-    
+
+    PostgreSQL ve SQLite'ta kayıt tek bir `UPDATE ... WHERE id=? AND is_active
+    RETURNING` ifadesiyle kapatılır: ücret ücret önbelleğindeki saatlik ücretle
+    önceden hesaplanır, kaydı yeniden okuma/commit sonrası yenileme gerekmez ve
+    eşzamanlı iki çıkış aynı kaydı iki kez kapatamaz. Diğer veritabanlarında
+    kayıt okunup ORM üzerinden güncellenir.
+
     Args:
         db: Database session
         record_id: Kapatılacak park kaydı ID'si
         parking_id: Otopark ID'si (ücret hesaplama için)
-        
+        entry_time: Kaydın giriş zamanı (çağıran aktif kaydı zaten okuduysa;
+            verilmezse kayıt okunur)
+
     Returns:
-        Kapatılan park kaydı veya None (hata durumunda)
+        Kapatılan park kaydı (oturumdan ayrılmış); kayıt bulunamadıysa veya
+        zaten kapatılmışsa (ör. eşzamanlı bir çıkış tarafından) None
     """
     logger = logging.getLogger(__name__)
+
+    if not supports_update_returning(db):
+        return _close_parking_record_fallback(db, record_id, parking_id)
+
+    logger.info(f"===> Park kaydı kapama başlatılıyor. Kayıt ID: {record_id}, Otopark ID: {parking_id}")
+
+    if entry_time is None:
+        db_record = get_parking_record(db, record_id)
+        if not db_record or not db_record.is_active:
+            logger.warning(f"Kapatılacak aktif kayıt bulunamadı! ID: {record_id}")
+            return None
+        entry_time = db_record.entry_time
+
+    exit_time = exit_time_for(entry_time)
+    fee = parking_fee_for(entry_time, exit_time, parking_id)
+
+    try:
+        db_record = db.scalars(close_parking_record_statement(record_id, exit_time, fee),
+                               execution_options={"populate_existing": True}).one_or_none()
+        # RETURNING ile gelen değerler yeterli; commit sonrası yeniden yüklenmesin
+        if db_record is not None:
+            db.expunge(db_record)
+            occupancy.stage(db, db_record.parking_id, -1)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Kayıt kapatılırken hata: {str(e)}")
+        db.rollback()
+        raise
+
+    if db_record is None:
+        logger.warning(f"Kayıt zaten kapatılmış veya bulunamadı (eşzamanlı çıkış olabilir)! ID: {record_id}")
+        return None
+
+    logger.info(f"✅ Park kaydı başarıyla kapatıldı. Kayıt ID: {db_record.id}, Ücret: {fee/100:.2f} TL")
+    return db_record
+
+def _close_parking_record_fallback(db: Session, record_id: int, parking_id: int = 1):
+    """UPDATE ... RETURNING desteklemeyen veritabanları için okuyup güncelleyen kayıt kapatma"""
+    logger = logging.getLogger(__name__)
     
     logger.info(f"===> Park kaydı kapama başlatılıyor. Kayıt ID: {record_id}, Otopark ID: {parking_id}")
     
@@ -212,28 +365,15 @@ def close_parking_record(db: Session, record_id: int, parking_id: int = 1):
         return db_record
     
     try:
-        # Timezone bilgisi içermeyen bir datetime nesnesi oluştur
-        exit_time = datetime.now()
-        
-        # Eğer entry_time timezone bilgisi içeriyorsa, exit_time'ı da timezone bilgisiyle oluştur
-        if db_record.entry_time.tzinfo is not None:
-            import pytz
-            exit_time = datetime.now(pytz.UTC)
-            logger.info(f"entry_time timezone bilgisi içeriyor, exit_time de aynı timezone kullanacak: {exit_time}")
+        exit_time = exit_time_for(db_record.entry_time)
             
-        try:
-            # Ücret hesaplama - API'den otomatik olarak doğru ücreti alır
-            fee = calculate_parking_fee(db_record.entry_time, exit_time, parking_id)
-            logger.info(f"Hesaplanan ücret: {fee/100:.2f} TL ({fee} kuruş)")
-        except ValueError as e:
-            # API'den ücret alamadıysak hatayı göster ve işlemi durdur
-            logger.error(f"Ücret hesaplanamadı: {str(e)}")
-            raise ValueError(f"Otopark ID={parking_id} için ücret bilgisi alınamadı. İşlem iptal edildi.")
+        fee = parking_fee_for(db_record.entry_time, exit_time, parking_id)
         
         # Veritabanını güncelle
         db_record.exit_time = exit_time
         db_record.is_active = False
         db_record.parking_fee = fee
+        occupancy.stage(db, db_record.parking_id, -1)
         
         # Database güncellemesini logla
         logger.info(f"Veritabanı güncellemesi: exit_time={exit_time}, is_active=False, parking_fee={fee}")
@@ -258,4 +398,232 @@ def close_parking_record(db: Session, record_id: int, parking_id: int = 1):
         raise
     
     logger.info(f"===> Park kaydı kapama tamamlandı. Kayıt ID: {record_id}")
-    return db_record 
\ No newline at end of file
+    return db_record 
+# Toplu giriş/çıkış olayları
+VEHICLE_EVENT_MESSAGES = {
+    "entered": "Araç girişi kaydedildi",
+    "already_parked": "Araç zaten bu otoparkta park halinde",
+    "exited": "Araç çıkışı kaydedildi",
+    "no_active_record": "Bu araca ait aktif park kaydı bulunamadı",
+    "invalid_timestamp": "Çıkış zamanı giriş zamanından önce",
+    "fee_unavailable": "Otopark için ücret bilgisi alınamadı",
+    "invalid": "Plaka bilgisi gereklidir",
+    "failed": "Olay uygulanamadı",
+}
+
+class _OpenRecord:
+    """Toplu olay uygulamasında veritabanında zaten açık olan park kaydının bellekteki karşılığı"""
+    __slots__ = ("id", "entry_time", "exit_time", "parking_fee")
+
+    def __init__(self, record_id: int, entry_time: datetime):
+        self.id = record_id
+        self.entry_time = entry_time
+        self.exit_time = None
+        self.parking_fee = None
+
+def _as_utc(value: datetime) -> datetime:
+    """Karşılaştırma için timezone'suz zamanı UTC kabul eder (bkz. calculate_parking_fee)"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def vehicle_event_result(index: int, event: schemas.VehicleEvent, status: str, record=None,
+                         exit_time: Optional[datetime] = None, parking_fee: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Toplu olay sonucunu oluşturur; ücret TL cinsinden döner.
+
+    Kayıt sonraki olaylarla değişebileceğinden çıkış zamanı ve ücret (kuruş)
+    olayın sonucu belirlendiği andaki değerleriyle verilir; kayıttan yalnızca
+    ID ve giriş zamanı okunur.
+    """
+    result = {
+        "index": index,
+        "event_id": event.event_id,
+        "type": event.type,
+        "license_plate": event.license_plate,
+        "parking_id": event.parking_id,
+        "success": status in ("entered", "exited"),
+        "status": status,
+        "message": f"{VEHICLE_EVENT_MESSAGES[status]}: {event.license_plate}",
+    }
+    if record is not None:
+        result["parking_record_id"] = record.id
+        result["entry_time"] = record.entry_time.isoformat()
+        if exit_time is not None:
+            duration = (_as_utc(exit_time) - _as_utc(record.entry_time)).total_seconds() / 3600
+            result["exit_time"] = exit_time.isoformat()
+            result["duration_hours"] = round(duration, 2)
+            result["parking_fee"] = round(parking_fee / 100.0, 2)
+    return result
+
+def _upsert_vehicles(db: Session, plates: List[str]) -> Dict[str, int]:
+    """Plakaları tek bir çok satırlı upsert ile ekler; plaka -> araç ID'si döndürür"""
+    if not plates:
+        return {}
+    insert = _upsert_insert(db)
+    if insert is not None:
+        db.execute(
+            insert(models.Vehicle)
+            .values([{"license_plate": plate} for plate in plates])
+            .on_conflict_do_nothing(index_elements=[models.Vehicle.license_plate])
+        )
+    else:
+        existing = set(db.scalars(select(models.Vehicle.license_plate).where(models.Vehicle.license_plate.in_(plates))))
+        db.add_all([models.Vehicle(license_plate=plate) for plate in plates if plate not in existing])
+        db.flush()
+    rows = db.execute(select(models.Vehicle.license_plate, models.Vehicle.id).where(models.Vehicle.license_plate.in_(plates)))
+    return {plate: vehicle_id for plate, vehicle_id in rows}
+
+def exit_parking_rates(events: List[schemas.VehicleEvent]) -> Dict[int, Optional[float]]:
+    """
+    Çıkış olaylarındaki otoparkların saatlik ücretlerini otopark başına bir kez
+    alır (önbellekte yoksa servis çağrılır; event loop dışında çağrılmalıdır).
+    Alınamayan ücretler None olur.
+    """
+    parking_ids = sorted({event.parking_id for event in events if event.type == "exit"})
+    return {parking_id: rate_cache.get_rate(parking_id) for parking_id in parking_ids}
+
+class VehicleEventPlan(NamedTuple):
+    """Toplu olayların bellekte işlenmiş hali (bkz. plan_vehicle_events)"""
+    outcomes: List[Tuple[schemas.VehicleEvent, str, Optional[_OpenRecord], Optional[datetime], Optional[int]]]
+    new_records: List[Tuple[models.ParkingRecord, _OpenRecord]]
+    closed: List[Dict[str, Any]]
+    occupancy_deltas: Dict[int, int]
+
+def load_vehicle_event_state(db: Session, events: List[schemas.VehicleEvent]) -> Tuple[Dict[str, int], Dict[Tuple[int, int], _OpenRecord]]:
+    """
+    Olaylardaki araçları tek bir çok satırlı upsert ile ekler ve aktif kayıtlarını
+    tek sorguda okur (PostgreSQL'de satırlar işlem sonuna kadar kilitlenir).
+
+    Returns:
+        (plaka -> araç ID'si, (araç ID'si, otopark ID'si) -> açık kayıt)
+    """
+    plates = sorted({event.license_plate for event in events if event.license_plate})
+    vehicle_ids = _upsert_vehicles(db, plates)
+    active = {}
+    if vehicle_ids:
+        rows = db.execute(
+            select(models.ParkingRecord.id, models.ParkingRecord.vehicle_id,
+                   models.ParkingRecord.parking_id, models.ParkingRecord.entry_time)
+            .where(models.ParkingRecord.vehicle_id.in_(list(vehicle_ids.values())),
+                   models.ParkingRecord.is_active == True)
+            .with_for_update()
+        )
+        active = {(row.vehicle_id, row.parking_id): _OpenRecord(row.id, row.entry_time) for row in rows}
+    return vehicle_ids, active
+
+def plan_vehicle_events(events: List[schemas.VehicleEvent], vehicle_ids: Dict[str, int],
+                        active: Dict[Tuple[int, int], _OpenRecord],
+                        rates: Dict[int, Optional[float]]) -> VehicleEventPlan:
+    """
+    Olayları bellekte sırayla işler; veritabanına ve ücret servisine dokunmaz.
+
+    Ücret hesabı ve kayıt nesnelerinin oluşturulması burada yapıldığından async
+    yolda event loop dışında (thread havuzunda) çalıştırılır. Aynı olay
+    listesinde giren ve çıkan aracın kaydı doğrudan kapalı olarak eklenir.
+    """
+    outcomes = []
+    new_records = []
+    created = {}  # (araç, otopark) -> bu listede eklenen ve henüz kapanmamış kayıt
+    closed = []
+    deltas = {}
+    for event in events:
+        if not event.license_plate:
+            outcomes.append((event, "invalid", None, None, None))
+            continue
+        key = (vehicle_ids[event.license_plate], event.parking_id)
+        record = active.get(key)
+
+        if event.type == "entry":
+            if record is not None:
+                outcomes.append((event, "already_parked", record, None, None))
+                continue
+            record = _OpenRecord(None, event.timestamp)  # ID'si yazıldıktan sonra atanır
+            created[key] = models.ParkingRecord(vehicle_id=key[0], parking_id=event.parking_id,
+                                                entry_time=event.timestamp, is_active=True)
+            new_records.append((created[key], record))
+            active[key] = record
+            deltas[event.parking_id] = deltas.get(event.parking_id, 0) + 1
+            outcomes.append((event, "entered", record, None, None))
+            continue
+
+        if record is None:
+            outcomes.append((event, "no_active_record", None, None, None))
+            continue
+        if _as_utc(event.timestamp) < _as_utc(record.entry_time):
+            outcomes.append((event, "invalid_timestamp", record, None, None))
+            continue
+        hourly_rate = rates.get(event.parking_id)
+        if hourly_rate is None:
+            outcomes.append((event, "fee_unavailable", record, None, None))
+            continue
+        fee = calculate_parking_fee(record.entry_time, event.timestamp, event.parking_id, hourly_rate=hourly_rate)
+
+        new_record = created.pop(key, None)
+        if new_record is not None:
+            new_record.exit_time = event.timestamp
+            new_record.parking_fee = fee
+            new_record.is_active = False
+        else:
+            closed.append({"id": record.id, "exit_time": event.timestamp, "is_active": False, "parking_fee": fee})
+        del active[key]
+        deltas[event.parking_id] = deltas.get(event.parking_id, 0) - 1
+        outcomes.append((event, "exited", record, event.timestamp, fee))
+    return VehicleEventPlan(outcomes, new_records, closed, deltas)
+
+def write_vehicle_events(db: Session, plan: VehicleEventPlan) -> None:
+    """
+    Planı yazar ve işlemi commit eder: yeni kayıtlar toplu INSERT, kapanan
+    mevcut kayıtlar birincil anahtara göre toplu UPDATE ile. Yeni kayıtların
+    ID'leri sonuçlarda kullanılmak üzere plandaki kayıtlara aktarılır.
+    """
+    if plan.new_records:
+        db.add_all([record for record, _ in plan.new_records])
+        db.flush()
+        for record, open_record in plan.new_records:
+            open_record.id = record.id
+    if plan.closed:
+        db.execute(update(models.ParkingRecord), plan.closed)
+    for parking_id, delta in plan.occupancy_deltas.items():
+        occupancy.stage(db, parking_id, delta)
+    db.commit()
+
+def vehicle_event_results(plan: VehicleEventPlan, start_index: int = 0) -> List[Dict[str, Any]]:
+    """Plandaki olay çıktılarından sonuç sözlüklerini oluşturur (bkz. vehicle_event_result)"""
+    return [vehicle_event_result(start_index + offset, event, status, record, exit_time, fee)
+            for offset, (event, status, record, exit_time, fee) in enumerate(plan.outcomes)]
+
+def apply_vehicle_events(db: Session, events: List[schemas.VehicleEvent], start_index: int = 0,
+                         rates: Optional[Dict[int, Optional[float]]] = None) -> List[Dict[str, Any]]:
+    """
+    Bariyerde biriken giriş/çıkış olaylarını sırasıyla ve tek bir işlemde uygular.
+
+    Araçlar ve aktif kayıtları okunur (load_vehicle_event_state), olaylar
+    bellekte sırayla işlenir (plan_vehicle_events) ve değişiklikler toplu olarak
+    yazılır (write_vehicle_events). Giriş/çıkış zamanı olarak olayın istemci
+    zamanı kullanılır. Çıkış olayları aracın olaydaki otoparktaki aktif kaydını
+    kapatır.
+
+    Args:
+        db: Veritabanı oturumu
+        events: Gerçekleşme sırasına göre olaylar
+        start_index: Sonuçlardaki ilk olayın isteğin içindeki sırası
+        rates: Otopark ID'si -> saatlik ücret (bkz. exit_parking_rates); verilirse
+            ücret için servis çağrılmaz, ücreti olmayan otoparktaki çıkışlar
+            fee_unavailable olur. Verilmezse ücretler burada alınır.
+
+    Returns:
+        Olaylarla aynı sırada sonuç sözlükleri (bkz. vehicle_event_result)
+    """
+    logger = logging.getLogger(__name__)
+    if rates is None:
+        rates = exit_parking_rates(events)
+    try:
+        vehicle_ids, active = load_vehicle_event_state(db, events)
+        plan = plan_vehicle_events(events, vehicle_ids, active, rates)
+        write_vehicle_events(db, plan)
+    except Exception as e:
+        logger.error(f"Toplu olaylar uygulanırken hata: {str(e)}")
+        db.rollback()
+        raise
+
+    logger.info(f"Toplu olaylar uygulandı: {len(events)} olay, {len(plan.new_records)} yeni kayıt, {len(plan.closed)} kapatılan kayıt")
+    return vehicle_event_results(plan, start_index)
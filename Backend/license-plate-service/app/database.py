@@ -1,23 +1,226 @@
+"""
+Veritabanı motoru, oturum fabrikası ve bağlantı havuzu metrikleri.
+
+Servisteki tüm veritabanı erişimi buradaki tek motoru (engine) kullanır. Havuz
+ayarları ortam değişkenleriyle yapılandırılır (bkz. config.DB_POOL_*); her
+uvicorn worker'ı kendi havuzunu açtığından veritabanına açılabilecek en fazla
+bağlantı sayısı worker sayısı * (DB_POOL_SIZE + DB_MAX_OVERFLOW) olur.
+
+Async endpoint'ler için aynı veritabanına asyncpg (PostgreSQL) veya aiosqlite
+(SQLite) sürücüsüyle bir async motor da açılır (AsyncSessionLocal). İki motor
+ayrı havuz kullanır ama bağlantı bütçesi ortaktır: DB_POOL_SIZE ve
+DB_MAX_OVERFLOW, ASYNC_DB_POOL_SHARE oranında async motora, kalanı senkron
+motora ayrılır (her motora en az bir kalıcı bağlantı). Böylece yukarıdaki
+formül iki motorun toplamı için geçerlidir. Sürücü kurulu değilse veya
+ASYNC_DB_ENABLED kapalıysa AsyncSessionLocal None olur, bütçenin tamamı
+senkron motorda kalır ve async CRUD fonksiyonları senkron oturumu thread
+havuzunda kullanır.
+
+Her iki havuzun bağlantı alma süresi, kullanımdaki ve taşma (overflow)
+bağlantı sayıları Prometheus'a engine etiketiyle (sync, async) aktarılır.
+"""
+
+import time
+import logging
+import importlib.util
+from typing import Any, Dict, Optional, Tuple
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
-# .env dosyasını yükle (Docker ortamında zaten çevre değişkenleri ayarlanmış olacak)
-load_dotenv()
+from .config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS, ASYNC_DB_ENABLED, ASYNC_DB_POOL_SHARE
+)
+from .monitoring import (
+    DB_POOL_CHECKOUT_SECONDS, DB_POOL_CHECKOUT_TIMEOUTS, DB_POOL_IN_USE, DB_POOL_OVERFLOW, DB_POOL_SIZE_GAUGE
+)
 
-# Veritabanı URL'sini al
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
 
-# Veritabanı URL'si yoksa ve PostgreSQL çalışmıyorsa SQLite kullan
-if not DATABASE_URL:
-    DATABASE_URL = "sqlite:///./license_plate.db"
-    print(f"UYARI: DATABASE_URL bulunamadı, varsayılan SQLite veritabanı kullanılıyor: {DATABASE_URL}")
-else:
-    print(f"Veritabanı bağlantısı: {DATABASE_URL}")
+# Veritabanı türüne göre async sürücü
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """Bağlantı alma süresini, zaman aşımlarını ve havuz doluluğunu ölçen QueuePool"""
+
+    # Metriklerdeki engine etiketi
+    metric_label = "sync"
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(engine=self.metric_label).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(engine=self.metric_label).observe(time.perf_counter() - started_at)
+        self._update_gauges()
+        return connection
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        DB_POOL_IN_USE.labels(engine=self.metric_label).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(engine=self.metric_label).set(max(self.overflow(), 0))
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Async motor için aynı metrikleri toplayan AsyncAdaptedQueuePool"""
+
+    metric_label = "async"
+
+
+def split_pool_budget(async_share: float, pool_size: int = DB_POOL_SIZE,
+                      max_overflow: int = DB_MAX_OVERFLOW) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    Worker başına bağlantı bütçesini senkron ve async motor arasında paylaştırır.
+
+    Her motora en az bir kalıcı bağlantı kalır (pool_size=0 havuzu sınırsız
+    yapar); async_share 0 ise bütçenin tamamı senkron motora verilir.
+
+    Returns:
+        (senkron motor, async motor) için {"pool_size", "max_overflow"}
+    """
+    if async_share <= 0:
+        return {"pool_size": pool_size, "max_overflow": max_overflow}, {"pool_size": 0, "max_overflow": 0}
+    async_share = min(async_share, 1.0)
+    async_size = min(max(round(pool_size * async_share), 1), max(pool_size - 1, 1))
+    async_overflow = round(max_overflow * async_share)
+    return (
+        {"pool_size": max(pool_size - async_size, 1), "max_overflow": max_overflow - async_overflow},
+        {"pool_size": async_size, "max_overflow": async_overflow},
+    )
+
+
+def _pool_options(url: str, poolclass: type, budget: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    """Senkron ve async motorun ortak havuz ayarları (SQLite'ta uygulanmaz)"""
+    if url.startswith("sqlite"):
+        return {}
+    budget = budget or {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+    return {
+        "poolclass": poolclass,
+        "pool_size": budget["pool_size"],
+        "max_overflow": budget["max_overflow"],
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
 
-# Engine oluştur
-engine = create_engine(DATABASE_URL)
+
+def _record_pool_size(db_engine: Engine) -> None:
+    if isinstance(db_engine.pool, InstrumentedQueuePool):
+        DB_POOL_SIZE_GAUGE.labels(engine=db_engine.pool.metric_label).set(db_engine.pool.size())
+
+
+def create_db_engine(url: str = DATABASE_URL, budget: Optional[Dict[str, int]] = None, **overrides: Any) -> Engine:
+    """
+    Yapılandırılmış bağlantı havuzuyla veritabanı motoru oluşturur.
+
+    SQLite'ta havuz ayarları ve ifade zaman aşımı uygulanmaz (gerekirse
+    overrides ile verilebilir).
+
+    Args:
+        url: Veritabanı URL'si
+        budget: {"pool_size", "max_overflow"} (bkz. split_pool_budget); verilmezse DB_POOL_SIZE/DB_MAX_OVERFLOW
+        **overrides: create_engine'e iletilecek ek/öncelikli argümanlar
+    """
+    options = _pool_options(url, InstrumentedQueuePool, budget)
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    elif DB_STATEMENT_TIMEOUT_MS > 0 and url.startswith("postgresql"):
+        # Uzun süren sorgular bağlantıyı (ve havuzu) kilitlemesin
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    options.update(overrides)
+    db_engine = create_engine(url, **options)
+    _record_pool_size(db_engine)
+    return db_engine
+
+
+def async_database_url(url: str = DATABASE_URL) -> Optional[str]:
+    """
+    Senkron veritabanı URL'sini async sürücülü URL'ye çevirir.
+
+    Returns:
+        Async URL veya sürücü desteklenmiyor/kurulu değilse None
+    """
+    sync_url = make_url(url)
+    backend = sync_url.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None or importlib.util.find_spec(driver) is None:
+        return None
+    return sync_url.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str = DATABASE_URL, budget: Optional[Dict[str, int]] = None,
+                           **overrides: Any) -> Optional[AsyncEngine]:
+    """
+    Senkron motorla aynı havuz ayarlarını ve metrikleri kullanan async motor oluşturur.
+
+    Args:
+        url: Senkron veritabanı URL'si (sürücü otomatik seçilir)
+        budget: {"pool_size", "max_overflow"} (bkz. split_pool_budget); verilmezse DB_POOL_SIZE/DB_MAX_OVERFLOW
+        **overrides: create_async_engine'e iletilecek ek/öncelikli argümanlar
+
+    Returns:
+        Async motor veya async sürücü kullanılamıyorsa None
+    """
+    async_url = async_database_url(url)
+    if async_url is None:
+        return None
+
+    options = _pool_options(url, InstrumentedAsyncAdaptedQueuePool, budget)
+    if DB_STATEMENT_TIMEOUT_MS > 0 and url.startswith("postgresql"):
+        # asyncpg sunucu ayarlarını server_settings ile iletir
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    options.update(overrides)
+    async_db_engine = create_async_engine(async_url, **options)
+    _record_pool_size(async_db_engine.sync_engine)
+    return async_db_engine
+
+
+def pool_status(db_engine: Optional[Engine] = None) -> Dict[str, Any]:
+    """Bağlantı havuzunun anlık durumu (/health için)"""
+    pool = (db_engine or engine).pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "idle": pool.checkedin(),
+    }
+
+
+# Async motor açılacaksa bağlantı bütçesi iki motor arasında paylaştırılır
+_async_enabled = ASYNC_DB_ENABLED and async_database_url() is not None
+sync_pool_budget, async_pool_budget = split_pool_budget(ASYNC_DB_POOL_SHARE if _async_enabled else 0.0)
+
+# Servis genelinde paylaşılan motor ve oturum fabrikası
+engine = create_db_engine(budget=sync_pool_budget)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+logger.info(f"Veritabanı motoru oluşturuldu: {engine.url.render_as_string(hide_password=True)}")
+
+# Async endpoint'ler için motor ve oturum fabrikası (async sürücü yoksa None).
+# Commit sonrası nesneler yeniden yüklenmez; async oturumda tembel yükleme yapılamaz.
+async_engine = create_async_db_engine(budget=async_pool_budget) if _async_enabled else None
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine is not None else None
+)
+if async_engine is not None:
+    logger.info(f"Async veritabanı motoru oluşturuldu: {async_engine.url.render_as_string(hide_password=True)}")
+else:
+    logger.info("Async veritabanı sürücüsü kullanılamıyor, async CRUD işlemleri thread havuzunda çalışacak")
@@ -0,0 +1,229 @@
+"""
+WebSocket bildirimleri için uygulama içi olay kuyruğu (event bus).
+
+Endpoint'ler ve thread havuzundaki kod bildirimleri publish() ile yayınlar;
+publish() thread-safe'tir ve olayı loop.call_soon_threadsafe ile ana event
+loop'taki kuyruğa aktarır. Hiçbir zaman yeni bir event loop oluşturulmaz ve
+sahipsiz görev (create_task) başlatılmaz. Ana loop'taki tek tüketici görev
+bekleyen olayları toplu olarak alır ve yayınlanma sırasıyla ConnectionManager'a
+teslim eder.
+
+Kuyruk EVENT_BUS_MAX_PENDING ile sınırlıdır; dolduğunda EVENT_BUS_OVERFLOW_POLICY
+uygulanır (drop_oldest: en eski olay düşer, drop_new: yeni olay reddedilir).
+coalesce_key verilen olaylar, aynı anahtarlı teslim edilmemiş olay varsa onun
+yerine geçer (ör. bariyerde bekleyen aracın tekrarlanan "zaten park halinde"
+bildirimleri). Teslim gecikmesi, kuyruk derinliği ve düşen olaylar
+Prometheus'a aktarılır.
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from .config import EVENT_BUS_MAX_PENDING, EVENT_BUS_BATCH_SIZE, EVENT_BUS_OVERFLOW_POLICY
+from .monitoring import EVENT_BUS_EVENTS, EVENT_BUS_QUEUE_DEPTH, EVENT_BUS_DELIVERY_LAG
+from .websocket import ConnectionManager, RoomType, manager
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_new")
+
+
+# Olay türleri (ConnectionManager'daki gönderim yöntemine karşılık gelir)
+class EventKind:
+    VEHICLE_UPDATE = "vehicle_update"  # send_vehicle_update
+    PARKING_RECORD_UPDATE = "parking_record_update"  # send_parking_record_update
+    PARKING_UPDATE = "parking_update"  # send_parking_update
+    BROADCAST = "broadcast"  # broadcast(data, room_type)
+
+
+class Event:
+    __slots__ = ("kind", "data", "room_type", "coalesce_key", "published_at")
+
+    def __init__(self, kind: str, data: Dict[str, Any], room_type: str, coalesce_key: Optional[str],
+                 published_at: float):
+        self.kind = kind
+        self.data = data
+        self.room_type = room_type
+        self.coalesce_key = coalesce_key
+        self.published_at = published_at
+
+
+class EventBus:
+    """Bildirimleri ana event loop'ta sırayla ve toplu olarak teslim eden sınırlı kuyruk"""
+
+    def __init__(self,
+                 connection_manager: ConnectionManager = manager,
+                 max_pending: int = EVENT_BUS_MAX_PENDING,
+                 batch_size: int = EVENT_BUS_BATCH_SIZE,
+                 overflow_policy: str = EVENT_BUS_OVERFLOW_POLICY):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Geçersiz taşma politikası: {overflow_policy} (seçenekler: {', '.join(OVERFLOW_POLICIES)})")
+        self.manager = connection_manager
+        self.max_pending = max(max_pending, 1)
+        self.batch_size = max(batch_size, 1)
+        self.overflow_policy = overflow_policy
+        self._pending: Deque[Event] = deque()
+        self._by_key: Dict[str, Event] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task"] = None
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Tüketici görevini mevcut event loop üzerinde başlatır"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Olay kuyruğu başlatıldı: en fazla {self.max_pending} olay, politika={self.overflow_policy}")
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Bekleyen olayları en fazla drain_timeout saniye teslim etmeye çalışır, sonra durur"""
+        if self._task is None:
+            return
+        if self._pending:
+            deadline = time.monotonic() + drain_timeout
+            while self._pending and time.monotonic() < deadline and not self._task.done():
+                await asyncio.sleep(0.01)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+        if self._pending:
+            logger.warning(f"Olay kuyruğu durduruldu, {len(self._pending)} olay teslim edilemedi")
+            self._drop(len(self._pending))
+            self._pending.clear()
+            self._by_key.clear()
+        EVENT_BUS_QUEUE_DEPTH.set(0)
+
+    def publish(self, kind: str, data: Dict[str, Any], room_type: str = RoomType.ALL,
+                coalesce_key: Optional[str] = None) -> bool:
+        """
+        Bildirim olayı yayınlar. Herhangi bir thread'den çağrılabilir.
+
+        Args:
+            kind: Olay türü (EventKind)
+            data: Gönderilecek veri
+            room_type: EventKind.BROADCAST için hedef oda türü
+            coalesce_key: Aynı anahtarlı teslim edilmemiş olay varsa onunla birleştir
+
+        Returns:
+            Olay kuyruğa aktarıldıysa True; kuyruk çalışmıyorsa False
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            logger.debug(f"Olay kuyruğu çalışmıyor, olay düşürüldü: {kind}")
+            self._drop()
+            return False
+
+        event = Event(kind, data, room_type, coalesce_key, time.monotonic())
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            self._enqueue(event)
+        else:
+            loop.call_soon_threadsafe(self._enqueue, event)
+        return True
+
+    def _enqueue(self, event: Event) -> None:
+        """Olayı kuyruğa ekler (yalnızca event loop thread'inde çalışır)"""
+        self.published += 1
+        EVENT_BUS_EVENTS.labels(result="published").inc()
+
+        if event.coalesce_key is not None:
+            pending = self._by_key.get(event.coalesce_key)
+            if pending is not None:
+                # Sıradaki yeri ve ilk yayın zamanı korunur, içerik güncellenir
+                pending.data = event.data
+                pending.room_type = event.room_type
+                self.coalesced += 1
+                EVENT_BUS_EVENTS.labels(result="coalesced").inc()
+                return
+
+        if len(self._pending) >= self.max_pending:
+            if self.overflow_policy == "drop_new":
+                self._drop()
+                return
+            oldest = self._pending.popleft()
+            self._forget(oldest)
+            self._drop()
+
+        self._pending.append(event)
+        if event.coalesce_key is not None:
+            self._by_key[event.coalesce_key] = event
+        EVENT_BUS_QUEUE_DEPTH.set(len(self._pending))
+        self._wakeup.set()
+
+    def _forget(self, event: Event) -> None:
+        if event.coalesce_key is not None and self._by_key.get(event.coalesce_key) is event:
+            del self._by_key[event.coalesce_key]
+
+    def _drop(self, count: int = 1) -> None:
+        self.dropped += count
+        EVENT_BUS_EVENTS.labels(result="dropped").inc(count)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                for event in batch:
+                    self._forget(event)
+                EVENT_BUS_QUEUE_DEPTH.set(len(self._pending))
+                for event in batch:
+                    await self._deliver(event)
+
+    async def _deliver(self, event: Event) -> None:
+        try:
+            if event.kind == EventKind.VEHICLE_UPDATE:
+                await self.manager.send_vehicle_update(event.data)
+            elif event.kind == EventKind.PARKING_RECORD_UPDATE:
+                await self.manager.send_parking_record_update(event.data)
+            elif event.kind == EventKind.PARKING_UPDATE:
+                await self.manager.send_parking_update(event.data)
+            else:
+                await self.manager.broadcast(event.data, event.room_type)
+        except Exception as e:
+            self.failed += 1
+            EVENT_BUS_EVENTS.labels(result="failed").inc()
+            logger.error(f"Bildirim teslim edilemedi ({event.kind}): {str(e)}")
+            return
+        self.delivered += 1
+        EVENT_BUS_EVENTS.labels(result="delivered").inc()
+        EVENT_BUS_DELIVERY_LAG.observe(time.monotonic() - event.published_at)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "overflow_policy": self.overflow_policy,
+            "published": self.published,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+# Global olay kuyruğu örneği
+event_bus = EventBus()
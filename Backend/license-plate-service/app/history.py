@@ -0,0 +1,211 @@
+"""
+Park kayıtları geçmişi: keyset sayfalama ve akışlı dışa aktarma.
+
+Listeleme OFFSET yerine önceki sayfanın son satırının (entry_time, id) değerinden
+devam eder; her sayfa ix_parking_records_entry_time_id (otopark filtresinde
+ix_parking_records_parking_entry_time_id) indeksinde doğrudan konumlandığından
+sayfa ilerledikçe yavaşlamaz ve sayfalar arasında eklenen kayıtlar satırların
+kaymasına yol açmaz. Cursor istemci için opak bir metindir.
+
+Dışa aktarma satırları sunucu tarafı cursor'dan (yield_per) HISTORY_EXPORT_YIELD_PER
+satırlık gruplar halinde okur ve NDJSON veya CSV olarak parça parça üretir;
+bellek kullanımı kayıt sayısından bağımsızdır.
+"""
+
+import io
+import csv
+import json
+import base64
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from .config import HISTORY_EXPORT_YIELD_PER
+from .models import ParkingRecord, Vehicle
+from .monitoring import HISTORY_EXPORT_ROWS
+
+try:
+    import orjson
+except ImportError:  # İsteğe bağlı; yoksa standart json kullanılır
+    orjson = None
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+# Dışa aktarılan alanlar (CSV başlığı ve NDJSON anahtarları)
+EXPORT_FIELDS = ["id", "vehicle_id", "license_plate", "parking_id", "entry_time", "exit_time",
+                 "is_active", "duration_hours", "parking_fee"]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def encode_cursor(entry_time: datetime, record_id: int) -> str:
+    """Sayfanın son satırından opak cursor oluşturur"""
+    raw = f"{entry_time.isoformat()}|{record_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Cursor'ı (entry_time, id) değerine çevirir.
+
+    Raises:
+        ValueError: Cursor geçersizse
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        entry_time, record_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(entry_time), int(record_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Geçersiz cursor: {cursor}") from e
+
+
+def records_statement(parking_id: Optional[int] = None,
+                      start: Optional[datetime] = None,
+                      end: Optional[datetime] = None,
+                      active: Optional[bool] = None):
+    """
+    Park kayıtlarını plakasıyla birlikte seçen sorgu (yalnızca dışa aktarılan
+    sütunlar; ORM nesnesi oluşturulmaz). start dahil, end hariç giriş zamanı aralığı.
+    """
+    statement = (
+        select(ParkingRecord.id, ParkingRecord.vehicle_id, Vehicle.license_plate, ParkingRecord.parking_id,
+               ParkingRecord.entry_time, ParkingRecord.exit_time, ParkingRecord.is_active,
+               ParkingRecord.parking_fee)
+        .join(Vehicle, ParkingRecord.vehicle_id == Vehicle.id)
+    )
+    if parking_id is not None:
+        statement = statement.where(ParkingRecord.parking_id == parking_id)
+    if start is not None:
+        statement = statement.where(ParkingRecord.entry_time >= start)
+    if end is not None:
+        statement = statement.where(ParkingRecord.entry_time < end)
+    if active is not None:
+        statement = statement.where(ParkingRecord.is_active == active)
+    return statement
+
+
+def record_to_dict(row) -> Dict[str, Any]:
+    """Sorgu satırını API/dışa aktarma biçimine çevirir; ücret TL cinsinden"""
+    # Satır, records_statement sütun sırasıyla açılır (ada göre erişimden hızlı)
+    record_id, vehicle_id, license_plate, parking_id, entry_time, exit_time, is_active, parking_fee = row
+    duration = None
+    if exit_time is not None and entry_time is not None:
+        duration = round((exit_time - entry_time).total_seconds() / 3600, 2)
+    return {
+        "id": record_id,
+        "vehicle_id": vehicle_id,
+        "license_plate": license_plate,
+        "parking_id": parking_id or 1,  # Default 1 olarak ayarla
+        "entry_time": entry_time.isoformat() if entry_time is not None else None,
+        "exit_time": exit_time.isoformat() if exit_time is not None else None,
+        "is_active": bool(is_active),
+        "duration_hours": duration,
+        "parking_fee": round(parking_fee / 100.0, 2) if parking_fee is not None else None,
+    }
+
+
+def list_parking_records(db: Session,
+                         limit: int = 50,
+                         cursor: Optional[str] = None,
+                         parking_id: Optional[int] = None,
+                         start: Optional[datetime] = None,
+                         end: Optional[datetime] = None,
+                         active: Optional[bool] = None,
+                         descending: bool = True) -> Dict[str, Any]:
+    """
+    Park kayıtlarının bir sayfasını (entry_time, id) sırasıyla döndürür.
+
+    Args:
+        limit: Sayfadaki en fazla kayıt
+        cursor: Önceki sayfanın next_cursor değeri (ilk sayfa için None);
+            aynı sıralama yönü ve filtrelerle kullanılmalıdır
+        descending: True ise en yeni kayıtlar önce
+
+    Returns:
+        {"items": [...], "next_cursor": sonraki sayfa cursor'ı veya son sayfada None}
+
+    Raises:
+        ValueError: Cursor geçersizse
+    """
+    statement = records_statement(parking_id, start, end, active)
+    key = tuple_(ParkingRecord.entry_time, ParkingRecord.id)
+    if cursor is not None:
+        position = tuple_(*decode_cursor(cursor))
+        statement = statement.where(key < position if descending else key > position)
+    if descending:
+        statement = statement.order_by(ParkingRecord.entry_time.desc(), ParkingRecord.id.desc())
+    else:
+        statement = statement.order_by(ParkingRecord.entry_time, ParkingRecord.id)
+
+    # Bir fazla satır okunur; varsa sonraki sayfa vardır
+    rows = db.execute(statement.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].entry_time, rows[-1].id)
+    return {"items": [record_to_dict(row) for row in rows], "next_cursor": next_cursor}
+
+
+def _dumps(item: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(item)
+    return json.dumps(item, ensure_ascii=False).encode("utf-8")
+
+
+def _encode_ndjson(items: List[Dict[str, Any]]) -> bytes:
+    return b"".join(_dumps(item) + b"\n" for item in items)
+
+
+def _encode_csv(items: List[Dict[str, Any]], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(items)
+    return buffer.getvalue().encode("utf-8")
+
+
+def iter_export(db: Session,
+                export_format: str = "ndjson",
+                parking_id: Optional[int] = None,
+                start: Optional[datetime] = None,
+                end: Optional[datetime] = None,
+                yield_per: int = HISTORY_EXPORT_YIELD_PER) -> Iterator[bytes]:
+    """
+    Park kayıtlarını (entry_time, id) artan sırayla NDJSON veya CSV parçaları
+    olarak üretir. Satırlar sunucu tarafı cursor'dan yield_per'lik gruplar
+    halinde okunur; her grup tek bir parça olarak döner.
+
+    Args:
+        db: Veritabanı oturumu (üretim bitene kadar açık kalmalıdır)
+        export_format: "ndjson" veya "csv"
+    """
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Desteklenmeyen dışa aktarma biçimi: {export_format}")
+
+    statement = (
+        records_statement(parking_id, start, end)
+        .order_by(ParkingRecord.entry_time, ParkingRecord.id)
+        .execution_options(yield_per=max(yield_per, 1))
+    )
+    if export_format == "csv":
+        yield _encode_csv([], header=True)
+
+    exported = 0
+    result = db.execute(statement)
+    try:
+        for rows in result.partitions():
+            items = [record_to_dict(row) for row in rows]
+            yield _encode_ndjson(items) if export_format == "ndjson" else _encode_csv(items)
+            exported += len(items)
+            HISTORY_EXPORT_ROWS.labels(format=export_format).inc(len(items))
+    finally:
+        result.close()
+    logger.info(f"Park kayıtları dışa aktarıldı: {exported} kayıt ({export_format})")
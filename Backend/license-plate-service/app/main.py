@@ -10,39 +10,54 @@ import asyncio
 from typing import Optional, List, Dict, Any, Union
 
 # FastAPI 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, BackgroundTasks, Body, Query, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse, Response
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Body, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
 # Veritabanı bağlantısı
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, func, Boolean, Text, inspect, text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import Column, Integer, String, Float, DateTime, func, Boolean, Text, inspect, text
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import datetime
 
 # CRUD ve Şemalar
-from app.database import engine, SessionLocal, Base
-from app.models import Vehicle, ParkingRecord
+from app.database import engine, SessionLocal, Base, pool_status, async_engine, AsyncSessionLocal
+from app.models import Vehicle, ParkingRecord, PlateRecord
+from app.migrations import run_migrations
 from app.schemas import (
     VehicleCreate, Vehicle as VehicleSchema, 
     ParkingRecordCreate, ParkingRecord as ParkingRecordSchema, 
-    ParkingRecordUpdate, VehicleWithRecords
+    ParkingRecordUpdate, VehicleWithRecords, VehicleEvent
 )
 from app.crud import (
-    get_vehicle, get_vehicle_by_license_plate, create_vehicle, 
-    get_parking_record, get_active_parking_record_by_vehicle, create_parking_record,
-    close_parking_record, calculate_parking_fee
+    get_vehicle, create_vehicle, get_parking_record, create_parking_record, calculate_parking_fee,
+    vehicle_event_result, exit_parking_rates
+)
+# Park kayıtları geçmişi (keyset sayfalama, dışa aktarma ve aktivite akışı)
+from app.history import list_parking_records, iter_export, EXPORT_MEDIA_TYPES
+from app.activity import recent_activities, activities_since
+from app.occupancy import occupancy
+# Async endpoint'lerin veritabanı işlemleri
+from app.async_crud import (
+    get_vehicle_by_license_plate, get_active_parking_record_by_vehicle, close_parking_record, register_entry,
+    apply_vehicle_events
 )
 
 # Konfigürasyon
-from app.config import DATABASE_URL, RABBITMQ_URL
+from app.config import DATABASE_URL, RABBITMQ_URL, INFERENCE_SCHEDULER_ENABLED, RECOGNITION_WORKERS, PARKING_RATE_PRELOAD
+from app.config import VEHICLE_EVENT_BATCH_MAX_EVENTS, VEHICLE_EVENT_BATCH_CHUNK_SIZE, HISTORY_PAGE_MAX_LIMIT
+from app.parking_rates import rate_cache
 
 # WebSocket yönetimi
 from app.websocket import manager, RoomType
+from app.backplane import create_backplane
+from app.events import event_bus, EventKind
 
 # Monitoring ve metrikler
 from app.monitoring import PrometheusMiddleware, track_plate_recognition, track_vehicle_entry, track_vehicle_exit
+from app.monitoring import VEHICLE_EVENT_BATCH_EVENTS
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST, REGISTRY
 
 # Log yapılandırması - artık monitoring modülü tarafından yönetiliyor
@@ -72,21 +87,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Veritabanı bağlantısı
-try:
-    engine = create_engine(DATABASE_URL)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base = declarative_base()
-    logger.info("Veritabanı bağlantısı başarıyla kuruldu")
-except Exception as e:
-    logger.error(f"Veritabanı bağlantısı kurulamadı: {str(e)}")
-    engine = None
-    SessionLocal = None
-    Base = declarative_base()
-
 # Model içe aktarımı
 try:
-    from app.model import process_image_for_plate_recognition
+    from app.model import (
+        process_image_for_plate_recognition, get_model_stats,
+        inference_scheduler, recognition_pool, recognition_cache, RecognitionBusyError
+    )
     logger.info("Plaka tanıma modeli başarıyla yüklendi")
     MODEL_AVAILABLE = True
 except Exception as e:
@@ -95,21 +101,6 @@ except Exception as e:
     traceback.print_exc()
     MODEL_AVAILABLE = False
 
-# Veritabanı modelleri
-class PlateRecord(Base):
-    __tablename__ = "plate_records"
-
-    id = Column(Integer, primary_key=True, index=True)
-    plate_text = Column(String, index=True)
-    confidence = Column(Float)
-    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
-    image_path = Column(String, nullable=True)
-    processed = Column(Boolean, default=False)
-    bbox = Column(String, nullable=True)  # JSON formatında bounding box
-    
-    def __repr__(self):
-        return f"<PlateRecord(id={self.id}, plate={self.plate_text}, confidence={self.confidence})>"
-
 # Veritabanı oluştur
 if engine is not None:
     try:
@@ -130,6 +121,24 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    Async endpoint'ler için AsyncSession oluşturur. Async sürücü yoksa senkron
+    oturum döner; app.async_crud fonksiyonları bu durumda thread havuzunda çalışır.
+    """
+    if AsyncSessionLocal is None:
+        if SessionLocal is None:
+            raise HTTPException(status_code=503, detail="Veritabanı bağlantısı kullanılamıyor")
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+
+    async with AsyncSessionLocal() as async_db:
+        yield async_db
+
 # Pydantic modelleri
 class PlateInfo(BaseModel):
     plate_text: str
@@ -144,9 +153,18 @@ def health_check():
         "status": "healthy",
         "timestamp": time.time(),
         "model_available": MODEL_AVAILABLE,
-        "database_connected": engine is not None
+        "database_connected": engine is not None,
+        "database_pool": pool_status(engine) if engine is not None else None,
+        "async_database_pool": pool_status(async_engine.sync_engine) if async_engine is not None else None
     }
 
+@app.get("/models/status")
+def model_status():
+    """Bu worker sürecinde yüklenen modellerin yükleme süresi ve bellek kullanımı"""
+    if not MODEL_AVAILABLE:
+        return {"model_available": False, "models": {}}
+    return {"model_available": True, **get_model_stats()}
+
 @app.get("/plates", response_model=List[PlateInfo])
 def get_all_plates(
     limit: int = Query(10, description="Maksimum kayıt sayısı"),
@@ -187,9 +205,7 @@ def root():
 @app.on_event("startup")
 def startup_event():
     logger.info("License Plate Recognition Service başlatılıyor...")
-
-    # Klasörleri oluştur
-    os.makedirs("./debug_plates", exist_ok=True)
+    migration_error = None
 
     # Veritabanı tablolarını oluştur
     try:
@@ -213,6 +229,13 @@ def startup_event():
             logger.info("Veritabanı tablolarını oluşturmaya başlıyor...")
             Base.metadata.create_all(bind=engine)
             logger.info("Veritabanı tabloları oluşturuldu")
+
+            # Mevcut tablolara sonradan eklenen indeksleri vb. uygula
+            try:
+                run_migrations(engine)
+            except Exception as e:
+                logger.error(f"Veritabanı göçleri uygulanamadı: {str(e)}")
+                migration_error = e
             
             # Tablo durumunu kontrol et ve log'a yaz
             if inspector.has_table("plate_records"):
@@ -259,15 +282,95 @@ def startup_event():
         import traceback
         traceback.print_exc()
 
+    # Göçler uygulanmadan (ör. aktif kayıt benzersiz indeksi olmadan) giriş kaydı
+    # yapılırsa register_entry'nin ON CONFLICT sorgusu başarısız olur; servis başlatılmaz
+    if migration_error is not None:
+        raise RuntimeError("Veritabanı göçleri uygulanamadı, servis başlatılmıyor") from migration_error
+
     logger.info(f"Model durumu: {'Kullanılabilir' if MODEL_AVAILABLE else 'Kullanılamıyor'}")
     logger.info(f"Veritabanı durumu: {'Bağlı' if engine is not None else 'Bağlı değil'}")
     logger.info("Servis başlatıldı!")
 
+# Otopark ücretlerini önceden yükle (çıkışlarda servis çağrısı yapılmasın)
+@app.on_event("startup")
+def preload_parking_rates():
+    if PARKING_RATE_PRELOAD:
+        rate_cache.preload()
+
+# Doluluk sayaçlarını aktif park kayıtlarından oluştur ve periyodik eşitlemeyi başlat
+@app.on_event("startup")
+async def start_occupancy_tracking():
+    if engine is None:
+        return
+    def rebuild():
+        db = SessionLocal()
+        try:
+            occupancy.rebuild(db)
+        finally:
+            db.close()
+    try:
+        await run_in_threadpool(rebuild)
+    except Exception as e:
+        logger.error(f"Doluluk sayaçları oluşturulamadı: {str(e)}")
+    await occupancy.start_resync(SessionLocal)
+
+# WebSocket bildirim kuyruğunu event loop üzerinde başlat
+@app.on_event("startup")
+async def start_event_bus():
+    await event_bus.start()
+
+# Sessiz WebSocket bağlantılarını çıkaran süpürücüyü başlat
+@app.on_event("startup")
+async def start_websocket_sweeper():
+    await manager.start_sweeper()
+
+# Diğer worker'lardaki istemcilere yayın için backplane'e bağlan
+@app.on_event("startup")
+async def start_websocket_backplane():
+    await manager.attach_backplane(create_backplane())
+
+# Mikro-toplu çıkarım zamanlayıcısını event loop üzerinde başlat
+@app.on_event("startup")
+async def start_inference_scheduler():
+    if not (MODEL_AVAILABLE and INFERENCE_SCHEDULER_ENABLED):
+        return
+    if RECOGNITION_WORKERS > 0:
+        # Toplu işler modelleri önceden yüklenmiş worker süreçlerinde çalışır
+        await recognition_pool.start()
+        await inference_scheduler.start(runner=recognition_pool.run_batch, concurrency=recognition_pool.workers)
+    else:
+        await inference_scheduler.start()
+
 # Uygulama kapatıldığında
 @app.on_event("shutdown")
 def shutdown_event():
     logger.info("License Plate Recognition Service kapatılıyor...")
 
+@app.on_event("shutdown")
+async def stop_inference_scheduler():
+    if not MODEL_AVAILABLE:
+        return
+    if inference_scheduler.running:
+        await inference_scheduler.stop()
+    await recognition_pool.stop()
+
+@app.on_event("shutdown")
+async def stop_event_bus():
+    await event_bus.stop()
+    # Kuyruktaki bildirimleri istemcilere göndermeyi dene
+    await manager.flush(timeout=5.0)
+    await manager.stop_sweeper()
+    await manager.detach_backplane()
+
+@app.on_event("shutdown")
+async def stop_occupancy_resync():
+    await occupancy.stop_resync()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
 # Uygulamayı doğrudan çalıştırma
 if __name__ == "__main__":
     import uvicorn
@@ -303,29 +406,72 @@ class VehicleExitResponse(BaseModel):
     license_plate: Optional[str] = None
     confidence: Optional[float] = None
 
-# Asenkron task'leri güvenli şekilde çalıştırmak için yardımcı fonksiyon
-def run_async(coroutine):
-    """Senkron bir fonksiyondan asenkron bir coroutine'i çalıştırmak için güvenli yöntem"""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        # Eğer mevcut event loop yoksa yeni bir tane oluştur
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    # Eğer loop çalışmıyorsa yeni bir executor ile coroutine'i çalıştır
-    if not loop.is_running():
-        return loop.run_until_complete(coroutine)
+class VehicleEventBatchRequest(BaseModel):
+    events: List[VehicleEvent] = Field(..., max_items=VEHICLE_EVENT_BATCH_MAX_EVENTS)  # Gerçekleşme sırasına göre
+
+class VehicleEventResult(BaseModel):
+    index: int  # Olayın istekteki sırası
+    event_id: Optional[str] = None
+    type: str
+    license_plate: str
+    parking_id: int
+    success: bool
+    status: str  # entered, already_parked, exited, no_active_record, invalid_timestamp, fee_unavailable, invalid, failed
+    message: str
+    parking_record_id: Optional[int] = None
+    entry_time: Optional[str] = None
+    exit_time: Optional[str] = None
+    duration_hours: Optional[float] = None
+    parking_fee: Optional[float] = None  # TL cinsinden
+
+class VehicleEventBatchResponse(BaseModel):
+    success: bool  # Tüm parçalar veritabanına yazıldıysa True (olay bazında sonuç results içinde)
+    message: str
+    total: int
+    applied: int
+    results: List[VehicleEventResult] = []
+
+# Plaka tanımayı event loop'u bloklamadan çalıştırmak için yardımcı fonksiyon
+async def recognize_plate(contents: bytes, save_debug: bool = False, endpoint: Optional[str] = None,
+                          **options: Any) -> Dict[str, Any]:
+    """
+    Görüntüdeki plakaları tanır.
+
+    options (ör. detection_mode, parking_id, gate) tanıma fonksiyonuna olduğu gibi iletilir.
+
+    Zamanlayıcı çalışıyorsa istek eşzamanlı isteklerle birlikte toplu çıkarıma
+    eklenir; çalışmıyorsa tanıma bir thread havuzunda yapılır. Kuyruk doluysa
+    Retry-After başlıklı HTTP 429 döndürülür.
+
+    Önbellek açıksa aynı otopark kapısı ve uç noktasından (endpoint: entry/exit)
+    kısa süre içinde gelen, plaka kırpıntısı da aynı olan kareler (bariyerde
+    bekleyen araç, zaman aşımı sonrası tekrar) önbellekten yanıtlanır; debug
+    kaydı istenen kareler her zaman tanınır.
+    """
+    cache_key = None
+    if MODEL_AVAILABLE and recognition_cache.enabled and not save_debug:
+        cache_key, cached = await run_in_threadpool(
+            recognition_cache.lookup, contents, parking_id=options.get("parking_id"),
+            detection_mode=options.get("detection_mode"), gate=options.get("gate"), endpoint=endpoint)
+        if cached is not None:
+            return cached
+
+    if MODEL_AVAILABLE and inference_scheduler.running:
+        try:
+            results = await inference_scheduler.submit(contents, save_debug=save_debug, **options)
+        except RecognitionBusyError as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     else:
-        # Eğer loop zaten çalışıyorsa (uvicorn içinde), daha sonra çalıştırılmak üzere planla
-        # Burası uvicorn'un ana event loop'u içinde çalışacaktır
-        return asyncio.create_task(coroutine)
+        results = await run_in_threadpool(process_image_for_plate_recognition, contents, save_debug=save_debug, **options)
+
+    if cache_key is not None:
+        await run_in_threadpool(recognition_cache.put, cache_key, results, contents)
+    return results
 
 @app.post("/vehicle/entry", response_model=VehicleEntryResponse)
-def register_vehicle_entry(
+async def register_vehicle_entry(
     entry: VehicleEntryRequest,
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = BackgroundTasks()
+    db: Union[AsyncSession, Session] = Depends(get_async_db)
 ):
     """
     Araç otoparka giriş yaptığında, plaka bilgisini kaydet ve giriş kaydı oluştur.
@@ -342,20 +488,11 @@ def register_vehicle_entry(
                 message="Plaka bilgisi gereklidir"
             )
         
-        # Araç veritabanında var mı kontrol et
-        db_vehicle = get_vehicle_by_license_plate(db, entry.license_plate)
-        
-        # Yoksa yeni araç kaydı oluştur
-        if not db_vehicle:
-            vehicle_data = VehicleCreate(
-                license_plate=entry.license_plate
-            )
-            db_vehicle = create_vehicle(db, vehicle_data)
-            logger.info(f"Yeni araç kaydı oluşturuldu: {entry.license_plate}")
-        
-        # Aktif park kaydı var mı kontrol et (aynı otoparkta)
-        active_record = get_active_parking_record_by_vehicle(db, db_vehicle.id, entry.parking_id)
-        if active_record:
+        # Aracı upsert et ve park kaydını tek işlemde oluştur; araç zaten bu
+        # otoparkta park halindeyse mevcut aktif kayıt döner
+        db_vehicle, db_record, created = await register_entry(db, entry.license_plate, entry.parking_id)
+        if not created:
+            active_record = db_record
             response = VehicleEntryResponse(
                 success=False,
                 message=f"Bu araç zaten bu otoparkta park halinde. Giriş zamanı: {active_record.entry_time}",
@@ -365,32 +502,19 @@ def register_vehicle_entry(
             )
             
             # WebSocket bildirimi gönder (zaten park halinde)
-            background_tasks.add_task(
-                lambda: run_async(manager.send_vehicle_update({
-                    "id": db_vehicle.id,
-                    "license_plate": db_vehicle.license_plate,
-                    "status": "already_parked",
-                    "message": f"Araç zaten park halinde: {entry.license_plate}",
-                    "parking_record_id": active_record.id,
-                    "entry_time": active_record.entry_time.isoformat(),
-                    "parking_id": entry.parking_id  # Otopark ID'sini ekle
-                }))
-            )
+            event_bus.publish(EventKind.VEHICLE_UPDATE, {
+                "id": db_vehicle.id,
+                "license_plate": db_vehicle.license_plate,
+                "status": "already_parked",
+                "message": f"Araç zaten park halinde: {entry.license_plate}",
+                "parking_record_id": active_record.id,
+                "entry_time": active_record.entry_time.isoformat(),
+                "parking_id": entry.parking_id  # Otopark ID'sini ekle
+            }, coalesce_key=f"already_parked:{entry.parking_id}:{db_vehicle.license_plate}")
             
             return response
-            
-        # Başka bir otoparkta aktif park kaydı var mı kontrol et
-        other_active_record = get_active_parking_record_by_vehicle(db, db_vehicle.id)
-        if other_active_record:
-            # Başka bir otoparkta park halinde, ama bu otoparka giriş yapabilir
-            logger.info(f"Araç başka bir otoparkta park halinde (ID: {other_active_record.parking_id}), ama bu otoparka (ID: {entry.parking_id}) giriş yapabilir.")
         
-        # Yeni park kaydı oluştur
-        parking_record_data = ParkingRecordCreate(
-            vehicle_id=db_vehicle.id,
-            parking_id=entry.parking_id  # Otopark ID'sini ekle
-        )
-        new_record = create_parking_record(db, parking_record_data)
+        new_record = db_record
         
         # Metrik güncelle
         track_vehicle_entry()
@@ -404,17 +528,15 @@ def register_vehicle_entry(
         )
         
         # WebSocket bildirimi gönder (yeni giriş)
-        background_tasks.add_task(
-            lambda: run_async(manager.send_parking_record_update({
-                "id": new_record.id,
-                "vehicle_id": db_vehicle.id,
-                "license_plate": db_vehicle.license_plate,
-                "action": "entry",
-                "entry_time": new_record.entry_time.isoformat(),
-                "message": f"Araç girişi: {entry.license_plate}",
-                "parking_id": entry.parking_id  # Otopark ID'sini ekle
-            }))
-        )
+        event_bus.publish(EventKind.PARKING_RECORD_UPDATE, {
+            "id": new_record.id,
+            "vehicle_id": db_vehicle.id,
+            "license_plate": db_vehicle.license_plate,
+            "action": "entry",
+            "entry_time": new_record.entry_time.isoformat(),
+            "message": f"Araç girişi: {entry.license_plate}",
+            "parking_id": entry.parking_id  # Otopark ID'sini ekle
+        })
         
         return response
         
@@ -428,10 +550,9 @@ def register_vehicle_entry(
         )
 
 @app.post("/vehicle/exit", response_model=VehicleExitResponse)
-def register_vehicle_exit(
+async def register_vehicle_exit(
     exit_req: VehicleExitRequest,
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = BackgroundTasks()
+    db: Union[AsyncSession, Session] = Depends(get_async_db)
 ):
     """
     Araç otoparktan çıkış yaptığında, çıkış kaydı oluştur ve ücretlendirme yap
@@ -448,7 +569,7 @@ def register_vehicle_exit(
             )
         
         # Araç veritabanında var mı kontrol et
-        db_vehicle = get_vehicle_by_license_plate(db, exit_req.license_plate)
+        db_vehicle = await get_vehicle_by_license_plate(db, exit_req.license_plate)
         if not db_vehicle:
             response = VehicleExitResponse(
                 success=False,
@@ -456,20 +577,18 @@ def register_vehicle_exit(
             )
             
             # WebSocket bildirimi gönder (araç bulunamadı)
-            background_tasks.add_task(
-                lambda: run_async(manager.broadcast({
-                    "type": "error",
-                    "action": "exit_failed",
-                    "reason": "vehicle_not_found",
-                    "license_plate": exit_req.license_plate,
-                    "message": f"Araç bulunamadı: {exit_req.license_plate}"
-                }, RoomType.ADMIN))
-            )
+            event_bus.publish(EventKind.BROADCAST, {
+                "type": "error",
+                "action": "exit_failed",
+                "reason": "vehicle_not_found",
+                "license_plate": exit_req.license_plate,
+                "message": f"Araç bulunamadı: {exit_req.license_plate}"
+            }, RoomType.ADMIN, coalesce_key=f"exit_failed:{exit_req.license_plate}")
             
             return response
         
         # Aktif park kaydı var mı kontrol et
-        active_record = get_active_parking_record_by_vehicle(db, db_vehicle.id)
+        active_record = await get_active_parking_record_by_vehicle(db, db_vehicle.id)
         if not active_record:
             response = VehicleExitResponse(
                 success=False,
@@ -477,22 +596,35 @@ def register_vehicle_exit(
             )
         
             # WebSocket bildirimi gönder (aktif kayıt yok)
-            background_tasks.add_task(
-                lambda: run_async(manager.broadcast({
-                    "type": "error",
-                    "action": "exit_failed",
-                    "reason": "no_active_record",
-                    "license_plate": exit_req.license_plate,
-                    "vehicle_id": db_vehicle.id,
-                    "message": f"Aktif park kaydı yok: {exit_req.license_plate}"
-                }, RoomType.ADMIN))
-            )
+            event_bus.publish(EventKind.BROADCAST, {
+                "type": "error",
+                "action": "exit_failed",
+                "reason": "no_active_record",
+                "license_plate": exit_req.license_plate,
+                "vehicle_id": db_vehicle.id,
+                "message": f"Aktif park kaydı yok: {exit_req.license_plate}"
+            }, RoomType.ADMIN, coalesce_key=f"exit_failed:{exit_req.license_plate}")
             
             return response
         
         # Park kaydını kapat ve ücretlendirme yap (otopark ID'si ile)
         logger.info(f"Araç çıkışı için park kaydı kapatılıyor: {active_record.id}, Otopark ID: {exit_req.parking_id}")
-        closed_record = close_parking_record(db, active_record.id, exit_req.parking_id)
+        closed_record = await close_parking_record(db, active_record.id, exit_req.parking_id, active_record.entry_time)
+        if closed_record is None:
+            # Aynı araç için eşzamanlı başka bir çıkış kaydı kapatmış
+            response = VehicleExitResponse(
+                success=False,
+                message=f"Bu araca ait park kaydı zaten kapatılmış: {exit_req.license_plate}"
+            )
+            event_bus.publish(EventKind.BROADCAST, {
+                "type": "error",
+                "action": "exit_failed",
+                "reason": "already_closed",
+                "license_plate": exit_req.license_plate,
+                "vehicle_id": db_vehicle.id,
+                "message": f"Park kaydı zaten kapatılmış: {exit_req.license_plate}"
+            }, RoomType.ADMIN, coalesce_key=f"exit_failed:{exit_req.license_plate}")
+            return response
         
         # Metrik güncelle
         track_vehicle_exit()
@@ -525,20 +657,18 @@ def register_vehicle_exit(
         )
         
         # WebSocket bildirimi gönder (çıkış başarılı)
-        background_tasks.add_task(
-            lambda: run_async(manager.send_parking_record_update({
-                "id": closed_record.id,
-                "vehicle_id": db_vehicle.id,
-                "license_plate": exit_req.license_plate,
-                "parking_id": exit_req.parking_id,
-                "action": "exit",
-                "entry_time": closed_record.entry_time.isoformat(),
-                "exit_time": closed_record.exit_time.isoformat(),
-                "duration_hours": round(duration, 2),
-                "parking_fee": round(fee_tl, 2),
-                "message": f"Araç çıkışı: {exit_req.license_plate}, Ücret: {fee_tl:.2f} TL"
-            }))
-        )
+        event_bus.publish(EventKind.PARKING_RECORD_UPDATE, {
+            "id": closed_record.id,
+            "vehicle_id": db_vehicle.id,
+            "license_plate": exit_req.license_plate,
+            "parking_id": exit_req.parking_id,
+            "action": "exit",
+            "entry_time": closed_record.entry_time.isoformat(),
+            "exit_time": closed_record.exit_time.isoformat(),
+            "duration_hours": round(duration, 2),
+            "parking_fee": round(fee_tl, 2),
+            "message": f"Araç çıkışı: {exit_req.license_plate}, Ücret: {fee_tl:.2f} TL"
+        })
         
         logger.info(f"Çıkış cevabı hazırlandı: {response}")
         return response
@@ -550,16 +680,14 @@ def register_vehicle_exit(
         
         # WebSocket hata bildirimi
         try:
-            background_tasks.add_task(
-                lambda: run_async(manager.broadcast({
-                    "type": "error",
-                    "action": "exit_error",
-                    "license_plate": exit_req.license_plate,
-                    "parking_id": exit_req.parking_id,
-                    "error": str(e),
-                    "message": f"Çıkış işlemi sırasında hata: {str(e)}"
-                }, RoomType.ADMIN))
-            )
+            event_bus.publish(EventKind.BROADCAST, {
+                "type": "error",
+                "action": "exit_error",
+                "license_plate": exit_req.license_plate,
+                "parking_id": exit_req.parking_id,
+                "error": str(e),
+                "message": f"Çıkış işlemi sırasında hata: {str(e)}"
+            }, RoomType.ADMIN)
         except:
             pass
             
@@ -568,12 +696,97 @@ def register_vehicle_exit(
             message=f"Araç çıkışı kaydedilirken hata: {str(e)}"
         )
 
+@app.post("/vehicle/events:batch", response_model=VehicleEventBatchResponse)
+async def register_vehicle_events_batch(
+    batch: VehicleEventBatchRequest,
+    db: Union[AsyncSession, Session] = Depends(get_async_db)
+):
+    """
+    Bağlantısı kopan bariyerin biriktirdiği giriş/çıkış olaylarını toplu olarak kaydeder.
+
+    Olaylar gönderildikleri sırayla, VEHICLE_EVENT_BATCH_CHUNK_SIZE olayluk
+    parçalar halinde uygulanır; her parça tek bir veritabanı işlemidir ve giriş/
+    çıkış zamanı olarak olayın istemci zamanı kullanılır. Olay başına sonuç
+    döner. WebSocket bildirimleri olay başına değil, otopark başına tek bir
+    özet olarak yayınlanır.
+    """
+    events = batch.events
+    logger.info(f"Toplu olay aktarımı başlatılıyor: {len(events)} olay")
+
+    # Ücretler otopark başına bir kez, event loop dışında alınır ve tüm parçalara
+    # verilir; alınamayan ücretler için servis tekrar çağrılmaz (çıkışlar fee_unavailable olur)
+    rates = await run_in_threadpool(exit_parking_rates, events)
+
+    results = []
+    failed_chunks = 0
+    chunk_size = max(VEHICLE_EVENT_BATCH_CHUNK_SIZE, 1)
+    for start in range(0, len(events), chunk_size):
+        chunk = events[start:start + chunk_size]
+        try:
+            results.extend(await apply_vehicle_events(db, chunk, start, rates))
+        except Exception as e:
+            # Parça geri alındı; sonraki parçalar yine de denenir
+            failed_chunks += 1
+            logger.error(f"Olay parçası uygulanamadı ({start}-{start + len(chunk) - 1}): {str(e)}")
+            results.extend(vehicle_event_result(start + offset, event, "failed") for offset, event in enumerate(chunk))
+
+    # Metrikler ve otopark başına özet bildirimi
+    counts = {}
+    summaries = {}
+    for result in results:
+        status = result["status"]
+        counts[(result["type"], status)] = counts.get((result["type"], status), 0) + 1
+        summary = summaries.setdefault(result["parking_id"], {
+            "id": result["parking_id"],
+            "action": "batch_summary",
+            "entries": 0,
+            "exits": 0,
+            "rejected": 0,
+            "total_fee": 0.0
+        })
+        if status == "entered":
+            summary["entries"] += 1
+        elif status == "exited":
+            summary["exits"] += 1
+            summary["total_fee"] += result["parking_fee"]
+        else:
+            summary["rejected"] += 1
+    for (event_type, status), count in counts.items():
+        VEHICLE_EVENT_BATCH_EVENTS.labels(type=event_type, status=status).inc(count)
+
+    entries = sum(summary["entries"] for summary in summaries.values())
+    exits = sum(summary["exits"] for summary in summaries.values())
+    if entries:
+        track_vehicle_entry(entries)
+    if exits:
+        track_vehicle_exit(exits)
+
+    for summary in summaries.values():
+        summary["total_fee"] = round(summary["total_fee"], 2)
+        summary["message"] = (f"Toplu olay aktarımı: {summary['entries']} giriş, {summary['exits']} çıkış, "
+                              f"{summary['rejected']} reddedilen olay")
+        event_bus.publish(EventKind.PARKING_UPDATE, summary)
+
+    applied = entries + exits
+    logger.info(f"Toplu olay aktarımı tamamlandı: {applied}/{len(events)} olay uygulandı, "
+                f"{failed_chunks} parça başarısız")
+    return VehicleEventBatchResponse(
+        success=failed_chunks == 0,
+        message=f"{len(events)} olaydan {applied} tanesi uygulandı",
+        total=len(events),
+        applied=applied,
+        results=results
+    )
+
 @app.post("/process-plate-entry", response_model=VehicleEntryResponse)
 async def process_plate_for_entry(
     file: UploadFile = File(...),
     save_debug: bool = Query(False, description="Debug görsellerini kaydet"),
     parking_id: int = Query(1, description="Otopark ID'si"),
-    db: Session = Depends(get_db)
+    gate: str = Query("entry", description="Görüntünün geldiği kapı/kamera (kapı bazlı ROI için)"),
+    detection_mode: Optional[str] = Query(None, regex="^(full|plate_only|lazy)$",
+                                          description="Araç tespit modu (full, plate_only, lazy); verilmezse otopark ayarı kullanılır"),
+    db: Union[AsyncSession, Session] = Depends(get_async_db)
 ):
     """
     Yüklenen görüntüdeki plakayı tanı ve araç girişi olarak işle
@@ -583,7 +796,8 @@ async def process_plate_for_entry(
         contents = await file.read()
         
         # Plaka tanıma işlemini gerçekleştir
-        results = process_image_for_plate_recognition(contents, save_debug=save_debug)
+        results = await recognize_plate(contents, save_debug=save_debug, endpoint="entry",
+                                        detection_mode=detection_mode, parking_id=parking_id, gate=gate)
         
         if "error" in results:
             return VehicleEntryResponse(
@@ -630,7 +844,7 @@ async def process_plate_for_entry(
         
         # Araç girişi yap
         vehicle_entry = VehicleEntryRequest(license_plate=license_plate, parking_id=parking_id)
-        response = register_vehicle_entry(vehicle_entry, db)
+        response = await register_vehicle_entry(vehicle_entry, db)
         
         # Yanıta plaka bilgisini ekle
         response.license_plate = license_plate
@@ -638,6 +852,8 @@ async def process_plate_for_entry(
         
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Plaka tanıma ve araç girişi sırasında hata: {str(e)}")
         import traceback
@@ -654,7 +870,10 @@ async def process_plate_for_exit(
     file: UploadFile = File(...),
     save_debug: bool = Query(False, description="Debug görsellerini kaydet"),
     parking_id: int = Query(1, description="Otopark ID'si"),
-    db: Session = Depends(get_db)
+    gate: str = Query("exit", description="Görüntünün geldiği kapı/kamera (kapı bazlı ROI için)"),
+    detection_mode: Optional[str] = Query(None, regex="^(full|plate_only|lazy)$",
+                                          description="Araç tespit modu (full, plate_only, lazy); verilmezse otopark ayarı kullanılır"),
+    db: Union[AsyncSession, Session] = Depends(get_async_db)
 ):
     """
     Yüklenen görüntüdeki plakayı tanı ve araç çıkışı olarak işle
@@ -664,7 +883,8 @@ async def process_plate_for_exit(
         contents = await file.read()
         
         # Plaka tanıma işlemini gerçekleştir
-        results = process_image_for_plate_recognition(contents, save_debug=save_debug)
+        results = await recognize_plate(contents, save_debug=save_debug, endpoint="exit",
+                                        detection_mode=detection_mode, parking_id=parking_id, gate=gate)
         
         if "error" in results:
             return VehicleExitResponse(
@@ -711,7 +931,7 @@ async def process_plate_for_exit(
         
         # Araç çıkışı yap
         vehicle_exit = VehicleExitRequest(license_plate=license_plate, parking_id=parking_id)
-        response = register_vehicle_exit(vehicle_exit, db)
+        response = await register_vehicle_exit(vehicle_exit, db)
         
         # Yanıta plaka bilgisini ekle
         response.license_plate = license_plate
@@ -719,6 +939,8 @@ async def process_plate_for_exit(
         
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Plaka tanıma ve araç çıkışı sırasında hata: {str(e)}")
         import traceback
@@ -771,6 +993,7 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             try:
                 data = await websocket.receive_text()
+                manager.touch(client_id)  # Heartbeat: istemci canlı
                 logger.debug(f"WebSocket mesajı alındı: client_id={client_id}, veri uzunluğu={len(data)}")
                 
                 try:
@@ -858,6 +1081,7 @@ async def websocket_admin_endpoint(websocket: WebSocket):
         while True:
             try:
                 data = await websocket.receive_text()
+                manager.touch(client_id)  # Heartbeat: istemci canlı
                 logger.debug(f"Admin WebSocket mesajı alındı: client_id={client_id}, veri uzunluğu={len(data)}")
                 
                 try:
@@ -982,12 +1206,14 @@ async def websocket_parking_endpoint(websocket: WebSocket, parking_id: int):
             "message": f"Otopark ID={parking_id} WebSocket bağlantısı başarıyla kuruldu!",
             "client_id": client_id,
             "parking_id": parking_id,
+            "active_vehicles": occupancy.get(parking_id),
             "timestamp": datetime.datetime.now().isoformat()
         }))
         
         # İstemciden gelen mesajları dinle
         while True:
             data = await websocket.receive_text()
+            manager.touch(client_id)  # Heartbeat: istemci canlı
             try:
                 message = json.loads(data)
                 message_type = message.get("type", "unknown")
@@ -1058,6 +1284,7 @@ async def websocket_vehicle_endpoint(websocket: WebSocket, license_plate: str):
         # İstemciden gelen mesajları dinle
         while True:
             data = await websocket.receive_text()
+            manager.touch(client_id)  # Heartbeat: istemci canlı
             try:
                 message = json.loads(data)
                 message_type = message.get("type", "unknown")
@@ -1103,8 +1330,22 @@ async def websocket_vehicle_endpoint(websocket: WebSocket, license_plate: str):
 # WebSocket bilgi endpointi
 @app.get("/ws/info")
 def websocket_info():
-    """WebSocket bağlantı durumunu görüntüle"""
-    return manager.get_connection_status()
+    """WebSocket bağlantı durumunu ve bildirim kuyruğunu görüntüle"""
+    return {**manager.get_connection_status(), "event_bus": event_bus.stats()}
+
+@app.get("/occupancy")
+def get_occupancy(parking_id: Optional[int] = Query(None, description="Otopark ID'si (verilmezse tüm otoparklar)")):
+    """
+    Otoparkların anlık aktif araç sayıları. Sayılar bellekteki doluluk
+    sayaçlarından okunur; veritabanı sorgusu yapılmaz (bkz. app.occupancy).
+    """
+    if parking_id is not None:
+        return {"parking_id": parking_id, "active_vehicles": occupancy.get(parking_id)}
+    counts = occupancy.snapshot()
+    return {
+        "parkings": [{"parking_id": pid, "active_vehicles": count} for pid, count in sorted(counts.items())],
+        "total": sum(counts.values())
+    }
 
 @app.get("/active-vehicles")
 def get_active_vehicles(
@@ -1147,96 +1388,88 @@ def get_active_vehicles(
 
 @app.get("/recent-activities")
 def get_recent_activities(
-    limit: int = Query(20, description="Maksimum kayıt sayısı"),
+    response: Response,
+    limit: int = Query(20, ge=1, le=HISTORY_PAGE_MAX_LIMIT, description="Maksimum kayıt sayısı"),
     parking_id: int = Query(None, description="Otopark ID'si (filtreleme için)"),
+    since: Optional[str] = Query(None, description="Yalnızca bu öğeden (cursor) yeni aktiviteler (yoklama için)"),
+    cursor: Optional[str] = Query(None, description="Bu öğeden (cursor) daha eski aktiviteler (sayfalama için)"),
     db: Session = Depends(get_db)
 ):
     """
-    Son giriş/çıkış aktivitelerinin listesini döndürür
+    Son giriş/çıkış aktivitelerinin listesini döndürür (en yeni en üstte).
+    Her öğenin cursor alanı since/cursor parametrelerinde kullanılabilir.
+
+    since ile yoklamada yeni aktiviteler eskiden yeniye döner; X-Has-More
+    başlığı "true" ise limitten fazla yeni aktivite vardır ve istemci
+    X-Next-Cursor (son öğenin cursor'ı) ile hemen tekrar istemelidir.
     """
     try:
-        # Baz sorguları oluştur
-        completed_query = db.query(ParkingRecord).filter(
-            ParkingRecord.exit_time != None  # Çıkış yapmış olanlar
-        ).join(Vehicle)
-        
-        active_query = db.query(ParkingRecord).filter(
-            ParkingRecord.exit_time == None  # Çıkış yapmamış olanlar
-        ).join(Vehicle)
-        
-        # Otopark ID'si filtresi ekle
-        if parking_id is not None:
-            completed_query = completed_query.filter(ParkingRecord.parking_id == parking_id)
-            active_query = active_query.filter(ParkingRecord.parking_id == parking_id)
-        
-        # En son tamamlanan (çıkış yapılmış) park kayıtlarını getir    
-        completed_records = completed_query.order_by(ParkingRecord.exit_time.desc()).limit(limit).all()
-        
-        # En son giriş yapılmış (aktif) park kayıtlarını getir
-        active_records = active_query.order_by(ParkingRecord.entry_time.desc()).limit(limit).all()
-        
-        result = []
-        
-        # Çıkış aktiviteleri
-        for record in completed_records:
-            vehicle = record.vehicle
-            
-            # Park süresini hesapla (saat olarak)
-            duration = (record.exit_time - record.entry_time).total_seconds() / 3600
-            
-            # Ücret TL'ye çevrilmeli
-            fee_tl = float(record.parking_fee) / 100.0 if record.parking_fee else 0
-            
-            # Çıkış aktivitesi
-            result.append({
-                "id": record.id,
-                "vehicle_id": vehicle.id,
-                "license_plate": vehicle.license_plate,
-                "action": "exit",
-                "entry_time": record.entry_time.isoformat(),
-                "exit_time": record.exit_time.isoformat(),
-                "duration_hours": round(duration, 2),
-                "parking_fee": round(fee_tl, 2),
-                "message": f"Araç çıkışı: {vehicle.license_plate}",
-                "parking_id": record.parking_id or 1  # Default 1 olarak ayarla
-            })
-            
-            # Aynı araç için giriş aktivitesi de ekle
-            result.append({
-                "id": f"{record.id}_entry",  # Benzersiz ID oluştur
-                "vehicle_id": vehicle.id,
-                "license_plate": vehicle.license_plate,
-                "action": "entry",
-                "entry_time": record.entry_time.isoformat(),
-                "message": f"Araç girişi: {vehicle.license_plate}",
-                "parking_id": record.parking_id or 1  # Default 1 olarak ayarla
-            })
-        
-        # Aktif araçların giriş aktiviteleri
-        for record in active_records:
-            vehicle = record.vehicle
-            result.append({
-                "id": record.id,
-                "vehicle_id": vehicle.id,
-                "license_plate": vehicle.license_plate,
-                "action": "entry",
-                "entry_time": record.entry_time.isoformat(),
-                "message": f"Araç girişi: {vehicle.license_plate}",
-                "parking_id": record.parking_id or 1  # Default 1 olarak ayarla
-            })
-        
-        # Tarihe göre sırala (en yeni en üstte)
-        result.sort(key=lambda x: x.get("exit_time", x.get("entry_time")), reverse=True)
-        
-        # Sınırla
-        return result[:limit]
-        
+        if since and not cursor:
+            page = activities_since(db, since, limit=limit, parking_id=parking_id)
+            response.headers["X-Has-More"] = "true" if page["has_more"] else "false"
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
+            return page["items"]
+        return recent_activities(db, limit=limit, parking_id=parking_id, cursor=cursor, since=since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Son aktiviteler alınırken hata: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Veritabanı hatası: {str(e)}")
 
+@app.get("/parking-records")
+def get_parking_record_history(
+    limit: int = Query(50, ge=1, le=HISTORY_PAGE_MAX_LIMIT, description="Sayfadaki maksimum kayıt sayısı"),
+    cursor: Optional[str] = Query(None, description="Önceki sayfanın next_cursor değeri"),
+    parking_id: int = Query(None, description="Otopark ID'si (filtreleme için)"),
+    start: Optional[datetime.datetime] = Query(None, alias="from", description="Bu zamandan itibaren girişler (dahil)"),
+    end: Optional[datetime.datetime] = Query(None, alias="to", description="Bu zamana kadar girişler (hariç)"),
+    active: Optional[bool] = Query(None, description="Yalnızca aktif (true) veya kapanmış (false) kayıtlar"),
+    order: str = Query("desc", regex="^(asc|desc)$", description="Giriş zamanına göre sıralama yönü"),
+    db: Session = Depends(get_db)
+):
+    """
+    Park kayıtlarını (entry_time, id) keyset sayfalamasıyla listeler.
+    Sonraki sayfa için yanıttaki next_cursor aynı filtrelerle gönderilir.
+    """
+    try:
+        return list_parking_records(db, limit=limit, cursor=cursor, parking_id=parking_id,
+                                    start=start, end=end, active=active, descending=order == "desc")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Park kayıtları alınırken hata: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Veritabanı hatası: {str(e)}")
+
+@app.get("/parking-records/export")
+def export_parking_record_history(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$", description="Dışa aktarma biçimi"),
+    parking_id: int = Query(None, description="Otopark ID'si (filtreleme için)"),
+    start: Optional[datetime.datetime] = Query(None, alias="from", description="Bu zamandan itibaren girişler (dahil)"),
+    end: Optional[datetime.datetime] = Query(None, alias="to", description="Bu zamana kadar girişler (hariç)")
+):
+    """
+    Park kayıtlarını giriş zamanına göre NDJSON veya CSV olarak akış halinde dışa aktarır.
+    Satırlar sunucu tarafı cursor'dan okunur; yanıt boyutundan bağımsız olarak bellek sabittir.
+    """
+    if SessionLocal is None:
+        raise HTTPException(status_code=503, detail="Veritabanı bağlantısı kullanılamıyor")
+
+    def stream():
+        # Oturum akış bitene kadar açık kalmalı; bu yüzden bağımlılık yerine burada açılır
+        db = SessionLocal()
+        try:
+            yield from iter_export(db, format, parking_id=parking_id, start=start, end=end)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="parking-records.{format}"'}
+    )
+
 # Prometheus metrics endpoint
 @app.get("/metrics")
 async def metrics():
@@ -0,0 +1,257 @@
+"""
+Veritabanı şema göçleri (migration).
+
+Base.metadata.create_all yalnızca eksik tabloları oluşturur; mevcut tablolara
+sonradan eklenen indeksler ve benzeri değişiklikler buradaki sıralı göçlerle
+uygulanır. Uygulanan sürümler `schema_migrations` tablosunda tutulur ve her göç
+bir kez çalışır. Göçler idempotenttir (ör. indeksler IF NOT EXISTS ile
+oluşturulur); create_all ile sıfırdan oluşturulan veritabanlarında da sorunsuz
+çalışırlar.
+
+Kullanım:
+    python -m app.migrations            # bekleyen göçleri uygula
+    python -m app.migrations --status   # uygulanan/bekleyen göçleri listele
+
+PostgreSQL'de birden fazla süreç aynı anda başlatılırsa göçler bir advisory
+lock ile sırayla çalışır. Büyük parking_records tablosunda indeks oluşturma
+yazmaları kilitlememesi için CREATE INDEX CONCURRENTLY ile yapılır; bu ifade
+işlem içinde çalışamadığından PostgreSQL'de göç bağlantısı autocommit
+kipindedir (her ifade kendi başına işlenir, göçler idempotent olduğundan yarıda
+kalan göç yeniden çalıştırılabilir) ve servisin varsayılan statement_timeout
+değeri (DB_STATEMENT_TIMEOUT_MS) bu bağlantıda kapatılır.
+"""
+
+import sys
+import logging
+import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, MetaData, String, Table, and_, bindparam, exists, func, or_, select, text, update
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateIndex
+
+from .models import ParkingRecord, Vehicle
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock anahtarı (servise özgü sabit)
+_ADVISORY_LOCK_KEY = 7_420_215
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def _index(name: str) -> Index:
+    """Modelde tanımlı indeksi adına göre döndürür"""
+    for index in ParkingRecord.__table__.indexes:
+        if index.name == name:
+            return index
+    raise KeyError(f"Modelde indeks bulunamadı: {name}")
+
+
+class CreateIndexConcurrently(CreateIndex):
+    """PostgreSQL'de tabloyu yazmaya kilitlemeden (CONCURRENTLY) indeks oluşturan DDL"""
+
+
+@compiles(CreateIndexConcurrently, "postgresql")
+def _compile_create_index_concurrently(element: CreateIndexConcurrently, compiler, **kw) -> str:
+    # "CREATE [UNIQUE] INDEX IF NOT EXISTS ..." -> "CREATE [UNIQUE] INDEX CONCURRENTLY IF NOT EXISTS ..."
+    return compiler.visit_create_index(element, **kw).replace("INDEX", "INDEX CONCURRENTLY", 1)
+
+
+def _drop_invalid_index(connection: Connection, name: str) -> None:
+    """
+    Yarıda kesilen CONCURRENTLY oluşturma geçersiz (INVALID) bir indeks bırakır;
+    IF NOT EXISTS onu mevcut sayacağından yeniden oluşturmadan önce silinir.
+    """
+    invalid = connection.execute(text(
+        "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid is not None:
+        logger.warning(f"Geçersiz indeks siliniyor ve yeniden oluşturulacak: {name}")
+        connection.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def _create_indexes(*names: str) -> Callable[[Connection], None]:
+    def upgrade(connection: Connection) -> None:
+        for name in names:
+            if connection.dialect.name == "postgresql":
+                _drop_invalid_index(connection, name)
+            connection.execute(CreateIndexConcurrently(_index(name), if_not_exists=True))
+            logger.info(f"İndeks hazır: {name}")
+    return upgrade
+
+
+def _drop_indexes(*names: str) -> Callable[[Connection], None]:
+    """Modelden çıkarılan indeksleri siler (PostgreSQL'de tabloyu kilitlemeden)"""
+    def upgrade(connection: Connection) -> None:
+        concurrently = " CONCURRENTLY" if connection.dialect.name == "postgresql" else ""
+        for name in names:
+            connection.exec_driver_sql(f"DROP INDEX{concurrently} IF EXISTS {name}")
+            logger.info(f"İndeks silindi: {name}")
+    return upgrade
+
+
+def _consolidate_indexes(connection: Connection) -> None:
+    # Yeni indeks eskiler silinmeden önce oluşturulur; sorgular arada indekssiz kalmaz
+    _create_indexes("ix_parking_records_closed_exit_time_id")(connection)
+    _drop_indexes("ix_parking_records_open_entry_time",
+                  "ix_parking_records_open_parking_entry_time",
+                  "ix_parking_records_closed_exit_time",
+                  "ix_parking_records_closed_parking_exit_time")(connection)
+
+
+def _close_duplicate_active_records(connection: Connection) -> None:
+    """
+    Eski okuyup-yazan giriş akışının eşzamanlı girişlerde bıraktığı, aynı araç
+    ve otopark için birden fazla aktif kaydı kapatır.
+
+    Her (vehicle_id, parking_id) için en yeni kayıt (entry_time, id) açık kalır.
+    Fazladan kayıtlar, aracın son görüldüğü an olan bir sonraki girişin
+    zamanında (aynı anda açılmış çift kayıtta kendi giriş zamanında) kapatılır.
+    Gerçek bir çıkış olmadığından ücret yazılmaz (parking_fee NULL kalır);
+    kapatılan kayıtlar plaka ve kayıt ID'leriyle loglanır.
+    """
+    records = ParkingRecord.__table__
+    vehicles = Vehicle.__table__
+    newer = records.alias("newer")
+    superseded = and_(
+        newer.c.vehicle_id == records.c.vehicle_id,
+        newer.c.parking_id == records.c.parking_id,
+        newer.c.is_active == True,
+        or_(newer.c.entry_time > records.c.entry_time,
+            and_(newer.c.entry_time == records.c.entry_time, newer.c.id > records.c.id)),
+    )
+    superseded_at = select(func.min(newer.c.entry_time)).where(superseded).scalar_subquery()
+    duplicates = connection.execute(
+        select(records.c.id, records.c.parking_id, vehicles.c.license_plate, records.c.entry_time,
+               superseded_at.label("superseded_at"))
+        .select_from(records.outerjoin(vehicles, vehicles.c.id == records.c.vehicle_id))
+        .where(records.c.is_active == True, records.c.parking_id != None, exists().where(superseded))
+        .order_by(records.c.id)
+    ).all()
+    if not duplicates:
+        return
+
+    for row in duplicates:
+        logger.warning(f"Çift aktif park kaydı kapatılıyor: kayıt {row.id}, plaka {row.license_plate}, "
+                       f"otopark {row.parking_id}, giriş {row.entry_time}, çıkış {row.superseded_at}")
+    connection.execute(
+        update(records)
+        .where(records.c.id == bindparam("record_id"), records.c.is_active == True)
+        .values(is_active=False, exit_time=bindparam("closed_at")),
+        [{"record_id": row.id, "closed_at": row.superseded_at} for row in duplicates],
+    )
+    logger.warning(f"Aynı araç/otopark için fazladan açık kalmış {len(duplicates)} park kaydı kapatıldı: "
+                   f"{[row.id for row in duplicates]}")
+
+
+def _unique_active_record_index(connection: Connection) -> None:
+    # Çift aktif kayıtlar varken benzersiz indeks oluşturulamaz; önce kapatılır
+    _close_duplicate_active_records(connection)
+    _create_indexes("uq_parking_records_active_vehicle_parking")(connection)
+
+
+# Sıralı göç listesi; yeni göçler sona eklenir, mevcutlar değiştirilmez
+# (1. göç yalnızca uygulanamadığı veritabanlarında yeniden çalışacağı için çift kayıt temizliği eklendi;
+# 2. göçün modelden çıkarılan indeksleri, henüz uygulanmadığı veritabanlarında boşuna oluşturulmasın
+# diye listeden çıkarıldı, uygulandığı veritabanlarında 4. göçle silinir)
+MIGRATIONS: List[Migration] = [
+    Migration(1, "parking_records_active_vehicle_unique", _unique_active_record_index),
+    Migration(2, "parking_records_hot_path_indexes",
+              _create_indexes("ix_parking_records_vehicle_id_entry_time")),
+    Migration(3, "parking_records_keyset_indexes",
+              _create_indexes("ix_parking_records_entry_time_id",
+                              "ix_parking_records_parking_entry_time_id")),
+    Migration(4, "parking_records_consolidate_indexes", _consolidate_indexes),
+]
+
+
+def applied_versions(connection: Connection) -> List[int]:
+    schema_migrations.create(connection, checkfirst=True)
+    return sorted(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(connection: Connection) -> List[Migration]:
+    applied = set(applied_versions(connection))
+    return [migration for migration in MIGRATIONS if migration.version not in applied]
+
+
+def run_migrations(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """
+    Bekleyen göçleri sırayla uygular. Her göç kendi işleminde (PostgreSQL'de
+    autocommit kipinde, zaman aşımı olmadan) çalışır; bir göç başarısız olursa
+    sonraki göçler uygulanmaz ve hata yükseltilir.
+
+    Args:
+        engine: Veritabanı motoru
+        target: Bu sürüme kadar uygula (verilmezse tümü)
+
+    Returns:
+        Uygulanan göç sürümleri
+    """
+    applied = []
+    with engine.connect() as connection:
+        is_postgresql = connection.dialect.name == "postgresql"
+        if is_postgresql:
+            # CREATE INDEX CONCURRENTLY işlem bloğunda çalışamaz; büyük tablolarda
+            # indeks oluşturma statement_timeout'a takılmamalı
+            connection.execution_options(isolation_level="AUTOCOMMIT")
+            connection.exec_driver_sql("SET statement_timeout = 0")
+            connection.exec_driver_sql(f"SELECT pg_advisory_lock({_ADVISORY_LOCK_KEY})")
+            connection.commit()
+        try:
+            with connection.begin():
+                pending = pending_migrations(connection)
+            for migration in pending:
+                if target is not None and migration.version > target:
+                    break
+                logger.info(f"Göç uygulanıyor: {migration.version} {migration.name}")
+                with connection.begin():
+                    migration.upgrade(connection)
+                    connection.execute(schema_migrations.insert().values(
+                        version=migration.version, name=migration.name,
+                        applied_at=datetime.datetime.now(datetime.timezone.utc),
+                    ))
+                applied.append(migration.version)
+        finally:
+            if is_postgresql:
+                connection.exec_driver_sql(f"SELECT pg_advisory_unlock({_ADVISORY_LOCK_KEY})")
+                # Havuza dönen bağlantı servisin varsayılan zaman aşımına döner
+                connection.exec_driver_sql("RESET statement_timeout")
+                connection.commit()
+
+    if applied:
+        logger.info(f"Uygulanan göçler: {applied}")
+    else:
+        logger.info("Veritabanı şeması güncel, bekleyen göç yok")
+    return applied
+
+
+if __name__ == "__main__":
+    from .database import engine as _engine
+
+    logging.basicConfig(level=logging.INFO)
+    if "--status" in sys.argv:
+        with _engine.begin() as _connection:
+            _applied = set(applied_versions(_connection))
+        for _migration in MIGRATIONS:
+            print(f"{'[x]' if _migration.version in _applied else '[ ]'} {_migration.version:04d} {_migration.name}")
+    else:
+        run_migrations(_engine)
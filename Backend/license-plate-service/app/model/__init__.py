@@ -2,7 +2,8 @@
 Plaka tespiti, takibi ve okunması için gerekli fonksiyonları içeren model modülü
 """
 
-__all__ = ['process_image_for_plate_recognition', 'read_license_plate_enhanced']
+__all__ = ['process_image_for_plate_recognition', 'process_images_for_plate_recognition', 'read_license_plate_enhanced', 'get_model_stats', 'resolve_detection_mode',
+           'inference_scheduler', 'recognition_pool', 'recognition_cache', 'RecognitionBusyError']
 
 import cv2
 import numpy as np
@@ -12,249 +13,454 @@ import time
 from pathlib import Path
 from typing import Dict, Tuple, List, Any, Optional, Union
 
+from ..config import DETECTION_MODE, DETECTION_MODE_BY_PARKING
+from ..monitoring import VEHICLE_DETECTION_PASSES
+from .debug_capture import debug_capture
+from .roi import RegionOfInterest, prepare_inference_view, roi_for_parking
+from .ingest import DecodedImage, decode_image
+from .scheduler import inference_scheduler, RecognitionBusyError
+from .worker_pool import recognition_pool
+from .result_cache import recognition_cache
+
 # Loglama yapılandırması
 logger = logging.getLogger(__name__)
 
+# Model modülü (app.model.main) ilk kullanımda bir kez içe aktarılır ve saklanır;
+# modeller registry üzerinden worker süreci başına bir kez yüklenir
+_model_module = None
+
+def _get_model_module():
+    """Model modülünü ilk çağrıda içe aktarır, sonraki çağrılarda saklananı döndürür"""
+    global _model_module
+    if _model_module is None:
+        from . import main as model_module
+        _model_module = model_module
+        logger.info("Model modülleri başarıyla yüklendi")
+    return _model_module
+
+# Araç tespit modları
+DETECTION_MODES = ("full", "plate_only", "lazy")
+
+# Bu skorun altındaki plaka tespitleri yok sayılır
+PLATE_SCORE_THRESHOLD = 0.3
+
+def resolve_detection_mode(parking_id: Optional[int] = None, requested: Optional[str] = None) -> str:
+    """
+    Kullanılacak araç tespit modunu belirler.
+
+    Öncelik sırası: istekte verilen mod, otopark için yapılandırılmış mod,
+    DETECTION_MODE varsayılanı. Geçersiz modlar yok sayılır.
+    """
+    for mode in (requested, DETECTION_MODE_BY_PARKING.get(str(parking_id)) if parking_id is not None else None, DETECTION_MODE):
+        if mode in DETECTION_MODES:
+            return mode
+        if mode:
+            logger.warning(f"Geçersiz tespit modu yok sayıldı: {mode}")
+    return "full"
+
+def get_model_stats() -> Dict[str, Any]:
+    """Bu süreçte yüklenen modellerin yükleme süresi, bellek, OCR kaskad ve zamanlayıcı istatistiklerini döndürür"""
+    from .registry import registry
+    from .ocr_cascade import ocr_cascade
+    return {
+        **registry.stats(),
+        "ocr_cascade": ocr_cascade.stats(),
+        "inference_scheduler": inference_scheduler.stats(),
+        "recognition_pool": recognition_pool.stats(),
+        "recognition_cache": recognition_cache.stats(),
+    }
+
+def _track_vehicles(detections: Optional[List[List[float]]]) -> np.ndarray:
+    """
+    Araç tespitlerini filtreler ve her araca basit bir takip ID'si atar.
+
+    Args:
+        detections: Orijinal kare koordinatlarında [x1, y1, x2, y2, skor, sınıf] satırları
+
+    Returns:
+        [x1, y1, x2, y2, car_id] satırlarından oluşan dizi; araç yoksa
+        (veya araç tespiti atlandıysa) boş dizi
+    """
+    if detections is None:
+        return np.array([])
+    vehicles = [2, 3, 5, 7]  # COCO sınıfları: car, motorcycle, bus, truck
+    detections_ = []
+    
+    # Araçları filtrele
+    for detection in detections:
+        x1, y1, x2, y2, score, class_id = detection
+        class_id = int(class_id)
+        if class_id in vehicles and score > 0.3:  # Güven skoru filtresi
+            detections_.append([x1, y1, x2, y2, score])
+    
+    logger.info(f"Tespit edilen araç sayısı: {len(detections_)}")
+    
+    # SORT tracker yok - boş bir dizi oluştur
+    track_ids = np.array([])
+    if len(detections_) > 0:
+        # Her tespit için bir ID atayarak basit track_ids oluştur
+        track_ids = np.zeros((len(detections_), 5))
+        for i, det in enumerate(detections_):
+            x1, y1, x2, y2, score = det
+            track_ids[i] = [x1, y1, x2, y2, i+1]  # i+1 ile ID ata
+        
+        logger.info(f"Basit araç takibi: {len(track_ids)} araç")
+    else:
+        logger.info("Takip edilecek araç yok")
+    return track_ids
+
+def _collect_plate_crops(image: DecodedImage,
+                         plate_detections: List[List[float]]) -> Tuple[List[Tuple[int, List[float]]], List[np.ndarray]]:
+    """
+    Güven skoru yeterli plaka tespitlerini ve kırpıntılarını toplar. Kırpıntılar
+    kopyalanmaz; OCR için yeterli çözünürlükteki kareden alınan görünümlerdir.
+
+    Returns:
+        ((tespit sırası, tespit) listesi, plaka kırpıntıları listesi)
+    """
+    plates = []
+    crops = []
+    for i, license_plate in enumerate(plate_detections):
+        x1, y1, x2, y2, score, class_id = license_plate
+        
+        # Güven skoru çok düşük plakaları atla
+        if score < PLATE_SCORE_THRESHOLD:
+            continue
+        
+        plates.append((i, license_plate))
+        crops.append(image.region(x1, y1, x2, y2))
+    return plates, crops
+
+def _assign_plate_results(frame_results: Dict[Any, Any], plates: List[Tuple[int, List[float]]],
+                          readings: List[Tuple[Optional[str], float]], track_ids: np.ndarray,
+                          get_car) -> List[str]:
+    """
+    Okunan plakaları araçlarla eşleştirip kare sonuçlarına yazar.
+
+    Araca eşleştirilemeyen (veya hiç araç tespit edilmeyen) plakalar `plate_{i}`
+    anahtarıyla, plakanın çevresi genişletilerek araç kutusu olarak kaydedilir.
+
+    Returns:
+        Okunan plaka metinleri listesi
+    """
+    license_plate_results = []
+    for (i, license_plate), (license_plate_text, license_plate_text_score) in zip(plates, readings):
+        try:
+            if license_plate_text is None:
+                continue
+            x1, y1, x2, y2, score, class_id = license_plate
+            
+            # Plakaya ait araç var mı?
+            car_id = -1
+            if len(track_ids) > 0:
+                xcar1, ycar1, xcar2, ycar2, car_id = get_car(license_plate, track_ids)
+            
+            if car_id != -1:
+                result_id = car_id
+                car_bbox = [xcar1, ycar1, xcar2, ycar2]
+            else:
+                # Araç eşleştirilemedi, ama plaka var
+                result_id = f"plate_{i}"
+                car_bbox = [x1-50, y1-50, x2+50, y2+50]  # Plakanın çevresini genişlet
+            
+            frame_results[result_id] = {
+                'car': {'bbox': car_bbox},
+                'license_plate': {
+                    'bbox': [x1, y1, x2, y2],
+                    'text': license_plate_text,
+                    'bbox_score': score,
+                    'text_score': license_plate_text_score
+                }
+            }
+            license_plate_results.append(license_plate_text)
+        except Exception as e:
+            logger.error(f"Plaka işleme hatası ({i}): {str(e)}")
+    return license_plate_results
+
+def _draw_debug_frame(image: DecodedImage, track_ids: np.ndarray, plates: List[Tuple[int, List[float]]],
+                      readings: List[Tuple[Optional[str], float]]) -> np.ndarray:
+    """
+    Araç ve plaka kutularını ve okunan metinleri tam çözünürlüklü karenin bir
+    kopyasına çizer. Yalnızca kaydedilecek debug oturumları için çağrılır.
+    """
+    debug_frame = image.full().copy()
+    for x1, y1, x2, y2, car_id in track_ids:
+        cv2.rectangle(debug_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+        cv2.putText(debug_frame, f"Car {int(car_id)}", (int(x1), int(y1)-10), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+    for (i, license_plate), (license_plate_text, _) in zip(plates, readings):
+        x1, y1, x2, y2 = license_plate[:4]
+        cv2.rectangle(debug_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 255), 2)
+        if license_plate_text is not None:
+            cv2.putText(debug_frame, license_plate_text, (int(x1), int(y2)+20), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+    return debug_frame
+
+def _load_frame(image: Union[str, np.ndarray, bytes], roi: Optional[RegionOfInterest] = None) -> Optional[DecodedImage]:
+    """
+    Görüntüyü çıkarım için çözer.
+
+    Bytes ve dosya yolları gerekirse küçültülmüş çözünürlükte çözülür (bkz. ingest);
+    numpy dizileri kopyalanmadan kullanılır.
+
+    Returns:
+        Çözülmüş görüntü; format desteklenmiyorsa None. Çözülemeyen görüntüler için boş bir çerçeve döner.
+    """
+    decoded = None
+    try:
+        if isinstance(image, str):
+            # Dosya yolu olarak verildiyse
+            decoded = decode_image(np.fromfile(image, dtype=np.uint8), roi=roi)
+            logger.info(f"Görüntü dosyadan yüklendi: {image}")
+        elif isinstance(image, np.ndarray):
+            # Numpy dizisi olarak verildiyse (yalnızca okunur, kopyalanmaz)
+            decoded = DecodedImage(image)
+            logger.info("Görüntü numpy dizisinden yüklendi")
+        elif isinstance(image, (bytes, bytearray, memoryview)):
+            # Bytes olarak verildiyse
+            decoded = decode_image(image, roi=roi)
+            logger.info("Görüntü bytes verisinden yüklendi")
+        else:
+            logger.error(f"Desteklenmeyen görüntü formatı: {type(image)}")
+            return None
+        
+        if decoded is None:
+            logger.warning("Görüntü yüklenemedi veya boş")
+            decoded = DecodedImage(np.zeros((300, 300, 3), dtype=np.uint8))  # Boş bir çerçeve oluştur
+    except Exception as e:
+        logger.error(f"Görüntü yükleme hatası: {str(e)}")
+        decoded = DecodedImage(np.zeros((300, 300, 3), dtype=np.uint8))  # Boş bir çerçeve oluştur
+    return decoded
+
+def _run_detector(detector, frames: List[np.ndarray]) -> List[Any]:
+    """
+    Dedektörü tüm karelerde tek bir toplu çağrıyla çalıştırır.
+
+    Ultralytics modelleri görüntü listesi alıp her kare için bir sonuç döndürür.
+    Toplu çağrı desteklenmiyorsa (ör. mock dedektör) kareler tek tek işlenir.
+    """
+    if len(frames) > 1:
+        detections = list(detector(frames))
+        if len(detections) == len(frames):
+            return detections
+    return [detector(frame)[0] for frame in frames]
+
+def _per_image(value: Any, count: int) -> List[Any]:
+    """Tüm görüntüler için tek değer veya görüntü başına liste olarak verilen parametreyi listeye çevirir"""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value] * count
+
+def _needs_vehicle_detection(mode: str, license_plates: List[List[float]]) -> bool:
+    """
+    Karede araç tespitinin gerekip gerekmediğini belirler.
+
+    Araç kutuları yalnızca plakayı araca eşleştirmek için kullanılır; eşleşme
+    olmadığında plaka kutusu genişletilerek araç kutusu olarak kullanılır.
+    lazy modda araç tespiti yalnızca birden fazla plaka bulunduğunda (plakaları
+    araçlara ayırmak gerektiğinde) çalıştırılır.
+    """
+    if mode == "full":
+        return True
+    if mode == "lazy":
+        return sum(1 for plate in license_plates if plate[4] >= PLATE_SCORE_THRESHOLD) > 1
+    return False
+
+def _test_result() -> Dict[str, Any]:
+    """Model yüklenemediğinde döndürülen sabit test sonucu"""
+    return {
+        "warning": "Model yüklenemedi, test sonuçları döndürülüyor",
+        "results": {
+            "0": {
+                "license_plate": {
+                    "text": "34ABC123",
+                    "text_score": 0.9,
+                    "bbox": [100, 100, 200, 150]
+                }
+            }
+        },
+        "license_plates": ["34ABC123"]
+    }
+
+def _error_result(message: str) -> Dict[str, Any]:
+    return {"error": message, "results": {}, "license_plates": []}
+
 # Plaka işleme fonksiyonu - API tarafından çağrılır
-def process_image_for_plate_recognition(image: Union[str, np.ndarray, bytes], save_debug: bool = False) -> Dict[str, Any]:
+def process_image_for_plate_recognition(image: Union[str, np.ndarray, bytes], save_debug: bool = False,
+                                        detection_mode: Optional[str] = None,
+                                        parking_id: Optional[int] = None,
+                                        gate: Optional[str] = None) -> Dict[str, Any]:
     """
     Verilen görüntüdeki plakaları tespit edip okuyan ana fonksiyon.
     
     Args:
         image: Görüntü dosyası yolu, numpy dizisi veya bytes şeklinde görüntü verisi
         save_debug: Hata ayıklama görüntülerini kaydetme seçeneği
+        detection_mode: Araç tespit modu (full, plate_only, lazy); verilmezse otopark ayarı kullanılır
+        parking_id: Görüntünün geldiği otopark (otopark bazlı ayarlar için)
+        gate: Görüntünün geldiği kapı/kamera (kapı bazlı ROI için, ör. entry, exit)
         
     Returns:
         Dict: Tespit edilen plakalar ve araçlar hakkında bilgi içeren sözlük
     """
+    return process_images_for_plate_recognition([image], save_debug=[save_debug],
+                                                detection_mode=[detection_mode], parking_id=[parking_id],
+                                                gate=[gate])[0]
+
+def process_images_for_plate_recognition(images: List[Union[str, np.ndarray, bytes]],
+                                         save_debug: Union[bool, List[bool]] = False,
+                                         detection_mode: Union[Optional[str], List[Optional[str]]] = None,
+                                         parking_id: Union[Optional[int], List[Optional[int]]] = None,
+                                         gate: Union[Optional[str], List[Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Birden fazla görüntüyü tek seferde işler (mikro-toplu çıkarım).
+
+    Araç ve plaka dedektörleri tüm karelerde birer toplu çağrıyla, tüm karelerdeki
+    plaka kırpıntıları da tek bir toplu OCR çağrısıyla çalıştırılır. Her görüntü
+    için process_image_for_plate_recognition ile aynı yapıda bir sonuç döner.
+
+    Args:
+        images: Görüntü listesi (dosya yolu, numpy dizisi veya bytes)
+        save_debug: Tüm görüntüler için veya görüntü başına debug kayıt seçeneği
+        detection_mode: Tüm görüntüler için veya görüntü başına araç tespit modu
+        parking_id: Tüm görüntüler için veya görüntü başına otopark ID'si
+        gate: Tüm görüntüler için veya görüntü başına kapı/kamera
+
+    Returns:
+        Giriş sırasıyla her görüntü için sonuç sözlüğü
+    """
+    if not images:
+        return []
+    save_debug_flags = _per_image(save_debug, len(images))
+    parking_ids = _per_image(parking_id, len(images))
+    detection_modes = [resolve_detection_mode(pid, mode)
+                       for pid, mode in zip(parking_ids, _per_image(detection_mode, len(images)))]
+
     try:
-        logger.info("Plaka tanıma işlemi başlatılıyor...")
+        logger.info(f"Plaka tanıma işlemi başlatılıyor ({len(images)} görüntü)...")
         
-        # Ana modül içeriklerini yükle
+        # Ana modül içeriklerini yükle (yalnızca ilk çağrıda içe aktarılır)
         try:
             # SORT/mot_tracker kaldırıldı
-            from .main import coco_model, license_plate_detector, read_license_plate_enhanced, USE_REAL_MODEL
-            logger.info("Model modülleri başarıyla yüklendi")
+            model_module = _get_model_module()
+            coco_model = model_module.coco_model
+            license_plate_detector = model_module.license_plate_detector
+            get_car = model_module.get_car
+            USE_REAL_MODEL = model_module.USE_REAL_MODEL
         except ImportError as e:
             logger.error(f"Model modüllerini içe aktarırken hata: {str(e)}")
             # Basit bir mock sonuç döndür
-            return {"error": f"Model modülleri yüklenemedi: {str(e)}", "results": {}, "license_plates": []}
-        
-        # Görüntüyü doğru formata dönüştür
-        frame = None
+            return [_error_result(f"Model modülleri yüklenemedi: {str(e)}") for _ in images]
         
-        # Görüntü yükleme
-        try:
-            if isinstance(image, str):
-                # Dosya yolu olarak verildiyse
-                frame = cv2.imread(image)
-                logger.info(f"Görüntü dosyadan yüklendi: {image}")
-            elif isinstance(image, np.ndarray):
-                # Numpy dizisi olarak verildiyse
-                frame = image.copy()
-                logger.info("Görüntü numpy dizisinden yüklendi")
-            elif isinstance(image, bytes):
-                # Bytes olarak verildiyse
-                nparr = np.frombuffer(image, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                logger.info("Görüntü bytes verisinden yüklendi")
-            else:
-                logger.error(f"Desteklenmeyen görüntü formatı: {type(image)}")
-                return {"error": "Desteklenmeyen görüntü formatı", "results": {}, "license_plates": []}
-            
+        # Görüntüleri doğru formata dönüştür; desteklenmeyenler hata sonucu alır
+        outputs: List[Optional[Dict[str, Any]]] = [None] * len(images)
+        indices = []
+        frames = []
+        rois = [roi_for_parking(pid, image_gate) for pid, image_gate in zip(parking_ids, _per_image(gate, len(images)))]
+        for index, image in enumerate(images):
+            frame = _load_frame(image, rois[index])
             if frame is None:
-                logger.warning("Görüntü yüklenemedi veya boş")
-                frame = np.zeros((300, 300, 3), dtype=np.uint8)  # Boş bir çerçeve oluştur
-        except Exception as e:
-            logger.error(f"Görüntü yükleme hatası: {str(e)}")
-            frame = np.zeros((300, 300, 3), dtype=np.uint8)  # Boş bir çerçeve oluştur
-        
-        # Sonuçlar için veri yapısı oluştur
-        results = {}
-        frame_nmr = 0
-        results[frame_nmr] = {}
-        
-        # Debug görselleştirmesi için çerçeveyi kopyala
-        debug_frame = frame.copy() if save_debug else None
+                outputs[index] = _error_result("Desteklenmeyen görüntü formatı")
+            else:
+                indices.append(index)
+                frames.append(frame)
         
         # Test amaçlı, model yüklenemezse sabit bir sonuç döndür
         if not USE_REAL_MODEL:
             logger.warning("Gerçek model yüklenemedi - test verisi döndürülüyor")
-            return {
-                "warning": "Model yüklenemedi, test sonuçları döndürülüyor",
-                "results": {
-                    "0": {
-                        "license_plate": {
-                            "text": "34ABC123",
-                            "text_score": 0.9,
-                            "bbox": [100, 100, 200, 150]
-                        }
-                    }
-                },
-                "license_plates": ["34ABC123"]
-            }
-        
-        # Araç tespiti yap
-        logger.info("Araç tespiti yapılıyor...")
-        vehicles = [2, 3, 5, 7]  # COCO sınıfları: car, motorcycle, bus, truck
+            for index in indices:
+                outputs[index] = _test_result()
+            return outputs
+        if not frames:
+            return outputs
         
         try:
-            detections = coco_model(frame)[0]
-            detections_ = []
-            
-            # Araçları filtrele
-            for detection in detections.boxes.data.tolist():
-                x1, y1, x2, y2, score, class_id = detection
-                class_id = int(class_id)
-                if class_id in vehicles and score > 0.3:  # Güven skoru filtresi
-                    detections_.append([x1, y1, x2, y2, score])
+            # Dedektörler yalnızca şerit bölgesini (ROI), çıkarım boyutuna küçültülmüş olarak görür;
+            # tespitler orijinal kare koordinatlarına geri çevrilir
+            views = [prepare_inference_view(frame.frame, rois[index], source_scale=frame.scale, frame_shape=frame.shape)
+                     for index, frame in zip(indices, frames)]
             
-            logger.info(f"Tespit edilen araç sayısı: {len(detections_)}")
-            
-            # SORT tracker yok - boş bir dizi oluştur
-            track_ids = np.array([])
-            if len(detections_) > 0:
-                # Her tespit için bir ID atayarak basit track_ids oluştur
-                track_ids = np.zeros((len(detections_), 5))
-                for i, det in enumerate(detections_):
-                    x1, y1, x2, y2, score = det
-                    track_ids[i] = [x1, y1, x2, y2, i+1]  # i+1 ile ID ata
-                
-                logger.info(f"Basit araç takibi: {len(track_ids)} araç")
-                
-                # Takip edilen araçları görselleştir
-                if save_debug and debug_frame is not None:
-                    for car in track_ids:
-                        x1, y1, x2, y2, car_id = car
-                        cv2.rectangle(debug_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-                        cv2.putText(debug_frame, f"Car {int(car_id)}", (int(x1), int(y1)-10), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-            else:
-                logger.info("Takip edilecek araç yok")
-            
-            # Plaka tespiti yap
+            # Plaka tespiti - tüm kareler için tek bir toplu çağrı
             logger.info("Plaka tespiti yapılıyor...")
-            license_plates = license_plate_detector(frame)[0]
-            logger.info(f"Tespit edilen plaka sayısı: {len(license_plates.boxes.data)}")
+            plate_detections = [view.to_original(detections, inside_roi=True) for view, detections in
+                                zip(views, _run_detector(license_plate_detector, [view.image for view in views]))]
             
-            license_plate_results = []
-            
-            # Tespit edilen plakaları işle
-            for i, license_plate in enumerate(license_plates.boxes.data.tolist()):
-                try:
-                    x1, y1, x2, y2, score, class_id = license_plate
-                    
-                    # Güven skoru çok düşük plakaları atla
-                    if score < 0.3:
-                        continue
-                    
-                    # Plakayı görselleştir
-                    if save_debug and debug_frame is not None:
-                        cv2.rectangle(debug_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 255), 2)
-                    
-                    # Plaka görüntüsünü kırp
-                    license_plate_crop = frame[int(y1):int(y2), int(x1): int(x2), :]
-                    
-                    # Plakayı oku
-                    from .main import read_license_plate_enhanced
-                    license_plate_text, license_plate_text_score = read_license_plate_enhanced(license_plate_crop)
-                    
-                    if license_plate_text is not None:
-                        # Plakaya ait araç var mı?
-                        if len(track_ids) > 0:
-                            from .util import get_car
-                            xcar1, ycar1, xcar2, ycar2, car_id = get_car(license_plate, track_ids)
-                            
-                            # Araca eşleştirebildiysek
-                            if car_id != -1:
-                                results[frame_nmr][car_id] = {
-                                    'car': {'bbox': [xcar1, ycar1, xcar2, ycar2]},
-                                    'license_plate': {
-                                        'bbox': [x1, y1, x2, y2],
-                                        'text': license_plate_text,
-                                        'bbox_score': score,
-                                        'text_score': license_plate_text_score
-                                    }
-                                }
-                                license_plate_results.append(license_plate_text)
-                                
-                                # Görselleştirmede metni göster
-                                if save_debug and debug_frame is not None:
-                                    cv2.putText(debug_frame, license_plate_text, (int(x1), int(y2)+20), 
-                                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                            else:
-                                # Araç eşleştirilemedi, ama plaka var
-                                placeholder_id = f"plate_{i}"
-                                results[frame_nmr][placeholder_id] = {
-                                    'car': {'bbox': [x1-50, y1-50, x2+50, y2+50]},  # Plakanın çevresini genişlet
-                                    'license_plate': {
-                                        'bbox': [x1, y1, x2, y2],
-                                        'text': license_plate_text,
-                                        'bbox_score': score,
-                                        'text_score': license_plate_text_score
-                                    }
-                                }
-                                license_plate_results.append(license_plate_text)
-                                
-                                # Görselleştirmede metni göster
-                                if save_debug and debug_frame is not None:
-                                    cv2.putText(debug_frame, license_plate_text, (int(x1), int(y2)+20), 
-                                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                        else:
-                            # Hiç araç tespiti yoksa, plakayı doğrudan işle
-                            placeholder_id = f"plate_{i}"
-                            results[frame_nmr][placeholder_id] = {
-                                'car': {'bbox': [x1-50, y1-50, x2+50, y2+50]},  # Plakanın çevresini genişlet
-                                'license_plate': {
-                                    'bbox': [x1, y1, x2, y2],
-                                    'text': license_plate_text,
-                                    'bbox_score': score,
-                                    'text_score': license_plate_text_score
-                                }
-                            }
-                            license_plate_results.append(license_plate_text)
-                            
-                            # Görselleştirmede metni göster
-                            if save_debug and debug_frame is not None:
-                                cv2.putText(debug_frame, license_plate_text, (int(x1), int(y2)+20), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                except Exception as e:
-                    logger.error(f"Plaka işleme hatası ({i}): {str(e)}")
+            # Araç tespiti yalnızca moda göre gereken karelerde, tek bir toplu çağrıyla
+            vehicle_detections = [None] * len(frames)
+            needs_vehicles = []
+            for k, (index, license_plates) in enumerate(zip(indices, plate_detections)):
+                mode = detection_modes[index]
+                needed = _needs_vehicle_detection(mode, license_plates)
+                VEHICLE_DETECTION_PASSES.labels(mode=mode, result="run" if needed else "skipped").inc()
+                if needed:
+                    needs_vehicles.append(k)
+            if needs_vehicles:
+                logger.info(f"Araç tespiti yapılıyor ({len(needs_vehicles)}/{len(frames)} kare)...")
+                for k, detections in zip(needs_vehicles, _run_detector(coco_model, [views[k].image for k in needs_vehicles])):
+                    vehicle_detections[k] = views[k].to_original(detections)
+            else:
+                logger.info("Araç tespiti atlandı (plate_only/lazy mod)")
+        except Exception as e:
+            logger.error(f"Görüntü işleme hatası: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            for index in indices:
+                outputs[index] = _error_result(f"Görüntü işleme hatası: {str(e)}")
+            return outputs
+        
+        # Kare başına araç takibi ve plaka kırpıntıları
+        frame_states = []
+        all_crops = []
+        all_debugs = []
+        for index, frame, detections, license_plates in zip(indices, frames, vehicle_detections, plate_detections):
+            try:
+                # Debug kayıt oturumu - kapalıyken hiçbir kopya veya disk yazımı yapılmaz
+                debug = debug_capture.begin(force=save_debug_flags[index])
+                track_ids = _track_vehicles(detections)
+                logger.info(f"Tespit edilen plaka sayısı: {len(license_plates)}")
+                plates, crops = _collect_plate_crops(frame, license_plates)
+            except Exception as e:
+                logger.error(f"Görüntü işleme hatası: {str(e)}")
+                outputs[index] = _error_result(f"Görüntü işleme hatası: {str(e)}")
+                continue
+            frame_states.append((index, frame, debug, track_ids, plates, len(all_crops)))
+            all_crops.extend(crops)
+            all_debugs.extend([debug] * len(crops))
+        
+        # Tüm karelerdeki plaka kırpıntılarını tek bir toplu OCR çağrısında oku
+        readings = model_module.read_license_plates_batched(all_crops, debugs=all_debugs)
+        
+        for index, frame, debug, track_ids, plates, offset in frame_states:
+            results = {}
+            frame_nmr = 0
+            results[frame_nmr] = {}
+            frame_readings = readings[offset:offset + len(plates)]
+            license_plate_results = _assign_plate_results(results[frame_nmr], plates, frame_readings,
+                                                          track_ids, get_car)
             
-            # Debug görüntüsünü kaydet
-            if save_debug and debug_frame is not None:
-                debug_dir = "./debug_plates"
-                os.makedirs(debug_dir, exist_ok=True)
-                debug_path = f"{debug_dir}/result_{int(time.time())}.jpg"
-                cv2.imwrite(debug_path, debug_frame)
-                logger.info(f"Debug görüntüsü kaydedildi: {debug_path}")
+            # Debug görüntülerini arka plan yazıcısına ver. Örnekleme kararı OCR sonrası
+            # verilir; tam kare yalnızca kaydedilecekse kopyalanıp üzerine çizilir
+            if debug.active:
+                text_scores = [r['license_plate']['text_score'] for r in results[frame_nmr].values()
+                               if r['license_plate'].get('text_score') is not None]
+                confidence = min(text_scores) if text_scores else None
+                if debug.wants(confidence):
+                    debug.add("result", _draw_debug_frame(frame, track_ids, plates, frame_readings))
+                debug.commit(confidence)
             
             # Sonuçları döndür
-            return {
+            outputs[index] = {
                 "results": results,
                 "license_plates": license_plate_results,
                 "timestamp": time.time()
             }
-            
-        except Exception as e:
-            logger.error(f"Görüntü işleme hatası: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "error": f"Görüntü işleme hatası: {str(e)}",
-                "results": {},
-                "license_plates": []
-            }
+        return outputs
     
     except Exception as e:
         logger.error(f"Genel işlem hatası: {str(e)}")
         import traceback
         traceback.print_exc()
-        return {
-            "error": f"Genel işlem hatası: {str(e)}",
-            "results": {},
-            "license_plates": []
-        }
+        return [_error_result(f"Genel işlem hatası: {str(e)}") for _ in images]
 
 # Test için
 if __name__ == "__main__":
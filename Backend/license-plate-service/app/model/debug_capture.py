@@ -0,0 +1,235 @@
+"""
+Debug görüntü kaydı: plaka kırpıntıları ve işlenmiş varyantlar istek akışını
+bloklamadan, sınırlı bir kuyruk üzerinden arka plan thread'i ile diske yazılır.
+
+Varsayılan olarak kapalıdır. Açıkken her N istekten biri ve düşük güvenli
+okumalar kaydedilir; klasör boyut ve yaş sınırına göre döndürülür.
+"""
+
+import os
+import time
+import queue
+import logging
+import itertools
+import threading
+from typing import Any, List, Optional, Tuple
+
+import cv2
+
+from ..config import (
+    DEBUG_CAPTURE_ENABLED, DEBUG_CAPTURE_DIR, DEBUG_CAPTURE_SAMPLE_RATE,
+    DEBUG_CAPTURE_LOW_CONFIDENCE, DEBUG_CAPTURE_QUEUE_SIZE,
+    DEBUG_CAPTURE_MAX_MB, DEBUG_CAPTURE_MAX_AGE_HOURS
+)
+from ..monitoring import DEBUG_CAPTURE_IMAGES
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+
+class _NullCaptureSession:
+    """Kayıt kapalıyken kullanılan, hiçbir şey yapmayan oturum"""
+    active = False
+
+    def add(self, name: str, image: Any) -> None:
+        pass
+
+    def wants(self, confidence: Optional[float] = None) -> bool:
+        return False
+
+    def commit(self, confidence: Optional[float] = None) -> None:
+        pass
+
+
+NULL_SESSION = _NullCaptureSession()
+
+
+class DebugCaptureSession:
+    """Tek bir isteğe ait debug görüntülerini toplar, istek sonunda kuyruğa verir"""
+    active = True
+
+    def __init__(self, capture: "DebugCapture", request_id: str, sampled: bool, forced: bool):
+        self._capture = capture
+        self.request_id = request_id
+        self.sampled = sampled
+        self.forced = forced
+        self._images: List[Tuple[str, Any]] = []
+
+    def add(self, name: str, image: Any) -> None:
+        """Görüntüyü oturuma ekler (diske yazma commit sonrası arka planda yapılır)"""
+        if image is not None:
+            self._images.append((f"{len(self._images):02d}_{name}", image))
+
+    def wants(self, confidence: Optional[float] = None) -> bool:
+        """
+        Verilen en düşük güvenle oturumun yazılıp yazılmayacağı (örnekleme kararı).
+        Pahalı debug görüntüleri (tam kare kopyası, çizimler) yalnızca True ise üretilmelidir.
+        """
+        low_confidence = confidence is None or confidence < self._capture.low_confidence
+        return self.forced or self.sampled or low_confidence
+
+    def commit(self, confidence: Optional[float] = None) -> None:
+        """Örnekleme kararına göre görüntüleri yazma kuyruğuna gönderir"""
+        images, self._images = self._images, []
+        if images and self.wants(confidence):
+            self._capture.submit(self.request_id, images)
+
+
+class DebugCapture:
+    """Sınırlı kuyruklu, örneklemeli ve döndürmeli asenkron debug görüntü yazıcısı"""
+
+    def __init__(self,
+                 directory: str = DEBUG_CAPTURE_DIR,
+                 enabled: bool = DEBUG_CAPTURE_ENABLED,
+                 sample_rate: int = DEBUG_CAPTURE_SAMPLE_RATE,
+                 low_confidence: float = DEBUG_CAPTURE_LOW_CONFIDENCE,
+                 queue_size: int = DEBUG_CAPTURE_QUEUE_SIZE,
+                 max_bytes: int = DEBUG_CAPTURE_MAX_MB * 1024 * 1024,
+                 max_age_seconds: float = DEBUG_CAPTURE_MAX_AGE_HOURS * 3600,
+                 rotate_every: int = 50):
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = max(sample_rate, 1)
+        self.low_confidence = low_confidence
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.rotate_every = rotate_every
+        self._queue: "queue.Queue[Optional[Tuple[str, List[Tuple[str, Any]]]]]" = queue.Queue(maxsize=queue_size)
+        self._request_counter = itertools.count(1)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def begin(self, force: bool = False):
+        """
+        Yeni bir istek için kayıt oturumu başlatır.
+
+        Args:
+            force: Örneklemeden bağımsız olarak bu isteği kaydet (save_debug=True)
+
+        Returns:
+            Kayıt kapalıysa ve zorlanmadıysa NULL_SESSION, aksi halde DebugCaptureSession
+        """
+        if not (self.enabled or force):
+            return NULL_SESSION
+        sequence = next(self._request_counter)
+        request_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{sequence:06d}"
+        sampled = sequence % self.sample_rate == 0
+        return DebugCaptureSession(self, request_id, sampled, force)
+
+    def submit(self, request_id: str, images: List[Tuple[str, Any]]) -> bool:
+        """Görüntüleri bloklamadan kuyruğa ekler; kuyruk doluysa düşürür"""
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait((request_id, images))
+            return True
+        except queue.Full:
+            self.dropped += len(images)
+            DEBUG_CAPTURE_IMAGES.labels(result="dropped").inc(len(images))
+            logger.debug(f"Debug kayıt kuyruğu dolu, {len(images)} görüntü düşürüldü: {request_id}")
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Kuyruktaki tüm görüntüler yazılana kadar bekler (test ve kapanış için)"""
+        if self._writer is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _ensure_writer(self) -> None:
+        """Yazıcı thread'ini ilk ihtiyaçta başlatır"""
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._writer = threading.Thread(target=self._writer_loop, name="debug-capture-writer", daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self) -> None:
+        self._rotate()
+        writes_since_rotate = 0
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                request_id, images = item
+                for name, image in images:
+                    path = os.path.join(self.directory, f"{request_id}_{name}.jpg")
+                    try:
+                        if cv2.imwrite(path, image):
+                            self.written += 1
+                            DEBUG_CAPTURE_IMAGES.labels(result="written").inc()
+                        else:
+                            raise IOError("cv2.imwrite başarısız")
+                    except Exception as e:
+                        self.failed += 1
+                        DEBUG_CAPTURE_IMAGES.labels(result="failed").inc()
+                        logger.warning(f"Debug görüntüsü yazılamadı ({path}): {str(e)}")
+                writes_since_rotate += len(images)
+                if writes_since_rotate >= self.rotate_every:
+                    self._rotate()
+                    writes_since_rotate = 0
+            finally:
+                self._queue.task_done()
+
+    def _rotate(self) -> None:
+        """Yaş sınırını aşan dosyaları, ardından boyut sınırını aşan en eski dosyaları siler"""
+        try:
+            entries = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(".jpg"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            logger.warning(f"Debug klasörü okunamadı: {str(e)}")
+            return
+
+        now = time.time()
+        entries.sort()
+        kept = []
+        removed = 0
+        for mtime, size, path in entries:
+            if now - mtime > self.max_age_seconds:
+                removed += self._remove(path)
+            else:
+                kept.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in kept)
+        for mtime, size, path in kept:
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+
+        if removed:
+            logger.info(f"Debug klasörü döndürüldü: {removed} dosya silindi, kalan boyut={total / (1024 * 1024):.1f} MB")
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+
+# Süreç genelinde paylaşılan debug kaydedici
+debug_capture = DebugCapture()
@@ -0,0 +1,179 @@
+"""
+Görüntü alma (ingest): yüklenen görüntüyü çıkarım için gereken en düşük
+çözünürlükte çözer.
+
+Kare, dedektör girişinden (INFERENCE_MAX_SIZE) çok büyükse JPEG, libjpeg'in
+DCT ölçekleme desteğiyle doğrudan 1/2, 1/4 veya 1/8 çözünürlükte çözülür
+(cv2.IMREAD_REDUCED_COLOR_*); tam çözünürlüklü piksel dizisi hiç oluşturulmaz.
+Plaka kırpıntısı küçültülmüş karede OCR için yeterince büyük değilse görüntü
+yalnızca o zaman ve bir kez tam çözünürlükte çözülür.
+
+Koordinatlar her zaman tam çözünürlüklü kareye göredir.
+"""
+
+import logging
+from typing import Any, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from ..config import INFERENCE_MAX_SIZE, INGEST_OCR_MIN_WIDTH
+from .roi import RegionOfInterest
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+# Küçültme oranı -> OpenCV bayrağı
+_REDUCED_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+
+# Boyut bilgisi taşımayan SOF dışı işaretçiler (DHT, JPG, DAC)
+_NON_SOF_MARKERS = (0xC4, 0xC8, 0xCC)
+
+
+def image_size(data: Union[bytes, bytearray, memoryview]) -> Optional[Tuple[int, int]]:
+    """
+    JPEG veya PNG başlığından (yükseklik, genişlik) okur; görüntüyü çözmez.
+
+    Returns:
+        (yükseklik, genişlik) veya biçim tanınmazsa None
+    """
+    buffer = memoryview(data)
+    if len(buffer) >= 24 and bytes(buffer[:8]) == b"\x89PNG\r\n\x1a\n":
+        width = int.from_bytes(buffer[16:20], "big")
+        height = int.from_bytes(buffer[20:24], "big")
+        return height, width
+    if len(buffer) < 4 or buffer[0] != 0xFF or buffer[1] != 0xD8:
+        return None
+
+    position = 2
+    while position + 9 < len(buffer):
+        if buffer[position] != 0xFF:
+            return None
+        marker = buffer[position + 1]
+        if marker == 0xFF:  # Dolgu baytı
+            position += 1
+            continue
+        if 0xD0 <= marker <= 0xD9 or marker == 0x01:  # Uzunluk alanı olmayan işaretçiler
+            position += 2
+            continue
+        length = int.from_bytes(buffer[position + 2:position + 4], "big")
+        if 0xC0 <= marker <= 0xCF and marker not in _NON_SOF_MARKERS:
+            height = int.from_bytes(buffer[position + 5:position + 7], "big")
+            width = int.from_bytes(buffer[position + 7:position + 9], "big")
+            return height, width
+        position += 2 + length
+    return None
+
+
+def is_jpeg(data: Union[bytes, bytearray, memoryview]) -> bool:
+    buffer = memoryview(data)
+    return len(buffer) >= 2 and buffer[0] == 0xFF and buffer[1] == 0xD8
+
+
+def choose_reduction(size: Optional[Tuple[int, int]], target_size: int) -> int:
+    """
+    Küçültülmüş kare en uzun kenarda hâlâ target_size'dan küçük olmayacak
+    şekilde en büyük küçültme oranını (1, 2, 4, 8) seçer.
+    """
+    if not size or not target_size:
+        return 1
+    longest = max(size)
+    for factor in (8, 4, 2):
+        if longest / factor >= target_size:
+            return factor
+    return 1
+
+
+class DecodedImage:
+    """
+    Çıkarım için çözülmüş görüntü.
+
+    `frame` dedektörlerin kullandığı (gerekirse küçültülmüş) karedir; `scale`
+    bu karenin tam çözünürlüğe oranıdır. Tam çözünürlüklü kare yalnızca
+    gerektiğinde ve bir kez çözülür.
+    """
+
+    __slots__ = ("frame", "scale", "_data", "_full", "ocr_min_width")
+
+    def __init__(self, frame: np.ndarray, scale: int = 1, data: Optional[Any] = None,
+                 ocr_min_width: int = INGEST_OCR_MIN_WIDTH):
+        self.frame = frame
+        self.scale = scale
+        self._data = data
+        self._full = frame if scale == 1 else None
+        self.ocr_min_width = ocr_min_width
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Tam çözünürlüklü karenin (yaklaşık) boyutu"""
+        if self._full is not None:
+            return self._full.shape
+        height, width = self.frame.shape[:2]
+        return (height * self.scale, width * self.scale) + tuple(self.frame.shape[2:])
+
+    @property
+    def is_reduced(self) -> bool:
+        return self._full is None
+
+    def full(self) -> np.ndarray:
+        """Tam çözünürlüklü kareyi döndürür (ilk çağrıda çözülür)"""
+        if self._full is None:
+            self._full = cv2.imdecode(np.frombuffer(self._data, np.uint8), cv2.IMREAD_COLOR)
+            if self._full is None:
+                # Tam çözünürlükte çözülemezse küçültülmüş kareyi büyüt
+                height, width = self.frame.shape[:2]
+                self._full = cv2.resize(self.frame, (width * self.scale, height * self.scale))
+            logger.debug(f"Görüntü OCR için tam çözünürlükte çözüldü: {self._full.shape}")
+        return self._full
+
+    def region(self, x1: float, y1: float, x2: float, y2: float) -> np.ndarray:
+        """
+        Tam çözünürlük koordinatlarındaki bölgeyi döndürür (kopyalamadan).
+
+        Bölge küçültülmüş karede en az `ocr_min_width` piksel genişliğindeyse
+        küçültülmüş kareden alınır; aksi halde tam çözünürlüklü kareden alınır.
+        """
+        if self._full is None and (x2 - x1) / self.scale >= self.ocr_min_width:
+            s = self.scale
+            return self.frame[int(y1 / s):int(y2 / s), int(x1 / s):int(x2 / s), :]
+        return self.full()[int(y1):int(y2), int(x1):int(x2), :]
+
+
+def decode_image(data: Union[bytes, bytearray, memoryview], target_size: int = INFERENCE_MAX_SIZE,
+                 roi: Optional[RegionOfInterest] = None) -> Optional[DecodedImage]:
+    """
+    Görüntü baytlarını çıkarım için gereken en düşük çözünürlükte çözer.
+
+    Args:
+        data: Görüntü baytları (kopyalanmaz)
+        target_size: Dedektör girişinin en uzun kenarı (0: her zaman tam çözünürlük)
+        roi: Dedektöre verilecek şerit bölgesi; küçültme oranı bu bölgenin
+            boyutuna göre seçilir (küçük şeritlerde daha az küçültme yapılır)
+
+    Returns:
+        DecodedImage veya görüntü çözülemezse None
+    """
+    buffer = np.frombuffer(data, np.uint8)
+    factor = 1
+    if is_jpeg(data):
+        size = image_size(data)
+        if size is not None:
+            if roi is not None:
+                x1, y1, x2, y2 = roi.crop_box(size)
+                size = (y2 - y1, x2 - x1)
+            factor = choose_reduction(size, target_size)
+
+    if factor > 1:
+        frame = cv2.imdecode(buffer, _REDUCED_FLAGS[factor])
+        if frame is not None:
+            return DecodedImage(frame, factor, data)
+        logger.warning("Küçültülmüş çözme başarısız, tam çözünürlük deneniyor")
+
+    frame = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+    return DecodedImage(frame)
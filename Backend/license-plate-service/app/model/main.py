@@ -44,10 +44,9 @@ def load_torch_model(model_path, device='cpu'):
 # Model ve util dosyalarını import et
 from . import util
 from .util import get_car, read_license_plate, write_csv
-
-# Debug klasörü oluştur
-debug_dir = "./debug_plates"
-os.makedirs(debug_dir, exist_ok=True)
+from .registry import registry, COCO_MODEL, LICENSE_PLATE_DETECTOR, OCR_READER
+from .debug_capture import NULL_SESSION
+from .ocr_cascade import ocr_cascade
 
 # Basit YOLO çağrısı için sınıf
 class SimpleYOLO:
@@ -101,230 +100,87 @@ class MockBoxes:
     def __init__(self):
         self.data = np.zeros((0, 6))  # Boş sonuç veri yapısı
 
-# Model dosyalarını yüklemeyi dene
+# Model dosyalarının yolları
 current_dir = os.path.dirname(os.path.abspath(__file__))
-try:
-    logger.info("YOLO modellerini yüklemeye başlıyor...")
-    
-    # Yolların doğru olduğunu kontrol et
-    coco_model_path = os.path.join(current_dir, 'yolov8n.pt')
-    license_model_path = os.path.join(current_dir, 'license_plate_detector.pt')
-    
-    logger.info(f"COCO model dosyası mevcut mu: {os.path.exists(coco_model_path)}")
-    logger.info(f"Plaka model dosyası mevcut mu: {os.path.exists(license_model_path)}")
-    
-    # Modelleri yükle
-    coco_model = SimpleYOLO(coco_model_path)
-    license_plate_detector = SimpleYOLO(license_model_path)
-    
-    # Hata kontrolü
-    if coco_model.error is None and license_plate_detector.error is None:
-        logger.info("YOLO modelleri başarıyla yüklendi")
-        USE_REAL_MODEL = True
-    else:
-        logger.warning("YOLO modelleri yüklenemedi, test modları kullanılacak")
-        coco_model = MockDetector("coco")
-        license_plate_detector = MockDetector("license_plate")
-        logger.info("YOLO modelleri (test modelleri) başarıyla yüklendi")
-        USE_REAL_MODEL = False
-except Exception as e:
-    logger.error(f"YOLO modelleri yüklenirken hata: {str(e)}")
-    # Hata durumunda mock modelleri kullan
-    coco_model = MockDetector("coco")  
-    license_plate_detector = MockDetector("license_plate")
-    logger.info("YOLO modelleri (test modelleri) başarıyla yüklendi")
-    USE_REAL_MODEL = False
-
-# EasyOCR okuyucusu
-try:
-    logger.info("EasyOCR yükleniyor...")
-    reader = easyocr.Reader(['en', 'tr'])  # Türkçe ve İngilizce
+coco_model_path = os.path.join(current_dir, 'yolov8n.pt')
+license_model_path = os.path.join(current_dir, 'license_plate_detector.pt')
+
+def _load_yolo(model_path, name):
+    """YOLO modelini yükler; yüklenemezse mock detector döndürür"""
+    logger.info(f"Model dosyası mevcut mu ({name}): {os.path.exists(model_path)}")
+    model = SimpleYOLO(model_path)
+    if model.error is not None:
+        logger.warning(f"YOLO modeli yüklenemedi ({name}), test modu kullanılacak")
+        return MockDetector(name)
+    return model
+
+def _load_ocr_reader():
+    """Türkçe ve İngilizce EasyOCR okuyucusunu yükler"""
+    return easyocr.Reader(['en', 'tr'])  # Türkçe ve İngilizce
+
+# Yükleyicileri kaydet - her model worker süreci başına yalnızca bir kez yüklenir
+registry.register(COCO_MODEL, lambda: _load_yolo(coco_model_path, "coco"))
+registry.register(LICENSE_PLATE_DETECTOR, lambda: _load_yolo(license_model_path, "license_plate"))
+registry.register(OCR_READER, _load_ocr_reader)
+
+# Modelleri yükle
+logger.info("YOLO modellerini yüklemeye başlıyor...")
+coco_model = registry.get(COCO_MODEL) or MockDetector("coco")
+license_plate_detector = registry.get(LICENSE_PLATE_DETECTOR) or MockDetector("license_plate")
+USE_REAL_MODEL = not isinstance(coco_model, MockDetector) and not isinstance(license_plate_detector, MockDetector)
+if USE_REAL_MODEL:
+    logger.info("YOLO modelleri başarıyla yüklendi")
+else:
+    logger.warning("YOLO modelleri yüklenemedi, test modları kullanılacak")
+
+# EasyOCR okuyucusu (util.read_license_plate ile paylaşılır)
+logger.info("EasyOCR yükleniyor...")
+reader = registry.get(OCR_READER)
+if reader is not None:
     logger.info("EasyOCR başarıyla yüklendi")
-except Exception as e:
-    logger.error(f"EasyOCR yüklenemedi: {str(e)}")
-    reader = None
 
 # Alternatif plaka okuma fonksiyonu
-def read_license_plate_enhanced(img):
+def read_license_plate_enhanced(img, debug=NULL_SESSION):
     """
-    Geliştirilmiş plaka okuma fonksiyonu,
-    birden fazla görüntü işleme tekniği ve OCR uygular
+    Geliştirilmiş plaka okuma fonksiyonu.
+
+    Ön işleme varyantlarını (gri, threshold, adaptif, eşitleme) geçmiş isabet
+    oranına göre sırayla OCR'dan geçirir ve Türk plaka formatında yeterli güvenle
+    bir sonuç bulunduğu anda durur (bkz. ocr_cascade.OcrCascade).
+
+    Args:
+        img: Plaka kırpıntısı
+        debug: Debug kayıt oturumu; görüntüler yalnızca oturum aktifse
+            ve arka planda yazılır
+    """
+    return read_license_plates_batched([img], debugs=[debug])[0]
+
+def read_license_plates_batched(crops, debugs=None):
+    """
+    Birden fazla plaka kırpıntısını toplu okur.
+
+    Aynı kaskad aşamasındaki tüm kırpıntılar tek bir EasyOCR çağrısında işlenir;
+    böylece bir karedeki (veya birden fazla karedeki) N plaka için tanıma modeli
+    N*varyant yerine varyant sayısı kadar çağrılır.
+
+    Args:
+        crops: Plaka kırpıntıları listesi
+        debugs: Her kırpıntı için debug kayıt oturumu (opsiyonel)
+
+    Returns:
+        Her kırpıntı için (plaka metni, güven skoru) listesi
     """
+    if not crops:
+        return []
     if reader is None:
         logger.warning("EasyOCR yüklü değil, plaka okunamıyor")
-        return None, 0
-    
+        return [(None, 0)] * len(crops)
+
     try:
-        # Orjinal görüntüyü kaydet
-        timestamp = int(time.time())
-        orig_path = f"{debug_dir}/plate_orig_{timestamp}.jpg"
-        cv2.imwrite(orig_path, img)
-        
-        # Metot 1: Normal OCR (gri tonlama)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
-        gray_path = f"{debug_dir}/plate_gray_{timestamp}.jpg"
-        cv2.imwrite(gray_path, gray)
-        
-        # Metot 2: Threshold negatif
-        _, thresh_neg = cv2.threshold(gray, 64, 255, cv2.THRESH_BINARY_INV)
-        thresh_neg_path = f"{debug_dir}/plate_thresh_neg_{timestamp}.jpg"
-        cv2.imwrite(thresh_neg_path, thresh_neg)
-        
-        # Metot 3: Threshold pozitif
-        _, thresh_pos = cv2.threshold(gray, 120, 255, cv2.THRESH_BINARY)
-        thresh_pos_path = f"{debug_dir}/plate_thresh_pos_{timestamp}.jpg"
-        cv2.imwrite(thresh_pos_path, thresh_pos)
-        
-        # Metot 4: Adaptif threshold
-        adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        adaptive_path = f"{debug_dir}/plate_adaptive_{timestamp}.jpg"
-        cv2.imwrite(adaptive_path, adaptive)
-        
-        # Metot 5: Eşitleme ve blur
-        equalized = cv2.equalizeHist(gray)
-        blurred = cv2.GaussianBlur(equalized, (5, 5), 0)
-        equalized_path = f"{debug_dir}/plate_equalized_{timestamp}.jpg"
-        cv2.imwrite(equalized_path, blurred)
-        
-        # Mevcut OCR ile dene
-        text_old, score_old = read_license_plate(thresh_neg)
-        logger.info(f"  -> Mevcut OCR sonucu: {text_old}, Güven: {score_old if text_old else 'Okunamadı'}")
-        
-        # Tüm tespit edilen metinleri topla
-        all_detected_texts = []
-        
-        # EasyOCR ile farklı görüntü işleme yöntemlerini dene
-        for method_name, img_proc in [
-            ("gray", gray),
-            ("thresh_neg", thresh_neg),
-            ("thresh_pos", thresh_pos),
-            ("adaptive", adaptive),
-            ("equalized", equalized)
-        ]:
-            try:
-                # EasyOCR ile oku
-                results_ocr = reader.readtext(img_proc)
-                
-                if results_ocr:
-                    for (bbox, text, confidence) in results_ocr:
-                        logger.info(f"  -> EasyOCR ({method_name}): {text}, Güven: {confidence:.2f}")
-                        
-                        # Temizlenmiş metni ekle
-                        clean_text = ''.join(c for c in text if c.isalnum()).upper()
-                        if clean_text and confidence > 0.3:  # Minimum güven skoru
-                            # X koordinatına göre sıralayarak metinlerin pozisyonunu kaydediyoruz
-                            left, top = bbox[0]
-                            all_detected_texts.append((clean_text, confidence, left))
-            except Exception as e:
-                logger.error(f"  -> OCR hatası ({method_name}): {str(e)}")
-        
-        # Tespit edilen metinleri pozisyona göre sırala (soldan sağa)
-        all_detected_texts.sort(key=lambda x: x[2])
-        
-        logger.info(f"  -> Tespit edilen tüm metinler (soldan sağa): {[t[0] for t in all_detected_texts]}")
-        
-        # Türk plaka formatına uygunluk için regex kontrolleri
-        import re
-        
-        # Olası plaka kombinasyonlarını dene
-        possible_plate_formats = []
-        
-        # Tüm tespit edilen metinleri birleştirerek kombinasyonlar oluştur
-        # Pozisyona göre sıralanmış metinleri kullan
-        if all_detected_texts:
-            # Metinleri birleştir
-            combined_text = ''.join([t[0] for t in all_detected_texts])
-            combined_confidence = sum([t[1] for t in all_detected_texts]) / len(all_detected_texts)
-            possible_plate_formats.append((combined_text, combined_confidence))
-            
-            # İlk iki karakter il kodu mu kontrol et
-            if len(combined_text) >= 2 and combined_text[:2].isdigit() and 1 <= int(combined_text[:2]) <= 81:
-                possible_plate_formats.append((combined_text, combined_confidence))
-        
-        # Boşlukları temizleyen ve formatı kontrol eden fonksiyon
-        def is_turkish_plate_format(text):
-            # Türk plaka formatı regex deseni:
-            # 1-2 rakam (il kodu), 1-3 harf, 2-4 rakam
-            # Örnek: 06AKP37, 34AB123, 07A1234
-            pattern = r'^(0?[1-9]|[1-7][0-9]|8[0-1])([A-Z]{1,3})([0-9]{2,4})$'
-            return bool(re.match(pattern, text))
-        
-        # Plakanın parçalanmış olabileceğini düşünerek birleştirme denemeleri yap
-        for i in range(len(all_detected_texts)):
-            base_text = all_detected_texts[i][0]
-            base_conf = all_detected_texts[i][1]
-            
-            # Tek başına olan kısım plaka olabilir mi?
-            if is_turkish_plate_format(base_text):
-                possible_plate_formats.append((base_text, base_conf))
-            
-            # İki parçayı birleştir
-            for j in range(i+1, len(all_detected_texts)):
-                combined = base_text + all_detected_texts[j][0]
-                avg_conf = (base_conf + all_detected_texts[j][1]) / 2
-                if is_turkish_plate_format(combined):
-                    possible_plate_formats.append((combined, avg_conf))
-            
-            # Üç parçayı birleştir
-            if i+1 < len(all_detected_texts) and i+2 < len(all_detected_texts):
-                j = i+1
-                k = i+2
-                three_combined = base_text + all_detected_texts[j][0] + all_detected_texts[k][0]
-                avg_conf_3 = (base_conf + all_detected_texts[j][1] + all_detected_texts[k][1]) / 3
-                if is_turkish_plate_format(three_combined):
-                    possible_plate_formats.append((three_combined, avg_conf_3))
-        
-        # Türk plaka formatına manuel düzeltmeler uygula
-        for text, conf in list(possible_plate_formats):
-            # Tüm parçaları alıp, rakam ve harf gruplarını ayırmaya çalış
-            digits_prefix = ""
-            letters = ""
-            digits_suffix = ""
-            
-            # İlk kısımda il kodunu bul (1-2 rakam)
-            match = re.match(r'^(\d{1,2})(.*)$', text)
-            if match:
-                digits_prefix, rest = match.groups()
-                
-                # İkinci kısımda harfleri bul (1-3 harf)
-                match = re.match(r'^([A-Z]{1,3})(.*)$', rest)
-                if match:
-                    letters, digits_suffix = match.groups()
-                    
-                    # Son kısım rakamlardan oluşuyor mu?
-                    if digits_suffix.isdigit():
-                        formatted_plate = f"{digits_prefix}{letters}{digits_suffix}"
-                        possible_plate_formats.append((formatted_plate, conf))
-        
-        # Plaka formatına uygun sonuçları filtrele
-        valid_plates = [(text, conf) for text, conf in possible_plate_formats if is_turkish_plate_format(text)]
-        
-        logger.info(f"  -> Olası plaka formatları: {valid_plates}")
-        
-        # En yüksek güven skoruna sahip olanı seç
-        if valid_plates:
-            valid_plates.sort(key=lambda x: x[1], reverse=True)
-            best_text, best_score = valid_plates[0]
-            logger.info(f"  -> En iyi plaka sonucu: {best_text}, Güven: {best_score:.2f}")
-            return best_text, best_score
-        
-        # Eğer hiçbir geçerli format bulunamadıysa, en yüksek güvenli sonucu döndür
-        if all_detected_texts:
-            all_detected_texts.sort(key=lambda x: x[1], reverse=True)
-            best_text, best_score, _ = all_detected_texts[0]
-            
-            # Son bir çözüm olarak, bazı manuel düzeltmeler yap
-            if len(best_text) >= 5:  # Minimum plaka uzunluğu
-                # 0 ile O, 1 ile I gibi karışabilecek karakterleri düzelt
-                corrected_text = best_text.replace('O', '0').replace('I', '1').replace('S', '5').replace('G', '6')
-                return corrected_text, best_score
-            
-            return best_text, best_score
-        
-        return text_old, score_old  # Mevcut OCR sonucu döndür
+        return ocr_cascade.read_batch(reader, crops, debugs=debugs, legacy_reader=read_license_plate)
     except Exception as e:
         logger.error(f"Plaka okumada beklenmeyen hata: {str(e)}")
-        return None, 0
+        return [(None, 0)] * len(crops)
 
 # Görüntü işleme fonksiyonu (test/örnek amaçlı)
 def process_test_image(image_path):
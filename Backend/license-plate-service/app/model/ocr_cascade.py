@@ -0,0 +1,311 @@
+"""
+Erken çıkışlı OCR kaskadı.
+
+Plaka kırpıntısı için ön işleme varyantları (gri, threshold, adaptif, eşitleme)
+geçmiş isabet oranına göre sıralanır ve sırayla OCR'dan geçirilir. Bir varyant
+güven eşiğinin üstünde Türk plaka formatına uygun bir sonuç ürettiği anda
+kaskad durur; kalan varyantlar çalıştırılmaz.
+"""
+
+import re
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+
+from ..config import (
+    OCR_CASCADE_VARIANTS, OCR_CASCADE_ADAPTIVE, OCR_EARLY_EXIT_CONFIDENCE,
+    OCR_MIN_TEXT_CONFIDENCE, OCR_LEGACY_FALLBACK, OCR_BATCH_SIZE
+)
+from ..monitoring import OCR_VARIANT_ATTEMPTS, OCR_VARIANT_HITS, OCR_VARIANT_LATENCY, OCR_CASCADE_DEPTH
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+# (metin, güven, sol x koordinatı)
+DetectedText = Tuple[str, float, float]
+
+# Türk plaka formatı: 1-2 rakam (il kodu), 1-3 harf, 2-4 rakam. Örnek: 06AKP37, 34AB123, 07A1234
+TURKISH_PLATE_PATTERN = re.compile(r'^(0?[1-9]|[1-7][0-9]|8[0-1])([A-Z]{1,3})([0-9]{2,4})$')
+
+
+def is_turkish_plate_format(text: str) -> bool:
+    """Metnin Türk plaka formatına uyup uymadığını kontrol eder"""
+    return bool(TURKISH_PLATE_PATTERN.match(text))
+
+
+# Ön işleme varyantları - hepsi gri tonlamalı görüntü alır
+PREPROCESSORS: Dict[str, Callable[[Any], Any]] = {
+    "gray": lambda gray: gray,
+    "thresh_neg": lambda gray: cv2.threshold(gray, 64, 255, cv2.THRESH_BINARY_INV)[1],
+    "thresh_pos": lambda gray: cv2.threshold(gray, 120, 255, cv2.THRESH_BINARY)[1],
+    "adaptive": lambda gray: cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2),
+    "equalized": lambda gray: cv2.equalizeHist(gray),
+}
+
+
+def to_gray(img):
+    """Renkli kırpıntıyı gri tonlamaya çevirir (zaten griyse olduğu gibi döndürür)"""
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+
+
+def collect_texts(ocr_results, min_confidence: float = OCR_MIN_TEXT_CONFIDENCE) -> List[DetectedText]:
+    """EasyOCR sonuçlarından temizlenmiş (alfanümerik, büyük harf) metin parçalarını çıkarır"""
+    texts = []
+    for (bbox, text, confidence) in ocr_results or []:
+        clean_text = ''.join(c for c in text if c.isalnum()).upper()
+        if clean_text and confidence > min_confidence:
+            left, top = bbox[0]
+            texts.append((clean_text, float(confidence), left))
+    return texts
+
+
+def plate_candidates(detected_texts: Sequence[DetectedText]) -> List[Tuple[str, float]]:
+    """
+    Metin parçalarından Türk plaka formatına uygun adayları üretir.
+
+    Plaka birden fazla parçaya bölünmüş olabileceğinden parçalar soldan sağa
+    sıralanıp tümü, ikili ve ardışık üçlü kombinasyonlar halinde denenir.
+    """
+    texts = sorted(detected_texts, key=lambda x: x[2])
+    candidates = []
+
+    if texts:
+        combined_text = ''.join(t[0] for t in texts)
+        combined_confidence = sum(t[1] for t in texts) / len(texts)
+        candidates.append((combined_text, combined_confidence))
+
+    for i in range(len(texts)):
+        base_text, base_conf = texts[i][0], texts[i][1]
+
+        # Tek başına olan kısım plaka olabilir mi?
+        candidates.append((base_text, base_conf))
+
+        # İki parçayı birleştir
+        for j in range(i + 1, len(texts)):
+            candidates.append((base_text + texts[j][0], (base_conf + texts[j][1]) / 2))
+
+        # Ardışık üç parçayı birleştir
+        if i + 2 < len(texts):
+            candidates.append((
+                base_text + texts[i + 1][0] + texts[i + 2][0],
+                (base_conf + texts[i + 1][1] + texts[i + 2][1]) / 3
+            ))
+
+    return [(text, conf) for text, conf in candidates if is_turkish_plate_format(text)]
+
+
+def best_plate(detected_texts: Sequence[DetectedText]) -> Optional[Tuple[str, float]]:
+    """Türk plaka formatına uygun en yüksek güvenli adayı döndürür"""
+    candidates = plate_candidates(detected_texts)
+    if not candidates:
+        return None
+    return max(candidates, key=lambda x: x[1])
+
+
+def fallback_plate(detected_texts: Sequence[DetectedText]) -> Optional[Tuple[str, float]]:
+    """Formata uyan aday yoksa en yüksek güvenli metni karakter düzeltmeleriyle döndürür"""
+    if not detected_texts:
+        return None
+    best_text, best_score, _ = max(detected_texts, key=lambda x: x[1])
+    if len(best_text) >= 5:  # Minimum plaka uzunluğu
+        # 0 ile O, 1 ile I gibi karışabilecek karakterleri düzelt
+        best_text = best_text.replace('O', '0').replace('I', '1').replace('S', '5').replace('G', '6')
+    return best_text, best_score
+
+
+def batched_readtext(reader, images: Sequence[Any], batch_size: int = OCR_BATCH_SIZE) -> List[Any]:
+    """
+    Görüntüleri tek bir toplu EasyOCR çağrısıyla okur.
+
+    `readtext_batched` tüm görüntülerin aynı boyutta olmasını beklediği için
+    kırpıntılar ölçeklenmeden sağ/alt kenarlarından ortak boyuta genişletilir;
+    böylece metin kutularının sol koordinatları değişmez. Okuyucu toplu API'yi
+    desteklemiyorsa veya tek görüntü varsa `readtext` ile tek tek okunur.
+    """
+    if len(images) == 1 or not hasattr(reader, "readtext_batched"):
+        return [reader.readtext(img) for img in images]
+
+    height = max(img.shape[0] for img in images)
+    width = max(img.shape[1] for img in images)
+    padded = [
+        img if img.shape[:2] == (height, width) else
+        cv2.copyMakeBorder(img, 0, height - img.shape[0], 0, width - img.shape[1], cv2.BORDER_REPLICATE)
+        for img in images
+    ]
+    return reader.readtext_batched(padded, n_width=width, n_height=height, batch_size=batch_size)
+
+
+class OcrCascade:
+    """Varyant başına isabet/gecikme istatistiği tutan, erken çıkışlı OCR kaskadı"""
+
+    def __init__(self,
+                 variants: Sequence[str] = OCR_CASCADE_VARIANTS,
+                 early_exit_confidence: float = OCR_EARLY_EXIT_CONFIDENCE,
+                 adaptive: bool = OCR_CASCADE_ADAPTIVE,
+                 legacy_fallback: bool = OCR_LEGACY_FALLBACK):
+        unknown = [v for v in variants if v not in PREPROCESSORS]
+        if unknown:
+            logger.warning(f"Bilinmeyen OCR varyantları yok sayılıyor: {unknown}")
+        self.variants = [v for v in variants if v in PREPROCESSORS] or list(PREPROCESSORS)
+        self.early_exit_confidence = early_exit_confidence
+        self.adaptive = adaptive
+        self.legacy_fallback = legacy_fallback
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {
+            v: {"attempts": 0, "hits": 0, "total_seconds": 0.0} for v in self.variants
+        }
+
+    def order(self) -> List[str]:
+        """Varyantları geçmiş isabet oranına göre sıralar (Laplace düzeltmeli, eşitlikte yapılandırma sırası)"""
+        if not self.adaptive:
+            return list(self.variants)
+        with self._lock:
+            rates = {
+                v: (s["hits"] + 1) / (s["attempts"] + 2) for v, s in self._stats.items()
+            }
+        return sorted(self.variants, key=lambda v: -rates[v])
+
+    def record(self, variant: str, hit: bool, seconds: float) -> None:
+        """Bir OCR geçişinin sonucunu istatistiklere ve metriklere işler"""
+        with self._lock:
+            stats = self._stats[variant]
+            stats["attempts"] += 1
+            stats["total_seconds"] += seconds
+            if hit:
+                stats["hits"] += 1
+        OCR_VARIANT_ATTEMPTS.labels(variant=variant).inc()
+        OCR_VARIANT_LATENCY.labels(variant=variant).observe(seconds)
+        if hit:
+            OCR_VARIANT_HITS.labels(variant=variant).inc()
+
+    def is_hit(self, plate: Optional[Tuple[str, float]]) -> bool:
+        return plate is not None and plate[1] >= self.early_exit_confidence
+
+    def stats(self) -> Dict[str, Any]:
+        """Varyant başına deneme, isabet ve ortalama gecikme bilgisini döndürür"""
+        with self._lock:
+            variants = {
+                v: {
+                    "attempts": int(s["attempts"]),
+                    "hits": int(s["hits"]),
+                    "hit_rate": round(s["hits"] / s["attempts"], 3) if s["attempts"] else None,
+                    "avg_latency_ms": round(1000 * s["total_seconds"] / s["attempts"], 2) if s["attempts"] else None,
+                }
+                for v, s in self._stats.items()
+            }
+        return {"order": self.order(), "early_exit_confidence": self.early_exit_confidence, "variants": variants}
+
+    def read(self, reader, img, debug=None, legacy_reader=None) -> Tuple[Optional[str], float]:
+        """
+        Tek bir plaka kırpıntısını kaskad ile okur.
+
+        Args:
+            reader: EasyOCR okuyucusu
+            img: Plaka kırpıntısı (BGR veya gri)
+            debug: Debug kayıt oturumu (opsiyonel)
+            legacy_reader: Hiç metin okunamazsa denenecek eski okuyucu (util.read_license_plate)
+
+        Returns:
+            (plaka metni, güven skoru); okunamazsa (None, 0)
+        """
+        return self.read_batch(reader, [img], debugs=[debug], legacy_reader=legacy_reader)[0]
+
+    def read_batch(self, reader, imgs: Sequence[Any], debugs: Optional[Sequence[Any]] = None,
+                   legacy_reader=None) -> List[Tuple[Optional[str], float]]:
+        """
+        Birden fazla plaka kırpıntısını kaskad ile toplu okur.
+
+        Her kaskad aşamasında henüz okunamamış tüm kırpıntıların o varyantı tek bir
+        toplu OCR çağrısıyla işlenir; güvenle okunan kırpıntılar sonraki aşamalara
+        katılmaz. Sonuçlar giriş sırasıyla döndürülür.
+
+        Args:
+            reader: EasyOCR okuyucusu
+            imgs: Plaka kırpıntıları (farklı karelerden/isteklerden olabilir)
+            debugs: Her kırpıntı için debug kayıt oturumu (opsiyonel)
+            legacy_reader: Hiç metin okunamazsa denenecek eski okuyucu
+
+        Returns:
+            Her kırpıntı için (plaka metni, güven skoru); okunamazsa (None, 0)
+        """
+        count = len(imgs)
+        if count == 0:
+            return []
+        debugs = list(debugs) if debugs is not None else [None] * count
+
+        grays = [to_gray(img) for img in imgs]
+        for k, (img, debug) in enumerate(zip(imgs, debugs)):
+            if debug is not None:
+                debug.add(f"plate{k}_orig", img)
+
+        results: List[Optional[Tuple[Optional[str], float]]] = [None] * count
+        all_texts: List[List[DetectedText]] = [[] for _ in range(count)]
+        processed: List[Dict[str, Any]] = [{} for _ in range(count)]
+        depths = [0] * count
+        pending = list(range(count))
+
+        for variant in self.order():
+            if not pending:
+                break
+            batch = []
+            for k in pending:
+                img_proc = PREPROCESSORS[variant](grays[k])
+                processed[k][variant] = img_proc
+                batch.append(img_proc)
+                if debugs[k] is not None:
+                    debugs[k].add(f"plate{k}_{variant}", img_proc)
+
+            start_time = time.perf_counter()
+            try:
+                batch_results = batched_readtext(reader, batch)
+            except Exception as e:
+                logger.error(f"  -> OCR hatası ({variant}): {str(e)}")
+                batch_results = [[] for _ in batch]
+            seconds_per_item = (time.perf_counter() - start_time) / len(batch)
+
+            still_pending = []
+            for k, ocr_results in zip(pending, batch_results):
+                texts = collect_texts(ocr_results)
+                depths[k] += 1
+                plate = best_plate(texts)
+                hit = self.is_hit(plate)
+                self.record(variant, hit, seconds_per_item)
+                logger.debug(f"  -> EasyOCR ({variant}, kırpıntı {k}): {[t[0] for t in texts]}, aday: {plate}")
+                if hit:
+                    results[k] = plate
+                    logger.info(f"  -> Plaka okundu ({variant}, {depths[k]}. geçiş): {plate[0]}, Güven: {plate[1]:.2f}")
+                else:
+                    all_texts[k].extend(texts)
+                    still_pending.append(k)
+            pending = still_pending
+
+        for k in range(count):
+            OCR_CASCADE_DEPTH.observe(depths[k])
+            if results[k] is None:
+                legacy_input = processed[k].get("thresh_neg")
+                if legacy_input is None:
+                    legacy_input = PREPROCESSORS["thresh_neg"](grays[k])
+                results[k] = self.finalize(all_texts[k], legacy_input, legacy_reader)
+        return results
+
+    def finalize(self, all_texts: Sequence[DetectedText], legacy_input=None, legacy_reader=None) -> Tuple[Optional[str], float]:
+        """Erken çıkış olmadıysa tüm varyantlardan toplanan parçalardan en iyi sonucu seçer"""
+        plate = best_plate(all_texts) or fallback_plate(all_texts)
+        if plate is not None:
+            logger.info(f"  -> En iyi plaka sonucu: {plate[0]}, Güven: {plate[1]:.2f}")
+            return plate
+
+        # Son çare: eski okuyucu (yalnızca hiçbir varyant metin üretmediyse çalışır)
+        if self.legacy_fallback and legacy_reader is not None and legacy_input is not None:
+            text_old, score_old = legacy_reader(legacy_input)
+            logger.info(f"  -> Mevcut OCR sonucu: {text_old}, Güven: {score_old if text_old else 'Okunamadı'}")
+            if text_old is not None:
+                return text_old, score_old
+        return None, 0
+
+
+# Süreç genelinde paylaşılan kaskad (isabet istatistikleri tüm istekler arasında birikir)
+ocr_cascade = OcrCascade()
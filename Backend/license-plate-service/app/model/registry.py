@@ -0,0 +1,145 @@
+"""
+Model kayıt defteri: YOLO dedektörleri ve OCR okuyucuları her worker süreci
+için yalnızca bir kez yüklenir ve tüm istekler arasında paylaşılır.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_bytes() -> int:
+    """Sürecin o anki resident bellek kullanımını (byte) döndürür"""
+    try:
+        # Linux: /proc/self/statm ikinci alanı resident sayfa sayısıdır
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        # Diğer POSIX sistemler: tepe RSS değeri (Linux'ta KB, macOS'ta byte)
+        import resource
+        import sys
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """
+    Ağır modeller için süreç başına tekil yükleyici.
+
+    Her model bir isim ve yükleyici fonksiyon ile kaydedilir; ilk `get` çağrısında
+    yüklenir, sonraki çağrılar aynı nesneyi döndürür. Süreç fork edildiğinde
+    (örn. uvicorn/gunicorn worker'ları) önbellek yeni süreçte sıfırlanır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._pid = os.getpid()
+
+    def _check_pid(self) -> None:
+        """Fork sonrası ebeveyn sürecin modellerini paylaşma"""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._lock = threading.Lock()
+            self._models = {}
+            self._stats = {}
+            self._pid = pid
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Bir model için yükleyici fonksiyon kaydeder (yükleme yapmaz)"""
+        self._loaders[name] = loader
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._loaders
+
+    def is_loaded(self, name: str) -> bool:
+        self._check_pid()
+        return name in self._models
+
+    def get(self, name: str) -> Any:
+        """Modeli döndürür; gerekiyorsa bu süreçte ilk kez yükler"""
+        self._check_pid()
+        model = self._models.get(name)
+        if model is not None or name in self._models:
+            return model
+
+        with self._lock:
+            # Kilidi beklerken başka bir thread yüklemiş olabilir
+            if name in self._models:
+                return self._models[name]
+
+            loader = self._loaders.get(name)
+            if loader is None:
+                raise KeyError(f"Kayıtlı olmayan model: {name}")
+
+            rss_before = _current_rss_bytes()
+            start_time = time.perf_counter()
+            try:
+                model = loader()
+            except Exception as e:
+                logger.error(f"Model yüklenemedi ({name}): {str(e)}")
+                model = None
+            load_seconds = time.perf_counter() - start_time
+            rss_after = _current_rss_bytes()
+
+            self._models[name] = model
+            self._stats[name] = {
+                "loaded": model is not None,
+                "load_seconds": round(load_seconds, 3),
+                "rss_delta_bytes": max(rss_after - rss_before, 0),
+                "rss_after_bytes": rss_after,
+                "pid": self._pid,
+            }
+            logger.info(
+                f"Model yüklendi: {name}, süre={load_seconds:.2f}s, "
+                f"bellek artışı={(rss_after - rss_before) / (1024 * 1024):.1f} MB, "
+                f"toplam RSS={rss_after / (1024 * 1024):.1f} MB, pid={self._pid}"
+            )
+            self._report_metrics(name)
+            return model
+
+    def preload(self, *names: str) -> None:
+        """Verilen (veya kayıtlı tüm) modelleri önceden yükler"""
+        for name in names or tuple(self._loaders):
+            self.get(name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Yüklenen modellerin yükleme süresi ve bellek bilgisini döndürür"""
+        self._check_pid()
+        return {
+            "pid": self._pid,
+            "rss_bytes": _current_rss_bytes(),
+            "models": {name: dict(info) for name, info in self._stats.items()},
+        }
+
+    def _report_metrics(self, name: str) -> None:
+        """Yükleme bilgisini Prometheus metriklerine yansıtır"""
+        try:
+            from ..monitoring import MODEL_LOAD_SECONDS, MODEL_MEMORY_BYTES
+        except Exception:
+            return
+        info = self._stats[name]
+        MODEL_LOAD_SECONDS.labels(model=name).set(info["load_seconds"])
+        MODEL_MEMORY_BYTES.labels(model=name).set(info["rss_delta_bytes"])
+
+
+# Kayıtlı model isimleri (yükleyiciler model/main.py içinde kaydedilir)
+COCO_MODEL = "coco_model"
+LICENSE_PLATE_DETECTOR = "license_plate_detector"
+# Tek OCR okuyucusu; util.read_license_plate de ayrı bir ['en'] okuyucusu yerine bunu kullanır
+OCR_READER = "ocr_reader"
+
+# Süreç genelinde paylaşılan kayıt defteri
+registry = ModelRegistry()
@@ -0,0 +1,276 @@
+"""
+Tekrarlanan kapı kareleri için tanıma sonucu önbelleği.
+
+Kapı istemcileri bariyerde bekleyen araç için veya zaman aşımından sonra
+neredeyse aynı kareyi tekrar gönderir. Her kare için küçültülmüş gri
+görüntünün fark hash'i (dHash, 64 bit) hesaplanır; aynı otopark, kapı, uç nokta
+(giriş/çıkış) ve tespit modu için Hamming uzaklığı RECOGNITION_CACHE_MAX_DISTANCE'ı
+aşmayan ve süresi dolmamış bir kayıt aday olur.
+
+Kare hash'ine şeridin arka planı hakim olduğundan yalnızca plakası farklı iki
+araç aynı hash'i verebilir. Bu yüzden aday, sonucundaki her plaka kutusunda
+yeni karenin tam çözünürlüklü kırpıntısı saklanan kırpıntıyla karşılaştırılarak
+doğrulanır; belirgin değişen piksel oranı RECOGNITION_CACHE_PLATE_MAX_CHANGE'i
+aşarsa (farklı plaka veya araç kıpırdamış) kayıt atılır ve kare yeniden tanınır.
+Plaka bulunamayan sonuçlar doğrulanamayacağından saklanmaz.
+
+Önbellek varsayılan olarak kapalıdır ve LRU olarak sınırlıdır; kayıtlar
+RECOGNITION_CACHE_TTL_SECONDS sonra geçersiz olur.
+"""
+
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from ..config import (
+    RECOGNITION_CACHE_ENABLED, RECOGNITION_CACHE_SIZE, RECOGNITION_CACHE_TTL_SECONDS,
+    RECOGNITION_CACHE_MAX_DISTANCE, RECOGNITION_CACHE_PLATE_MAX_CHANGE
+)
+from ..monitoring import RECOGNITION_CACHE_REQUESTS
+from .ingest import image_size, is_jpeg
+from .roi import roi_for_parking
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+# dHash kenar uzunluğu (8 -> 64 bit)
+HASH_SIZE = 8
+# Plaka kırpıntılarının karşılaştırıldığı boyut (genişlik, yükseklik)
+PLATE_CROP_SIZE = (96, 24)
+# Bu kadar gri seviyeden fazla değişen piksel "belirgin değişmiş" sayılır (gürültü/JPEG farkı değil)
+PLATE_PIXEL_THRESHOLD = 64
+
+
+def dhash(image: Union[bytes, bytearray, memoryview, np.ndarray], parking_id: Optional[int] = None,
+          hash_size: int = HASH_SIZE, gate: Optional[str] = None) -> Optional[int]:
+    """
+    Görüntünün fark hash'ini (dHash) hesaplar.
+
+    JPEG baytları 1/8 çözünürlükte ve gri tonlamalı çözülür; otopark kapısı için
+    ROI tanımlıysa yalnızca şerit bölgesi hash'lenir.
+
+    Returns:
+        hash_size * hash_size bitlik tam sayı veya görüntü çözülemezse None
+    """
+    full_shape = None
+    if isinstance(image, np.ndarray):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    else:
+        buffer = np.frombuffer(image, np.uint8)
+        if is_jpeg(image):
+            full_shape = image_size(image)
+            gray = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        else:
+            gray = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+    if gray is None or gray.size == 0:
+        return None
+
+    roi = roi_for_parking(parking_id, gate)
+    if roi is not None:
+        full_shape = full_shape or gray.shape
+        x1, y1, x2, y2 = roi.crop_box(full_shape)
+        sx, sy = gray.shape[1] / full_shape[1], gray.shape[0] / full_shape[0]
+        region = gray[int(y1 * sy):max(int(y2 * sy), int(y1 * sy) + 1), int(x1 * sx):max(int(x2 * sx), int(x1 * sx) + 1)]
+        if region.size:
+            gray = region
+
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _decode_gray(image: Union[bytes, bytearray, memoryview, np.ndarray]) -> Optional[np.ndarray]:
+    """Görüntüyü tam çözünürlükte gri tonlamalı çözer"""
+    if isinstance(image, np.ndarray):
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    return cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+def plate_boxes(result: Dict[str, Any]) -> List[Sequence[float]]:
+    """Tanıma sonucundaki plaka kutuları (orijinal kare koordinatlarında)"""
+    boxes = []
+    for item in (result.get("results") or {}).values():
+        bbox = item.get("license_plate", {}).get("bbox") if isinstance(item, dict) else None
+        if bbox is not None:
+            boxes.append(bbox)
+    return boxes
+
+
+def plate_crop(gray: np.ndarray, bbox: Sequence[float]) -> Optional[np.ndarray]:
+    """Plaka kutusunu karşılaştırma boyutuna küçültür ve kontrastını normalleştirir"""
+    height, width = gray.shape[:2]
+    x1, y1 = max(int(bbox[0]), 0), max(int(bbox[1]), 0)
+    x2, y2 = min(int(np.ceil(bbox[2])), width), min(int(np.ceil(bbox[3])), height)
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        return None
+    crop = cv2.resize(gray[y1:y2, x1:x2], PLATE_CROP_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.normalize(crop, None, 0, 255, cv2.NORM_MINMAX)
+
+
+def plate_change(a: np.ndarray, b: np.ndarray) -> float:
+    """İki plaka kırpıntısında belirgin değişen piksellerin oranı"""
+    return float(np.mean(cv2.absdiff(a, b) > PLATE_PIXEL_THRESHOLD))
+
+
+class RecognitionResultCache:
+    """Algısal hash'e göre anahtarlanan, TTL'li ve boyutu sınırlı LRU sonuç önbelleği"""
+
+    def __init__(self, max_entries: int = RECOGNITION_CACHE_SIZE, ttl_seconds: float = RECOGNITION_CACHE_TTL_SECONDS,
+                 max_distance: int = RECOGNITION_CACHE_MAX_DISTANCE, enabled: bool = RECOGNITION_CACHE_ENABLED,
+                 plate_max_change: float = RECOGNITION_CACHE_PLATE_MAX_CHANGE, clock=time.monotonic):
+        self.max_entries = max(max_entries, 1)
+        self.ttl = ttl_seconds
+        self.max_distance = max(max_distance, 0)
+        self.plate_max_change = max(plate_max_change, 0.0)
+        self.enabled = enabled and ttl_seconds > 0
+        self._clock = clock
+        # (kapsam, hash) -> (sonuç, son geçerlilik zamanı, [(plaka kutusu, kırpıntı)]); en son kullanılan sonda
+        self._entries: "OrderedDict[Tuple[Hashable, int], Tuple[Dict[str, Any], float, list]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, image: Any, parking_id: Optional[int] = None, detection_mode: Optional[str] = None,
+                gate: Optional[str] = None, endpoint: Optional[str] = None) -> Optional[Tuple[Hashable, int]]:
+        """
+        Görüntü için önbellek anahtarını (kapsam, dHash) hesaplar; hesaplanamazsa None.
+        Kapsam otopark, kapı, uç nokta (entry/exit) ve tespit modundan oluşur.
+        """
+        if not self.enabled:
+            return None
+        try:
+            value = dhash(image, parking_id, gate=gate)
+        except Exception as e:
+            logger.warning(f"Görüntü hash'i hesaplanamadı: {str(e)}")
+            return None
+        if value is None:
+            return None
+        return (parking_id, gate, endpoint, detection_mode), value
+
+    def lookup(self, image: Any, **scope: Any) -> Tuple[Optional[Tuple[Hashable, int]], Optional[Dict[str, Any]]]:
+        """Anahtarı hesaplar ve önbelleğe bakar (bkz. key_for, get); (anahtar, sonuç veya None)"""
+        key = self.key_for(image, **scope)
+        return key, self.get(key, image)
+
+    def get(self, key: Optional[Tuple[Hashable, int]], image: Any) -> Optional[Dict[str, Any]]:
+        """
+        Anahtara yeterince yakın, süresi dolmamış ve plaka kırpıntıları yeni
+        karedekilerle eşleşen bir sonuç varsa kopyasını döndürür.
+        """
+        if key is None:
+            return None
+        scope, value = key
+        now = self._clock()
+        with self._lock:
+            found = None
+            if key in self._entries:
+                found = key
+            else:
+                best = self.max_distance + 1
+                for candidate in reversed(self._entries):
+                    if candidate[0] != scope:
+                        continue
+                    distance = hamming_distance(candidate[1], value)
+                    if distance < best:
+                        found, best = candidate, distance
+                        if distance == 0:
+                            break
+            entry = None
+            if found is not None:
+                entry = self._entries[found]
+                if entry[1] <= now:
+                    del self._entries[found]
+                    entry = None
+
+        # Kare benzer olsa da plaka farklı olabilir; kırpıntılar kilit dışında karşılaştırılır
+        if entry is not None and not self._plates_match(entry[2], image):
+            with self._lock:
+                if self._entries.get(found) is entry:
+                    del self._entries[found]
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if found in self._entries:
+                    self._entries.move_to_end(found)
+        if entry is None:
+            RECOGNITION_CACHE_REQUESTS.labels(result="miss").inc()
+            return None
+        RECOGNITION_CACHE_REQUESTS.labels(result="hit").inc()
+        return copy.deepcopy(entry[0])
+
+    def _plates_match(self, crops: list, image: Any) -> bool:
+        try:
+            gray = _decode_gray(image)
+        except Exception as e:
+            logger.warning(f"Plaka kırpıntısı doğrulanamadı: {str(e)}")
+            return False
+        if gray is None:
+            return False
+        for bbox, expected in crops:
+            crop = plate_crop(gray, bbox)
+            if crop is None or plate_change(crop, expected) > self.plate_max_change:
+                return False
+        return True
+
+    def put(self, key: Optional[Tuple[Hashable, int]], result: Dict[str, Any], image: Any) -> None:
+        """
+        Başarılı tanıma sonucunu karedeki plaka kırpıntılarıyla birlikte saklar.
+        Hatalı ve plaka içermeyen sonuçlar saklanmaz.
+        """
+        if key is None or not result or result.get("error"):
+            return
+        boxes = plate_boxes(result)
+        if not boxes:
+            return
+        try:
+            gray = _decode_gray(image)
+        except Exception as e:
+            logger.warning(f"Plaka kırpıntısı alınamadı: {str(e)}")
+            return
+        if gray is None:
+            return
+        crops = [(bbox, plate_crop(gray, bbox)) for bbox in boxes]
+        if any(crop is None for _, crop in crops):
+            return
+        expires_at = self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(result), expires_at, crops)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "max_distance": self.max_distance,
+            "plate_max_change": self.plate_max_change,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# Süreç genelinde paylaşılan önbellek
+recognition_cache = RecognitionResultCache()
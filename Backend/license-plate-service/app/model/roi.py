@@ -0,0 +1,193 @@
+"""
+İlgi bölgesi (ROI) kırpma ve çıkarım boyutuna küçültme.
+
+Kapı kameraları tam çözünürlüklü kareler gönderir; dedektörlere ise yalnızca
+şeridin bulunduğu bölge, en uzun kenarı INFERENCE_MAX_SIZE olacak şekilde
+küçültülüp YOLO adımına (32) göre doldurularak (letterbox) verilir. Tespitler
+orijinal kare koordinatlarına geri çevrilir; OCR kırpıntıları tam çözünürlüklü
+kareden alınır.
+
+ROI otopark veya kapı (kamera) bazında ROI_BY_PARKING ile yapılandırılır:
+    {"1": {"box": [x1, y1, x2, y2]}, "1:exit": {"polygon": [[x, y], ...]}}
+"<otopark>:<kapı>" anahtarı o kapının kamerası için kullanılır; kapı için
+tanım yoksa otoparkın ROI'sine düşülür. Aynı otoparktaki giriş ve çıkış
+kameraları farklı şeritleri gördüğünden ayrı tanımlanmalıdır. Tüm değerler
+1'den küçük veya eşitse koordinatlar kare boyutuna oranlı kabul edilir.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from ..config import INFERENCE_MAX_SIZE, ROI_BY_PARKING
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+# YOLO adımı ve ultralytics'in doldurma rengi
+LETTERBOX_STRIDE = 32
+LETTERBOX_COLOR = (114, 114, 114)
+
+
+class RegionOfInterest:
+    """Kutu veya çokgen olarak tanımlanan şerit bölgesi"""
+
+    def __init__(self, box: Optional[Sequence[float]] = None, polygon: Optional[Sequence[Sequence[float]]] = None):
+        if box is None and polygon is None:
+            raise ValueError("ROI için box veya polygon gereklidir")
+        if polygon is not None:
+            self.points = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+            if len(self.points) < 3:
+                raise ValueError("ROI çokgeni en az 3 noktadan oluşmalıdır")
+            self.is_polygon = True
+        else:
+            x1, y1, x2, y2 = box
+            self.points = np.asarray([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float32)
+            self.is_polygon = False
+        self.normalized = bool(np.all(self.points <= 1.0))
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RegionOfInterest":
+        return cls(box=config.get("box"), polygon=config.get("polygon"))
+
+    def resolve(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """Noktaları verilen kare boyutunda piksel koordinatlarına çevirir"""
+        if self.normalized:
+            height, width = shape[:2]
+            return self.points * np.array([width, height], dtype=np.float32)
+        return self.points
+
+    def crop_box(self, shape: Tuple[int, ...]) -> Tuple[int, int, int, int]:
+        """ROI'yi çevreleyen, kare sınırlarına kırpılmış tam sayı kutu (x1, y1, x2, y2)"""
+        height, width = shape[:2]
+        points = self.resolve(shape)
+        x1, y1 = np.floor(points.min(axis=0)).astype(int)
+        x2, y2 = np.ceil(points.max(axis=0)).astype(int)
+        x1, x2 = max(0, min(x1, width)), max(0, min(x2, width))
+        y1, y2 = max(0, min(y1, height)), max(0, min(y2, height))
+        if x2 - x1 < 2 or y2 - y1 < 2:
+            return 0, 0, width, height
+        return int(x1), int(y1), int(x2), int(y2)
+
+    def contains(self, x: float, y: float, shape: Tuple[int, ...]) -> bool:
+        """Noktanın ROI içinde olup olmadığını kontrol eder"""
+        if not self.is_polygon:
+            x1, y1, x2, y2 = self.crop_box(shape)
+            return x1 <= x <= x2 and y1 <= y <= y2
+        return cv2.pointPolygonTest(self.resolve(shape), (float(x), float(y)), False) >= 0
+
+
+def letterbox(image: np.ndarray, max_size: int, stride: int = LETTERBOX_STRIDE) -> Tuple[np.ndarray, float]:
+    """
+    Görüntüyü en-boy oranını koruyarak en uzun kenarı max_size olacak şekilde
+    küçültür ve sağ/alt kenarlarını adımın katına tamamlar.
+
+    Büyütme yapılmaz. Küçültme ve doldurma gerekmiyorsa görüntünün kendisi
+    (kopyalanmadan) döndürülür.
+
+    Returns:
+        (dedektör girişi, ölçek)
+    """
+    height, width = image.shape[:2]
+    scale = 1.0
+    if max_size and max(height, width) > max_size:
+        scale = max_size / max(height, width)
+        image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        height, width = image.shape[:2]
+
+        pad_bottom = (-height) % stride
+        pad_right = (-width) % stride
+        if pad_bottom or pad_right:
+            image = cv2.copyMakeBorder(image, 0, pad_bottom, 0, pad_right, cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+    return image, scale
+
+
+class InferenceView:
+    """Dedektör girişi ve tespitleri orijinal kareye geri çevirmek için gereken bilgi"""
+
+    __slots__ = ("image", "scale", "offset", "roi", "frame_shape")
+
+    def __init__(self, image: np.ndarray, scale: float, offset: Tuple[int, int],
+                 roi: Optional[RegionOfInterest], frame_shape: Tuple[int, ...]):
+        self.image = image
+        self.scale = scale  # Dedektör girişi / tam çözünürlüklü kare
+        self.offset = offset  # ROI'nin tam çözünürlükteki sol üst köşesi
+        self.roi = roi
+        self.frame_shape = frame_shape  # Tam çözünürlüklü karenin boyutu
+
+    def to_original(self, detections: Any, inside_roi: bool = False) -> List[List[float]]:
+        """
+        Dedektör sonucunu orijinal kare koordinatlarında [x1, y1, x2, y2, skor, sınıf]
+        satırlarına çevirir.
+
+        Args:
+            detections: YOLO sonucu (boxes.data) veya satır dizisi
+            inside_roi: Merkezi ROI çokgeni dışında kalan tespitleri at
+        """
+        data = detections.boxes.data if hasattr(detections, "boxes") else detections
+        rows = np.array(data.tolist() if hasattr(data, "tolist") else data, dtype=float).reshape(-1, 6)
+        if len(rows) == 0:
+            return []
+        offset_x, offset_y = self.offset
+        height, width = self.frame_shape[:2]
+        rows[:, [0, 2]] = np.clip(rows[:, [0, 2]] / self.scale + offset_x, 0, width)
+        rows[:, [1, 3]] = np.clip(rows[:, [1, 3]] / self.scale + offset_y, 0, height)
+        mapped = rows.tolist()
+        if inside_roi and self.roi is not None and self.roi.is_polygon:
+            mapped = [row for row in mapped
+                      if self.roi.contains((row[0] + row[2]) / 2, (row[1] + row[3]) / 2, self.frame_shape)]
+        return mapped
+
+
+def roi_for_parking(parking_id: Optional[int], gate: Optional[str] = None) -> Optional[RegionOfInterest]:
+    """
+    Otopark kapısı için yapılandırılmış ROI'yi döndürür; kapı için tanım
+    yoksa otoparkın ROI'si, o da yoksa None.
+    """
+    if parking_id is None:
+        return None
+    if gate:
+        roi = _PARKING_ROIS.get(f"{parking_id}:{gate}")
+        if roi is not None:
+            return roi
+    return _PARKING_ROIS.get(str(parking_id))
+
+
+def prepare_inference_view(frame: np.ndarray, roi: Optional[RegionOfInterest] = None,
+                           max_size: int = INFERENCE_MAX_SIZE, source_scale: int = 1,
+                           frame_shape: Optional[Tuple[int, ...]] = None) -> InferenceView:
+    """
+    Kareyi ROI'ye kırpar (kopyalamadan) ve çıkarım boyutuna küçültür.
+
+    Args:
+        frame: Kare; tam çözünürlüklü veya çözme sırasında source_scale kat küçültülmüş
+        roi: Şerit bölgesi (tam çözünürlük koordinatlarında); verilmezse tüm kare kullanılır
+        max_size: Dedektör girişinin en uzun kenarı (0: küçültme yapılmaz)
+        source_scale: Karenin tam çözünürlüğe göre küçültme oranı (bkz. ingest.DecodedImage)
+        frame_shape: Tam çözünürlüklü karenin boyutu (verilmezse karenin kendi boyutu)
+    """
+    frame_shape = frame_shape or frame.shape
+    x1, y1 = 0, 0
+    region = frame
+    if roi is not None:
+        x1, y1, x2, y2 = roi.crop_box(frame_shape)
+        region = frame[y1 // source_scale:y2 // source_scale, x1 // source_scale:x2 // source_scale]
+        x1, y1 = (x1 // source_scale) * source_scale, (y1 // source_scale) * source_scale
+    image, scale = letterbox(region, max_size)
+    return InferenceView(image, scale / source_scale, (x1, y1), roi, frame_shape)
+
+
+def _load_parking_rois(config: Dict[str, Any]) -> Dict[str, RegionOfInterest]:
+    rois = {}
+    for key, roi_config in config.items():
+        try:
+            rois[str(key)] = RegionOfInterest.from_config(roi_config)
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Otopark/kapı {key} için ROI yapılandırması geçersiz, yok sayılıyor: {str(e)}")
+    return rois
+
+
+_PARKING_ROIS = _load_parking_rois(ROI_BY_PARKING)
@@ -0,0 +1,269 @@
+"""
+Mikro-toplu çıkarım zamanlayıcısı.
+
+Plaka tanıma istekleri bir asyncio kuyruğunda toplanır. İlk istekten sonra kısa
+bir pencere (varsayılan 15 ms) veya en fazla N görüntü beklenir; toplanan
+görüntüler tek bir toplu YOLO + OCR çalıştırmasıyla işlenir ve her isteğin
+future'ı kendi sonucuyla tamamlanır. Toplu iş event loop dışında çalışır:
+varsayılan olarak ayrı bir thread'de, süreç havuzu verildiğinde ise havuzdaki
+bir worker sürecinde (bkz. worker_pool.RecognitionWorkerPool).
+
+Bekleyen istek sayısı sınırı aşarsa yeni istekler RecognitionBusyError ile
+reddedilir; API bunu Retry-After başlıklı HTTP 429 olarak döndürür.
+"""
+
+import math
+import functools
+import time
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..config import INFERENCE_BATCH_WINDOW_MS, INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_PENDING
+from ..monitoring import (
+    INFERENCE_QUEUE_DEPTH, INFERENCE_BATCH_SIZE, INFERENCE_QUEUE_WAIT_SECONDS, INFERENCE_REJECTED,
+    PLATE_RECOGNITION_COUNT, PLATE_RECOGNITION_LATENCY
+)
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+# (görüntüler, save_debug=[...], <seçenek>=[...]) -> görüntü başına sonuç sözlükleri.
+# İstek seçenekleri (save_debug, detection_mode, parking_id, gate...) görüntü başına listeler olarak verilir.
+BatchProcessor = Callable[..., List[Dict[str, Any]]]
+BatchRunner = Callable[..., Awaitable[List[Dict[str, Any]]]]
+
+
+class RecognitionBusyError(Exception):
+    """Bekleyen tanıma isteği sınırı aşıldığında fırlatılır"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Plaka tanıma kuyruğu dolu, {retry_after} saniye sonra tekrar deneyin")
+        self.retry_after = retry_after
+
+
+class _PendingRequest:
+    __slots__ = ("image", "options", "future", "enqueued_at")
+
+    def __init__(self, image: Any, options: Dict[str, Any], future: "asyncio.Future", enqueued_at: float):
+        self.image = image
+        self.options = options
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+def _batch_options(batch: List[_PendingRequest]) -> Dict[str, List[Any]]:
+    """İstek seçeneklerini seçenek başına görüntü listesine çevirir (eksik seçenekler None)"""
+    keys = {key for request in batch for key in request.options}
+    return {key: [request.options.get(key) for request in batch] for key in sorted(keys)}
+
+
+class InferenceScheduler:
+    """Eşzamanlı plaka tanıma isteklerini toplu çıkarım için gruplayan zamanlayıcı"""
+
+    def __init__(self,
+                 process_batch: Optional[BatchProcessor] = None,
+                 max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+                 window_ms: float = INFERENCE_BATCH_WINDOW_MS,
+                 max_pending: int = INFERENCE_MAX_PENDING,
+                 executor: Optional[Executor] = None):
+        self._process_batch = process_batch
+        self.max_batch_size = max(max_batch_size, 1)
+        self.window = max(window_ms, 0) / 1000.0
+        self.max_pending = max(max_pending, 1)
+        self._executor = executor
+        self._owns_executor = False
+        self._runner: Optional[BatchRunner] = None
+        self.concurrency = 1
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight: set = set()
+        self._queue: Optional["asyncio.Queue[_PendingRequest]"] = None
+        self._task: Optional["asyncio.Task"] = None
+        self._pending = 0
+        self._batch_seconds = 0.0  # Toplu iş süresinin üstel hareketli ortalaması
+        self.batches = 0
+        self.processed = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, runner: Optional[BatchRunner] = None, concurrency: int = 1) -> None:
+        """
+        Toplu iş döngüsünü mevcut event loop üzerinde başlatır.
+
+        Args:
+            runner: Toplu işi çalıştıran coroutine fonksiyonu (ör. süreç havuzu);
+                verilmezse toplu işler ayrı bir thread'de çalıştırılır
+            concurrency: Aynı anda çalışabilecek toplu iş sayısı
+        """
+        if self.running:
+            return
+        if runner is None:
+            if self._process_batch is None:
+                from . import process_images_for_plate_recognition
+                self._process_batch = process_images_for_plate_recognition
+            if self._executor is None:
+                # Modeller thread-safe olmadığından toplu işler tek bir thread'de sırayla çalışır
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plate-inference")
+                self._owns_executor = True
+            runner = self._run_in_executor
+            concurrency = 1
+        self._runner = runner
+        self.concurrency = max(concurrency, 1)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Çıkarım zamanlayıcısı başlatıldı: pencere={self.window * 1000:.0f} ms, "
+                    f"en fazla {self.max_batch_size} görüntü, {self.concurrency} eşzamanlı toplu iş")
+
+    async def stop(self) -> None:
+        """Döngüyü durdurur; kuyrukta bekleyen istekler hata ile sonlandırılır"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._inflight):
+            task.cancel()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                request = self._queue.get_nowait()
+                if not request.future.done():
+                    request.future.set_exception(RuntimeError("Çıkarım zamanlayıcısı durduruldu"))
+            INFERENCE_QUEUE_DEPTH.set(0)
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._owns_executor = False
+        logger.info("Çıkarım zamanlayıcısı durduruldu")
+
+    async def submit(self, image: Any, save_debug: bool = False, **options: Any) -> Dict[str, Any]:
+        """
+        Görüntüyü bir sonraki toplu işe ekler ve sonucunu bekler.
+
+        Args:
+            image: Görüntü (bytes, numpy dizisi veya dosya yolu)
+            save_debug: Bu görüntü için debug kaydını zorla
+            **options: Görüntüye özel diğer tanıma seçenekleri (ör. detection_mode, parking_id)
+
+        Returns:
+            process_image_for_plate_recognition ile aynı yapıda sonuç sözlüğü
+        """
+        if not self.running:
+            raise RuntimeError("Çıkarım zamanlayıcısı çalışmıyor")
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            INFERENCE_REJECTED.inc()
+            raise RecognitionBusyError(self.retry_after())
+        future = asyncio.get_running_loop().create_future()
+        self._pending += 1
+        try:
+            options["save_debug"] = save_debug
+            await self._queue.put(_PendingRequest(image, options, future, time.perf_counter()))
+            INFERENCE_QUEUE_DEPTH.set(self._queue.qsize())
+            return await future
+        finally:
+            self._pending -= 1
+
+    def retry_after(self) -> int:
+        """Bekleyen isteklerin işlenmesi için tahmini süre (saniye, en az 1)"""
+        rounds = math.ceil(self._pending / (self.max_batch_size * self.concurrency))
+        return max(1, math.ceil(rounds * self._batch_seconds))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "concurrency": self.concurrency,
+            "batches": self.batches,
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window * 1000,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Boş toplu iş yuvası yoksa istekler kuyrukta birikir ve sonraki toplu iş büyür
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                # Önceki toplu iş sürerken biriken istekleri beklemeden al
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            INFERENCE_QUEUE_DEPTH.set(self._queue.qsize())
+            task = asyncio.create_task(self._execute(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run_in_executor(self, images: List[Any], **options: List[Any]) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(self._process_batch, images, **options))
+
+    async def _execute(self, batch: List[_PendingRequest]) -> None:
+        try:
+            await self._execute_batch(batch)
+        except asyncio.CancelledError:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(RuntimeError("Çıkarım zamanlayıcısı durduruldu"))
+            raise
+        finally:
+            self._slots.release()
+
+    async def _execute_batch(self, batch: List[_PendingRequest]) -> None:
+        # Bağlantısı kopan (future'ı iptal edilen) istekleri işleme
+        batch = [request for request in batch if not request.future.done()]
+        if not batch:
+            return
+
+        started_at = time.perf_counter()
+        for request in batch:
+            INFERENCE_QUEUE_WAIT_SECONDS.observe(started_at - request.enqueued_at)
+        INFERENCE_BATCH_SIZE.observe(len(batch))
+
+        try:
+            results = await self._runner([request.image for request in batch], **_batch_options(batch))
+        except Exception as e:
+            logger.error(f"Toplu çıkarım hatası ({len(batch)} görüntü): {str(e)}")
+            for request in batch:
+                PLATE_RECOGNITION_COUNT.labels(success="false").inc()
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        finished_at = time.perf_counter()
+        batch_seconds = finished_at - started_at
+        self._batch_seconds = batch_seconds if self.batches == 0 else 0.8 * self._batch_seconds + 0.2 * batch_seconds
+        self.batches += 1
+        self.processed += len(batch)
+        logger.debug(f"Toplu çıkarım tamamlandı: {len(batch)} görüntü, {batch_seconds:.3f} sn")
+        for request, result in zip(batch, results):
+            success = "true" if result and not result.get("error") else "false"
+            PLATE_RECOGNITION_COUNT.labels(success=success).inc()
+            PLATE_RECOGNITION_LATENCY.observe(finished_at - request.enqueued_at)
+            if not request.future.done():
+                request.future.set_result(result)
+
+
+# Süreç genelinde paylaşılan zamanlayıcı (uygulama açılışında başlatılır)
+inference_scheduler = InferenceScheduler()
@@ -1,8 +1,6 @@
 import string
-import easyocr
 
-# Initialize the OCR reader
-reader = easyocr.Reader(['en'], gpu=False)
+from .registry import registry, OCR_READER
 
 # Mapping dictionaries for character conversion
 dict_char_to_int = {'O': '0',
@@ -116,6 +114,11 @@ def read_license_plate(license_plate_crop):
         tuple: Tuple containing the formatted license plate text and its confidence score.
     """
 
+    # Shared per-process OCR reader (loaded once by the model registry)
+    reader = registry.get(OCR_READER)
+    if reader is None:
+        return None, None
+
     detections = reader.readtext(license_plate_crop)
 
     for detection in detections:
@@ -0,0 +1,163 @@
+"""
+Plaka tanıma süreç havuzu.
+
+Tanıma (YOLO + OCR) API sürecinin dışında, modelleri açılışta bir kez yükleyen
+worker süreçlerinde çalışır; böylece CPU yoğun numpy/torch işleri event loop'u,
+WebSocket ping'lerini ve /health gibi diğer route'ları geciktirmez.
+
+Görüntü baytları süreçler arasında pickle ile kopyalanmaz: API süreci baytları
+bir paylaşımlı bellek bloğuna yazar, worker aynı bloğu kopyalamadan okuyup
+doğrudan cv2.imdecode'a verir. Blok, toplu iş tamamlanınca API sürecinde silinir.
+"""
+
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+from ..config import RECOGNITION_WORKERS, RECOGNITION_POOL_START_METHOD
+from ..monitoring import RECOGNITION_WORKERS_BUSY
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+def _init_worker() -> None:
+    """Worker süreci açılışında modelleri yükler (registry süreç başına bir kez yükler)"""
+    from . import _get_model_module
+    _get_model_module()
+    logger.info(f"Tanıma worker'ı hazır (pid={os.getpid()})")
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+def _process_shared_batch(images: List[Any], options: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Worker içinde çalışır: paylaşımlı bellekteki görüntüleri kopyalamadan toplu işler"""
+    from . import process_images_for_plate_recognition
+
+    segments = []
+    views = []
+    inputs = []
+    try:
+        for image in images:
+            if isinstance(image, tuple):
+                # Paylaşımlı bellekteki görüntü: (blok adı, bayt sayısı)
+                name, size = image
+                # Worker'lar API sürecinin resource tracker'ını paylaşır; bloğu API süreci siler
+                segment = shared_memory.SharedMemory(name=name)
+                segments.append(segment)
+                view = segment.buf[:size]
+                views.append(view)
+                inputs.append(view)
+            else:
+                inputs.append(image)
+        return process_images_for_plate_recognition(inputs, **options)
+    finally:
+        inputs.clear()
+        for view in views:
+            try:
+                view.release()
+            except BufferError:
+                pass
+        for segment in segments:
+            try:
+                segment.close()
+            except BufferError:
+                logger.warning(f"Paylaşımlı bellek bloğu kapatılamadı: {segment.name}")
+
+
+class RecognitionWorkerPool:
+    """Modelleri önceden yüklenmiş worker süreçlerinde toplu plaka tanıma çalıştırır"""
+
+    def __init__(self, workers: int = RECOGNITION_WORKERS, start_method: str = RECOGNITION_POOL_START_METHOD):
+        self.workers = max(workers, 1)
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._busy = 0
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    async def start(self) -> None:
+        """Worker süreçlerini başlatır ve hepsi modelleri yükleyene kadar bekler"""
+        if self.running:
+            return
+        self._executor = self._create_executor()
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(self._executor, _warmup) for _ in range(self.workers)))
+        logger.info(f"Tanıma süreç havuzu başlatıldı: {self.workers} worker, pid={sorted(set(pids))}")
+
+    async def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("Tanıma süreç havuzu durduruldu")
+
+    async def run_batch(self, images: List[Any], **options: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Toplu işi bir worker sürecinde çalıştırır (InferenceScheduler çalıştırıcısı).
+
+        Bytes görüntüler paylaşımlı belleğe yazılır; diğer türler (dosya yolu,
+        numpy dizisi) olduğu gibi gönderilir.
+        """
+        if self._executor is None:
+            raise RuntimeError("Tanıma süreç havuzu çalışmıyor")
+        segments = []
+        payload = []
+        try:
+            for image in images:
+                if isinstance(image, (bytes, bytearray)) and len(image) > 0:
+                    segment = shared_memory.SharedMemory(create=True, size=len(image))
+                    segments.append(segment)
+                    segment.buf[:len(image)] = image
+                    payload.append((segment.name, len(image)))
+                else:
+                    payload.append(image)
+
+            loop = asyncio.get_running_loop()
+            self._busy += 1
+            RECOGNITION_WORKERS_BUSY.set(self._busy)
+            try:
+                return await loop.run_in_executor(self._executor, _process_shared_batch, payload, options)
+            except BrokenProcessPool:
+                # Bir worker beklenmedik şekilde sonlandıysa havuzu yeniden oluştur
+                logger.error("Tanıma worker'ı beklenmedik şekilde sonlandı, havuz yeniden başlatılıyor")
+                self._restart()
+                raise
+            finally:
+                self._busy -= 1
+                RECOGNITION_WORKERS_BUSY.set(self._busy)
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "busy": self._busy,
+            "start_method": self.start_method,
+        }
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+        )
+
+    def _restart(self) -> None:
+        broken, self._executor = self._executor, self._create_executor()
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+
+
+# Süreç genelinde paylaşılan havuz (RECOGNITION_WORKERS > 0 ise açılışta başlatılır)
+recognition_pool = RecognitionWorkerPool()
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+import datetime
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -27,3 +29,55 @@ class ParkingRecord(Base):
     
     # İlişkiler
     vehicle = relationship("Vehicle", back_populates="parking_records")
+
+    # Sıcak sorgu yollarına uygun indeksler; mevcut veritabanlarına app/migrations.py ile eklenir.
+    # Her giriş bir satır ekler, her çıkış exit_time/is_active'i güncellediğinden her indeks yazma
+    # yoluna maliyet ekler; set, tests/test_migrations.py'deki sorgu planı testlerinin gerektirdiği
+    # en küçük kümedir.
+    __table_args__ = (
+        # Bir araç aynı otoparkta en fazla bir aktif kayda sahip olabilir (kısmi benzersiz indeks).
+        # get_active_parking_record_by_vehicle (vehicle_id, is_active[, parking_id]) bu indeksi kullanır.
+        Index(
+            "uq_parking_records_active_vehicle_parking",
+            vehicle_id, parking_id,
+            unique=True,
+            postgresql_where=(is_active == True),
+            sqlite_where=(is_active == True),
+        ),
+        # Aracın tüm kayıtları (vehicle.parking_records, araç geçmişi)
+        Index("ix_parking_records_vehicle_id_entry_time", vehicle_id, entry_time),
+        # (entry_time, id) sıralı okuma: /parking-records, dışa aktarma, /recent-activities giriş olayları
+        # ve /active-vehicles (açık kayıtlar en yeni girişler arasında olduğundan ayrı kısmi indeks gerekmez)
+        Index("ix_parking_records_entry_time_id", entry_time, id),
+        Index("ix_parking_records_parking_entry_time_id", parking_id, entry_time, id),
+        # /recent-activities çıkış olayları: exit_time'a göre azalan sıralı; otopark filtresi indeksten
+        # okunur, böylece tek indeks hem filtreli hem filtresiz sorguya yeter
+        Index(
+            "ix_parking_records_closed_exit_time_id",
+            exit_time, id, parking_id,
+            postgresql_where=(exit_time != None),
+            sqlite_where=(exit_time != None),
+        ),
+    )
+
+class ParkingOccupancy(Base):
+    """Otopark başına aktif araç sayısı özeti (OCCUPANCY_SUMMARY_TABLE açıkken app/occupancy.py tarafından güncellenir)"""
+    __tablename__ = "parking_occupancy"
+
+    parking_id = Column(Integer, primary_key=True)
+    active_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class PlateRecord(Base):
+    __tablename__ = "plate_records"
+
+    id = Column(Integer, primary_key=True, index=True)
+    plate_text = Column(String, index=True)
+    confidence = Column(Float)
+    timestamp = Column(DateTime, default=datetime.datetime.utcnow)
+    image_path = Column(String, nullable=True)
+    processed = Column(Boolean, default=False)
+    bbox = Column(String, nullable=True)  # JSON formatında bounding box
+    
+    def __repr__(self):
+        return f"<PlateRecord(id={self.id}, plate={self.plate_text}, confidence={self.confidence})>"
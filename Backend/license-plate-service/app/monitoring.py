@@ -38,6 +38,192 @@ PLATE_RECOGNITION_LATENCY = Histogram(
     'License plate recognition latency in seconds'
 )
 
+MODEL_LOAD_SECONDS = Gauge(
+    'license_plate_model_load_seconds',
+    'Time spent loading a model in this worker process',
+    ['model']
+)
+
+MODEL_MEMORY_BYTES = Gauge(
+    'license_plate_model_memory_bytes',
+    'Resident memory growth caused by loading a model in this worker process',
+    ['model']
+)
+
+OCR_VARIANT_ATTEMPTS = Counter(
+    'license_plate_ocr_variant_attempts_total',
+    'OCR passes run per preprocessing variant',
+    ['variant']
+)
+
+OCR_VARIANT_HITS = Counter(
+    'license_plate_ocr_variant_hits_total',
+    'OCR passes that produced a Turkish-format plate above the early-exit confidence',
+    ['variant']
+)
+
+OCR_VARIANT_LATENCY = Histogram(
+    'license_plate_ocr_variant_latency_seconds',
+    'Latency of a single OCR pass per preprocessing variant',
+    ['variant']
+)
+
+OCR_CASCADE_DEPTH = Histogram(
+    'license_plate_ocr_cascade_depth',
+    'Number of OCR variants run before the cascade stopped',
+    buckets=(1, 2, 3, 4, 5, 6)
+)
+
+DEBUG_CAPTURE_IMAGES = Counter(
+    'license_plate_debug_capture_images_total',
+    'Debug images handled by the capture writer',
+    ['result']  # written, dropped, failed
+)
+
+INFERENCE_QUEUE_DEPTH = Gauge(
+    'license_plate_inference_queue_depth',
+    'Number of plate recognition requests waiting for a batch'
+)
+
+INFERENCE_BATCH_SIZE = Histogram(
+    'license_plate_inference_batch_size',
+    'Number of images processed together in one inference batch',
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 32)
+)
+
+INFERENCE_QUEUE_WAIT_SECONDS = Histogram(
+    'license_plate_inference_queue_wait_seconds',
+    'Time a plate recognition request waits before its batch starts',
+    buckets=(0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+INFERENCE_REJECTED = Counter(
+    'license_plate_inference_rejected_total',
+    'Plate recognition requests rejected with 429 because the queue was full'
+)
+
+RECOGNITION_WORKERS_BUSY = Gauge(
+    'license_plate_recognition_workers_busy',
+    'Number of recognition worker processes currently running a batch'
+)
+
+VEHICLE_DETECTION_PASSES = Counter(
+    'license_plate_vehicle_detection_total',
+    'Frames for which the COCO vehicle detector was run or skipped',
+    ['mode', 'result']  # result: run, skipped
+)
+
+RECOGNITION_CACHE_REQUESTS = Counter(
+    'license_plate_recognition_cache_requests_total',
+    'Recognition result cache lookups',
+    ['result']  # hit, miss
+)
+
+PARKING_RATE_LOOKUPS = Counter(
+    'license_plate_parking_rate_lookups_total',
+    'Hourly parking rate lookups by cache outcome',
+    ['result']  # fresh, stale, miss, error
+)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    'license_plate_db_pool_checkout_seconds',
+    'Time spent waiting for a connection from the database pool',
+    ['engine'],  # sync, async
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    'license_plate_db_pool_checkout_timeouts_total',
+    'Database pool checkouts that timed out waiting for a connection',
+    ['engine']  # sync, async
+)
+
+DB_POOL_SIZE_GAUGE = Gauge(
+    'license_plate_db_pool_size',
+    'Configured number of persistent connections in the database pool',
+    ['engine']  # sync, async
+)
+
+DB_POOL_IN_USE = Gauge(
+    'license_plate_db_pool_connections_in_use',
+    'Database connections currently checked out of the pool',
+    ['engine']  # sync, async
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    'license_plate_db_pool_overflow_connections',
+    'Database connections open beyond pool_size (max_overflow)',
+    ['engine']  # sync, async
+)
+
+EVENT_BUS_EVENTS = Counter(
+    'license_plate_event_bus_events_total',
+    'Notification events handled by the in-process event bus',
+    ['result']  # published, delivered, coalesced, dropped, failed
+)
+
+EVENT_BUS_QUEUE_DEPTH = Gauge(
+    'license_plate_event_bus_queue_depth',
+    'Notification events waiting to be delivered to WebSocket clients'
+)
+
+EVENT_BUS_DELIVERY_LAG = Histogram(
+    'license_plate_event_bus_delivery_lag_seconds',
+    'Time from publishing a notification event until it is delivered',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+WS_SEND_QUEUE_DEPTH = Gauge(
+    'license_plate_ws_send_queue_messages',
+    'Outbound WebSocket messages queued across all client send queues'
+)
+
+WS_SEND_DROPPED = Counter(
+    'license_plate_ws_send_dropped_total',
+    'Outbound WebSocket messages dropped or replaced in client send queues',
+    ['reason']  # drop_oldest, coalesced
+)
+
+WS_CLIENT_EVICTIONS = Counter(
+    'license_plate_ws_client_evictions_total',
+    'WebSocket clients disconnected by the server for being too slow, failing or going silent',
+    ['reason']  # queue_full, send_timeout, send_error, ping_timeout
+)
+
+WS_CONNECTIONS = Gauge(
+    'license_plate_ws_connections',
+    'Currently connected WebSocket clients'
+)
+
+WS_ROOMS = Gauge(
+    'license_plate_ws_rooms',
+    'WebSocket rooms with at least one connected client'
+)
+
+WS_BACKPLANE_MESSAGES = Counter(
+    'license_plate_ws_backplane_messages_total',
+    'WebSocket events exchanged with other workers through the backplane',
+    ['backplane', 'direction']  # direction: published, received, failed
+)
+
+VEHICLE_EVENT_BATCH_EVENTS = Counter(
+    'license_plate_vehicle_event_batch_events_total',
+    'Vehicle entry/exit events applied through the batch ingestion endpoint',
+    ['type', 'status']  # status: entered, exited, already_parked, no_active_record, invalid_timestamp, fee_unavailable, failed
+)
+
+HISTORY_EXPORT_ROWS = Counter(
+    'license_plate_history_export_rows_total',
+    'Parking records streamed by the history export endpoint',
+    ['format']  # ndjson, csv
+)
+
+PARKING_OCCUPANCY = Gauge(
+    'license_plate_parking_occupancy',
+    'Vehicles currently parked (active parking records) per parking',
+    ['parking_id']
+)
+
 PARKING_RECORDS_COUNT = Counter(
     'parking_records_total',
     'Total number of parking records',
@@ -144,17 +330,17 @@ def track_plate_recognition(func):
     return wrapper
 
 # Park kaydı metriklerini güncellemek için yardımcı fonksiyonlar
-def track_vehicle_entry():
+def track_vehicle_entry(count: int = 1):
     """
     Araç girişlerini izle
     """
-    PARKING_RECORDS_COUNT.labels(action="entry").inc()
+    PARKING_RECORDS_COUNT.labels(action="entry").inc(count)
 
-def track_vehicle_exit():
+def track_vehicle_exit(count: int = 1):
     """
     Araç çıkışlarını izle
     """
-    PARKING_RECORDS_COUNT.labels(action="exit").inc()
+    PARKING_RECORDS_COUNT.labels(action="exit").inc(count)
 
 # Log ve metrik yapılandırmasını başlat
 def init_monitoring():
@@ -0,0 +1,234 @@
+"""
+Otopark başına anlık doluluk (aktif araç) sayaçları.
+
+Dashboard'lar doluluğu /active-vehicles satırlarını sayarak değil, bellekte
+tutulan sayılardan O(1) okur. Giriş/çıkış yapan CRUD fonksiyonları değişikliği
+stage() ile oturumun işlemine ekler; sayılar yalnızca işlem commit edildiğinde
+(after_commit) güncellenir, işlem geri alınırsa değişiklik atılır. Her
+değişiklik Prometheus gauge'una ve otoparkın WebSocket odasına
+(parking_update, action=occupancy) aktarılır.
+
+Sayılar başlangıçta parking_records'tan yeniden oluşturulur. Her worker kendi
+commit'lerini anında görür; diğer worker'ların değişiklikleri
+OCCUPANCY_RESYNC_SECONDS aralıklı eşitlemeyle yansır. OCCUPANCY_SUMMARY_TABLE
+açıkken sayılar aynı işlem içinde (before_commit) parking_occupancy tablosunda
+da güncellenir: tablo tüm worker'lar için doğru toplamı tutar, commit eden
+worker güncel toplamı RETURNING ile alır ve eşitleme yalnızca bu küçük tablodan
+okunur.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, event, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .config import OCCUPANCY_SUMMARY_TABLE, OCCUPANCY_RESYNC_SECONDS
+from .events import EventKind, event_bus
+from .models import ParkingOccupancy, ParkingRecord
+from .monitoring import PARKING_OCCUPANCY
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+# Oturum (Session.info) anahtarları: işlemde bekleyen değişiklikler ve özet tablodan dönen toplamlar
+_DELTAS_KEY = "occupancy_deltas"
+_TOTALS_KEY = "occupancy_totals"
+
+
+class OccupancyTracker:
+    """Otopark ID'sine göre aktif araç sayılarını işlemlerle tutarlı biçimde tutar"""
+
+    def __init__(self,
+                 use_summary_table: bool = OCCUPANCY_SUMMARY_TABLE,
+                 resync_interval: float = OCCUPANCY_RESYNC_SECONDS):
+        self.use_summary_table = use_summary_table
+        self.resync_interval = resync_interval
+        self._counts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._resync_task: Optional["asyncio.Task"] = None
+
+    def get(self, parking_id: int) -> int:
+        return self._counts.get(parking_id, 0)
+
+    def snapshot(self) -> Dict[int, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def stage(self, db, parking_id: Optional[int], delta: int) -> None:
+        """
+        Aktif araç sayısı değişikliğini oturumun işlemine ekler; işlem commit
+        edildiğinde uygulanır, geri alınırsa atılır. Commit'ten önce çağrılmalıdır.
+        """
+        info = getattr(db, "info", None)
+        if not delta or not isinstance(info, dict):
+            return
+        deltas = info.setdefault(_DELTAS_KEY, {})
+        parking_id = parking_id or 1  # Default 1 olarak ayarla
+        deltas[parking_id] = deltas.get(parking_id, 0) + delta
+
+    def _before_commit(self, session: Session) -> None:
+        deltas = session.info.get(_DELTAS_KEY)
+        if self.use_summary_table and deltas:
+            session.info[_TOTALS_KEY] = self._apply_to_table(session, deltas)
+
+    def _after_commit(self, session: Session) -> None:
+        deltas = session.info.pop(_DELTAS_KEY, None)
+        totals = session.info.pop(_TOTALS_KEY, None) or {}
+        if not deltas:
+            return
+        with self._lock:
+            for parking_id, delta in deltas.items():
+                count = totals.get(parking_id, self._counts.get(parking_id, 0) + delta)
+                self._counts[parking_id] = max(count, 0)
+            changed = {parking_id: self._counts[parking_id] for parking_id in deltas}
+        self._publish(changed)
+
+    def _after_transaction_end(self, session: Session, transaction) -> None:
+        # Commit edilmeden biten (geri alınan/kapatılan) işlemin değişiklikleri atılır
+        if transaction.parent is None:
+            session.info.pop(_DELTAS_KEY, None)
+            session.info.pop(_TOTALS_KEY, None)
+
+    def _apply_to_table(self, session: Session, deltas: Dict[int, int]) -> Dict[int, int]:
+        """Değişiklikleri özet tabloya işlem içinde uygular; güncel toplamları döndürür"""
+        dialect = session.get_bind().dialect.name
+        upsert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(dialect)
+        totals = {}
+        # Sabit sıra: eşzamanlı işlemler satırları aynı sırayla kilitler
+        for parking_id, delta in sorted(deltas.items()):
+            if upsert is not None:
+                statement = (
+                    upsert(ParkingOccupancy)
+                    .values(parking_id=parking_id, active_count=max(delta, 0))
+                    .on_conflict_do_update(index_elements=[ParkingOccupancy.parking_id],
+                                           set_={"active_count": ParkingOccupancy.active_count + delta,
+                                                 "updated_at": func.now()})
+                    .returning(ParkingOccupancy.active_count)
+                )
+                totals[parking_id] = session.execute(statement).scalar_one()
+                continue
+            result = session.execute(
+                update(ParkingOccupancy).where(ParkingOccupancy.parking_id == parking_id)
+                .values(active_count=ParkingOccupancy.active_count + delta)
+            )
+            if result.rowcount == 0:
+                session.execute(insert(ParkingOccupancy).values(parking_id=parking_id, active_count=max(delta, 0)))
+            totals[parking_id] = session.scalar(
+                select(ParkingOccupancy.active_count).where(ParkingOccupancy.parking_id == parking_id))
+        return totals
+
+    def _count_active(self, db: Session) -> Dict[int, int]:
+        rows = db.execute(
+            select(ParkingRecord.parking_id, func.count())
+            .where(ParkingRecord.is_active == True)
+            .group_by(ParkingRecord.parking_id)
+        ).all()
+        counts: Dict[int, int] = {}
+        for parking_id, count in rows:
+            counts[parking_id or 1] = counts.get(parking_id or 1, 0) + count
+        return counts
+
+    def rebuild(self, db: Session) -> Dict[int, int]:
+        """
+        Sayıları parking_records'tan yeniden oluşturur; özet tablo açıksa tabloyu
+        da yeniden yazar. Başlangıçta çağrılır.
+        """
+        try:
+            if self.use_summary_table:
+                if db.get_bind().dialect.name == "postgresql":
+                    # Eşzamanlı girişler tablo yeniden yazılana kadar bekler; sayımla yazım arasında değişiklik kaybolmaz
+                    db.execute(text("LOCK TABLE parking_occupancy IN EXCLUSIVE MODE"))
+                db.execute(delete(ParkingOccupancy))
+            counts = self._count_active(db)
+            if self.use_summary_table and counts:
+                db.execute(insert(ParkingOccupancy),
+                           [{"parking_id": parking_id, "active_count": count} for parking_id, count in counts.items()])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        self._replace(counts)
+        logger.info(f"Doluluk sayaçları yeniden oluşturuldu: {len(counts)} otopark, {sum(counts.values())} aktif araç")
+        return counts
+
+    def refresh(self, db: Session) -> Dict[int, int]:
+        """Bellekteki sayıları veritabanıyla eşitler (özet tablo açıksa tablodan okunur)"""
+        if self.use_summary_table:
+            counts = dict(db.execute(select(ParkingOccupancy.parking_id, ParkingOccupancy.active_count)).all())
+        else:
+            counts = self._count_active(db)
+        db.rollback()  # Salt okuma; işlemi kapat
+        self._replace(counts)
+        return counts
+
+    def _replace(self, counts: Dict[int, int]) -> None:
+        with self._lock:
+            previous = self._counts
+            self._counts = {parking_id: 0 for parking_id in previous}
+            self._counts.update(counts)
+            changed = {parking_id: count for parking_id, count in self._counts.items()
+                       if previous.get(parking_id) != count}
+        self._publish(changed)
+
+    def _publish(self, changed: Dict[int, int]) -> None:
+        for parking_id, count in changed.items():
+            PARKING_OCCUPANCY.labels(parking_id=str(parking_id)).set(count)
+            if event_bus.running:
+                event_bus.publish(EventKind.PARKING_UPDATE, {
+                    "id": parking_id,
+                    "action": "occupancy",
+                    "active_vehicles": count
+                }, coalesce_key=f"occupancy:{parking_id}")
+
+    async def start_resync(self, session_factory: Callable[[], Session]) -> None:
+        """Sayıları periyodik olarak veritabanıyla eşitleyen arka plan görevini başlatır"""
+        if self.resync_interval <= 0 or (self._resync_task is not None and not self._resync_task.done()):
+            return
+        self._session_factory = session_factory
+        self._resync_task = asyncio.create_task(self._resync_loop())
+        logger.info(f"Doluluk eşitlemesi başlatıldı: aralık={self.resync_interval}s, "
+                    f"özet tablo={'açık' if self.use_summary_table else 'kapalı'}")
+
+    async def stop_resync(self) -> None:
+        if self._resync_task is None:
+            return
+        self._resync_task.cancel()
+        try:
+            await self._resync_task
+        except asyncio.CancelledError:
+            pass
+        self._resync_task = None
+
+    async def _resync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.resync_interval)
+            try:
+                await run_in_threadpool(self._refresh_with_new_session)
+            except Exception as e:
+                logger.error(f"Doluluk eşitlemesi sırasında hata: {str(e)}")
+
+    def _refresh_with_new_session(self) -> None:
+        db = self._session_factory()
+        try:
+            self.refresh(db)
+        finally:
+            db.close()
+
+
+# Global doluluk sayacı örneği
+occupancy = OccupancyTracker()
+
+# Sayaçlar oturum işlemine bağlıdır; tüm Session'lar (AsyncSession'ın senkron oturumu dahil) için dinlenir
+event.listen(Session, "before_commit", occupancy._before_commit)
+event.listen(Session, "after_commit", occupancy._after_commit)
+event.listen(Session, "after_transaction_end", occupancy._after_transaction_end)
@@ -0,0 +1,185 @@
+"""
+Otopark saatlik ücret önbelleği.
+
+Ücretler araç çıkışında Parking Management Service'ten tek tek çekilmek yerine
+otopark ID'sine göre önbellekte tutulur:
+
+- PARKING_RATE_TTL_SECONDS içinde ücret doğrudan önbellekten döner.
+- Süre dolduktan sonra PARKING_RATE_STALE_SECONDS boyunca eski ücret hemen
+  döndürülür ve arka planda yenilenir (stale-while-revalidate); servis kısa
+  süreli erişilemez olsa da çıkışlar devam eder.
+- Önbellekte hiç ücret yoksa (veya çok eskiyse) servis zaman aşımlı olarak
+  senkron çağrılır.
+
+İstekler bağlantıları yeniden kullanan tek bir requests.Session üzerinden yapılır.
+Açılışta tüm otoparkların ücretleri toplu olarak yüklenebilir (PARKING_RATE_PRELOAD).
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    PARKING_MANAGEMENT_SERVICE_URL, PARKING_SERVICE_TIMEOUT_SECONDS, PARKING_SERVICE_POOL_SIZE,
+    PARKING_RATE_TTL_SECONDS, PARKING_RATE_STALE_SECONDS
+)
+from .monitoring import PARKING_RATE_LOOKUPS
+
+# Loglama yapılandırması
+logger = logging.getLogger(__name__)
+
+
+def _parse_rate(parking_data: Any) -> Optional[float]:
+    """API yanıtındaki 'rate' alanını float'a çevirir (yoksa veya geçersizse None)"""
+    if not isinstance(parking_data, dict) or parking_data.get("rate") is None:
+        return None
+    try:
+        return float(parking_data["rate"])  # String olarak gelirse float'a çevir
+    except (ValueError, TypeError) as e:
+        logger.error(f"Rate değeri float'a çevrilemedi: {str(e)}")
+        return None
+
+
+class ParkingRateCache:
+    """Otopark ID'sine göre saatlik ücretleri TTL ve stale-while-revalidate ile önbelleğe alır"""
+
+    def __init__(self,
+                 base_url: str = PARKING_MANAGEMENT_SERVICE_URL,
+                 ttl_seconds: float = PARKING_RATE_TTL_SECONDS,
+                 stale_seconds: float = PARKING_RATE_STALE_SECONDS,
+                 timeout: float = PARKING_SERVICE_TIMEOUT_SECONDS,
+                 pool_size: int = PARKING_SERVICE_POOL_SIZE,
+                 clock=time.monotonic):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl_seconds
+        self.stale = stale_seconds
+        self.timeout = timeout
+        self._clock = clock
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # parking_id -> (saatlik ücret, alındığı zaman)
+        self._rates: Dict[int, Tuple[float, float]] = {}
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    def get_rate(self, parking_id: int) -> Optional[float]:
+        """
+        Otoparkın saatlik ücretini (TL) döndürür.
+
+        Returns:
+            Saatlik ücret veya ücret alınamadıysa ve önbellekte kullanılabilir değer yoksa None
+        """
+        now = self._clock()
+        with self._lock:
+            cached = self._rates.get(parking_id)
+        if cached is not None:
+            rate, fetched_at = cached
+            age = now - fetched_at
+            if age < self.ttl:
+                PARKING_RATE_LOOKUPS.labels(result="fresh").inc()
+                return rate
+            if age < self.ttl + self.stale:
+                PARKING_RATE_LOOKUPS.labels(result="stale").inc()
+                self._refresh_in_background(parking_id)
+                return rate
+
+        PARKING_RATE_LOOKUPS.labels(result="miss").inc()
+        rate = self.fetch(parking_id)
+        if rate is None:
+            PARKING_RATE_LOOKUPS.labels(result="error").inc()
+        return rate
+
+    def fetch(self, parking_id: int) -> Optional[float]:
+        """Ücreti servisten senkron çeker ve önbelleğe yazar"""
+        url = f"{self.base_url}/api/parkings/{parking_id}"
+        logger.info(f"Otopark (ID={parking_id}) için API üzerinden ücret bilgisi çekiliyor: {url}")
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                logger.error(f"Otopark servisi erişilemedi. Status code: {response.status_code}")
+                return None
+            parking_data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Parking service error: {str(e)}")
+            return None
+
+        rate = _parse_rate(parking_data)
+        if rate is None:
+            logger.warning(f"API yanıtında 'rate' alanı bulunamadı/null. Otopark ID: {parking_id}")
+            return None
+        self.set_rate(parking_id, rate)
+        logger.info(f"API'den alınan ücret: {rate} TL/saat (Otopark ID: {parking_id})")
+        return rate
+
+    def preload(self) -> int:
+        """
+        Tüm otoparkların ücretlerini tek istekle yükler.
+
+        Returns:
+            Önbelleğe alınan ücret sayısı (servis erişilemezse 0)
+        """
+        url = f"{self.base_url}/api/parkings"
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                logger.warning(f"Otopark ücretleri önceden yüklenemedi. Status code: {response.status_code}")
+                return 0
+            parkings = response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Otopark ücretleri önceden yüklenemedi: {str(e)}")
+            return 0
+
+        loaded = 0
+        for parking_data in parkings if isinstance(parkings, list) else []:
+            rate = _parse_rate(parking_data)
+            if rate is not None and parking_data.get("id") is not None:
+                self.set_rate(int(parking_data["id"]), rate)
+                loaded += 1
+        logger.info(f"{loaded} otoparkın ücret bilgisi önbelleğe alındı")
+        return loaded
+
+    def set_rate(self, parking_id: int, rate: float) -> None:
+        with self._lock:
+            self._rates[parking_id] = (rate, self._clock())
+
+    def invalidate(self, parking_id: Optional[int] = None) -> None:
+        """Tek bir otoparkın (veya tüm otoparkların) önbellekteki ücretini siler"""
+        with self._lock:
+            if parking_id is None:
+                self._rates.clear()
+            else:
+                self._rates.pop(parking_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached": len(self._rates),
+            "refreshing": len(self._refreshing),
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale,
+        }
+
+    def _refresh_in_background(self, parking_id: int) -> None:
+        with self._lock:
+            if parking_id in self._refreshing:
+                return
+            self._refreshing.add(parking_id)
+        threading.Thread(target=self._refresh, args=(parking_id,), daemon=True,
+                         name=f"parking-rate-refresh-{parking_id}").start()
+
+    def _refresh(self, parking_id: int) -> None:
+        try:
+            if self.fetch(parking_id) is None:
+                logger.warning(f"Otopark (ID={parking_id}) ücreti yenilenemedi, eski ücret kullanılmaya devam ediliyor")
+        finally:
+            with self._lock:
+                self._refreshing.discard(parking_id)
+
+
+# Süreç genelinde paylaşılan ücret önbelleği
+rate_cache = ParkingRateCache()
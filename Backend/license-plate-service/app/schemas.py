@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 
 # Vehicle Schemas
@@ -50,4 +50,12 @@ class VehicleWithRecords(Vehicle):
     parking_records: List[ParkingRecord] = []
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True 
+
+# Toplu giriş/çıkış olayları (bağlantısı kopan bariyerlerin biriktirdiği olaylar)
+class VehicleEvent(BaseModel):
+    type: Literal["entry", "exit"]
+    license_plate: str
+    parking_id: int = 1  # Varsayılan otopark ID'si
+    timestamp: datetime  # Olayın bariyerde gerçekleştiği zaman (istemci saati)
+    event_id: Optional[str] = None  # İstemcinin olay kimliği (sonuçla birlikte geri döner)
@@ -1,18 +1,56 @@
 """
 WebSocket bağlantıları ve ileti gönderimini yöneten modül
+
+Birden fazla odaya giden olaylar (araç/park kaydı güncellemeleri) fan-out
+planıyla gönderilir: hedef odalardaki istemciler tekilleştirilir, mesaj bir kez
+serileştirilir (orjson kuruluysa orjson ile) ve her istemciye tam bir kez
+gönderilir.
+
+Yayınlar istemcilere doğrudan gönderilmez; her istemcinin sınırlı bir giden
+kuyruğu ve kendi yazıcı görevi vardır (ClientSender). Yavaş bir pano yalnızca
+kendi kuyruğunu doldurur, diğer istemcilere gönderimi geciktirmez. Kuyruk
+dolduğunda WS_SEND_OVERFLOW_POLICY uygulanır: drop_oldest (en eski mesaj
+düşer), coalesce (aynı anahtarlı bekleyen mesajın yerine geçer, yoksa en eski
+düşer) veya disconnect (istemci çıkarılır). Tek bir gönderim
+WS_SEND_TIMEOUT_SECONDS'u aşarsa veya hata verirse istemci çıkarılır.
+
+Her istemcinin katıldığı odalar kaydında tutulur (istemci -> odalar ters
+indeksi); bağlantı ekleme/kaldırma tüm odaları taramaz, boşalan odalar hemen
+silinir. Canlılık heartbeat ile izlenir: istemciden gelen her mesaj (ping dahil)
+son görülme zamanını günceller ve arka plan süpürücü görevi
+WS_PING_TIMEOUT_SECONDS boyunca sessiz kalan istemcileri çıkarır.
+
+Birden fazla worker çalıştığında broadcast/fan-out olayları backplane
+(app.backplane) üzerinden diğer worker'lara da iletilir; her worker olayı
+yalnızca kendi istemcilerine gönderir.
 """
 
+import time
 import asyncio
 import json
 import logging
-from typing import Dict, List, Any, Optional, Set
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Iterable, List, Any, Optional, Set, Tuple
 from datetime import datetime
 
+from .config import (WS_SEND_QUEUE_SIZE, WS_SEND_OVERFLOW_POLICY, WS_SEND_TIMEOUT_SECONDS,
+                     WS_PING_TIMEOUT_SECONDS, WS_SWEEP_INTERVAL_SECONDS)
+from .monitoring import (WS_SEND_QUEUE_DEPTH, WS_SEND_DROPPED, WS_CLIENT_EVICTIONS,
+                         WS_CONNECTIONS, WS_ROOMS)
+
+try:
+    import orjson
+except ImportError:  # İsteğe bağlı; yoksa standart json kullanılır
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
-# Aktif WebSocket bağlantılarını saklayan sözlük
-# client_id -> WebSocket bağlantısı
-active_connections: Dict[str, Any] = {}
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Mesajı WebSocket metin çerçevesi için JSON'a serileştirir"""
+    if orjson is not None:
+        return orjson.dumps(message).decode("utf-8")
+    return json.dumps(message)
 
 # Oda türleri
 class RoomType:
@@ -21,18 +59,176 @@ class RoomType:
     VEHICLE = "vehicle"  # Belirli bir araç için bağlantılar
     ALL = "all"  # Tüm bağlantılar
 
+SEND_OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+class ClientSender:
+    """İstemci başına sınırlı giden mesaj kuyruğu ve yazıcı görevi"""
+
+    __slots__ = ("client_id", "websocket", "max_size", "policy", "send_timeout", "on_failure",
+                 "_queue", "_by_key", "_wakeup", "_idle", "_task")
+
+    def __init__(self, client_id: str, websocket: Any, max_size: int, policy: str, send_timeout: float,
+                 on_failure: Callable[[str, str], None]):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.max_size = max(max_size, 1)
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.on_failure = on_failure
+        # Kuyruk öğeleri [anahtar, metin]; coalesce'te metin yerinde değiştirilir
+        self._queue: Deque[list] = deque()
+        self._by_key: Dict[str, list] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task"] = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, text: str, key: Optional[str] = None) -> bool:
+        """
+        Mesajı kuyruğa ekler ve yazıcı görevini uyandırır.
+
+        Returns:
+            False: kuyruk dolu ve politika disconnect (istemci çıkarılmalı)
+        """
+        if len(self._queue) >= self.max_size:
+            if self.policy == "disconnect":
+                return False
+            pending = self._by_key.get(key) if key is not None else None
+            if pending is not None:
+                pending[1] = text
+                WS_SEND_DROPPED.labels(reason="coalesced").inc()
+                return True
+            self._forget(self._queue.popleft())
+            WS_SEND_QUEUE_DEPTH.dec()
+            WS_SEND_DROPPED.labels(reason="drop_oldest").inc()
+
+        item = [key, text]
+        self._queue.append(item)
+        if key is not None and self.policy == "coalesce":
+            self._by_key[key] = item
+        WS_SEND_QUEUE_DEPTH.inc()
+        self._ensure_writer()
+        return True
+
+    def _forget(self, item: list) -> None:
+        if item[0] is not None and self._by_key.get(item[0]) is item:
+            del self._by_key[item[0]]
+
+    def _ensure_writer(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._idle.clear()
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._queue:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            item = self._queue.popleft()
+            self._forget(item)
+            WS_SEND_QUEUE_DEPTH.dec()
+            # Mesaj başına görev oluşturmamak için zaman aşımı bir zamanlayıcıyla izlenir;
+            # süre dolarsa istemci çıkarılır ve close() bu görevi iptal eder
+            timer = loop.call_later(self.send_timeout, self.on_failure, self.client_id, "send_timeout") \
+                if self.send_timeout > 0 else None
+            try:
+                await self.websocket.send_text(item[1])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Mesaj gönderilirken hata: client_id={self.client_id}, {str(e)}")
+                self.on_failure(self.client_id, "send_error")
+                return
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+    @property
+    def busy(self) -> bool:
+        """Kuyrukta veya gönderimde mesaj var mı"""
+        return self._task is not None and not self._task.done() and not self._idle.is_set()
+
+    def close(self) -> None:
+        """Yazıcı görevini durdurur ve bekleyen mesajları bırakır"""
+        if self._queue:
+            WS_SEND_QUEUE_DEPTH.dec(len(self._queue))
+            self._queue.clear()
+            self._by_key.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+
+class ClientRecord:
+    """Bağlı istemcinin kaydı: katıldığı odalar (ters indeks) ve son görülme zamanı"""
+
+    __slots__ = ("client_id", "room_type", "room_id", "rooms", "connected_at", "last_seen")
+
+    def __init__(self, client_id: str, room_type: str, room_id: Optional[str]):
+        self.client_id = client_id
+        self.room_type = room_type
+        self.room_id = room_id
+        self.rooms: Set[str] = set()
+        self.connected_at = datetime.now().isoformat()
+        self.last_seen = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "room_type": self.room_type,
+            "room_id": self.room_id,
+            "connected_at": self.connected_at,
+            "client_id": self.client_id,
+            "rooms": sorted(self.rooms),
+        }
+
+
 # Odaları yönetecek sınıf
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self,
+                 send_queue_size: int = WS_SEND_QUEUE_SIZE,
+                 overflow_policy: str = WS_SEND_OVERFLOW_POLICY,
+                 send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+                 ping_timeout: float = WS_PING_TIMEOUT_SECONDS,
+                 sweep_interval: float = WS_SWEEP_INTERVAL_SECONDS):
+        if overflow_policy not in SEND_OVERFLOW_POLICIES:
+            raise ValueError(f"Geçersiz taşma politikası: {overflow_policy} "
+                             f"(seçenekler: {', '.join(SEND_OVERFLOW_POLICIES)})")
         # Her oda tipi için aktif bağlantıları tutan sözlük
         # room_id -> set(client_id)
         self.room_connections: Dict[str, Set[str]] = {
             RoomType.ALL: set()
         }
-        self.client_info: Dict[str, Dict[str, Any]] = {}
+        # client_id -> ClientRecord; en uzun süredir sessiz olan istemci başta
+        self.clients: "OrderedDict[str, ClientRecord]" = OrderedDict()
         self.last_cleanup = datetime.now()
-        self.cleanup_interval = 300  # 5 dakikada bir temizlik yap (saniye)
+        # Heartbeat: ping_timeout saniye mesaj gelmeyen istemci süpürücü tarafından çıkarılır
+        self.ping_timeout = ping_timeout
+        self.sweep_interval = sweep_interval
+        self._sweeper: Optional["asyncio.Task"] = None
+        # Diğer worker'lara iletim (app.backplane.Backplane); None ise yalnızca yerel gönderim
+        self.backplane = None
+        # İstemci başına giden mesaj kuyrukları
+        self.send_queue_size = send_queue_size
+        self.overflow_policy = overflow_policy
+        self.send_timeout = send_timeout
+        self.senders: Dict[str, ClientSender] = {}
+        self.evictions = 0
+        self._closing: Set["asyncio.Task"] = set()
         logger.info("WebSocket bağlantı yöneticisi başlatıldı")
+
+    @property
+    def client_info(self) -> Dict[str, Dict[str, Any]]:
+        """İstemci bilgileri (client_id -> sözlük)"""
+        return {client_id: record.to_dict() for client_id, record in self.clients.items()}
         
     def get_room_key(self, room_type: str, room_id: Optional[str] = None) -> str:
         """Oda anahtarını oluşturur: room_type:room_id"""
@@ -42,47 +238,67 @@ class ConnectionManager:
         
     def add_connection(self, client_id: str, websocket: Any, room_type: str, room_id: Optional[str] = None) -> None:
         """Yeni bir WebSocket bağlantısını kaydeder"""
-        # WebSocket nesnesini sakla
-        active_connections[client_id] = websocket
-        
-        # Odaya ekle
+        # WebSocket nesnesi istemcinin gönderici kuyruğunda tutulur
+        sender = self.senders.get(client_id)
+        if sender is None or sender.websocket is not websocket:
+            self._replace_sender(client_id, websocket)
+        
+        # Bağlantı kaydı (aynı client_id ile tekrar eklenirse yeni odaya da katılır)
+        record = self.clients.get(client_id)
+        if record is None:
+            record = ClientRecord(client_id, room_type, room_id)
+            self.clients[client_id] = record
+        else:
+            record.room_type = room_type
+            record.room_id = room_id
+            self.touch(client_id)
+        
+        # Odaya ve genel "all" odasına ekle
         room_key = self.get_room_key(room_type, room_id)
-        if room_key not in self.room_connections:
-            self.room_connections[room_key] = set()
-        self.room_connections[room_key].add(client_id)
-        
-        # Genel "all" odasına da ekle
-        self.room_connections[RoomType.ALL].add(client_id)
-        
-        # Bağlantı bilgilerini kaydet
-        self.client_info[client_id] = {
-            "room_type": room_type, 
-            "room_id": room_id,
-            "connected_at": datetime.now().isoformat(),
-            "client_id": client_id
-        }
+        self._join(record, room_key)
+        self._join(record, RoomType.ALL)
+        self._update_gauges()
         
         logger.info(f"Yeni WebSocket bağlantısı: client_id={client_id}, room={room_key}")
-        
-        # Periyodik temizlik kontrolü
-        self.check_cleanup()
+
+    def _join(self, record: ClientRecord, room_key: str) -> None:
+        room = self.room_connections.get(room_key)
+        if room is None:
+            room = self.room_connections[room_key] = set()
+        room.add(record.client_id)
+        record.rooms.add(room_key)
         
     def remove_connection(self, client_id: str) -> None:
-        """Bir WebSocket bağlantısını kaldırır"""
-        # WebSocket nesnesini kaldır
-        if client_id in active_connections:
-            del active_connections[client_id]
-            
-            # Tüm odalardan kaldır
-            for room_key in self.room_connections:
-                if client_id in self.room_connections[room_key]:
-                    self.room_connections[room_key].remove(client_id)
-            
-            # İstemci bilgilerini kaldır
-            if client_id in self.client_info:
-                del self.client_info[client_id]
-                
+        """Bir WebSocket bağlantısını yalnızca katıldığı odalardan kaldırır"""
+        sender = self.senders.pop(client_id, None)
+        if sender is not None:
+            sender.close()
+
+        record = self.clients.pop(client_id, None)
+        if record is not None:
+            for room_key in record.rooms:
+                room = self.room_connections.get(room_key)
+                if room is None:
+                    continue
+                room.discard(client_id)
+                # Boşalan odayı sil (plaka odaları sınırsız büyümesin)
+                if not room and room_key != RoomType.ALL:
+                    del self.room_connections[room_key]
+            self._update_gauges()
+
+        if sender is not None or record is not None:
             logger.info(f"WebSocket bağlantısı kapatıldı: client_id={client_id}")
+
+    def touch(self, client_id: str) -> None:
+        """İstemciden mesaj (ping dahil) alındığını kaydeder"""
+        record = self.clients.get(client_id)
+        if record is not None:
+            record.last_seen = time.monotonic()
+            self.clients.move_to_end(client_id)
+
+    def _update_gauges(self) -> None:
+        WS_CONNECTIONS.set(len(self.clients))
+        WS_ROOMS.set(len(self.room_connections) - 1)
         
     def get_connections(self, room_type: str, room_id: Optional[str] = None) -> List[str]:
         """Belirli bir odadaki tüm bağlantıları döndürür"""
@@ -115,11 +331,33 @@ class ConnectionManager:
             fallback_to_admin: Oda boşsa admin odasına gönder
             
         Returns:
-            bool: Mesajın en az bir bağlantıya gönderilip gönderilmediği
+            bool: Mesajın en az bir bağlantıya (veya diğer worker'lara) iletilip iletilmediği
         """
         if exclude is None:
             exclude = []
-            
+        # Çağıranın sözlüğü değiştirilmez (timestamp/forwarded_from kopyaya eklenir)
+        message = dict(message)
+        # Tüm worker'lar aynı zaman damgasını göndersin
+        if "timestamp" not in message:
+            message["timestamp"] = datetime.now().isoformat()
+
+        published = await self._publish_remote({
+            "op": "broadcast",
+            "message": message,
+            "room_type": room_type,
+            "room_id": room_id,
+            "exclude": list(exclude),
+            "fallback_to_admin": fallback_to_admin,
+        })
+        return await self._broadcast_local(message, room_type, room_id, exclude, fallback_to_admin) or published
+
+    async def _broadcast_local(self,
+                               message: Dict[str, Any],
+                               room_type: str,
+                               room_id: Optional[str],
+                               exclude: List[str],
+                               fallback_to_admin: bool) -> bool:
+        """broadcast'in bu worker'a bağlı istemcilere gönderim kısmı"""
         room_key = self.get_room_key(room_type, room_id)
         clients = self.get_connections(room_type, room_id)
         
@@ -134,7 +372,7 @@ class ConnectionManager:
                     message["forwarded_from"] = room_key
                 
                 # Admin odasına gönder
-                return await self.broadcast(message, RoomType.ADMIN, exclude=exclude, fallback_to_admin=False)
+                return await self._broadcast_local(message, RoomType.ADMIN, None, exclude, False)
             else:
                 logger.debug("Admin odası da boş, mesaj gönderilemedi")
                 return False
@@ -150,31 +388,170 @@ class ConnectionManager:
             message["timestamp"] = datetime.now().isoformat()
         
         # JSON formatına dönüştür
-        message_json = json.dumps(message)
-        
-        # Asenkron görevleri topla
-        tasks = []
-        sent_count = 0
-        for client_id in clients:
-            if client_id in exclude:
-                continue
-                
-            if client_id in active_connections:
-                websocket = active_connections[client_id]
-                tasks.append(websocket.send_text(message_json))
-                sent_count += 1
-        
-        # Tüm görevleri çalıştır
-        if tasks:
-            try:
-                await asyncio.gather(*tasks, return_exceptions=True)
-                return sent_count > 0
-            except Exception as e:
-                logger.error(f"Mesaj gönderilirken hata: {str(e)}")
-                return False
+        message_json = encode_message(message)
         
-        return False
+        # İstemci kuyruklarına ekle
+        sent_count = await self._enqueue((client_id for client_id in clients if client_id not in exclude),
+                                         message_json)
+        return sent_count > 0
     
+    def plan_fanout(self,
+                    rooms: Iterable[Tuple[str, Optional[str]]],
+                    exclude: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Birden fazla odaya gidecek bir olay için hedef istemcileri belirler.
+
+        Args:
+            rooms: (oda türü, oda ID'si) çiftleri
+            exclude: Mesajın gönderilmeyeceği client_id'ler
+
+        Returns:
+            Tekilleştirilmiş client_id kümesi (bir istemci birden fazla odada
+            olsa da bir kez yer alır)
+        """
+        targets: Set[str] = set()
+        for room_type, room_id in rooms:
+            if room_type == RoomType.ALL and room_id is None:
+                # Herkes ALL odasında; diğer odalara bakmaya gerek yok
+                targets = set(self.room_connections.get(RoomType.ALL, ()))
+                break
+            targets.update(self.room_connections.get(self.get_room_key(room_type, room_id), ()))
+        if exclude:
+            targets.difference_update(exclude)
+        return targets
+
+    async def fanout(self,
+                     message: Dict[str, Any],
+                     rooms: Iterable[Tuple[str, Optional[str]]],
+                     exclude: Optional[Iterable[str]] = None,
+                     coalesce_key: Optional[str] = None) -> bool:
+        """
+        Mesajı verilen odaların birleşimindeki her istemciye tam bir kez gönderir.
+
+        Args:
+            coalesce_key: coalesce politikasında dolu kuyruktaki aynı anahtarlı
+                mesajın yerine geçer (ör. aynı park kaydının eski durumu)
+
+        Returns:
+            bool: Mesajın en az bir bağlantının kuyruğuna (veya diğer worker'lara)
+            iletilip iletilmediği
+        """
+        rooms = [(room_type, room_id) for room_type, room_id in rooms]
+        if "timestamp" not in message:
+            message = {**message, "timestamp": datetime.now().isoformat()}
+
+        published = await self._publish_remote({
+            "op": "fanout",
+            "message": message,
+            "rooms": rooms,
+            "exclude": list(exclude) if exclude else None,
+            "coalesce_key": coalesce_key,
+        })
+        return await self._fanout_local(message, rooms, exclude, coalesce_key) or published
+
+    async def _fanout_local(self,
+                            message: Dict[str, Any],
+                            rooms: List[Tuple[str, Optional[str]]],
+                            exclude: Optional[Iterable[str]],
+                            coalesce_key: Optional[str]) -> bool:
+        """fanout'un bu worker'a bağlı istemcilere gönderim kısmı"""
+        clients = [client_id for client_id in self.plan_fanout(rooms, exclude) if client_id in self.senders]
+        if not clients:
+            logger.debug(f"Fan-out hedefi yok: type={message.get('type')}")
+            return False
+
+        message_json = encode_message(message)
+
+        logger.debug(f"Fan-out: type={message.get('type')}, client_count={len(clients)}")
+        return await self._enqueue(clients, message_json, coalesce_key) > 0
+
+    async def attach_backplane(self, backplane: Any) -> None:
+        """Diğer worker'larla olay alışverişini başlatır"""
+        await backplane.start(self._on_backplane_message)
+        self.backplane = backplane
+        logger.info(f"WebSocket backplane'i bağlandı: {backplane.name}")
+
+    async def detach_backplane(self) -> None:
+        backplane, self.backplane = self.backplane, None
+        if backplane is not None:
+            await backplane.stop()
+
+    async def _publish_remote(self, envelope: Dict[str, Any]) -> bool:
+        if self.backplane is None:
+            return False
+        return await self.backplane.publish(envelope)
+
+    async def _on_backplane_message(self, envelope: Dict[str, Any]) -> None:
+        """Başka bir worker'ın yayınını yalnızca yerel istemcilere gönderir"""
+        op = envelope.get("op")
+        if op == "fanout":
+            rooms = [(room_type, room_id) for room_type, room_id in envelope["rooms"]]
+            await self._fanout_local(envelope["message"], rooms, envelope.get("exclude"),
+                                     envelope.get("coalesce_key"))
+        elif op == "broadcast":
+            await self._broadcast_local(envelope["message"], envelope["room_type"], envelope.get("room_id"),
+                                        envelope.get("exclude") or [], envelope.get("fallback_to_admin", True))
+        else:
+            logger.warning(f"Bilinmeyen backplane olayı: {op}")
+
+    def _replace_sender(self, client_id: str, websocket: Any) -> ClientSender:
+        previous = self.senders.get(client_id)
+        if previous is not None:
+            previous.close()
+        sender = ClientSender(client_id, websocket, self.send_queue_size, self.overflow_policy,
+                              self.send_timeout, self._evict)
+        self.senders[client_id] = sender
+        return sender
+
+    async def _enqueue(self, client_ids: Iterable[str], message_json: str, key: Optional[str] = None) -> int:
+        """Mesajı istemcilerin kuyruklarına ekler; kuyruğa eklenen istemci sayısını döndürür"""
+        queued = 0
+        for client_id in client_ids:
+            sender = self.senders.get(client_id)
+            if sender is None:
+                continue
+            if sender.enqueue(message_json, key):
+                queued += 1
+            else:
+                self._evict(client_id, "queue_full")
+        if queued:
+            # Yazıcı görevlerine sıra ver; hızlı istemciler hemen gönderir
+            await asyncio.sleep(0)
+        return queued
+
+    def _evict(self, client_id: str, reason: str, code: int = 1013) -> None:
+        """Yavaş, hatalı veya sessiz istemciyi çıkarır ve bağlantısını kapatır"""
+        sender = self.senders.get(client_id)
+        websocket = sender.websocket if sender is not None else None
+        self.evictions += 1
+        WS_CLIENT_EVICTIONS.labels(reason=reason).inc()
+        logger.warning(f"WebSocket istemcisi çıkarıldı: client_id={client_id}, sebep={reason}")
+        self.remove_connection(client_id)
+        if websocket is not None and hasattr(websocket, "close"):
+            task = asyncio.ensure_future(self._close_websocket(websocket, code))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_websocket(websocket: Any, code: int) -> None:
+        try:
+            await websocket.close(code=code)  # 1013: Try Again Later, 1001: Going Away
+        except Exception:
+            pass
+
+    async def flush(self, timeout: Optional[float] = None) -> None:
+        """Tüm istemci kuyrukları boşalana kadar (en fazla timeout saniye) bekler"""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        polls = 0
+        # İstemci başına bekleme görevi oluşturmadan meşgul yazıcıları yokla
+        while any(sender.busy for sender in self.senders.values()):
+            if deadline is not None and loop.time() >= deadline:
+                logger.warning("WebSocket kuyrukları zamanında boşaltılamadı")
+                return
+            polls += 1
+            await asyncio.sleep(0 if polls < 100 else 0.01)
+
     def get_connection_status(self) -> Dict[str, Any]:
         """Bağlantı durumu bilgisini döndürür"""
         room_stats = {}
@@ -182,55 +559,66 @@ class ConnectionManager:
             room_stats[room_key] = len(self.room_connections[room_key])
             
         return {
-            "total_connections": len(active_connections),
+            "total_connections": len(self.clients),
             "room_stats": room_stats,
-            "clients": list(self.client_info.values()),
+            "clients": [record.to_dict() for record in self.clients.values()],
+            "queued_messages": sum(len(sender) for sender in self.senders.values()),
+            "evictions": self.evictions,
+            "backplane": self.backplane.stats() if self.backplane is not None else None,
             "last_cleanup": self.last_cleanup.isoformat()
         }
     
-    def check_cleanup(self) -> None:
-        """Periyodik temizlik kontrolü yapar"""
-        now = datetime.now()
-        seconds_since_cleanup = (now - self.last_cleanup).total_seconds()
-        
-        if seconds_since_cleanup >= self.cleanup_interval:
-            self.cleanup_connections()
-            self.last_cleanup = now
-            
-    def cleanup_connections(self) -> None:
-        """Geçersiz bağlantıları temizler"""
-        logger.info("WebSocket bağlantıları temizleniyor...")
-        
-        # Aktif olmayan bağlantıları tespit et
-        inactive_connections = []
-        for client_id, websocket in active_connections.items():
+    def cleanup_connections(self, now: Optional[float] = None) -> int:
+        """
+        ping_timeout süresince mesaj göndermeyen istemcileri çıkarır.
+
+        Kayıtlar son görülme sırasına göre tutulduğundan yalnızca süresi dolan
+        istemciler dolaşılır.
+
+        Returns:
+            Çıkarılan istemci sayısı
+        """
+        self.last_cleanup = datetime.now()
+        if self.ping_timeout <= 0:
+            return 0
+        deadline = (time.monotonic() if now is None else now) - self.ping_timeout
+        stale = []
+        for client_id, record in self.clients.items():
+            if record.last_seen > deadline:
+                break
+            stale.append(client_id)
+
+        for client_id in stale:
+            self._evict(client_id, "ping_timeout", code=1001)
+        if stale:
+            logger.info(f"WebSocket temizliği tamamlandı: {len(stale)} sessiz bağlantı çıkarıldı")
+        return len(stale)
+
+    async def start_sweeper(self) -> None:
+        """Sessiz bağlantıları periyodik olarak çıkaran arka plan görevini başlatır"""
+        if self.ping_timeout <= 0 or (self._sweeper is not None and not self._sweeper.done()):
+            return
+        self._sweeper = asyncio.create_task(self._sweep_loop())
+        logger.info(f"WebSocket süpürücüsü başlatıldı: ping zaman aşımı={self.ping_timeout}s, "
+                    f"aralık={self.sweep_interval}s")
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is None:
+            return
+        self._sweeper.cancel()
+        try:
+            await self._sweeper
+        except asyncio.CancelledError:
+            pass
+        self._sweeper = None
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
             try:
-                # WebSocket bağlantısının durumunu kontrol et
-                if hasattr(websocket, "client_state") and websocket.client_state.name == "DISCONNECTED":
-                    inactive_connections.append(client_id)
-                    logger.debug(f"Bağlantı kapalı tespit edildi: {client_id}")
-                elif hasattr(websocket, "closed") and websocket.closed:
-                    inactive_connections.append(client_id)
-                    logger.debug(f"Kapalı bağlantı tespit edildi: {client_id}")
+                self.cleanup_connections()
             except Exception as e:
-                logger.warning(f"Bağlantı durumu kontrol edilirken hata: {str(e)}")
-                inactive_connections.append(client_id)
-        
-        # Geçersiz bağlantıları kaldır
-        for client_id in inactive_connections:
-            self.remove_connection(client_id)
-            
-        # Boş odaları temizle
-        empty_rooms = []
-        for room_key, clients in self.room_connections.items():
-            if room_key != RoomType.ALL and len(clients) == 0:
-                empty_rooms.append(room_key)
-                
-        for room_key in empty_rooms:
-            del self.room_connections[room_key]
-            logger.debug(f"Boş oda temizlendi: {room_key}")
-            
-        logger.info(f"WebSocket temizliği tamamlandı: {len(inactive_connections)} bağlantı ve {len(empty_rooms)} oda temizlendi")
+                logger.error(f"WebSocket temizliği sırasında hata: {str(e)}")
     
     async def send_vehicle_update(self, vehicle_data: Dict[str, Any]) -> bool:
         """Araç güncelleme olayını ilgili odalara gönderir"""
@@ -241,23 +629,15 @@ class ConnectionManager:
             "data": vehicle_data
         }
         
-        sent = False
-        
-        # Araç odasına gönder
+        # Araç odaları (ID ve plaka), admin odası ve tüm bağlantılar
+        rooms = []
         if vehicle_id:
-            sent = await self.broadcast(message, RoomType.VEHICLE, str(vehicle_id)) or sent
-            
-        # Plaka ile de araç odasına gönder
+            rooms.append((RoomType.VEHICLE, str(vehicle_id)))
         if license_plate:
-            sent = await self.broadcast(message, RoomType.VEHICLE, license_plate) or sent
-            
-        # Admin odasına gönder
-        sent = await self.broadcast(message, RoomType.ADMIN) or sent
-        
-        # Tüm bağlantılara gönder
-        sent = await self.broadcast(message) or sent
+            rooms.append((RoomType.VEHICLE, license_plate))
+        rooms += [(RoomType.ADMIN, None), (RoomType.ALL, None)]
         
-        return sent
+        return await self.fanout(message, rooms, coalesce_key=f"vehicle_update:{vehicle_id or license_plate}")
     
     async def send_parking_update(self, parking_data: Dict[str, Any]) -> bool:
         """Otopark güncelleme olayını ilgili odalara gönderir"""
@@ -267,19 +647,13 @@ class ConnectionManager:
             "data": parking_data
         }
         
-        sent = False
-        
-        # Otopark odasına gönder
+        # Otopark odası, admin odası ve tüm bağlantılar
+        rooms = []
         if parking_id:
-            sent = await self.broadcast(message, RoomType.PARKING, str(parking_id)) or sent
-            
-        # Admin odasına gönder
-        sent = await self.broadcast(message, RoomType.ADMIN) or sent
+            rooms.append((RoomType.PARKING, str(parking_id)))
+        rooms += [(RoomType.ADMIN, None), (RoomType.ALL, None)]
         
-        # Tüm bağlantılara gönder
-        sent = await self.broadcast(message) or sent
-        
-        return sent
+        return await self.fanout(message, rooms, coalesce_key=f"parking_update:{parking_id}")
     
     async def send_parking_record_update(self, record_data: Dict[str, Any]) -> bool:
         """Park kaydı güncelleme olayını ilgili odalara gönderir"""
@@ -291,44 +665,26 @@ class ConnectionManager:
             "data": record_data
         }
         
-        sent = False
-        
-        # İlgili araç odasına gönder
+        # İlgili araç odaları (ID ve plaka), otopark odası, admin odası ve tüm bağlantılar
+        rooms = []
         if vehicle_id:
-            sent = await self.broadcast(message, RoomType.VEHICLE, str(vehicle_id)) or sent
-            
-        # Plaka ile de araç odasına gönder
+            rooms.append((RoomType.VEHICLE, str(vehicle_id)))
         if license_plate:
-            sent = await self.broadcast(message, RoomType.VEHICLE, license_plate) or sent
-            
-        # İlgili otopark odasına gönder
+            rooms.append((RoomType.VEHICLE, license_plate))
         if parking_id:
-            sent = await self.broadcast(message, RoomType.PARKING, str(parking_id)) or sent
-            
-        # Admin odasına gönder
-        sent = await self.broadcast(message, RoomType.ADMIN) or sent
-        
-        # Tüm bağlantılara gönder
-        sent = await self.broadcast(message) or sent
+            rooms.append((RoomType.PARKING, str(parking_id)))
+        rooms += [(RoomType.ADMIN, None), (RoomType.ALL, None)]
         
-        return sent
+        return await self.fanout(message, rooms, coalesce_key=f"parking_record_update:{record_data.get('id')}")
         
     async def send_error(self, client_id: str, error_message: str) -> bool:
-        """Hata mesajı gönderir"""
-        if client_id in active_connections:
-            try:
-                websocket = active_connections[client_id]
-                message = {
-                    "type": "error",
-                    "message": error_message,
-                    "timestamp": datetime.now().isoformat()
-                }
-                await websocket.send_text(json.dumps(message))
-                return True
-            except Exception as e:
-                logger.error(f"Hata mesajı gönderilirken hata: {str(e)}")
-                return False
-        return False
+        """Hata mesajını istemcinin gönderim kuyruğuna ekler (sınırlı kuyruk ve gönderim zaman aşımı geçerlidir)"""
+        message = {
+            "type": "error",
+            "message": error_message,
+            "timestamp": datetime.now().isoformat()
+        }
+        return await self._enqueue([client_id], encode_message(message)) > 0
 
 # Bağlantı yöneticisi örneği
 manager = ConnectionManager() 
\ No newline at end of file
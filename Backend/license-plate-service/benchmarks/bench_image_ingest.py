@@ -0,0 +1,76 @@
+"""
+Görüntü çözme benchmark'ı: tam çözünürlükte cv2.imdecode ile
+app.model.ingest.decode_image (küçültülmüş çözme) karşılaştırılır.
+
+Her görüntü boyutu için çözme süresi (medyan) ve tepe bellek kullanımı
+(tracemalloc; numpy/OpenCV dizileri dahil) raporlanır.
+
+Kullanım (servis kök dizininden):
+    python benchmarks/bench_image_ingest.py
+    python benchmarks/bench_image_ingest.py --repeat 50 --target-size 640
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# Servis kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model.ingest import decode_image
+
+SIZES = [(480, 640), (720, 1280), (1080, 1920), (1440, 2560), (2160, 3840)]
+
+
+def make_jpeg(height, width, quality=90):
+    """Gerçekçi sıkıştırma oranı için gürültü ve gradyan içeren bir JPEG üretir"""
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+    frame[:, :, 1] += np.linspace(0, 200, width, dtype=np.uint8)
+    ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    assert ok
+    return data.tobytes()
+
+
+def measure(func, repeat):
+    """(medyan süre ms, tepe bellek MB) döndürür"""
+    func()  # Isınma
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Görüntü çözme benchmark'ı")
+    parser.add_argument("--repeat", type=int, default=20, help="Her ölçüm için tekrar sayısı")
+    parser.add_argument("--target-size", type=int, default=640, help="Dedektör giriş boyutu (INFERENCE_MAX_SIZE)")
+    args = parser.parse_args()
+
+    print(f"{'boyut':>11} | {'jpeg KB':>7} | {'tam ms':>7} | {'tam MB':>7} | {'oran':>4} | {'küçük ms':>8} | {'küçük MB':>8} | {'hızlanma':>8}")
+    print("-" * 84)
+    for height, width in SIZES:
+        data = make_jpeg(height, width)
+        buffer = np.frombuffer(data, np.uint8)
+        full_ms, full_mb = measure(lambda: cv2.imdecode(buffer, cv2.IMREAD_COLOR), args.repeat)
+        reduced_ms, reduced_mb = measure(lambda: decode_image(data, target_size=args.target_size), args.repeat)
+        scale = decode_image(data, target_size=args.target_size).scale
+        print(f"{width:>5}x{height:<5} | {len(data) / 1024:>7.0f} | {full_ms:>7.2f} | {full_mb:>7.2f} | "
+              f"1/{scale:<2} | {reduced_ms:>8.2f} | {reduced_mb:>8.2f} | {full_ms / reduced_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
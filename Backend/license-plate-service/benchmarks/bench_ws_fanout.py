@@ -0,0 +1,127 @@
+"""
+WebSocket fan-out benchmark'ı: park kaydı güncellemesinin oda başına
+broadcast ile (eski yöntem) ve fan-out planıyla gönderilmesi karşılaştırılır.
+
+Bağlı panolar admin odasında, bir kısmı ayrıca otopark ve araç odalarındadır
+(herkes ALL odasındadır). Her bağlantı için olay başına gönderilen mesaj
+sayısı, serileştirme sayısı ve olay başına süre (medyan) raporlanır.
+WebSocket gönderimi ağ gecikmesi olmadan taklit edilir; ölçülen süre
+planlama + serileştirme + kuyruğa ekleme + gönderim çağrılarının CPU maliyetidir.
+
+Kullanım (servis kök dizininden):
+    python benchmarks/bench_ws_fanout.py
+    python benchmarks/bench_ws_fanout.py --clients 1000 10000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+# Servis kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import websocket as websocket_module
+from app.websocket import ConnectionManager, RoomType
+
+
+class FakeWebSocket:
+    """Gönderilen mesajları yalnızca sayan WebSocket taklidi"""
+    __slots__ = ("sent",)
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_text(self, text):
+        self.sent += 1
+
+
+def build_manager(clients: int):
+    manager = ConnectionManager()
+    connections = {}
+    with patch.object(websocket_module.logger, "info"):
+        for i in range(clients):
+            client_id = f"dashboard-{i}"
+            connections[client_id] = FakeWebSocket()
+            if i % 10 == 0:
+                manager.add_connection(client_id, connections[client_id], RoomType.PARKING, str(i % 5 + 1))
+            elif i % 50 == 1:
+                manager.add_connection(client_id, connections[client_id], RoomType.VEHICLE, "34ABC123")
+            else:
+                manager.add_connection(client_id, connections[client_id], RoomType.ADMIN)
+    return manager, connections
+
+
+async def legacy_send_parking_record_update(manager: ConnectionManager, record_data):
+    """Fan-out planından önceki davranış: her oda için ayrı broadcast"""
+    message = {"type": "parking_record_update", "data": record_data}
+    await manager.broadcast(message, RoomType.VEHICLE, str(record_data["vehicle_id"]))
+    await manager.broadcast(message, RoomType.VEHICLE, record_data["license_plate"])
+    await manager.broadcast(message, RoomType.PARKING, str(record_data["parking_id"]))
+    await manager.broadcast(message, RoomType.ADMIN)
+    await manager.broadcast(message)
+
+
+def record(i: int):
+    return {
+        "id": i, "vehicle_id": 17, "license_plate": "34ABC123", "parking_id": 1, "action": "exit",
+        "entry_time": "2024-01-01T10:00:00", "exit_time": "2024-01-01T12:00:00",
+        "duration_hours": 2.0, "parking_fee": 30.0, "message": "Araç çıkışı: 34ABC123, Ücret: 30.00 TL",
+    }
+
+
+async def measure(send, manager, connections, repeat):
+    """(medyan süre ms, bağlantı başına mesaj, serileştirme sayısı) döndürür"""
+    await send(manager, record(0))  # Isınma
+    await manager.flush()
+    for websocket in connections.values():
+        websocket.sent = 0
+
+    encodes = 0
+    original_encode = websocket_module.encode_message
+
+    def counting_encode(message):
+        nonlocal encodes
+        encodes += 1
+        return original_encode(message)
+
+    timings = []
+    with patch.object(websocket_module, "encode_message", counting_encode):
+        for i in range(repeat):
+            start = time.perf_counter()
+            await send(manager, record(i))
+            await manager.flush()  # İstemci kuyrukları boşalana kadar (gönderim dahil)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    per_client = max(websocket.sent for websocket in connections.values()) / repeat
+    return statistics.median(timings), per_client, encodes / repeat
+
+
+async def run(client_counts, repeat):
+    print(f"JSON: {'orjson' if websocket_module.orjson is not None else 'json'}")
+    print(f"{'bağlantı':>9} | {'yöntem':<10} | {'olay başına ms':>14} | {'mesaj/istemci':>13} | {'serileştirme':>12}")
+    print("-" * 72)
+    for clients in client_counts:
+        manager, connections = build_manager(clients)
+        methods = [
+            ("broadcast", legacy_send_parking_record_update),
+            ("fan-out", lambda m, data: m.send_parking_record_update(data)),
+        ]
+        for name, send in methods:
+            median_ms, per_client, encodes = await measure(send, manager, connections, repeat)
+            print(f"{clients:>9} | {name:<10} | {median_ms:>14.2f} | {per_client:>13.1f} | {encodes:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket fan-out benchmark'ı")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1000, 10000], help="Bağlı pano sayıları")
+    parser.add_argument("--repeat", type=int, default=20, help="Her ölçüm için olay sayısı")
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -73,4 +73,8 @@ else:
     for table in all_tables:
         logger.info(f"- {table}")
 
+# Şema göçlerini uygula (mevcut tablolara eklenen indeksler vb.)
+from app.migrations import run_migrations
+run_migrations(engine)
+
 logger.info("Veritabanı başlatma işlemi tamamlandı!") 
\ No newline at end of file
@@ -20,6 +20,21 @@ from app.models import Base, Vehicle, ParkingRecord
 from app.schemas import VehicleCreate, ParkingRecordCreate
 from app.database import SessionLocal
 
+@pytest.fixture(autouse=True)
+def clear_recognition_cache():
+    """Tanıma sonucu önbelleğini testler arasında temizler (aynı test görüntüsü önbellekten dönmesin)"""
+    module = sys.modules.get("app.model.result_cache")
+    if module is not None:
+        module.recognition_cache.clear()
+    yield
+
+@pytest.fixture(autouse=True)
+def clear_parking_rate_cache():
+    """Otopark ücret önbelleğini testler arasında temizler (her test kendi API yanıtını mocklar)"""
+    from app.parking_rates import rate_cache
+    rate_cache.invalidate()
+    yield
+
 # Test için hafızada SQLite veritabanı kur
 @pytest.fixture(scope="function")
 def test_db():
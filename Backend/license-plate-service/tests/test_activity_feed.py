@@ -0,0 +1,141 @@
+"""
+Tek sorguluk giriş/çıkış aktivite akışı (/recent-activities) testleri
+"""
+
+import os
+import sys
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.activity import activities_since, recent_activities
+from app.models import ParkingRecord, Vehicle
+
+START = datetime.datetime(2024, 5, 1)
+
+
+def _add_records(db, count, offset=0):
+    vehicles = [Vehicle(license_plate=f"34ACT{offset + i:03d}") for i in range(count)]
+    db.add_all(vehicles)
+    db.flush()
+    for i, vehicle in enumerate(vehicles):
+        n = offset + i
+        entry_time = START + datetime.timedelta(minutes=30 * n)
+        closed = n % 3 != 0
+        db.add(ParkingRecord(
+            vehicle_id=vehicle.id, parking_id=n % 2 + 1, entry_time=entry_time,
+            # Bazı çıkışlar sonraki girişlerden sonra gerçekleşir; olaylar iç içe geçer
+            exit_time=entry_time + datetime.timedelta(minutes=45 + 20 * (n % 4)) if closed else None,
+            is_active=not closed, parking_fee=2500 if closed else None,
+        ))
+    db.commit()
+
+
+@pytest.fixture
+def records(test_db):
+    _add_records(test_db, 30)
+    return test_db
+
+
+def _expected_events(db, parking_id=None):
+    """Eski uygulamanın mantığı: her kayıt için giriş, kapanmışsa ayrıca çıkış olayı"""
+    events = []
+    for record in db.query(ParkingRecord).all():
+        if parking_id is not None and record.parking_id != parking_id:
+            continue
+        events.append((record.entry_time, record.id * 2, "entry", record.id))
+        if record.exit_time is not None:
+            events.append((record.exit_time, record.id * 2 + 1, "exit", record.id))
+    return sorted(events, reverse=True)
+
+
+@pytest.mark.parametrize("parking_id", [None, 2])
+def test_feed_matches_merged_entry_and_exit_events(records, parking_id):
+    expected = _expected_events(records, parking_id)[:15]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(records.get_bind(), "before_cursor_execute", listener)
+    try:
+        items = recent_activities(records, limit=15, parking_id=parking_id)
+    finally:
+        event.remove(records.get_bind(), "before_cursor_execute", listener)
+
+    # Plaka aynı sorguda join edilir; ilişki yüklemesi için ek sorgu yok
+    assert len(statements) == 1
+    assert "UNION ALL" in statements[0]
+    assert [(item["action"], item["license_plate"]) for item in items] == \
+        [(action, f"34ACT{record_id - 1:03d}") for _, _, action, record_id in expected]
+
+
+def test_items_keep_existing_response_shape(records):
+    items = recent_activities(records, limit=100)
+    exit_item = next(item for item in items if item["action"] == "exit")
+    closed_entry = next(item for item in items if item["action"] == "entry" and item["id"] == f"{exit_item['id']}_entry")
+    open_entry = next(item for item in items if item["action"] == "entry" and isinstance(item["id"], int))
+
+    assert exit_item["parking_fee"] == 25.0 and exit_item["duration_hours"] > 0
+    assert exit_item["message"].startswith("Araç çıkışı")
+    assert "exit_time" not in closed_entry and closed_entry["message"].startswith("Araç girişi")
+    assert records.get(ParkingRecord, open_entry["id"]).exit_time is None
+    assert len({item["cursor"] for item in items}) == len(items) == 50
+
+
+def test_cursor_pages_through_feed_and_since_returns_only_new_events(records):
+    seen, cursor = [], None
+    while True:
+        page = recent_activities(records, limit=7, cursor=cursor)
+        if not page:
+            break
+        seen += page
+        cursor = page[-1]["cursor"]
+    assert [(item["action"], item["id"]) for item in seen] == \
+        [(item["action"], item["id"]) for item in recent_activities(records, limit=100)]
+
+    newest = seen[0]["cursor"]
+    assert recent_activities(records, limit=20, since=newest) == []
+    _add_records(records, 2, offset=40)
+    new_items = recent_activities(records, limit=20, since=newest)
+    assert sorted((item["action"], item["license_plate"]) for item in new_items) == \
+        [("entry", "34ACT040"), ("entry", "34ACT041"), ("exit", "34ACT040"), ("exit", "34ACT041")]
+
+
+def test_since_pages_forward_through_more_than_limit_new_events(records):
+    newest = recent_activities(records, limit=1)[0]["cursor"]
+    _add_records(records, 12, offset=40)  # Toplu aktarım: iki yoklama arasında 12 giriş + 8 çıkış
+    expected = [(action, record_id) for _, _, action, record_id in reversed(_expected_events(records)[:20])]
+
+    seen, since, polls = [], newest, 0
+    while True:
+        page = activities_since(records, since, limit=6)
+        seen += page["items"]
+        since = page["next_cursor"]
+        polls += 1
+        if not page["has_more"]:
+            break
+
+    # Arada kalan olay atlanmadan eskiden yeniye alınır
+    assert [(item["action"], int(str(item["id"]).split("_")[0])) for item in seen] == expected
+    assert polls == 4
+    assert activities_since(records, since, limit=6) == {"items": [], "has_more": False, "next_cursor": since}
+
+
+def test_endpoint_rejects_invalid_cursor(records):
+    from app.main import app, get_db
+
+    app.dependency_overrides[get_db] = lambda: records
+    try:
+        client = TestClient(app)
+        assert len(client.get("/recent-activities", params={"limit": 5}).json()) == 5
+        assert client.get("/recent-activities", params={"since": "bozuk"}).status_code == 400
+
+        oldest = client.get("/recent-activities", params={"limit": 50}).json()[-1]["cursor"]
+        response = client.get("/recent-activities", params={"since": oldest, "limit": 5})
+        assert response.headers["x-has-more"] == "true"
+        assert response.headers["x-next-cursor"] == response.json()[-1]["cursor"]
+    finally:
+        app.dependency_overrides.pop(get_db, None)
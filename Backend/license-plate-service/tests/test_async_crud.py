@@ -0,0 +1,87 @@
+"""
+Async veritabanı katmanı (AsyncSession ve senkron oturum yedeği) testleri
+"""
+
+import os
+import sys
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.database as database
+from app import async_crud, crud
+from app.database import async_database_url, create_async_db_engine
+from app.models import Base, ParkingRecord
+from app.parking_rates import rate_cache
+
+TEST_PLATE = "34ASY123"
+
+
+async def _entry_exit_flow(db):
+    vehicle, record, created = await async_crud.register_entry(db, TEST_PLATE, parking_id=1)
+    assert created is True
+
+    _, _, created = await async_crud.register_entry(db, TEST_PLATE, parking_id=1)
+    assert created is False
+
+    found = await async_crud.get_vehicle_by_license_plate(db, TEST_PLATE)
+    assert found.id == vehicle.id
+    active = await async_crud.get_active_parking_record_by_vehicle(db, vehicle.id, parking_id=1)
+    assert active.id == record.id
+
+    closed = await async_crud.close_parking_record(db, record.id, parking_id=1)
+    assert closed.is_active is False
+    assert closed.exit_time is not None
+    assert closed.parking_fee == 1000  # En az 1 saat ücretlendirilir
+    assert await async_crud.get_active_parking_record_by_vehicle(db, vehicle.id) is None
+
+
+def test_async_database_url_selects_installed_driver(monkeypatch):
+    monkeypatch.setattr(database.importlib.util, "find_spec", lambda name: object())
+    assert async_database_url("postgresql://user:pw@db:5432/plates") == "postgresql+asyncpg://user:pw@db:5432/plates"
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert async_database_url("mysql://user:pw@db/plates") is None
+
+    monkeypatch.setattr(database.importlib.util, "find_spec", lambda name: None)
+    assert async_database_url("postgresql://user:pw@db:5432/plates") is None
+    assert create_async_db_engine("postgresql://user:pw@db:5432/plates") is None
+
+
+def test_sync_session_fallback_runs_off_the_event_loop(test_db, monkeypatch):
+    rate_cache.set_rate(1, 10.0)
+    threads = set()
+    original = crud.get_vehicle_by_license_plate
+
+    def tracking_get_vehicle(db, license_plate):
+        threads.add(threading.get_ident())
+        return original(db, license_plate)
+
+    monkeypatch.setattr(crud, "get_vehicle_by_license_plate", tracking_get_vehicle)
+
+    asyncio.run(_entry_exit_flow(test_db))
+
+    assert threads and threading.get_ident() not in threads
+
+
+def test_async_session_flow(tmp_path):
+    pytest.importorskip("aiosqlite")
+    rate_cache.set_rate(1, 10.0)
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    Base.metadata.create_all(database.create_db_engine(url))
+    async_engine = create_async_db_engine(url)
+
+    async def run():
+        session_factory = database.async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+        async with session_factory() as db:
+            await _entry_exit_flow(db)
+        await async_engine.dispose()
+
+    asyncio.run(run())
+
+    db = sessionmaker(bind=database.create_db_engine(url))()
+    assert db.query(ParkingRecord).filter(ParkingRecord.is_active == False).count() == 1
+    db.close()
@@ -0,0 +1,115 @@
+"""
+Araç çıkışında park kaydının tek bir UPDATE ... RETURNING ile kapatılması testleri
+"""
+
+import os
+import sys
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.database as database
+from app import crud
+from app.models import Base, ParkingRecord, Vehicle
+from app.parking_rates import rate_cache
+
+
+def _open_record(db, hours_ago=2):
+    vehicle = Vehicle(license_plate="34EXT001")
+    db.add(vehicle)
+    db.commit()
+    record = ParkingRecord(vehicle_id=vehicle.id, parking_id=1, is_active=True,
+                           entry_time=datetime.now() - timedelta(hours=hours_ago))
+    db.add(record)
+    db.commit()
+    return vehicle.id, record.id, record.entry_time
+
+
+def test_close_runs_a_single_update_returning(test_db):
+    rate_cache.set_rate(1, 15.0)
+    _, record_id, entry_time = _open_record(test_db)
+    test_db.expunge_all()
+
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        closed = crud.close_parking_record(test_db, record_id, 1, entry_time)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith("UPDATE")
+    assert "RETURNING" in statements[0].upper()
+    assert closed.is_active is False
+    assert closed.exit_time is not None
+    assert 3000 <= closed.parking_fee <= 3010  # ~2 saat * 15 TL
+
+
+def test_second_close_of_same_record_returns_none(test_db):
+    rate_cache.set_rate(1, 15.0)
+    _, record_id, entry_time = _open_record(test_db)
+
+    first = crud.close_parking_record(test_db, record_id, 1, entry_time)
+    second = crud.close_parking_record(test_db, record_id, 1, entry_time)
+
+    assert first is not None
+    assert second is None
+    stored = test_db.get(ParkingRecord, record_id)
+    assert (stored.exit_time, stored.parking_fee) == (first.exit_time, first.parking_fee)
+    # Giriş zamanı verilmezse kayıt okunur; kapalı kayıt yine None döner
+    assert crud.close_parking_record(test_db, record_id, 1) is None
+
+
+def test_concurrent_exits_close_the_record_exactly_once(tmp_path):
+    rate_cache.set_rate(1, 15.0)
+    engine = database.create_db_engine(f"sqlite:///{tmp_path / 'exit.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        _, record_id, entry_time = _open_record(db)
+
+    barrier = threading.Barrier(4)
+    results = []
+
+    def exit_frame():
+        with Session() as db:
+            barrier.wait()
+            results.append(crud.close_parking_record(db, record_id, 1, entry_time))
+
+    threads = [threading.Thread(target=exit_frame) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4
+    assert sum(result is not None for result in results) == 1
+    engine.dispose()
+
+
+def test_exit_endpoint_reports_already_closed_record():
+    from app import main
+
+    vehicle = MagicMock(id=1, license_plate="34EXT001")
+    active = MagicMock(id=5, entry_time=datetime.now() - timedelta(hours=1))
+    with patch("app.main.get_vehicle_by_license_plate", return_value=vehicle), \
+         patch("app.main.get_active_parking_record_by_vehicle", return_value=active), \
+         patch("app.main.close_parking_record", return_value=None) as mock_close, \
+         patch("app.main.event_bus.publish") as mock_publish:
+        response = asyncio.run(main.register_vehicle_exit(
+            main.VehicleExitRequest(license_plate="34EXT001", parking_id=1), db=MagicMock()))
+
+    assert response.success is False
+    assert "zaten kapatılmış" in response.message
+    mock_close.assert_awaited_once()
+    assert mock_close.call_args[0][1:] == (5, 1, active.entry_time)
+    assert mock_publish.call_args[0][1]["reason"] == "already_closed"
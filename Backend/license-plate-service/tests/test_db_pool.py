@@ -0,0 +1,178 @@
+"""
+Veritabanı motoru fabrikası ve bağlantı havuzu metrikleri testleri
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.database as database
+from app.database import (
+    InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, create_async_db_engine, create_db_engine, pool_status,
+    split_pool_budget
+)
+from app.monitoring import DB_POOL_CHECKOUT_SECONDS, DB_POOL_CHECKOUT_TIMEOUTS, DB_POOL_IN_USE, DB_POOL_OVERFLOW
+
+
+def _sample(metric, suffix="", engine="sync"):
+    for family in metric.collect():
+        for sample in family.samples:
+            if sample.name == metric._name + suffix and sample.labels.get("engine") == engine:
+                return sample.value
+    return 0
+
+
+def test_postgresql_engine_uses_configured_pool(monkeypatch):
+    captured = {}
+    original_create_engine = database.create_engine
+
+    def fake_create_engine(url, **options):
+        captured.update(options)
+        return original_create_engine("sqlite://")
+
+    monkeypatch.setattr(database, "create_engine", fake_create_engine)
+
+    create_db_engine("postgresql://user:password@db:5432/license_plate_db")
+
+    assert captured["poolclass"] is InstrumentedQueuePool
+    assert captured["pool_size"] == database.DB_POOL_SIZE
+    assert captured["max_overflow"] == database.DB_MAX_OVERFLOW
+    assert captured["pool_pre_ping"] == database.DB_POOL_PRE_PING
+    assert captured["pool_recycle"] == database.DB_POOL_RECYCLE
+    if database.DB_STATEMENT_TIMEOUT_MS > 0:
+        assert captured["connect_args"]["options"] == f"-c statement_timeout={database.DB_STATEMENT_TIMEOUT_MS}"
+
+
+def test_pool_metrics_track_checkout_in_use_and_overflow(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+                              pool_size=1, max_overflow=1, pool_timeout=0.05)
+    checkouts_before = _sample(DB_POOL_CHECKOUT_SECONDS, "_count")
+    timeouts_before = _sample(DB_POOL_CHECKOUT_TIMEOUTS, "_total")
+
+    first = engine.connect()
+    first.execute(text("SELECT 1"))
+    assert DB_POOL_IN_USE.labels(engine="sync")._value.get() == 1
+    second = engine.connect()
+    assert DB_POOL_IN_USE.labels(engine="sync")._value.get() == 2
+    assert DB_POOL_OVERFLOW.labels(engine="sync")._value.get() == 1
+    assert pool_status(engine)["checked_out"] == 2
+
+    # Havuz ve taşma dolu: bağlantı beklerken zaman aşımı
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    second.close()
+    first.close()
+    assert DB_POOL_IN_USE.labels(engine="sync")._value.get() == 0
+    assert _sample(DB_POOL_CHECKOUT_SECONDS, "_count") - checkouts_before == 3
+    assert _sample(DB_POOL_CHECKOUT_TIMEOUTS, "_total") - timeouts_before == 1
+    engine.dispose()
+
+
+def test_application_uses_single_engine():
+    import app.main as main_module
+
+    assert main_module.engine is database.engine
+    assert main_module.SessionLocal is database.SessionLocal
+    assert main_module.PlateRecord.metadata is database.Base.metadata
+
+
+def test_pool_budget_is_shared_between_sync_and_async_engines():
+    sync_pool, async_pool = split_pool_budget(0.5, pool_size=5, max_overflow=10)
+    assert sync_pool["pool_size"] + async_pool["pool_size"] == 5
+    assert sync_pool["max_overflow"] + async_pool["max_overflow"] == 10
+    assert min(sync_pool["pool_size"], async_pool["pool_size"]) >= 1
+
+    # Async motor yoksa bütçenin tamamı senkron motorda kalır
+    assert split_pool_budget(0.0, pool_size=5, max_overflow=10)[0] == {"pool_size": 5, "max_overflow": 10}
+    # pool_size=0 sınırsız havuz demektir; her motora en az bir bağlantı kalır
+    assert split_pool_budget(0.9, pool_size=2, max_overflow=0) == (
+        {"pool_size": 1, "max_overflow": 0}, {"pool_size": 1, "max_overflow": 0}
+    )
+
+    application_total = sum(budget["pool_size"] + budget["max_overflow"]
+                            for budget in (database.sync_pool_budget, database.async_pool_budget))
+    assert application_total == database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW
+
+
+def test_async_engine_uses_instrumented_pool_with_its_budget(monkeypatch):
+    captured = {}
+    original_create_async_engine = database.create_async_engine
+
+    def fake_create_async_engine(url, **options):
+        captured.update(options, url=url)
+        return original_create_async_engine("sqlite+aiosqlite://")
+
+    monkeypatch.setattr(database.importlib.util, "find_spec", lambda name: object())
+    monkeypatch.setattr(database, "create_async_engine", fake_create_async_engine)
+
+    create_async_db_engine("postgresql://user:password@db:5432/license_plate_db",
+                           budget={"pool_size": 2, "max_overflow": 4})
+
+    assert captured["url"].startswith("postgresql+asyncpg://")
+    assert captured["poolclass"] is InstrumentedAsyncAdaptedQueuePool
+    assert captured["pool_size"] == 2
+    assert captured["max_overflow"] == 4
+
+
+def test_async_pool_metrics_are_labelled_separately(tmp_path):
+    pytest.importorskip("aiosqlite")
+    import asyncio
+
+    async_engine = create_async_db_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedAsyncAdaptedQueuePool,
+                                          pool_size=1, max_overflow=0)
+    checkouts_before = _sample(DB_POOL_CHECKOUT_SECONDS, "_count", engine="async")
+    sync_in_use = DB_POOL_IN_USE.labels(engine="sync")._value.get()
+
+    async def run():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            assert DB_POOL_IN_USE.labels(engine="async")._value.get() == 1
+        await async_engine.dispose()
+
+    asyncio.run(run())
+
+    assert DB_POOL_IN_USE.labels(engine="async")._value.get() == 0
+    assert DB_POOL_IN_USE.labels(engine="sync")._value.get() == sync_in_use
+    assert _sample(DB_POOL_CHECKOUT_SECONDS, "_count", engine="async") - checkouts_before == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_fallback_session_is_only_opened_without_async_driver(monkeypatch):
+    import app.main as main_module
+
+    opened = []
+    monkeypatch.setattr(main_module, "SessionLocal", lambda: opened.append(object()) or _ClosingSession())
+
+    async_session = object()
+
+    class FakeAsyncSession:
+        async def __aenter__(self):
+            return async_session
+
+        async def __aexit__(self, *args):
+            return False
+
+    monkeypatch.setattr(main_module, "AsyncSessionLocal", FakeAsyncSession)
+    dependency = main_module.get_async_db()
+    assert await dependency.__anext__() is async_session
+    assert opened == []
+    await dependency.aclose()
+
+    monkeypatch.setattr(main_module, "AsyncSessionLocal", None)
+    dependency = main_module.get_async_db()
+    db = await dependency.__anext__()
+    await dependency.aclose()
+    assert len(opened) == 1 and db.closed
+
+
+class _ClosingSession:
+    closed = False
+
+    def close(self):
+        self.closed = True
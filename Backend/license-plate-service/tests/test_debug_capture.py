@@ -0,0 +1,140 @@
+"""
+Debug görüntü kaydı (DebugCapture) için unit testler
+"""
+
+import pytest
+import sys
+import os
+import time
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Projenin kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.model as model
+from app.model.debug_capture import DebugCapture, NULL_SESSION
+from app.model.util import get_car
+
+
+@pytest.fixture
+def plate_image():
+    """Test için küçük bir plaka görüntüsü"""
+    return np.full((40, 120, 3), 255, dtype=np.uint8)
+
+
+def jpg_files(directory):
+    return sorted(f for f in os.listdir(directory) if f.endswith(".jpg"))
+
+
+def test_disabled_capture_is_noop(tmp_path, plate_image):
+    """Kayıt kapalıyken oturum hiçbir şey yazmamalıdır"""
+    capture = DebugCapture(directory=str(tmp_path / "debug"), enabled=False)
+    session = capture.begin()
+
+    assert session is NULL_SESSION
+    session.add("plate_orig", plate_image)
+    session.commit(0.1)
+    assert not (tmp_path / "debug").exists()
+
+
+def test_forced_session_writes_unique_files(tmp_path, plate_image):
+    """save_debug ile zorlanan oturumlar aynı saniyede bile çakışmayan dosyalar yazmalıdır"""
+    capture = DebugCapture(directory=str(tmp_path), enabled=False)
+    for _ in range(2):
+        session = capture.begin(force=True)
+        session.add("plate_orig", plate_image)
+        session.add("plate_gray", plate_image[:, :, 0])
+        session.commit(0.99)
+    capture.flush(timeout=5)
+
+    files = jpg_files(tmp_path)
+    assert len(files) == 4
+    assert capture.written == 4
+
+
+def test_sampling_keeps_one_in_n_and_low_confidence(tmp_path, plate_image):
+    """Her N istekten biri ve düşük güvenli okumalar kaydedilmelidir"""
+    capture = DebugCapture(directory=str(tmp_path), enabled=True, sample_rate=3, low_confidence=0.5)
+    for _ in range(6):
+        session = capture.begin()
+        session.add("plate_orig", plate_image)
+        session.commit(0.9)  # Yüksek güven: yalnızca örneklenenler yazılır
+    session = capture.begin()
+    session.add("plate_orig", plate_image)
+    session.commit(0.2)  # Düşük güven: her zaman yazılır
+    capture.flush(timeout=5)
+
+    assert len(jpg_files(tmp_path)) == 3
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, plate_image):
+    """Kuyruk doluysa submit bloklamadan görüntüleri düşürmelidir"""
+    capture = DebugCapture(directory=str(tmp_path), enabled=True, queue_size=1)
+    # Yazıcıyı başlatmadan kuyruğu doldur
+    capture._ensure_writer = lambda: None
+    assert capture.submit("req1", [("a", plate_image)]) is True
+    assert capture.submit("req2", [("b", plate_image)]) is False
+    assert capture.dropped == 1
+
+
+def test_rotation_by_age_and_size(tmp_path):
+    """Döndürme eski dosyaları ve boyut sınırını aşan en eski dosyaları silmelidir"""
+    capture = DebugCapture(directory=str(tmp_path), enabled=True, max_bytes=250, max_age_seconds=3600)
+    now = time.time()
+    for name, age in [("old", 7200), ("a", 30), ("b", 20), ("c", 10)]:
+        path = tmp_path / f"{name}.jpg"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (now - age, now - age))
+
+    capture._rotate()
+
+    assert jpg_files(tmp_path) == ["b.jpg", "c.jpg"]
+
+
+def test_session_wants_only_sampled_forced_or_low_confidence(tmp_path):
+    """Örnekleme kararı pahalı debug görüntüleri üretilmeden önce sorgulanabilmelidir"""
+    capture = DebugCapture(directory=str(tmp_path), enabled=True, sample_rate=2, low_confidence=0.5)
+    unsampled, sampled = capture.begin(), capture.begin()
+
+    assert not unsampled.wants(0.9)
+    assert unsampled.wants(0.2) and unsampled.wants(None)
+    assert sampled.wants(0.9)
+    assert capture.begin(force=True).wants(0.9)
+    assert not NULL_SESSION.wants(0.1)
+
+
+def test_pipeline_draws_result_frame_only_for_written_sessions(tmp_path, monkeypatch):
+    """Tam kare kopyası ve çizimler yalnızca kaydedilecek istekler için yapılmalıdır"""
+    def fake_detector(rows):
+        result = MagicMock()
+        result.boxes.data = np.array(rows, dtype=float).reshape(-1, 6)
+        return MagicMock(side_effect=lambda frames: [result] * (len(frames) if isinstance(frames, list) else 1))
+
+    confidence = {"value": 0.9}
+    monkeypatch.setattr(model, "_model_module", SimpleNamespace(
+        coco_model=fake_detector([[0, 0, 300, 300, 0.9, 2]]),
+        license_plate_detector=fake_detector([[50, 200, 150, 240, 0.9, 0]]),
+        read_license_plates_batched=lambda crops, debugs=None: [("34ABC123", confidence["value"])] * len(crops),
+        get_car=get_car,
+        USE_REAL_MODEL=True,
+    ))
+    capture = DebugCapture(directory=str(tmp_path), enabled=True, sample_rate=1000, low_confidence=0.5)
+    monkeypatch.setattr(model, "debug_capture", capture)
+    draws = []
+    original_draw = model._draw_debug_frame
+    monkeypatch.setattr(model, "_draw_debug_frame", lambda *args: draws.append(1) or original_draw(*args))
+    frame = np.zeros((300, 300, 3), dtype=np.uint8)
+
+    # Örneklenmeyen, yüksek güvenli istek: kare kopyalanmaz, hiçbir şey yazılmaz
+    model.process_image_for_plate_recognition(frame, detection_mode="full")
+    assert draws == []
+
+    # Düşük güvenli okuma OCR sonrası kaydedilir; sonuç karesi o zaman çizilir
+    confidence["value"] = 0.2
+    model.process_image_for_plate_recognition(frame, detection_mode="full")
+    capture.flush(timeout=5)
+    assert draws == [1]
+    assert any(name.endswith("_result.jpg") for name in jpg_files(tmp_path))
+    assert not frame.any()  # Girdi karesine çizilmez
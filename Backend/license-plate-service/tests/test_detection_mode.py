@@ -0,0 +1,91 @@
+"""
+Araç tespit modları (full, plate_only, lazy) için unit testler
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Projenin kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.model as model
+from app.model.util import get_car
+
+
+def detector_output(rows):
+    """YOLO sonuç yapısını taklit eden nesne"""
+    result = MagicMock()
+    result.boxes.data = np.array(rows, dtype=float).reshape(-1, 6)
+    return result
+
+
+def fake_detector(rows):
+    """Tek görüntü ve görüntü listesi ile çağrılabilen sahte dedektör"""
+    def detect(frames):
+        if isinstance(frames, list):
+            return [detector_output(rows) for _ in frames]
+        return [detector_output(rows)]
+    return MagicMock(side_effect=detect)
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """Gerçek modeller yerine sahte dedektörler ve OCR kullanan model modülü"""
+    models = SimpleNamespace(
+        coco_model=fake_detector([[0, 0, 300, 300, 0.9, 2]]),
+        license_plate_detector=fake_detector([[50, 200, 150, 240, 0.9, 0]]),
+        read_license_plates_batched=lambda crops, debugs=None: [("34ABC123", 0.9)] * len(crops),
+        get_car=get_car,
+        USE_REAL_MODEL=True,
+    )
+    monkeypatch.setattr(model, "_model_module", models)
+    return models
+
+
+@pytest.fixture
+def frame():
+    return np.zeros((300, 300, 3), dtype=np.uint8)
+
+
+def test_full_mode_runs_vehicle_detector(fake_models, frame):
+    """full modda araç tespiti yapılmalı ve plaka araca eşleştirilmelidir"""
+    result = model.process_image_for_plate_recognition(frame, detection_mode="full")
+
+    assert fake_models.coco_model.call_count == 1
+    assert result["license_plates"] == ["34ABC123"]
+    assert 1.0 in result["results"][0]
+
+
+def test_plate_only_mode_skips_vehicle_detector(fake_models, frame):
+    """plate_only modda araç dedektörü çalıştırılmamalı, plaka kutusu genişletilmelidir"""
+    result = model.process_image_for_plate_recognition(frame, detection_mode="plate_only")
+
+    assert fake_models.coco_model.call_count == 0
+    assert result["results"][0]["plate_0"]["car"]["bbox"] == [0, 150, 200, 290]
+
+
+def test_lazy_mode_runs_vehicle_detector_only_for_multiple_plates(fake_models, frame):
+    """lazy modda araç tespiti yalnızca birden fazla plaka bulunan karelerde yapılmalıdır"""
+    model.process_image_for_plate_recognition(frame, detection_mode="lazy")
+    assert fake_models.coco_model.call_count == 0
+
+    fake_models.license_plate_detector = fake_detector([[50, 200, 150, 240, 0.9, 0],
+                                                        [160, 200, 260, 240, 0.8, 0]])
+    result = model.process_image_for_plate_recognition(frame, detection_mode="lazy")
+    assert fake_models.coco_model.call_count == 1
+    assert len(result["license_plates"]) == 2
+
+
+def test_resolve_detection_mode_priority(monkeypatch):
+    """İstekteki mod otopark ayarını, otopark ayarı da varsayılanı geçersiz kılmalıdır"""
+    monkeypatch.setattr(model, "DETECTION_MODE", "full")
+    monkeypatch.setattr(model, "DETECTION_MODE_BY_PARKING", {"2": "plate_only"})
+
+    assert model.resolve_detection_mode(1) == "full"
+    assert model.resolve_detection_mode(2) == "plate_only"
+    assert model.resolve_detection_mode(2, "lazy") == "lazy"
+    assert model.resolve_detection_mode(2, "unknown") == "plate_only"
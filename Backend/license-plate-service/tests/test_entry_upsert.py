@@ -0,0 +1,81 @@
+"""
+Tek işlemli araç giriş kaydı (upsert + kısmi benzersiz indeks) testleri
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.crud import register_entry
+from app.models import ParkingRecord, Vehicle
+
+TEST_PLATE = "34UPS123"
+
+
+def _count_statements(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_new_entry_upserts_vehicle_and_creates_record_in_one_transaction(test_db):
+    statements = _count_statements(test_db)
+
+    vehicle, record, created = register_entry(test_db, TEST_PLATE, parking_id=3)
+
+    assert created is True
+    assert vehicle.license_plate == TEST_PLATE
+    assert record.vehicle_id == vehicle.id
+    assert record.parking_id == 3
+    assert record.is_active is True
+    assert record.entry_time is not None
+    # Araç upsert'i + park kaydı ekleme; önce okuma yapılmaz
+    assert len(statements) == 2
+    assert all(statement.lstrip().upper().startswith("INSERT") for statement in statements)
+
+
+def test_existing_vehicle_is_reused(test_db):
+    first_vehicle, first_record, _ = register_entry(test_db, TEST_PLATE, parking_id=1)
+    test_db.query(ParkingRecord).filter(ParkingRecord.id == first_record.id).update({"is_active": False})
+    test_db.commit()
+
+    vehicle, record, created = register_entry(test_db, TEST_PLATE, parking_id=1)
+
+    assert created is True
+    assert vehicle.id == first_vehicle.id
+    assert record.id != first_record.id
+    assert test_db.query(Vehicle).count() == 1
+
+
+def test_already_parked_returns_active_record(test_db):
+    _, active_record, _ = register_entry(test_db, TEST_PLATE, parking_id=1)
+
+    _, record, created = register_entry(test_db, TEST_PLATE, parking_id=1)
+
+    assert created is False
+    assert record.id == active_record.id
+    assert test_db.query(ParkingRecord).count() == 1
+
+    # Başka bir otoparka giriş yapılabilir
+    _, other_record, created = register_entry(test_db, TEST_PLATE, parking_id=2)
+    assert created is True
+    assert other_record.id != active_record.id
+
+
+def test_partial_unique_index_rejects_second_active_record(test_db):
+    vehicle, _, _ = register_entry(test_db, TEST_PLATE, parking_id=1)
+
+    test_db.add(ParkingRecord(vehicle_id=vehicle.id, parking_id=1, is_active=True))
+    with pytest.raises(IntegrityError):
+        test_db.commit()
+    test_db.rollback()
+
+    # Kapalı kayıtlar indeksin dışında kalır
+    test_db.add(ParkingRecord(vehicle_id=vehicle.id, parking_id=1, is_active=False))
+    test_db.commit()
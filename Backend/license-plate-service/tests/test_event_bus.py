@@ -0,0 +1,119 @@
+"""
+WebSocket bildirim kuyruğu (event bus) testleri
+"""
+
+import os
+import sys
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.events import EventBus, EventKind
+from app.websocket import RoomType
+
+
+def _manager():
+    manager = MagicMock()
+    manager.delivered = []
+    for name in ("send_vehicle_update", "send_parking_record_update", "broadcast"):
+        async def send(data, *args, _name=name):
+            manager.delivered.append((_name, data, *args))
+            return True
+        setattr(manager, name, AsyncMock(side_effect=send))
+    return manager
+
+
+def test_publish_from_worker_threads_is_delivered_in_order_on_main_loop():
+    manager = _manager()
+    bus = EventBus(connection_manager=manager)
+
+    async def run():
+        await bus.start()
+
+        def worker():
+            # Thread havuzundaki senkron kod gibi: bu thread'de event loop yok
+            for i in range(5):
+                assert bus.publish(EventKind.PARKING_RECORD_UPDATE, {"id": i})
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)  # call_soon_threadsafe ile aktarılan olaylar kuyruğa girsin
+        bus.publish(EventKind.BROADCAST, {"type": "error"}, RoomType.ADMIN)
+        await bus.stop()
+
+    asyncio.run(run())
+
+    assert [data["id"] for _, data in manager.delivered[:5]] == list(range(5))
+    assert manager.delivered[5] == ("broadcast", {"type": "error"}, RoomType.ADMIN)
+    assert bus.stats()["delivered"] == 6
+    assert bus.stats()["dropped"] == 0
+
+
+def test_pending_events_with_same_key_are_coalesced():
+    manager = _manager()
+    bus = EventBus(connection_manager=manager)
+
+    async def run():
+        await bus.start()
+        # Tüketici çalışmadan önce aynı anahtarla üç olay
+        for attempt in range(3):
+            bus.publish(EventKind.VEHICLE_UPDATE, {"attempt": attempt}, coalesce_key="already_parked:1:34ABC123")
+        bus.publish(EventKind.VEHICLE_UPDATE, {"attempt": "other"}, coalesce_key="already_parked:1:06XYZ789")
+        await bus.stop()
+
+    asyncio.run(run())
+
+    assert [data for _, data in manager.delivered] == [{"attempt": 2}, {"attempt": "other"}]
+    assert bus.stats()["coalesced"] == 2
+
+
+@pytest.mark.parametrize("policy, expected", [
+    ("drop_oldest", [2, 3, 4]),
+    ("drop_new", [0, 1, 2]),
+])
+def test_queue_is_bounded_by_overflow_policy(policy, expected):
+    manager = _manager()
+    bus = EventBus(connection_manager=manager, max_pending=3, overflow_policy=policy)
+
+    async def run():
+        await bus.start()
+        for i in range(5):
+            bus.publish(EventKind.PARKING_RECORD_UPDATE, {"id": i})
+        await bus.stop()
+
+    asyncio.run(run())
+
+    assert [data["id"] for _, data in manager.delivered] == expected
+    assert bus.stats()["dropped"] == 2
+
+
+def test_delivery_failure_does_not_stop_the_consumer():
+    manager = _manager()
+    manager.send_parking_record_update.side_effect = [RuntimeError("bağlantı koptu"), True]
+    bus = EventBus(connection_manager=manager)
+
+    async def run():
+        await bus.start()
+        bus.publish(EventKind.PARKING_RECORD_UPDATE, {"id": 1})
+        bus.publish(EventKind.PARKING_RECORD_UPDATE, {"id": 2})
+        await bus.stop()
+
+    asyncio.run(run())
+
+    assert manager.send_parking_record_update.await_count == 2
+    assert bus.stats()["failed"] == 1
+    assert bus.stats()["delivered"] == 1
+
+
+def test_publish_without_running_loop_does_not_create_event_loop():
+    bus = EventBus(connection_manager=_manager())
+
+    assert bus.publish(EventKind.VEHICLE_UPDATE, {"id": 1}) is False
+    assert bus.stats()["dropped"] == 1
+    with pytest.raises(ValueError):
+        EventBus(overflow_policy="block")
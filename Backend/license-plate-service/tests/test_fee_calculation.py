@@ -25,7 +25,7 @@ class TestFeeCalculation:
     @pytest.fixture
     def mock_parking_service(self):
         """Parking Management Service'i mocklar"""
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             # Mock yanıt nesnesi
             mock_response = MagicMock()
             mock_response.status_code = 200
@@ -110,7 +110,7 @@ class TestFeeCalculation:
     def test_api_error_handling(self):
         """API hatası durumunda ücret hesaplama testi"""
         # Requests.get çağrısını mockla
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             # API hatası simüle et
             mock_get.side_effect = requests.exceptions.RequestException("Bağlantı hatası")
             
@@ -128,7 +128,7 @@ class TestFeeCalculation:
     def test_api_returns_invalid_data(self):
         """API'nin geçersiz veri döndürdüğü durumda ücret hesaplama testi"""
         # Requests.get çağrısını mockla
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             # Mock yanıt nesnesi
             mock_response = MagicMock()
             mock_response.status_code = 200
@@ -153,7 +153,7 @@ class TestFeeCalculation:
     def test_api_returns_null_rate(self):
         """API'nin null rate döndürdüğü durumda ücret hesaplama testi"""
         # Requests.get çağrısını mockla
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             # Mock yanıt nesnesi
             mock_response = MagicMock()
             mock_response.status_code = 200
@@ -179,7 +179,7 @@ class TestFeeCalculation:
     def test_api_returns_invalid_status_code(self):
         """API'nin geçersiz durum kodu döndürdüğü durumda ücret hesaplama testi"""
         # Requests.get çağrısını mockla
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             # Mock yanıt nesnesi
             mock_response = MagicMock()
             mock_response.status_code = 404  # Not Found
@@ -204,7 +204,7 @@ class TestFeeCalculation:
         
         for idx, parking_id in enumerate(parking_ids):
             # Requests.get çağrısını mockla
-            with patch("requests.get") as mock_get:
+            with patch("requests.Session.get") as mock_get:
                 # Mock yanıt nesnesi
                 mock_response = MagicMock()
                 mock_response.status_code = 200
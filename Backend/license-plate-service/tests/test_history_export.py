@@ -0,0 +1,131 @@
+"""
+Park kayıtları geçmişi: keyset sayfalama ve akışlı NDJSON/CSV dışa aktarma testleri
+"""
+
+import os
+import sys
+import csv
+import io
+import json
+import datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import history
+from app.history import decode_cursor, encode_cursor, iter_export, list_parking_records
+from app.models import ParkingRecord, Vehicle
+
+START = datetime.datetime(2024, 5, 1)
+
+
+@pytest.fixture
+def records(test_db):
+    """İki otoparkta, bazıları aynı giriş zamanına sahip 25 kayıt"""
+    vehicles = [Vehicle(license_plate=f"34HIS{i:03d}") for i in range(25)]
+    test_db.add_all(vehicles)
+    test_db.flush()
+    for i, vehicle in enumerate(vehicles):
+        entry_time = START + datetime.timedelta(hours=i // 2)  # Her saatte iki giriş
+        closed = i % 3 != 0
+        test_db.add(ParkingRecord(
+            vehicle_id=vehicle.id, parking_id=i % 2 + 1, entry_time=entry_time,
+            exit_time=entry_time + datetime.timedelta(minutes=90) if closed else None,
+            is_active=not closed, parking_fee=1500 if closed else None,
+        ))
+    test_db.commit()
+    return test_db
+
+
+def _pages(db, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page = list_parking_records(db, cursor=cursor, **kwargs)
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_cover_all_records_once_in_order(records):
+    pages = _pages(records, limit=7)
+    ids = [item["id"] for page in pages for item in page]
+
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    assert len(ids) == len(set(ids)) == 25
+    keys = [(item["entry_time"], item["id"]) for page in pages for item in page]
+    assert keys == sorted(keys, reverse=True)
+
+    ascending = [item["id"] for page in _pages(records, limit=10, descending=False) for item in page]
+    assert ascending == sorted(ids)
+
+
+def test_keyset_pages_respect_filters(records):
+    end = START + datetime.timedelta(hours=6)
+    pages = _pages(records, limit=2, parking_id=2, start=START + datetime.timedelta(hours=1), end=end)
+    items = [item for page in pages for item in page]
+
+    assert items and all(item["parking_id"] == 2 for item in items)
+    assert all(START + datetime.timedelta(hours=1) <= datetime.datetime.fromisoformat(item["entry_time"]) < end
+               for item in items)
+    active = _pages(records, limit=100, active=True)[0]
+    assert len(active) == 9 and all(item["exit_time"] is None for item in active)
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    entry_time = datetime.datetime(2024, 5, 1, 8, 30, tzinfo=datetime.timezone.utc)
+    assert decode_cursor(encode_cursor(entry_time, 42)) == (entry_time, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_export_streams_rows_in_chunks(records):
+    chunks = list(iter_export(records, "ndjson", yield_per=10))
+
+    assert len(chunks) == 3  # 10 + 10 + 5 satır
+    rows = [json.loads(line) for chunk in chunks for line in chunk.decode("utf-8").splitlines()]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert rows[1]["parking_fee"] == 15.0 and rows[1]["duration_hours"] == 1.5
+    assert rows[0]["exit_time"] is None and rows[0]["is_active"] is True
+
+
+@pytest.fixture
+def client(records):
+    from app.main import app, get_db
+
+    def override():
+        yield records
+
+    app.dependency_overrides[get_db] = override
+    try:
+        with patch("app.main.SessionLocal", sessionmaker(bind=records.get_bind())):
+            yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+def test_export_endpoint_streams_csv(client):
+    response = client.get("/parking-records/export", params={"format": "csv", "parking_id": 1,
+                                                             "from": "2024-05-01T00:00:00",
+                                                             "to": "2024-05-01T06:00:00"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "parking-records.csv" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 6
+    assert list(rows[0]) == history.EXPORT_FIELDS
+    assert {row["parking_id"] for row in rows} == {"1"}
+
+
+def test_listing_endpoint_pages_with_cursor(client):
+    first = client.get("/parking-records", params={"limit": 20}).json()
+    second = client.get("/parking-records", params={"limit": 20, "cursor": first["next_cursor"]}).json()
+
+    assert len(first["items"]) == 20 and len(second["items"]) == 5
+    assert second["next_cursor"] is None
+    assert client.get("/parking-records", params={"cursor": "bozuk"}).status_code == 400
@@ -0,0 +1,69 @@
+"""
+Küçültülmüş çözünürlükte görüntü çözme (ingest) için unit testler
+"""
+
+import pytest
+import sys
+import os
+import cv2
+import numpy as np
+
+# Projenin kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model.ingest import decode_image, image_size, choose_reduction
+from app.model.roi import RegionOfInterest
+
+
+def encode(height, width, ext=".jpg"):
+    """Verilen boyutta gradyan içeren bir görüntüyü kodlar"""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[:, :, 0] = np.linspace(0, 255, width, dtype=np.uint8)
+    ok, data = cv2.imencode(ext, frame)
+    assert ok
+    return data.tobytes()
+
+
+@pytest.mark.parametrize("ext", [".jpg", ".png"])
+def test_image_size_reads_header(ext):
+    """Boyut, görüntü çözülmeden başlıktan okunmalıdır"""
+    assert image_size(encode(270, 480, ext)) == (270, 480)
+
+
+def test_choose_reduction_keeps_target_resolution():
+    """Küçültülmüş kare dedektör giriş boyutundan küçük olmamalıdır"""
+    assert choose_reduction((2160, 3840), 640) == 4
+    assert choose_reduction((1080, 1920), 640) == 2
+    assert choose_reduction((480, 640), 640) == 1
+    assert choose_reduction((2160, 3840), 0) == 1
+
+
+def test_large_jpeg_decoded_at_reduced_resolution():
+    """Büyük JPEG küçültülmüş çözünürlükte çözülmeli, koordinatlar tam çözünürlüğe göre kalmalıdır"""
+    decoded = decode_image(encode(2160, 3840), target_size=640)
+
+    assert decoded.scale == 4
+    assert decoded.frame.shape == (540, 960, 3)
+    assert decoded.shape[:2] == (2160, 3840)
+    assert decoded.is_reduced
+
+
+def test_small_plate_region_triggers_single_full_decode():
+    """Dar plaka bölgesi tam çözünürlükten, geniş bölge küçültülmüş kareden alınmalıdır"""
+    decoded = decode_image(encode(2160, 3840), target_size=640)
+    decoded.ocr_min_width = 100
+
+    wide = decoded.region(0, 0, 800, 200)
+    assert wide.shape == (50, 200, 3)
+    assert decoded.is_reduced
+
+    narrow = decoded.region(1000, 1000, 1200, 1060)
+    assert narrow.shape == (60, 200, 3)
+    assert not decoded.is_reduced
+
+
+def test_roi_limits_reduction():
+    """Küçük şerit bölgesinde küçültme oranı bölge boyutuna göre seçilmelidir"""
+    roi = RegionOfInterest(box=[0, 0, 0.25, 0.25])  # 960x540
+
+    assert decode_image(encode(2160, 3840), target_size=640, roi=roi).scale == 1
@@ -0,0 +1,99 @@
+"""
+İlgi bölgesi (ROI) kırpma ve letterbox küçültme için unit testler
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Projenin kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.model as model
+from app.model.roi import RegionOfInterest, letterbox, prepare_inference_view
+
+
+def test_letterbox_scales_longest_side_and_pads_to_stride():
+    """En uzun kenar max_size'a küçültülmeli, kenarlar 32'nin katına tamamlanmalıdır"""
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+    image, scale = letterbox(frame, 640)
+
+    assert scale == pytest.approx(1 / 3)
+    assert image.shape == (384, 640, 3)
+
+
+def test_letterbox_keeps_small_frames_without_copy():
+    """Çıkarım boyutundan küçük kareler kopyalanmadan aynen kullanılmalıdır"""
+    frame = np.zeros((300, 400, 3), dtype=np.uint8)
+
+    image, scale = letterbox(frame, 640)
+
+    assert image is frame
+    assert scale == 1.0
+
+
+def test_roi_view_maps_detections_back_to_frame():
+    """ROI içindeki tespitler orijinal kare koordinatlarına çevrilmelidir"""
+    frame = np.zeros((1000, 2000, 3), dtype=np.uint8)
+    roi = RegionOfInterest(box=[0.5, 0.5, 1.0, 1.0])  # Sağ alt çeyrek: 1000x500
+
+    view = prepare_inference_view(frame, roi, max_size=500)
+
+    assert view.image.shape[:2] == (256, 512)  # 250x500 -> 256x512 (adım 32)
+    assert view.to_original(np.array([[10, 20, 110, 60, 0.9, 0]])) == [[1020.0, 540.0, 1220.0, 620.0, 0.9, 0.0]]
+
+
+def test_polygon_roi_drops_detections_outside_lane():
+    """Merkezi şerit çokgeni dışında kalan plaka tespitleri atılmalıdır"""
+    frame = np.zeros((400, 400, 3), dtype=np.uint8)
+    roi = RegionOfInterest(polygon=[[0, 0], [400, 0], [0, 400]])  # Sol üst üçgen
+
+    view = prepare_inference_view(frame, roi, max_size=0)
+    rows = view.to_original(np.array([[10, 10, 50, 30, 0.9, 0], [300, 300, 380, 340, 0.9, 0]]), inside_roi=True)
+
+    assert rows == [[10.0, 10.0, 50.0, 30.0, 0.9, 0.0]]
+
+
+def test_ocr_crop_taken_from_full_resolution_frame(monkeypatch):
+    """Tespit küçültülmüş ROI'de yapılsa da OCR kırpıntısı tam çözünürlüklü kareden alınmalıdır"""
+    plate_result = MagicMock()
+    plate_result.boxes.data = np.array([[10, 10, 60, 30, 0.9, 0]], dtype=float)
+    detector = MagicMock(return_value=[plate_result])
+    crops = []
+
+    def read_batched(batch, debugs=None):
+        crops.extend(batch)
+        return [("34ABC123", 0.9)] * len(batch)
+
+    monkeypatch.setattr(model, "_model_module", SimpleNamespace(
+        coco_model=MagicMock(), license_plate_detector=detector, read_license_plates_batched=read_batched,
+        get_car=MagicMock(), USE_REAL_MODEL=True,
+    ))
+    monkeypatch.setattr(model, "roi_for_parking", lambda parking_id, gate=None: RegionOfInterest(box=[1000, 0, 2000, 1000]))
+    frame = np.zeros((1000, 2000, 3), dtype=np.uint8)
+
+    result = model.process_image_for_plate_recognition(frame, detection_mode="plate_only", parking_id=1)
+
+    assert detector.call_args[0][0].shape == (640, 640, 3)
+    assert result["results"][0]["plate_0"]["license_plate"]["bbox"] == [1015.625, 15.625, 1093.75, 46.875]
+    assert crops[0].shape == (31, 78, 3)
+
+
+def test_gate_roi_falls_back_to_parking_roi(monkeypatch):
+    """Kapı için tanımlı ROI kullanılmalı, kapı tanımı yoksa otoparkın ROI'sine düşülmelidir"""
+    from app.model import roi as roi_module
+
+    monkeypatch.setattr(roi_module, "_PARKING_ROIS", roi_module._load_parking_rois({
+        "1": {"box": [0.0, 0.5, 0.5, 1.0]},
+        "1:exit": {"box": [0.5, 0.5, 1.0, 1.0]},
+    }))
+    shape = (1000, 2000)
+
+    assert roi_module.roi_for_parking(1, "exit").crop_box(shape) == (1000, 500, 2000, 1000)
+    assert roi_module.roi_for_parking(1, "entry").crop_box(shape) == (0, 500, 1000, 1000)
+    assert roi_module.roi_for_parking(1).crop_box(shape) == (0, 500, 1000, 1000)
+    assert roi_module.roi_for_parking(2, "exit") is None
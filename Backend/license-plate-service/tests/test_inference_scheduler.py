@@ -0,0 +1,150 @@
+"""
+Mikro-toplu çıkarım zamanlayıcısı (InferenceScheduler) için unit testler
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+import threading
+
+# Projenin kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model.scheduler import InferenceScheduler, RecognitionBusyError
+
+
+class RecordingBatchProcessor:
+    """Çağrıldığı toplu işleri kaydeden sahte çıkarım fonksiyonu"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, images, save_debug):
+        self.batches.append(list(images))
+        if self.fail:
+            raise RuntimeError("model hatası")
+        return [{"results": {}, "license_plates": [f"plate-{image}"]} for image in images]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch():
+    """Pencere içinde gelen eşzamanlı istekler tek bir toplu işte çalışmalıdır"""
+    processor = RecordingBatchProcessor()
+    scheduler = InferenceScheduler(process_batch=processor, max_batch_size=8, window_ms=50)
+    await scheduler.start()
+    try:
+        results = await asyncio.gather(*(scheduler.submit(i) for i in range(3)))
+    finally:
+        await scheduler.stop()
+
+    assert [r["license_plates"] for r in results] == [["plate-0"], ["plate-1"], ["plate-2"]]
+    assert processor.batches == [[0, 1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_capped_at_max_size():
+    """Toplu iş boyutu max_batch_size değerini aşmamalıdır"""
+    processor = RecordingBatchProcessor()
+    scheduler = InferenceScheduler(process_batch=processor, max_batch_size=2, window_ms=50)
+    await scheduler.start()
+    try:
+        await asyncio.gather(*(scheduler.submit(i) for i in range(5)))
+    finally:
+        await scheduler.stop()
+
+    assert [len(batch) for batch in processor.batches] == [2, 2, 1]
+    assert scheduler.stats()["processed"] == 5
+
+
+@pytest.mark.asyncio
+async def test_batch_error_is_raised_to_every_request():
+    """Toplu çıkarım hatası toplu işteki tüm isteklere iletilmelidir"""
+    scheduler = InferenceScheduler(process_batch=RecordingBatchProcessor(fail=True), window_ms=20)
+    await scheduler.start()
+    try:
+        results = await asyncio.gather(scheduler.submit(1), scheduler.submit(2), return_exceptions=True)
+    finally:
+        await scheduler.stop()
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_inference():
+    """Çıkarım sürerken event loop diğer işleri çalıştırmaya devam etmelidir"""
+    release = threading.Event()
+
+    def slow_processor(images, save_debug):
+        release.wait(timeout=5)
+        return [{"results": {}, "license_plates": []} for _ in images]
+
+    scheduler = InferenceScheduler(process_batch=slow_processor, window_ms=1)
+    await scheduler.start()
+    try:
+        pending = asyncio.ensure_future(scheduler.submit(b"image"))
+        await asyncio.sleep(0.05)
+        assert not pending.done()  # Çıkarım sürüyor, ama loop çalışıyor
+        release.set()
+        assert (await pending)["license_plates"] == []
+    finally:
+        release.set()
+        await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_submit_requires_running_scheduler():
+    """Başlatılmamış zamanlayıcıya istek gönderilememelidir"""
+    scheduler = InferenceScheduler(process_batch=RecordingBatchProcessor())
+    with pytest.raises(RuntimeError):
+        await scheduler.submit(b"image")
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_pending_limit_reached():
+    """Bekleyen istek sınırı aşıldığında yeni istekler Retry-After ile reddedilmelidir"""
+    release = threading.Event()
+
+    def slow_processor(images, save_debug):
+        release.wait(timeout=5)
+        return [{"results": {}, "license_plates": []} for _ in images]
+
+    scheduler = InferenceScheduler(process_batch=slow_processor, window_ms=1, max_pending=2)
+    await scheduler.start()
+    try:
+        pending = [asyncio.ensure_future(scheduler.submit(i)) for i in range(2)]
+        await asyncio.sleep(0.02)
+        with pytest.raises(RecognitionBusyError) as exc_info:
+            await scheduler.submit(3)
+        assert exc_info.value.retry_after >= 1
+        assert scheduler.stats()["rejected"] == 1
+        release.set()
+        await asyncio.gather(*pending)
+    finally:
+        release.set()
+        await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_custom_runner_runs_batches_concurrently():
+    """Süreç havuzu gibi bir çalıştırıcıyla birden fazla toplu iş aynı anda çalışabilmelidir"""
+    running = 0
+    peak = 0
+
+    async def runner(images, save_debug):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return [{"results": {}, "license_plates": []} for _ in images]
+
+    scheduler = InferenceScheduler(max_batch_size=1, window_ms=0)
+    await scheduler.start(runner=runner, concurrency=2)
+    try:
+        await asyncio.gather(*(scheduler.submit(i) for i in range(4)))
+    finally:
+        await scheduler.stop()
+
+    assert peak == 2
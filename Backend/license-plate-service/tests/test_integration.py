@@ -33,7 +33,7 @@ class TestParkingIntegration:
     @pytest.fixture
     def mock_parking_api(self):
         """Parking Management Service API'sini mocklar"""
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             # Mock yanıt nesnesi
             mock_response = MagicMock()
             mock_response.status_code = 200
@@ -126,7 +126,7 @@ class TestEntryExitFlow:
     @pytest.fixture
     def mock_apis(self):
         """Tüm dış servisleri mocklar"""
-        with patch("requests.get") as mock_get, \
+        with patch("requests.Session.get") as mock_get, \
              patch("requests.post") as mock_post, \
              patch("app.model.process_image_for_plate_recognition") as mock_process_image, \
              patch("app.main.get_vehicle_by_license_plate") as mock_get_vehicle, \
@@ -210,7 +210,7 @@ class TestEntryExitFlow:
         image_bytes = image_data.encode("utf-8")
         
         # 1. Araç girişi testi
-        with patch("app.main.run_async") as mock_run_async:
+        with patch("app.main.event_bus.publish") as mock_publish:
             files = {"file": ("test.png", image_bytes, "image/png")}
             
             # process-plate-entry endpoint'ine istek gönder
@@ -249,7 +249,7 @@ class TestEntryExitFlow:
         mock_record.is_active = True
         mock_apis["mock_get_record"].return_value = mock_record
         
-        with patch("app.main.run_async") as mock_run_async:
+        with patch("app.main.event_bus.publish") as mock_publish:
             files = {"file": ("test.png", image_bytes, "image/png")}
             
             # process-plate-exit endpoint'ine istek gönder
@@ -304,7 +304,7 @@ class TestEdgeCaseScenarios:
         exit_time = entry_time + timedelta(hours=1)
         
         # requests.get'i patch et ve ConnectionError fırlat
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.ConnectionError("Bağlantı hatası")
             
             # Fonksiyon ValueError fırlatmalı
@@ -323,7 +323,7 @@ class TestEdgeCaseScenarios:
         exit_time = entry_time + timedelta(hours=1)
         
         # requests.get'i patch et ve 404 dönüş kodu ile yanıt döndür
-        with patch("requests.get") as mock_get:
+        with patch("requests.Session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 404
             mock_get.return_value = mock_response
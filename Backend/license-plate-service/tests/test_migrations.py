@@ -0,0 +1,255 @@
+"""
+Şema göçleri ve parking_records sıcak sorgularının sorgu planı regresyon testleri
+"""
+
+import os
+import sys
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.activity import activity_feed_statement
+from app.history import list_parking_records
+from app.migrations import MIGRATIONS, run_migrations
+from app.models import Base, ParkingRecord, Vehicle
+
+# İndeks eklenmeden önceki parking_records şeması
+LEGACY_SCHEMA = [
+    "CREATE TABLE vehicles (id INTEGER PRIMARY KEY, license_plate VARCHAR UNIQUE, "
+    "created_at DATETIME DEFAULT CURRENT_TIMESTAMP, updated_at DATETIME)",
+    "CREATE TABLE parking_records (id INTEGER PRIMARY KEY, vehicle_id INTEGER REFERENCES vehicles(id), "
+    "entry_time DATETIME DEFAULT CURRENT_TIMESTAMP, exit_time DATETIME, is_active BOOLEAN, "
+    "parking_fee INTEGER, parking_id INTEGER)",
+    "CREATE INDEX ix_parking_records_id ON parking_records (id)",
+]
+
+
+def _engine():
+    return create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+
+@pytest.fixture
+def populated_engine():
+    """Birkaç otoparkta açık ve kapalı kayıtlar içeren, istatistikleri toplanmış veritabanı"""
+    engine = _engine()
+    Base.metadata.create_all(engine)
+    run_migrations(engine)
+    db = sessionmaker(bind=engine)()
+    start = datetime.datetime(2024, 1, 1)
+    vehicles = [Vehicle(license_plate=f"34TST{i:03d}") for i in range(200)]
+    db.add_all(vehicles)
+    db.flush()
+    for i, vehicle in enumerate(vehicles):
+        for visit in range(10):
+            entry_time = start + datetime.timedelta(hours=i * 10 + visit)
+            is_open = visit == 9 and i % 4 == 0
+            db.add(ParkingRecord(
+                vehicle_id=vehicle.id, parking_id=i % 5 + 1, entry_time=entry_time,
+                exit_time=None if is_open else entry_time + datetime.timedelta(minutes=45),
+                is_active=is_open, parking_fee=None if is_open else 1000,
+            ))
+    db.commit()
+    db.close()
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    return engine
+
+
+def _plan(engine, statement) -> str:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+def _assert_uses_index(plan: str, index_name: str):
+    assert index_name in plan, plan
+    # Tam tablo taraması veya sıralama için geçici B-tree olmamalı
+    assert "SCAN parking_records\n" not in plan + "\n", plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+def test_migrations_add_indexes_to_legacy_database_once():
+    engine = _engine()
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+
+    assert run_migrations(engine) == [migration.version for migration in MIGRATIONS]
+    assert run_migrations(engine) == []
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("parking_records")}
+    expected = {index.name for index in ParkingRecord.__table__.indexes}
+    assert expected <= index_names
+
+
+def test_migrations_replace_overlapping_indexes_on_existing_database():
+    engine = _engine()
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+        # Önceki 2. göçün oluşturduğu, artık modelde olmayan indeksler
+        connection.exec_driver_sql("CREATE INDEX ix_parking_records_open_entry_time ON parking_records (entry_time) WHERE exit_time IS NULL")
+        connection.exec_driver_sql("CREATE INDEX ix_parking_records_closed_exit_time ON parking_records (exit_time) WHERE exit_time IS NOT NULL")
+    assert run_migrations(engine, target=3) == [1, 2, 3]
+
+    assert run_migrations(engine) == [4]
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("parking_records")}
+    assert index_names == {index.name for index in ParkingRecord.__table__.indexes}
+
+
+def test_migrations_close_duplicate_active_records_before_unique_index(caplog):
+    engine = _engine()
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql("INSERT INTO vehicles (id, license_plate) VALUES (1, '34DUP001'), (2, '34DUP002')")
+        # Eski giriş akışının eşzamanlı isteklerde bıraktığı çift aktif kayıtlar
+        connection.exec_driver_sql(
+            "INSERT INTO parking_records (id, vehicle_id, entry_time, exit_time, is_active, parking_fee, parking_id) VALUES "
+            "(1, 1, '2024-01-01 08:00:00', NULL, 1, NULL, 1), "
+            "(2, 1, '2024-01-01 08:05:00', NULL, 1, NULL, 1), "
+            "(3, 1, '2024-01-01 08:05:00', NULL, 1, NULL, 1), "
+            "(4, 1, '2024-01-01 07:00:00', NULL, 1, NULL, 2), "
+            "(5, 2, '2024-01-01 09:00:00', NULL, 1, NULL, 1), "
+            "(6, 2, '2024-01-01 10:00:00', '2024-01-01 11:00:00', 0, 1000, 1)"
+        )
+
+    assert run_migrations(engine) == [migration.version for migration in MIGRATIONS]
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("parking_records")}
+    assert "uq_parking_records_active_vehicle_parking" in index_names
+    with engine.connect() as connection:
+        rows = {row.id: row for row in connection.execute(select(ParkingRecord.__table__))}
+    # Her (araç, otopark) için en yeni kayıt açık kalır; eşit giriş zamanında büyük id kazanır
+    assert {record_id for record_id, row in rows.items() if row.is_active} == {3, 4, 5}
+    # Fazladan kayıtlar aracın bir sonraki girişinde kapatılır, ücret yazılmaz
+    assert rows[1].exit_time == datetime.datetime(2024, 1, 1, 8, 5) and rows[1].parking_fee is None
+    assert rows[2].exit_time == datetime.datetime(2024, 1, 1, 8, 5) and rows[2].parking_fee is None
+    assert rows[6].exit_time == datetime.datetime(2024, 1, 1, 11) and rows[6].parking_fee == 1000
+    closed_logs = [record.getMessage() for record in caplog.records if "Çift aktif park kaydı" in record.getMessage()]
+    assert len(closed_logs) == 2 and all("34DUP001" in message for message in closed_logs)
+
+
+def test_startup_stops_when_migrations_fail(monkeypatch):
+    import app.main as main_module
+
+    def failing_migrations(engine):
+        raise RuntimeError("UNIQUE constraint failed")
+
+    monkeypatch.setattr(main_module, "engine", _engine())
+    monkeypatch.setattr(main_module, "run_migrations", failing_migrations)
+    with pytest.raises(RuntimeError, match="göçleri"):
+        main_module.startup_event()
+
+
+def test_postgresql_index_ddl_builds_concurrently():
+    from sqlalchemy.dialects import postgresql
+    from app.migrations import _create_indexes
+
+    class RecordingConnection:
+        dialect = postgresql.dialect()
+
+        def __init__(self):
+            self.statements = []
+
+        def execute(self, statement, parameters=None):
+            self.statements.append(str(statement.compile(dialect=self.dialect)))
+            invalid = "SELECT 1 FROM pg_class" in self.statements[-1] and parameters["name"].startswith("uq_")
+            return type("Result", (), {"first": lambda result: (1,) if invalid else None})()
+
+        def exec_driver_sql(self, statement):
+            self.statements.append(statement)
+
+    connection = RecordingConnection()
+    _create_indexes(*(index.name for index in ParkingRecord.__table__.indexes if index.name != "ix_parking_records_id"))(connection)
+
+    ddl = [statement for statement in connection.statements if statement.startswith("CREATE")]
+    assert ddl and all(" INDEX CONCURRENTLY IF NOT EXISTS " in statement for statement in ddl)
+    # Yarıda kalmış (INVALID) indeks yeniden oluşturulmadan önce silinir
+    assert "DROP INDEX CONCURRENTLY IF EXISTS uq_parking_records_active_vehicle_parking" in connection.statements
+
+
+def test_migrations_are_noop_on_fresh_schema():
+    engine = _engine()
+    Base.metadata.create_all(engine)
+    assert run_migrations(engine) == [migration.version for migration in MIGRATIONS]
+
+
+@pytest.mark.parametrize("parking_id, index_name", [
+    (None, "ix_parking_records_entry_time_id"),
+    (2, "ix_parking_records_parking_entry_time_id"),
+])
+def test_active_vehicles_plan_uses_entry_time_index(populated_engine, parking_id, index_name):
+    # /active-vehicles sorgusu: açık kayıtlar en yeni girişler arasında olduğundan
+    # ayrı bir exit_time IS NULL kısmi indeksi gerekmez
+    statement = select(ParkingRecord).join(Vehicle).where(ParkingRecord.exit_time == None)
+    if parking_id is not None:
+        statement = statement.where(ParkingRecord.parking_id == parking_id)
+    statement = statement.order_by(ParkingRecord.entry_time.desc()).limit(50)
+    _assert_uses_index(_plan(populated_engine, statement), index_name)
+
+
+@pytest.mark.parametrize("parking_id", [None, 3])
+def test_recent_activities_plan_uses_partial_index(populated_engine, parking_id):
+    # /recent-activities tamamlanan kayıtlar sorgusu: otopark filtresi aynı indeksten okunur
+    statement = select(ParkingRecord).join(Vehicle).where(ParkingRecord.exit_time != None)
+    if parking_id is not None:
+        statement = statement.where(ParkingRecord.parking_id == parking_id)
+    statement = statement.order_by(ParkingRecord.exit_time.desc()).limit(20)
+    _assert_uses_index(_plan(populated_engine, statement), "ix_parking_records_closed_exit_time_id")
+
+
+def test_vehicle_history_plan_uses_vehicle_index(populated_engine):
+    # vehicle.parking_records (araç geçmişi); aktif kayıt indeksi kısmi olduğundan kapalı kayıtlara yetmez
+    statement = select(ParkingRecord).where(ParkingRecord.vehicle_id == 17).order_by(ParkingRecord.entry_time)
+    _assert_uses_index(_plan(populated_engine, statement), "ix_parking_records_vehicle_id_entry_time")
+
+
+@pytest.mark.parametrize("parking_id", [None, 4])
+def test_active_record_lookup_plan_uses_unique_partial_index(populated_engine, parking_id):
+    # get_active_parking_record_by_vehicle sorgusu
+    statement = select(ParkingRecord).where(ParkingRecord.vehicle_id == 17, ParkingRecord.is_active == True)
+    if parking_id is not None:
+        statement = statement.where(ParkingRecord.parking_id == parking_id)
+    _assert_uses_index(_plan(populated_engine, statement.limit(1)), "uq_parking_records_active_vehicle_parking")
+
+
+@pytest.mark.parametrize("parking_id, index_name", [
+    (None, "ix_parking_records_entry_time_id"),
+    (2, "ix_parking_records_parking_entry_time_id"),
+])
+def test_history_keyset_page_plan_uses_entry_time_id_index(populated_engine, parking_id, index_name):
+    # /parking-records sonraki sayfa sorgusu (cursor'dan devam)
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    event.listen(populated_engine, "before_cursor_execute", listener)
+    db = sessionmaker(bind=populated_engine)()
+    try:
+        cursor = list_parking_records(db, limit=20, parking_id=parking_id)["next_cursor"]
+        list_parking_records(db, limit=20, cursor=cursor, parking_id=parking_id)
+    finally:
+        event.remove(populated_engine, "before_cursor_execute", listener)
+        db.close()
+
+    statement, parameters = statements[-1]
+    with populated_engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    _assert_uses_index("\n".join(row[-1] for row in rows), index_name)
+
+
+@pytest.mark.parametrize("parking_id, entry_index, exit_index", [
+    (None, "ix_parking_records_entry_time_id", "ix_parking_records_closed_exit_time_id"),
+    (3, "ix_parking_records_parking_entry_time_id", "ix_parking_records_closed_exit_time_id"),
+])
+def test_activity_feed_plan_reads_both_branches_from_indexes(populated_engine, parking_id, entry_index, exit_index):
+    # /recent-activities UNION ALL sorgusu: her dal kendi indeksinden limit kadar satır okur
+    plan = _plan(populated_engine, activity_feed_statement(20, parking_id))
+    assert entry_index in plan and exit_index in plan, plan
+    assert "SCAN parking_records\n" not in plan + "\n", plan
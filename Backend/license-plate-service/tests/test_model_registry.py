@@ -0,0 +1,92 @@
+"""
+Model kayıt defteri (ModelRegistry) için unit testler
+"""
+
+import pytest
+import sys
+import os
+import threading
+from unittest.mock import MagicMock
+
+# Projenin kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model.registry import ModelRegistry
+
+
+@pytest.fixture
+def registry():
+    """Her test için boş bir kayıt defteri döndürür"""
+    return ModelRegistry()
+
+
+def test_model_loaded_once(registry):
+    """Aynı model birden fazla istenince yükleyici yalnızca bir kez çağrılmalıdır"""
+    loader = MagicMock(return_value=object())
+    registry.register("ocr", loader)
+
+    first = registry.get("ocr")
+    second = registry.get("ocr")
+
+    assert first is second
+    assert loader.call_count == 1
+
+
+def test_concurrent_get_loads_once(registry):
+    """Eşzamanlı isteklerde de model tek bir kez yüklenmelidir"""
+    loader = MagicMock(return_value=object())
+    registry.register("detector", loader)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("detector"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loader.call_count == 1
+    assert len(set(id(r) for r in results)) == 1
+
+
+def test_failed_load_is_cached_as_none(registry):
+    """Yüklenemeyen model None olarak saklanmalı ve tekrar denenmemelidir"""
+    loader = MagicMock(side_effect=RuntimeError("model dosyası yok"))
+    registry.register("broken", loader)
+
+    assert registry.get("broken") is None
+    assert registry.get("broken") is None
+    assert loader.call_count == 1
+    assert registry.stats()["models"]["broken"]["loaded"] is False
+
+
+def test_stats_report_load_time_and_memory(registry):
+    """stats() yükleme süresi ve bellek bilgisini içermelidir"""
+    registry.register("ocr", lambda: bytearray(1024))
+    registry.get("ocr")
+
+    stats = registry.stats()
+    assert stats["pid"] == os.getpid()
+    assert "rss_bytes" in stats
+    info = stats["models"]["ocr"]
+    assert info["loaded"] is True
+    assert info["load_seconds"] >= 0
+    assert info["rss_delta_bytes"] >= 0
+
+
+def test_unregistered_model_raises(registry):
+    """Kayıtlı olmayan model istenirse KeyError fırlatılmalıdır"""
+    with pytest.raises(KeyError):
+        registry.get("unknown")
+
+
+def test_registry_resets_after_fork(registry):
+    """Süreç kimliği değişince (fork) modeller yeniden yüklenmelidir"""
+    loader = MagicMock(side_effect=lambda: object())
+    registry.register("ocr", loader)
+    registry.get("ocr")
+
+    # Fork edilmiş bir worker sürecini simüle et
+    registry._pid = -1
+    registry.get("ocr")
+
+    assert loader.call_count == 2
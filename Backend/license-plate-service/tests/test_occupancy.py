@@ -0,0 +1,134 @@
+"""
+Otopark başına anlık doluluk sayaçları (app.occupancy) ve /occupancy endpoint testleri
+"""
+
+import os
+import sys
+import datetime
+from unittest.mock import PropertyMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import crud
+from app.events import EventKind, EventBus, event_bus
+from app.models import ParkingOccupancy, ParkingRecord, Vehicle
+from app.occupancy import occupancy
+from app.parking_rates import rate_cache
+from app.schemas import VehicleEvent
+
+
+@pytest.fixture(autouse=True)
+def clean_counts():
+    occupancy.clear()
+    yield
+    occupancy.clear()
+
+
+def test_counts_follow_committed_entries_and_exits(test_db):
+    rate_cache.set_rate(1, 15.0)
+    _, record, created = crud.register_entry(test_db, "34OCC001", parking_id=1)
+    crud.register_entry(test_db, "34OCC002", parking_id=2)
+    _, _, again = crud.register_entry(test_db, "34OCC001", parking_id=1)
+
+    assert created and not again  # Zaten park halindeki araç sayıyı artırmaz
+    assert occupancy.snapshot() == {1: 1, 2: 1}
+
+    crud.close_parking_record(test_db, record.id, 1, record.entry_time)
+    assert crud.close_parking_record(test_db, record.id, 1, record.entry_time) is None
+    assert occupancy.get(1) == 0 and occupancy.get(2) == 1
+    assert REGISTRY.get_sample_value("license_plate_parking_occupancy", {"parking_id": "2"}) == 1
+
+
+def test_rolled_back_changes_are_discarded(test_db):
+    vehicle = Vehicle(license_plate="34OCC003")
+    test_db.add(vehicle)
+    test_db.flush()
+    test_db.add(ParkingRecord(vehicle_id=vehicle.id, parking_id=1, is_active=True))
+    occupancy.stage(test_db, 1, 1)
+    test_db.rollback()
+
+    # Geri alınan değişiklik sonraki commit'e taşınmaz
+    test_db.commit()
+    assert occupancy.snapshot() == {}
+
+
+def test_batch_events_update_counts_once_per_net_change(test_db):
+    rate_cache.set_rate(1, 15.0)
+    start = datetime.datetime(2024, 5, 1, 8, 0)
+    events = [
+        VehicleEvent(type="entry", license_plate="34OCC010", timestamp=start),
+        VehicleEvent(type="entry", license_plate="34OCC011", timestamp=start),
+        VehicleEvent(type="exit", license_plate="34OCC010", timestamp=start + datetime.timedelta(hours=1)),
+        VehicleEvent(type="exit", license_plate="34OCC099", timestamp=start),  # Aktif kayıt yok
+    ]
+    crud.apply_vehicle_events(test_db, events)
+
+    assert occupancy.snapshot() == {1: 1}
+
+
+def _seed(db):
+    vehicles = [Vehicle(license_plate=f"34OCC{100 + i}") for i in range(7)]
+    db.add_all(vehicles)
+    db.flush()
+    for i, vehicle in enumerate(vehicles):
+        db.add(ParkingRecord(vehicle_id=vehicle.id, parking_id=None if i == 0 else i % 2 + 1,
+                             is_active=i != 6))
+    db.commit()
+
+
+def test_rebuild_counts_active_records_and_resets_stale_parkings(test_db):
+    _seed(test_db)
+    occupancy.stage(test_db, 9, 4)
+    test_db.commit()
+
+    counts = occupancy.rebuild(test_db)
+
+    # parking_id'si olmayan kayıt otopark 1'e sayılır; kapalı kayıt sayılmaz
+    assert counts == {1: 3, 2: 3}
+    assert occupancy.snapshot() == {1: 3, 2: 3, 9: 0}
+
+
+def test_summary_table_mode_keeps_shared_totals(test_db, monkeypatch):
+    monkeypatch.setattr(occupancy, "use_summary_table", True)
+    _seed(test_db)
+    occupancy.rebuild(test_db)
+    assert dict(test_db.query(ParkingOccupancy.parking_id, ParkingOccupancy.active_count).all()) == {1: 3, 2: 3}
+
+    # Başka bir worker'ın girişi: tablo aynı işlemde güncellenir, toplam tablodan alınır
+    occupancy.clear()
+    crud.register_entry(test_db, "34OCC200", parking_id=2)
+    assert occupancy.snapshot() == {2: 4}
+    assert test_db.get(ParkingOccupancy, 2).active_count == 4
+
+    occupancy.refresh(test_db)
+    assert occupancy.snapshot() == {1: 3, 2: 4}
+
+
+def test_changes_are_pushed_to_parking_room(test_db):
+    with patch.object(EventBus, "running", new_callable=PropertyMock, return_value=True), \
+            patch.object(event_bus, "publish") as publish:
+        crud.register_entry(test_db, "34OCC300", parking_id=3)
+
+    publish.assert_called_once_with(EventKind.PARKING_UPDATE,
+                                    {"id": 3, "action": "occupancy", "active_vehicles": 1},
+                                    coalesce_key="occupancy:3")
+
+
+def test_occupancy_endpoint(test_db):
+    from app.main import app
+
+    crud.register_entry(test_db, "34OCC400", parking_id=1)
+    crud.register_entry(test_db, "34OCC401", parking_id=2)
+    crud.register_entry(test_db, "34OCC402", parking_id=2)
+    client = TestClient(app)
+
+    assert client.get("/occupancy", params={"parking_id": 2}).json() == {"parking_id": 2, "active_vehicles": 2}
+    assert client.get("/occupancy", params={"parking_id": 5}).json()["active_vehicles"] == 0
+    assert client.get("/occupancy").json() == {
+        "parkings": [{"parking_id": 1, "active_vehicles": 1}, {"parking_id": 2, "active_vehicles": 2}],
+        "total": 3
+    }
@@ -0,0 +1,126 @@
+"""
+Erken çıkışlı OCR kaskadı (OcrCascade) için unit testler
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+from unittest.mock import MagicMock
+
+# Projenin kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model.ocr_cascade import OcrCascade, best_plate, is_turkish_plate_format
+
+@pytest.fixture
+def plate_crop():
+    """Test için renkli plaka kırpıntısı"""
+    return np.full((40, 120, 3), 200, dtype=np.uint8)
+
+
+def ocr_result(text, confidence, left=0):
+    return ([[left, 0], [left + 10, 0], [left + 10, 10], [left, 10]], text, confidence)
+
+
+def test_turkish_plate_format():
+    """Türk plaka formatı doğru tanınmalıdır"""
+    assert is_turkish_plate_format("34ABC123")
+    assert is_turkish_plate_format("06AKP37")
+    assert not is_turkish_plate_format("99ABC123")  # Geçersiz il kodu
+    assert not is_turkish_plate_format("ABC1234")
+
+
+def test_best_plate_joins_fragments_left_to_right():
+    """Parçalara bölünmüş plaka soldan sağa birleştirilmelidir"""
+    texts = [("123", 0.8, 50), ("34", 0.9, 0), ("ABC", 0.7, 20)]
+    assert best_plate(texts)[0] == "34ABC123"
+
+
+def test_cascade_stops_at_first_confident_plate(plate_crop):
+    """Güven eşiğini geçen ilk varyanttan sonra OCR çalıştırılmamalıdır"""
+    reader = MagicMock()
+    reader.readtext.return_value = [ocr_result("34 ABC 123", 0.9)]
+    cascade = OcrCascade(variants=["gray", "thresh_neg", "thresh_pos"], early_exit_confidence=0.6, adaptive=False)
+
+    text, score = cascade.read(reader, plate_crop)
+
+    assert text == "34ABC123"
+    assert score == pytest.approx(0.9)
+    assert reader.readtext.call_count == 1
+    assert cascade.stats()["variants"]["gray"]["hits"] == 1
+    assert cascade.stats()["variants"]["thresh_neg"]["attempts"] == 0
+
+
+def test_cascade_runs_all_variants_below_threshold(plate_crop):
+    """Eşik altındaki sonuçlarda tüm varyantlar denenmeli ve en iyi aday döndürülmelidir"""
+    reader = MagicMock()
+    reader.readtext.side_effect = [
+        [ocr_result("34ABC123", 0.4)],
+        [ocr_result("34ABC128", 0.5)],
+    ]
+    cascade = OcrCascade(variants=["gray", "thresh_neg"], early_exit_confidence=0.9, adaptive=False)
+
+    text, score = cascade.read(reader, plate_crop)
+
+    assert reader.readtext.call_count == 2
+    assert text == "34ABC128"
+    assert score == pytest.approx(0.5)
+
+
+def test_legacy_reader_only_when_nothing_read(plate_crop):
+    """Eski okuyucu yalnızca hiçbir varyant metin üretmediğinde çağrılmalıdır"""
+    reader = MagicMock()
+    reader.readtext.return_value = []
+    legacy_reader = MagicMock(return_value=("AB12CDE", 0.7))
+    cascade = OcrCascade(variants=["gray"], adaptive=False)
+
+    assert cascade.read(reader, plate_crop, legacy_reader=legacy_reader) == ("AB12CDE", 0.7)
+    legacy_reader.assert_called_once()
+
+
+def test_adaptive_order_prefers_historical_hits():
+    """Uyarlamalı modda isabet oranı yüksek varyant öne alınmalıdır"""
+    cascade = OcrCascade(variants=["gray", "thresh_neg", "adaptive"], adaptive=True)
+    for _ in range(5):
+        cascade.record("gray", False, 0.01)
+        cascade.record("adaptive", True, 0.01)
+
+    assert cascade.order()[0] == "adaptive"
+    assert cascade.order()[-1] == "gray"
+
+
+def test_read_batch_uses_one_call_per_stage():
+    """Toplu okumada her kaskad aşaması tüm kırpıntılar için tek OCR çağrısı yapmalıdır"""
+    reader = MagicMock()
+    reader.readtext_batched.return_value = [
+        [ocr_result("34ABC123", 0.9)], [ocr_result("??", 0.4)], [ocr_result("06AKP37", 0.8)]
+    ]
+    reader.readtext.return_value = [ocr_result("35XY42", 0.7)]
+    crops = [np.full((40, 120, 3), 200, dtype=np.uint8),
+             np.full((30, 100, 3), 200, dtype=np.uint8),
+             np.full((40, 110, 3), 200, dtype=np.uint8)]
+    cascade = OcrCascade(variants=["gray", "thresh_neg"], early_exit_confidence=0.6, adaptive=False)
+
+    results = cascade.read_batch(reader, crops)
+
+    assert [text for text, _ in results] == ["34ABC123", "35XY42", "06AKP37"]
+    assert reader.readtext_batched.call_count == 1
+    # Farklı boyutlu kırpıntılar ortak boyuta genişletilmelidir
+    first_batch = reader.readtext_batched.call_args[0][0]
+    assert {img.shape for img in first_batch} == {(40, 120)}
+    # Yalnızca okunamayan kırpıntı ikinci aşamaya geçmelidir (tek görüntü: readtext)
+    assert reader.readtext.call_count == 1
+    assert reader.readtext.call_args[0][0].shape == (30, 100)
+
+
+def test_read_batch_without_batched_api(plate_crop):
+    """Okuyucu toplu API'yi desteklemiyorsa readtext ile tek tek okunmalıdır"""
+    reader = MagicMock(spec=["readtext"])
+    reader.readtext.return_value = [ocr_result("34ABC123", 0.9)]
+    cascade = OcrCascade(variants=["gray"], adaptive=False)
+
+    results = cascade.read_batch(reader, [plate_crop, plate_crop])
+
+    assert results == [("34ABC123", pytest.approx(0.9))] * 2
+    assert reader.readtext.call_count == 2
@@ -0,0 +1,90 @@
+"""
+Otopark ücret önbelleği (TTL + stale-while-revalidate + toplu ön yükleme) testleri
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.parking_rates import ParkingRateCache
+from app import crud
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _response(payload, status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    return response
+
+
+@pytest.fixture
+def cache():
+    cache = ParkingRateCache(base_url="http://parking:8081", ttl_seconds=60, stale_seconds=600, timeout=1.5,
+                             clock=FakeClock())
+    cache.session.get = MagicMock(return_value=_response({"id": 1, "rate": "12.5"}))
+    # Arka plan yenilemesini testte senkron çalıştır
+    cache._refresh_in_background = MagicMock(side_effect=cache._refresh)
+    return cache
+
+
+def test_rate_is_fetched_once_with_timeout(cache):
+    assert cache.get_rate(1) == 12.5
+    assert cache.get_rate(1) == 12.5
+    cache.session.get.assert_called_once_with("http://parking:8081/api/parkings/1", timeout=1.5)
+
+
+def test_stale_rate_is_served_while_service_is_down(cache):
+    cache.get_rate(1)
+    cache._clock.now = 120  # TTL doldu, stale penceresi içinde
+    cache.session.get.side_effect = requests.exceptions.ConnectionError("Bağlantı hatası")
+
+    assert cache.get_rate(1) == 12.5
+    cache._refresh_in_background.assert_called_once_with(1)
+
+    # Stale penceresi de dolduysa ücret alınamaz
+    cache._clock.now = 60 + 600 + 1
+    assert cache.get_rate(1) is None
+
+
+def test_stale_rate_is_refreshed_in_background(cache):
+    cache.get_rate(1)
+    cache._clock.now = 120
+    cache.session.get.return_value = _response({"id": 1, "rate": 20})
+
+    assert cache.get_rate(1) == 12.5  # Eski ücret hemen döner
+    assert cache.get_rate(1) == 20.0  # Yenilenmiş ücret
+
+
+def test_preload_fills_all_parkings_with_one_request(cache):
+    cache.session.get.return_value = _response([
+        {"id": 1, "rate": 10}, {"id": 2, "rate": "15.0"}, {"id": 3, "rate": None},
+    ])
+    assert cache.preload() == 2
+    cache.session.get.reset_mock()
+
+    assert cache.get_rate(1) == 10.0
+    assert cache.get_rate(2) == 15.0
+    cache.session.get.assert_not_called()
+
+
+def test_exit_fee_uses_cached_rate_without_round_trip(cache, monkeypatch):
+    monkeypatch.setattr(crud, "rate_cache", cache)
+    cache.set_rate(7, 10.0)
+    entry_time = datetime(2023, 1, 1, 10, 0, 0)
+
+    assert crud.calculate_parking_fee(entry_time, entry_time + timedelta(hours=2), 7) == 2000
+    cache.session.get.assert_not_called()
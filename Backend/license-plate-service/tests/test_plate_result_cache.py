@@ -0,0 +1,154 @@
+"""
+Tanıma sonucu önbelleği (algısal hash + plaka kırpıntısı doğrulaması + LRU + TTL) testleri
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model.result_cache import RecognitionResultCache, dhash, hamming_distance
+
+PLATE_BOX = [260, 380, 420, 420]
+RESULT = {"license_plates": ["34ABC123"],
+          "results": {0: {"license_plate": {"text": "34ABC123", "bbox": PLATE_BOX}}}}
+
+
+def _frame(seed: int = 0, noise: int = 0, plate: str = "34ABC123") -> bytes:
+    """Bariyer önündeki aracı taklit eden JPEG kare; noise > 0 ise sensör gürültüsü eklenir"""
+    rng = np.random.default_rng(seed)
+    frame = np.full((480, 640, 3), 90, dtype=np.uint8)
+    for _ in range(6):
+        x, y = rng.integers(0, 560), rng.integers(0, 300)
+        cv2.rectangle(frame, (int(x), int(y)), (int(x) + 80, int(y) + 60), tuple(int(c) for c in rng.integers(0, 255, 3)), -1)
+    x1, y1, x2, y2 = PLATE_BOX
+    cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 255, 255), -1)
+    cv2.putText(frame, plate, (x1 + 6, y2 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+    if noise:
+        jitter = np.random.default_rng(seed + 100).integers(-noise, noise + 1, frame.shape)
+        frame = np.clip(frame.astype(int) + jitter, 0, 255).astype(np.uint8)
+    return cv2.imencode(".jpg", frame)[1].tobytes()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(**kwargs) -> RecognitionResultCache:
+    options = dict(max_entries=8, ttl_seconds=5, max_distance=4, enabled=True)
+    options.update(kwargs)
+    return RecognitionResultCache(**options)
+
+
+def test_cache_is_disabled_by_default():
+    assert RecognitionResultCache().enabled is False
+    assert RecognitionResultCache().key_for(_frame()) is None
+
+
+def test_near_duplicate_frame_hits_cache():
+    cache = _cache()
+    original = _frame(seed=1)
+    resent = _frame(seed=1, noise=6)
+    other = _frame(seed=2)
+
+    assert hamming_distance(dhash(original), dhash(resent)) <= 4
+
+    cache.put(cache.key_for(original, parking_id=1), RESULT, original)
+    assert cache.get(cache.key_for(resent, parking_id=1), resent) == RESULT
+    assert cache.get(cache.key_for(other, parking_id=1), other) is None
+    # Aynı kare farklı otoparktan gelirse önbellek kullanılmaz
+    assert cache.get(cache.key_for(original, parking_id=2), original) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_different_plates_in_same_scene_do_not_hit():
+    cache = _cache()
+    first = _frame(seed=1, plate="34ABC123")
+    next_car = _frame(seed=1, plate="06ABC123")
+
+    # Arka plan aynı olduğundan kare hash'i plakayı ayırt edemez
+    assert hamming_distance(dhash(first), dhash(next_car)) <= cache.max_distance
+
+    cache.put(cache.key_for(first, parking_id=1), RESULT, first)
+    assert cache.get(cache.key_for(next_car, parking_id=1), next_car) is None
+    # Plakası değişen kayıt atılır; aynı araç yeniden gelse de tekrar tanınır
+    assert cache.get(cache.key_for(first, parking_id=1), first) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_scope_includes_gate_and_endpoint():
+    cache = _cache()
+    frame = _frame(seed=1)
+    cache.put(cache.key_for(frame, parking_id=1, gate="entry", endpoint="entry"), RESULT, frame)
+
+    assert cache.get(cache.key_for(frame, parking_id=1, gate="exit", endpoint="exit"), frame) is None
+    assert cache.get(cache.key_for(frame, parking_id=1, gate="entry", endpoint="exit"), frame) is None
+    assert cache.get(cache.key_for(frame, parking_id=1, gate="entry", endpoint="entry"), frame) == RESULT
+
+
+def test_entries_expire_and_are_evicted_lru():
+    clock = FakeClock()
+    cache = _cache(max_entries=2, max_distance=0, clock=clock)
+    frames = [_frame(seed=i) for i in range(3)]
+    keys = [cache.key_for(frame) for frame in frames]
+
+    cache.put(keys[0], RESULT, frames[0])
+    cache.put(keys[1], RESULT, frames[1])
+    assert cache.get(keys[0], frames[0]) is not None  # keys[0] en son kullanılan olur
+    cache.put(keys[2], RESULT, frames[2])  # en eski kullanılan keys[1] çıkarılır
+    assert cache.get(keys[1], frames[1]) is None
+    assert cache.get(keys[0], frames[0]) is not None
+
+    clock.now = 6
+    assert cache.get(keys[0], frames[0]) is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_cached_result_is_a_copy_and_unverifiable_results_are_not_cached():
+    cache = _cache(max_distance=0)
+    frame = _frame(seed=3)
+    key = cache.key_for(frame)
+    cache.put(key, RESULT, frame)
+    cache.get(key, frame)["license_plates"].append("06XYZ99")
+    assert cache.get(key, frame) == RESULT
+
+    other = _frame(seed=4)
+    error_key = cache.key_for(other)
+    cache.put(error_key, {"error": "Model yüklenemedi", "license_plates": []}, other)
+    assert cache.get(error_key, other) is None
+    # Plaka bulunamayan sonuç doğrulanamaz; sonraki araca "plaka yok" dönmemeli
+    cache.put(error_key, {"license_plates": [], "results": {}}, other)
+    assert cache.get(error_key, other) is None
+
+
+@pytest.mark.asyncio
+async def test_recognize_plate_skips_inference_for_repeated_frame(monkeypatch):
+    import app.main as main_module
+
+    monkeypatch.setattr(main_module, "MODEL_AVAILABLE", True)
+    monkeypatch.setattr(main_module, "recognition_cache", _cache())
+    process = MagicMock(return_value=RESULT)
+    monkeypatch.setattr(main_module, "process_image_for_plate_recognition", process)
+
+    first = await main_module.recognize_plate(_frame(seed=5), endpoint="exit", parking_id=1, gate="exit")
+    second = await main_module.recognize_plate(_frame(seed=5, noise=4), endpoint="exit", parking_id=1, gate="exit")
+    assert first == second == RESULT
+    assert process.call_count == 1
+
+    # Aynı sahnede farklı plaka yeniden tanınır
+    await main_module.recognize_plate(_frame(seed=5, plate="34XYZ987"), endpoint="exit", parking_id=1, gate="exit")
+    assert process.call_count == 2
+
+    # Debug kaydı istenen kareler önbellekten dönmez
+    await main_module.recognize_plate(_frame(seed=5), save_debug=True, endpoint="exit", parking_id=1, gate="exit")
+    assert process.call_count == 3
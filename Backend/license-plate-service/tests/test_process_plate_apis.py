@@ -123,23 +123,14 @@ class TestProcessPlateAPIs:
     @pytest.fixture
     def mock_vehicle_entry(self):
         """Araç girişi işlemlerini mocklar"""
-        # Bu fixture ile crud modülündeki get_vehicle_by_license_plate ve create_vehicle fonksiyonlarını mockla
-        with patch("app.main.get_vehicle_by_license_plate") as mock_get_vehicle, \
-             patch("app.main.create_vehicle") as mock_create_vehicle, \
-             patch("app.main.get_active_parking_record_by_vehicle") as mock_get_record, \
-             patch("app.main.create_parking_record") as mock_create_record:
-            
-            # Araç bulunamadı
-            mock_get_vehicle.return_value = None
-            
+        # Araç upsert'i ve park kaydı oluşturma tek bir crud çağrısında (register_entry) yapılır
+        with patch("app.main.register_entry") as mock_register_entry:
             # Mock araç
             mock_vehicle = MagicMock()
             mock_vehicle.id = 1
             mock_vehicle.license_plate = TEST_PLATE
-            mock_create_vehicle.return_value = mock_vehicle
-            
-            # Aktif park kaydı yok
-            mock_get_record.return_value = None
+            mock_vehicle.created_at = datetime.now()
+            mock_vehicle.updated_at = None
             
             # Mock park kaydı
             mock_record = MagicMock()
@@ -147,9 +138,11 @@ class TestProcessPlateAPIs:
             mock_record.vehicle_id = 1
             mock_record.entry_time = datetime.now()
             mock_record.is_active = True
-            mock_create_record.return_value = mock_record
             
-            yield (mock_get_vehicle, mock_create_vehicle, mock_get_record, mock_create_record)
+            # Yeni park kaydı oluşturuldu
+            mock_register_entry.return_value = (mock_vehicle, mock_record, True)
+            
+            yield mock_register_entry
     
     @pytest.fixture
     def mock_vehicle_exit(self):
@@ -188,18 +181,18 @@ class TestProcessPlateAPIs:
     @pytest.fixture
     def mock_websocket_manager(self):
         """WebSocket yöneticisini mocklar"""
-        with patch("app.main.run_async") as mock_run_async, \
+        with patch("app.main.event_bus.publish") as mock_publish, \
              patch("app.main.manager.send_parking_record_update") as mock_send_update:
-            # Asenkron run_async fonksiyonu
-            mock_run_async.return_value = None
+            # Bildirim kuyruğu
+            mock_publish.return_value = True
             # WebSocket gönderimi
             mock_send_update.return_value = None
             
-            yield (mock_run_async, mock_send_update)
+            yield (mock_publish, mock_send_update)
     
     def test_process_plate_entry_success(self, client, test_image, mock_process_image, mock_vehicle_entry, mock_websocket_manager):
         """Başarılı araç girişi plaka işleme testi"""
-        mock_get_vehicle, mock_create_vehicle, mock_get_record, mock_create_record = mock_vehicle_entry
+        mock_register_entry = mock_vehicle_entry
         
         # Çoklu parça dosya yükleme için hazırlanmış istek
         files = {"file": ("test.png", test_image, "image/png")}
@@ -219,10 +212,8 @@ class TestProcessPlateAPIs:
         
         # Mock çağrılarının yapıldığını kontrol et - spesifik parametreleri kontrol etmiyoruz
         mock_process_image.assert_called_once()
-        assert mock_get_vehicle.call_count > 0
-        assert mock_create_vehicle.call_count > 0
-        assert mock_get_record.call_count > 0
-        assert mock_create_record.call_count > 0
+        mock_register_entry.assert_called_once()
+        assert mock_register_entry.call_args[0][1:] == (TEST_PLATE, 1)
     
     def test_process_plate_entry_no_plate_found(self, client, test_image, mock_process_image):
         """Plaka bulunamadığında girişi plaka işleme testi"""
@@ -289,15 +280,11 @@ class TestProcessPlateAPIs:
         mock_record.entry_time = datetime.now()
         mock_record.is_active = True
         
-        # Mock arama sonuçlarını ayarla
-        with patch("app.main.get_vehicle_by_license_plate") as mock_get_vehicle, \
-             patch("app.main.get_active_parking_record_by_vehicle") as mock_get_record:
-            
-            # Araç bulundu
-            mock_get_vehicle.return_value = mock_vehicle
+        # Mock giriş sonucunu ayarla
+        with patch("app.main.register_entry") as mock_register_entry:
             
-            # Aktif park kaydı var
-            mock_get_record.return_value = mock_record
+            # Araç bulundu ve aktif park kaydı var (yeni kayıt oluşturulmadı)
+            mock_register_entry.return_value = (mock_vehicle, mock_record, False)
             
             # Çoklu parça dosya yükleme için hazırlanmış istek
             files = {"file": ("test.png", test_image, "image/png")}
@@ -315,8 +302,7 @@ class TestProcessPlateAPIs:
             
             # Mock çağrıları doğru olmalı
             mock_process_image.assert_called_once()
-            assert mock_get_vehicle.call_count > 0
-            assert mock_get_record.call_count > 0
+            mock_register_entry.assert_called_once()
     
     def test_process_plate_exit_success(self, client, test_image, mock_process_image, mock_vehicle_exit, mock_websocket_manager):
         """Başarılı araç çıkışı plaka işleme testi"""
@@ -0,0 +1,77 @@
+"""
+Plaka tanıma süreç havuzu ve 429 geri basıncı için unit testler
+"""
+
+import pytest
+import sys
+import os
+from multiprocessing import shared_memory
+from unittest.mock import patch, MagicMock, AsyncMock
+from fastapi.testclient import TestClient
+
+# Projenin kök dizinini sys.path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.model import worker_pool
+from app.model.scheduler import RecognitionBusyError
+
+
+def test_worker_reads_image_from_shared_memory():
+    """Worker görüntü baytlarını paylaşımlı bellekten kopyasız okumalıdır"""
+    data = b"\xff\xd8jpeg-bytes\xff\xd9"
+    segment = shared_memory.SharedMemory(create=True, size=len(data))
+    segment.buf[:len(data)] = data
+    seen = []
+
+    def fake_process(images, save_debug=None):
+        seen.extend(image if isinstance(image, str) else bytes(image) for image in images)
+        return [{"results": {}, "license_plates": []} for _ in images]
+
+    try:
+        with patch("app.model.process_images_for_plate_recognition", fake_process):
+            results = worker_pool._process_shared_batch([(segment.name, len(data)), "frame.jpg"],
+                                                          {"save_debug": [False, False]})
+    finally:
+        segment.close()
+        segment.unlink()
+
+    assert seen == [data, "frame.jpg"]
+    assert len(results) == 2
+
+
+@pytest.mark.asyncio
+async def test_run_batch_unlinks_shared_memory():
+    """Toplu iş bittikten sonra paylaşımlı bellek blokları silinmelidir"""
+    pool = worker_pool.RecognitionWorkerPool(workers=1)
+    names = []
+
+    async def fake_run_in_executor(executor, func, payload, options):
+        names.extend(name for name, _ in payload)
+        return [{"results": {}, "license_plates": []} for _ in payload]
+
+    pool._executor = MagicMock()
+    with patch.object(worker_pool.asyncio, "get_running_loop") as mock_loop:
+        mock_loop.return_value.run_in_executor = fake_run_in_executor
+        await pool.run_batch([b"image-1", b"image-2"], save_debug=[False, False])
+
+    assert len(names) == 2
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_busy_scheduler_returns_429_with_retry_after(sample_image_bytes):
+    """Tanıma kuyruğu doluyken endpoint Retry-After başlıklı 429 döndürmelidir"""
+    from app.main import app
+
+    busy_scheduler = MagicMock(running=True)
+    busy_scheduler.submit = AsyncMock(side_effect=RecognitionBusyError(retry_after=3))
+    with patch("app.main.inference_scheduler", busy_scheduler):
+        client = TestClient(app)
+        response = client.post(
+            "/process-plate-entry",
+            files={"file": ("plate.jpg", sample_image_bytes, "image/jpeg")},
+        )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
@@ -0,0 +1,222 @@
+"""
+Toplu giriş/çıkış olayı aktarımı (/vehicle/events:batch) testleri
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import crud
+from app.models import ParkingRecord, Vehicle
+from app.parking_rates import rate_cache
+from app.schemas import VehicleEvent
+
+BASE_TIME = datetime(2024, 5, 1, 8, 0, 0)
+
+
+def _event(event_type, plate, minutes, parking_id=1, **kwargs):
+    return VehicleEvent(type=event_type, license_plate=plate, parking_id=parking_id,
+                        timestamp=BASE_TIME + timedelta(minutes=minutes), **kwargs)
+
+
+def test_events_are_applied_in_order_with_client_timestamps(test_db):
+    rate_cache.set_rate(1, 10.0)
+    events = [
+        _event("entry", "34BAT001", 0, event_id="g1-1"),
+        _event("entry", "34BAT001", 1),
+        _event("exit", "34BAT001", 150),
+        _event("exit", "34BAT001", 151),
+        _event("entry", "34BAT001", 200),
+        _event("exit", "34BAT001", 190),
+    ]
+
+    results = crud.apply_vehicle_events(test_db, events)
+
+    assert [r["status"] for r in results] == ["entered", "already_parked", "exited", "no_active_record",
+                                              "entered", "invalid_timestamp"]
+    assert [r["index"] for r in results] == list(range(6))
+    assert results[0]["event_id"] == "g1-1"
+    assert results[1]["parking_record_id"] == results[0]["parking_record_id"]
+    # Kayıt aynı listede sonradan kapansa da giriş sonuçları o anki durumu gösterir
+    for result in results[:2]:
+        assert "exit_time" not in result and "duration_hours" not in result and "parking_fee" not in result
+    assert results[5]["entry_time"] == (BASE_TIME + timedelta(minutes=200)).isoformat()
+    assert "exit_time" not in results[5]
+    assert results[2]["duration_hours"] == 2.5
+    assert results[2]["parking_fee"] == 25.0
+
+    records = test_db.query(ParkingRecord).order_by(ParkingRecord.id).all()
+    assert [(r.is_active, r.parking_fee) for r in records] == [(False, 2500), (True, None)]
+    assert records[0].entry_time == BASE_TIME
+    assert records[0].exit_time == BASE_TIME + timedelta(minutes=150)
+    assert records[1].entry_time == BASE_TIME + timedelta(minutes=200)
+
+
+def test_existing_active_records_are_closed_and_statement_count_is_constant(test_db):
+    rate_cache.set_rate(1, 10.0)
+    crud.register_entry(test_db, "34OLD000", parking_id=1)
+    existing = test_db.query(ParkingRecord).one()
+    existing.entry_time = BASE_TIME - timedelta(hours=1)
+    test_db.commit()
+
+    events = [_event("exit", "34OLD000", 0)]
+    for i in range(300):
+        plate = f"34BAT{i:03d}"
+        events += [_event("entry", plate, i), _event("exit", plate, i + 60)]
+    events += [_event("entry", f"34NEW{i:03d}", i) for i in range(300)]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(test_db.get_bind(), "before_cursor_execute", listener)
+    try:
+        results = crud.apply_vehicle_events(test_db, events)
+    finally:
+        event.remove(test_db.get_bind(), "before_cursor_execute", listener)
+
+    assert all(r["success"] for r in results)
+    assert results[0]["parking_record_id"] == existing.id
+    assert results[0]["parking_fee"] == 10.0
+    # Araç upsert'i + araç ID'leri + aktif kayıtlar + toplu INSERT + toplu UPDATE; olay sayısından bağımsız
+    assert len(statements) <= 6
+    assert test_db.query(Vehicle).count() == 601
+    assert test_db.query(ParkingRecord).filter(ParkingRecord.is_active == True).count() == 300
+    assert test_db.query(ParkingRecord).filter(ParkingRecord.parking_fee == 1000).count() == 301
+
+
+def test_missing_rate_rejects_only_the_exit(test_db):
+    with patch.object(rate_cache, "get_rate", return_value=None):
+        results = crud.apply_vehicle_events(test_db, [_event("entry", "34BAT001", 0),
+                                                      _event("exit", "34BAT001", 30),
+                                                      _event("entry", "", 31)])
+
+    assert [r["status"] for r in results] == ["entered", "fee_unavailable", "invalid"]
+    assert test_db.query(ParkingRecord).one().is_active is True
+
+
+def test_given_rates_are_used_without_calling_the_parking_service(test_db):
+    events = [_event("entry", "34BAT001", 0), _event("entry", "34BAT002", 0, parking_id=2),
+              _event("exit", "34BAT001", 60), _event("exit", "34BAT002", 60, parking_id=2)]
+    with patch.object(rate_cache, "get_rate") as get_rate:
+        results = crud.apply_vehicle_events(test_db, events, rates={1: 10.0, 2: None})
+
+    get_rate.assert_not_called()
+    assert [r["status"] for r in results] == ["entered", "entered", "exited", "fee_unavailable"]
+    assert results[2]["parking_fee"] == 10.0
+
+
+@pytest.mark.asyncio
+async def test_async_path_resolves_rates_outside_the_session_once_per_parking(test_db):
+    from app import async_crud
+
+    events = [_event("entry", f"34BAT{i:03d}", 0) for i in range(3)]
+    events += [_event("exit", f"34BAT{i:03d}", 60) for i in range(3)]
+    with patch.object(rate_cache, "get_rate", return_value=None) as get_rate:
+        results = await async_crud.apply_vehicle_events(test_db, events)
+
+    get_rate.assert_called_once_with(1)
+    assert [r["status"] for r in results[3:]] == ["fee_unavailable"] * 3
+
+
+def test_async_session_computes_fees_off_the_event_loop(tmp_path):
+    pytest.importorskip("aiosqlite")
+    import asyncio
+    import threading
+    from app import async_crud, database
+    from app.models import Base
+
+    url = f"sqlite:///{tmp_path / 'batch.db'}"
+    Base.metadata.create_all(database.create_db_engine(url))
+    async_engine = database.create_async_db_engine(url)
+    fee_threads = set()
+    original_fee = crud.calculate_parking_fee
+
+    def tracking_fee(*args, **kwargs):
+        fee_threads.add(threading.get_ident())
+        return original_fee(*args, **kwargs)
+
+    events = [_event("entry", f"34BAT{i:03d}", 0) for i in range(20)]
+    events += [_event("exit", f"34BAT{i:03d}", 90) for i in range(20)]
+
+    async def run():
+        session_factory = database.async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+        try:
+            async with session_factory() as db:
+                return threading.get_ident(), await async_crud.apply_vehicle_events(db, events, rates={1: 10.0})
+        finally:
+            await async_engine.dispose()
+
+    with patch.object(crud, "calculate_parking_fee", side_effect=tracking_fee):
+        loop_thread, results = asyncio.run(run())
+
+    # Ücret hesabı run_sync (event loop thread'i) içinde değil, thread havuzunda yapılır
+    assert len(fee_threads) >= 1 and loop_thread not in fee_threads
+    assert [r["status"] for r in results] == ["entered"] * 20 + ["exited"] * 20
+    assert results[20]["parking_record_id"] == results[0]["parking_record_id"]
+    assert results[20]["parking_fee"] == 15.0
+
+
+@pytest.fixture
+def client(test_db):
+    from app.main import app, get_async_db
+
+    def override():
+        yield test_db
+
+    app.dependency_overrides[get_async_db] = override
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_async_db, None)
+
+
+def _payload(events):
+    return {"events": [dict(e.dict(), timestamp=e.timestamp.isoformat()) for e in events]}
+
+
+def test_batch_endpoint_returns_per_event_results_and_one_summary_per_parking(client):
+    rate_cache.set_rate(1, 10.0)
+    rate_cache.set_rate(2, 20.0)
+    events = [_event("entry", "34BAT001", 0), _event("entry", "34BAT002", 5, parking_id=2),
+              _event("exit", "34BAT001", 60), _event("exit", "34BAT002", 65, parking_id=2),
+              _event("exit", "34BAT003", 70, parking_id=2)]
+
+    with patch("app.main.event_bus.publish") as mock_publish, \
+         patch("app.main.VEHICLE_EVENT_BATCH_CHUNK_SIZE", 2):
+        response = client.post("/vehicle/events:batch", json=_payload(events))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["success"], body["total"], body["applied"]) == (True, 5, 4)
+    assert [r["status"] for r in body["results"]] == ["entered", "entered", "exited", "exited", "no_active_record"]
+    assert [r["index"] for r in body["results"]] == list(range(5))
+
+    summaries = {call[0][1]["id"]: call[0][1] for call in mock_publish.call_args_list}
+    assert mock_publish.call_count == 2
+    assert all(call[0][0] == "parking_update" for call in mock_publish.call_args_list)
+    assert (summaries[1]["entries"], summaries[1]["exits"], summaries[1]["total_fee"]) == (1, 1, 10.0)
+    assert (summaries[2]["entries"], summaries[2]["exits"], summaries[2]["rejected"]) == (1, 1, 1)
+
+
+def test_failed_chunk_is_reported_and_later_chunks_are_applied(client):
+    original = crud.apply_vehicle_events
+
+    def failing_first_chunk(db, events, start_index=0, rates=None):
+        if start_index == 0:
+            raise RuntimeError("veritabanı hatası")
+        return original(db, events, start_index, rates)
+
+    events = [_event("entry", f"34BAT{i:03d}", i) for i in range(4)]
+    with patch("app.main.event_bus.publish"), \
+         patch("app.main.VEHICLE_EVENT_BATCH_CHUNK_SIZE", 2), \
+         patch("app.crud.apply_vehicle_events", side_effect=failing_first_chunk):
+        body = client.post("/vehicle/events:batch", json=_payload(events)).json()
+
+    assert body["success"] is False
+    assert [r["status"] for r in body["results"]] == ["failed", "failed", "entered", "entered"]
@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import Mock, MagicMock, patch, AsyncMock
 import json
 from datetime import datetime
 import sys
@@ -10,7 +10,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # WebSocket modülünü içe aktar
-from app.websocket import ConnectionManager, RoomType
+from app.websocket import ConnectionManager, RoomType, encode_message
 
 class TestConnectionManager:
     """ConnectionManager sınıfı için test suite"""
@@ -149,94 +149,71 @@ class TestConnectionManager:
         # Öncelikle manager'in room_connections sözlüğünü temizle
         manager.room_connections = {RoomType.ALL: set()}
         
-        # İstemci bilgilerini de temizle
-        manager.client_info = {}
-        
-        # active_connections global değişkenini patch'le
-        with patch('app.websocket.active_connections', {}) as mock_active_connections:
-            # Farklı odalara bağlantılar ekle
-            manager.add_connection("admin1", mock_websocket, RoomType.ADMIN)
-            manager.add_connection("admin2", mock_websocket, RoomType.ADMIN)
-            manager.add_connection("park1", mock_websocket, RoomType.PARKING, "park1")
+        # Farklı odalara bağlantılar ekle
+        manager.add_connection("admin1", mock_websocket, RoomType.ADMIN)
+        manager.add_connection("admin2", mock_websocket, RoomType.ADMIN)
+        manager.add_connection("park1", mock_websocket, RoomType.PARKING, "park1")
             
-            # Bağlantıların sayısını doğrula
-            assert len(mock_active_connections) == 3
+        # Bağlantıların sayısını doğrula
+        assert len(manager.senders) == 3
             
-            # Bağlantı durumunu al
-            status = manager.get_connection_status()
+        # Bağlantı durumunu al
+        status = manager.get_connection_status()
             
-            # Doğru bağlantı sayıları olmalı
-            assert status["total_connections"] == 3
-            assert status["room_stats"][RoomType.ADMIN] == 2
-            assert status["room_stats"][f"{RoomType.PARKING}:park1"] == 1
-            assert status["room_stats"][RoomType.ALL] == 3
+        # Doğru bağlantı sayıları olmalı
+        assert status["total_connections"] == 3
+        assert status["room_stats"][RoomType.ADMIN] == 2
+        assert status["room_stats"][f"{RoomType.PARKING}:park1"] == 1
+        assert status["room_stats"][RoomType.ALL] == 3
             
-            # client_info bilgisi de olmalı
-            assert len(status["clients"]) == 3
+        # client_info bilgisi de olmalı
+        assert len(status["clients"]) == 3
     
     @pytest.mark.asyncio
-    async def test_send_vehicle_update(self, manager, mock_websocket):
-        """send_vehicle_update mesajı doğru odalara göndermelidir"""
+    async def test_send_vehicle_update(self, manager):
+        """send_vehicle_update mesajı araç, admin ve tüm odalardaki her istemciye bir kez göndermelidir"""
         # Öncelikle manager'in room_connections sözlüğünü temizle
         manager.room_connections = {RoomType.ALL: set()}
         
-        # İstemci bilgilerini de temizle
-        manager.client_info = {}
-        
-        # active_connections global değişkenini patch'le
-        with patch('app.websocket.active_connections', {}), \
-             patch.object(manager, 'broadcast', new_callable=AsyncMock) as mock_broadcast:
-            
-            # Farklı odalara bağlantılar ekle
-            manager.add_connection("admin1", mock_websocket, RoomType.ADMIN)
-            manager.add_connection("vehicle1", mock_websocket, RoomType.VEHICLE, "123")
-            manager.add_connection("all1", mock_websocket, RoomType.ALL)
-            
-            # Araç güncellemesi gönder
-            vehicle_data = {
-                "id": 123,
-                "license_plate": "34ABC123",
-                "status": "entry",
-                "message": "Araç girişi"
-            }
-            
-            await manager.send_vehicle_update(vehicle_data)
-            
-            # broadcast 3 kez çağrılmış olmalı
-            assert mock_broadcast.call_count == 3
-            
-            # İlk çağrı vehicle odasına
-            first_call_args = mock_broadcast.call_args_list[0][0]
-            assert len(first_call_args) >= 3  # En az 3 pozisyonel argüman olmalı
-            assert first_call_args[1] == RoomType.VEHICLE  # İkinci argüman room_type
-            assert first_call_args[2] == "123"  # Üçüncü argüman room_id
-            
-            # İkinci çağrı admin odasına
-            second_call_args = mock_broadcast.call_args_list[1][0]
-            assert len(second_call_args) >= 2  # En az 2 pozisyonel argüman olmalı
-            assert second_call_args[1] == RoomType.ADMIN  # İkinci argüman room_type
-            
-            # Üçüncü çağrı tüm bağlantılara (varsayılan olarak ALL)
-            third_call_args = mock_broadcast.call_args_list[2][0]
-            assert len(third_call_args) >= 1  # En az 1 pozisyonel argüman olmalı
+        websockets = {client_id: MagicMock(send_text=AsyncMock()) for client_id in ("admin1", "vehicle1", "all1")}
+            
+        # Farklı odalara bağlantılar ekle
+        manager.add_connection("admin1", websockets["admin1"], RoomType.ADMIN)
+        manager.add_connection("vehicle1", websockets["vehicle1"], RoomType.VEHICLE, "123")
+        manager.add_connection("all1", websockets["all1"], RoomType.ALL)
+            
+        # Araç güncellemesi gönder
+        vehicle_data = {
+            "id": 123,
+            "license_plate": "34ABC123",
+            "status": "entry",
+            "message": "Araç girişi"
+        }
+            
+        assert await manager.send_vehicle_update(vehicle_data) is True
+        await manager.flush()
+            
+        # Her istemci (birden fazla odada olsa da) mesajı bir kez almalı
+        for websocket in websockets.values():
+            websocket.send_text.assert_awaited_once()
+            sent_message = json.loads(websocket.send_text.call_args[0][0])
+            assert sent_message["type"] == "vehicle_update"
+            assert sent_message["data"] == vehicle_data
+            assert "timestamp" in sent_message
     
     @pytest.mark.asyncio
-    async def test_send_parking_record_update(self, manager, mock_websocket):
-        """send_parking_record_update mesajı doğru odalara göndermelidir"""
+    async def test_send_parking_record_update(self, manager):
+        """send_parking_record_update mesajı bir kez serileştirip her istemciye bir kez göndermelidir"""
         # Öncelikle manager'in room_connections sözlüğünü temizle
         manager.room_connections = {RoomType.ALL: set()}
         
-        # İstemci bilgilerini de temizle
-        manager.client_info = {}
-        
-        # active_connections global değişkenini patch'le
-        with patch('app.websocket.active_connections', {}), \
-             patch.object(manager, 'broadcast', new_callable=AsyncMock) as mock_broadcast:
+        with patch('app.websocket.encode_message', wraps=encode_message) as mock_encode:
+            websockets = {client_id: MagicMock(send_text=AsyncMock()) for client_id in ("admin1", "vehicle1", "parking1")}
             
             # Farklı odalara bağlantılar ekle
-            manager.add_connection("admin1", mock_websocket, RoomType.ADMIN)
-            manager.add_connection("vehicle1", mock_websocket, RoomType.VEHICLE, "456")
-            manager.add_connection("parking1", mock_websocket, RoomType.PARKING, "789")
+            manager.add_connection("admin1", websockets["admin1"], RoomType.ADMIN)
+            manager.add_connection("vehicle1", websockets["vehicle1"], RoomType.VEHICLE, "456")
+            manager.add_connection("parking1", websockets["parking1"], RoomType.PARKING, "789")
             
             # Park kaydı güncellemesi gönder
             record_data = {
@@ -250,23 +227,29 @@ class TestConnectionManager:
                 "parking_fee": 20.0
             }
             
-            await manager.send_parking_record_update(record_data)
-            
-            # 4 kez broadcast çağrılmış olmalı (araç odası, otopark odası, admin odası, tüm odalar)
-            assert mock_broadcast.call_count == 4
-            
-            # Çağrıların pozisyonel argümanlarını kontrol et
-            calls = mock_broadcast.call_args_list
-            
-            # İlk çağrı araç odasına
-            assert calls[0][0][1] == RoomType.VEHICLE  # İkinci argüman room_type
-            assert calls[0][0][2] == "456"  # Üçüncü argüman room_id
-            
-            # İkinci çağrı otopark odasına
-            assert calls[1][0][1] == RoomType.PARKING  # İkinci argüman room_type
-            assert calls[1][0][2] == "789"  # Üçüncü argüman room_id
-            
-            # Üçüncü çağrı admin odasına
-            assert calls[2][0][1] == RoomType.ADMIN  # İkinci argüman room_type
+            assert await manager.send_parking_record_update(record_data) is True
+            await manager.flush()
+            
+            # Mesaj bir kez serileştirilmeli ve her istemciye aynı metin bir kez gitmeli
+            assert mock_encode.call_count == 1
+            sent_texts = set()
+            for websocket in websockets.values():
+                websocket.send_text.assert_awaited_once()
+                sent_texts.add(websocket.send_text.call_args[0][0])
+            assert len(sent_texts) == 1
+            assert json.loads(sent_texts.pop())["data"] == record_data
+    
+    @pytest.mark.asyncio
+    async def test_plan_fanout_deduplicates_clients_across_rooms(self, manager, mock_websocket):
+        """plan_fanout birden fazla odadaki istemciyi bir kez döndürmeli ve exclude'a uymalıdır"""
+        manager.room_connections = {RoomType.ALL: set()}
+        
+        manager.add_connection("admin1", mock_websocket, RoomType.ADMIN)
+        manager.add_connection("vehicle1", mock_websocket, RoomType.VEHICLE, "34ABC123")
+        manager.add_connection("parking1", mock_websocket, RoomType.PARKING, "1")
+        manager.add_connection("parking2", mock_websocket, RoomType.PARKING, "2")
             
-            # Dördüncü çağrı tüm bağlantılara (varsayılan olarak ALL) 
\ No newline at end of file
+        rooms = [(RoomType.VEHICLE, "34ABC123"), (RoomType.PARKING, "1"), (RoomType.ADMIN, None)]
+        assert manager.plan_fanout(rooms) == {"admin1", "vehicle1", "parking1"}
+        assert manager.plan_fanout(rooms, exclude=["admin1"]) == {"vehicle1", "parking1"}
+        assert manager.plan_fanout(rooms + [(RoomType.ALL, None)]) == {"admin1", "vehicle1", "parking1", "parking2"}
@@ -0,0 +1,148 @@
+"""
+Çok worker'lı WebSocket backplane'i testleri (Unix soket broker'ı yerel taklit olarak kullanılır)
+"""
+
+import os
+import sys
+import json
+import shutil
+import asyncio
+import tempfile
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.backplane import (InMemoryBackplane, UnixSocketBackplane, UnixSocketBroker, RedisBackplane,
+                           create_backplane, aioredis)
+from app.websocket import ConnectionManager, RoomType
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+@pytest.fixture
+def socket_path():
+    # Unix soket yolları ~100 karakterle sınırlı; kısa bir dizin kullan
+    directory = tempfile.mkdtemp(prefix="lps-", dir="/tmp")
+    yield os.path.join(directory, "ws.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Koşul zamanında sağlanmadı")
+        await asyncio.sleep(0.01)
+
+
+async def _two_workers_exchange(backplane_a, backplane_b):
+    """A'da yayınlanan park kaydı güncellemesi B'nin yerel istemcisine bir kez ulaşmalı"""
+    # Her worker'ın kendi ConnectionManager'ı ve yalnızca kendine bağlı istemcileri vardır
+    manager_a, manager_b = ConnectionManager(), ConnectionManager()
+    dashboard_a, dashboard_b = FakeWebSocket(), FakeWebSocket()
+    manager_a.add_connection("dashboard-a", dashboard_a, RoomType.ADMIN)
+    manager_b.add_connection("dashboard-b", dashboard_b, RoomType.PARKING, "1")
+    await manager_a.attach_backplane(backplane_a)
+    await manager_b.attach_backplane(backplane_b)
+
+    assert await manager_a.send_parking_record_update({"id": 7, "parking_id": 1, "action": "exit"})
+    await _wait_for(lambda: dashboard_a.sent and dashboard_b.sent)
+
+    assert [m["data"]["id"] for m in dashboard_a.sent] == [7]
+    assert [m["data"]["id"] for m in dashboard_b.sent] == [7]
+    assert dashboard_a.sent[0]["timestamp"] == dashboard_b.sent[0]["timestamp"]
+
+    # B'deki admin broadcast'i A'ya iletilir, B'ye geri dönmez
+    await manager_b.broadcast({"type": "info", "message": "duyuru"}, RoomType.ADMIN, fallback_to_admin=False)
+    await _wait_for(lambda: len(dashboard_a.sent) == 2)
+    await asyncio.sleep(0.05)
+    assert dashboard_a.sent[1]["message"] == "duyuru"
+    assert len(dashboard_b.sent) == 1
+
+    await manager_a.detach_backplane()
+    await manager_b.detach_backplane()
+    return backplane_a, backplane_b
+
+
+def test_in_memory_hub_forwards_only_to_other_workers():
+    hub = set()
+    a, b = asyncio.run(_two_workers_exchange(InMemoryBackplane(hub), InMemoryBackplane(hub)))
+
+    assert (a.published, a.received, b.published, b.received) == (1, 1, 1, 1)
+    assert hub == set()
+
+
+def test_unix_socket_broker_relays_between_workers(socket_path):
+    async def run():
+        broker = UnixSocketBroker(socket_path)
+        await broker.start()
+        try:
+            return await _two_workers_exchange(UnixSocketBackplane(socket_path, host_broker=False),
+                                               UnixSocketBackplane(socket_path, host_broker=False))
+        finally:
+            await broker.stop()
+
+    a, b = asyncio.run(run())
+    assert a.received == 1 and b.received == 1
+    assert not os.path.exists(socket_path)
+
+
+def test_first_worker_hosts_broker_when_none_is_running(socket_path):
+    async def run():
+        first, second = UnixSocketBackplane(socket_path), UnixSocketBackplane(socket_path)
+        received = []
+
+        async def handler(envelope):
+            received.append(envelope)
+
+        await first.start(handler)
+        await second.start(handler)
+        assert first.stats()["hosting_broker"] is True
+        assert second.stats()["hosting_broker"] is False
+
+        assert await second.publish({"op": "broadcast", "message": {"type": "info"}})
+        await _wait_for(lambda: received)
+        assert received[0]["origin"] == second.origin
+
+        await second.stop()
+        await first.stop()
+
+    asyncio.run(run())
+
+
+def test_single_process_backplane_does_not_change_local_delivery():
+    async def run():
+        manager = ConnectionManager()
+        dashboard = FakeWebSocket()
+        manager.add_connection("dashboard", dashboard, RoomType.ADMIN)
+        await manager.attach_backplane(create_backplane("memory://"))
+
+        assert await manager.broadcast({"type": "info"}, RoomType.ADMIN) is True
+        assert await manager.broadcast({"type": "info"}, RoomType.VEHICLE, "34ABC123",
+                                       fallback_to_admin=False) is False
+        await manager.flush(timeout=1)
+        assert len(dashboard.sent) == 1
+        assert manager.get_connection_status()["backplane"]["published"] == 0
+        await manager.detach_backplane()
+
+    asyncio.run(run())
+
+
+def test_create_backplane_selects_transport_by_url():
+    assert isinstance(create_backplane("memory://"), InMemoryBackplane)
+    unix = create_backplane("unix:///tmp/license-plate-ws.sock")
+    assert isinstance(unix, UnixSocketBackplane) and unix.path == "/tmp/license-plate-ws.sock"
+    if aioredis is None:
+        with pytest.raises(RuntimeError):
+            create_backplane("redis://redis:6379/0")
+    else:
+        assert isinstance(create_backplane("redis://redis:6379/0"), RedisBackplane)
+    with pytest.raises(ValueError):
+        create_backplane("amqp://rabbitmq")
@@ -0,0 +1,101 @@
+"""
+WebSocket bağlantı indeksi (istemci -> odalar) ve heartbeat süpürücüsü testleri
+"""
+
+import os
+import sys
+import time
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.websocket import ConnectionManager, ClientRecord, RoomType
+
+
+def _websocket():
+    return MagicMock(send_text=AsyncMock(), close=AsyncMock())
+
+
+def test_client_record_is_slotted_and_tracks_joined_rooms():
+    manager = ConnectionManager()
+    manager.add_connection("vehicle1", _websocket(), RoomType.VEHICLE, "34ABC123")
+    manager.add_connection("vehicle1", manager.senders["vehicle1"].websocket, RoomType.PARKING, "1")
+
+    record = manager.clients["vehicle1"]
+    assert isinstance(record, ClientRecord)
+    assert not hasattr(record, "__dict__")
+    assert record.rooms == {"vehicle:34ABC123", "parking:1", RoomType.ALL}
+    assert manager.client_info["vehicle1"]["room_type"] == RoomType.PARKING
+
+
+def test_remove_connection_leaves_other_rooms_and_drops_empty_ones():
+    manager = ConnectionManager()
+    for i in range(10000):
+        manager.add_connection(f"vehicle-{i}", object(), RoomType.VEHICLE, f"PLATE{i}")
+    manager.add_connection("admin1", _websocket(), RoomType.ADMIN)
+    assert len(manager.room_connections) == 10002
+
+    for i in range(10000):
+        manager.remove_connection(f"vehicle-{i}")
+
+    # Plaka odaları boşalınca silinir; admin odası ve ALL korunur
+    assert manager.room_connections == {RoomType.ALL: {"admin1"}, RoomType.ADMIN: {"admin1"}}
+    assert list(manager.clients) == ["admin1"]
+    assert list(manager.senders) == ["admin1"]
+    # Bilinmeyen istemciyi kaldırmak hata vermez
+    manager.remove_connection("vehicle-0")
+
+
+def test_cleanup_evicts_only_clients_silent_past_ping_timeout():
+    async def run():
+        manager = ConnectionManager(ping_timeout=30)
+        silent, chatty = _websocket(), _websocket()
+        manager.add_connection("silent", silent, RoomType.ADMIN)
+        manager.add_connection("chatty", chatty, RoomType.ADMIN)
+        now = time.monotonic()
+        manager.clients["silent"].last_seen = now - 60
+        manager.clients["chatty"].last_seen = now - 60
+        manager.touch("chatty")  # Ping alındı
+
+        assert manager.cleanup_connections(now=now) == 1
+        await asyncio.sleep(0)
+
+        assert manager.get_connections(RoomType.ADMIN) == ["chatty"]
+        silent.close.assert_awaited_once_with(code=1001)
+        chatty.close.assert_not_called()
+        assert manager.evictions == 1
+
+    asyncio.run(run())
+
+
+def test_sweeper_task_evicts_silent_clients_until_stopped():
+    async def run():
+        manager = ConnectionManager(ping_timeout=0.05, sweep_interval=0.02)
+        websocket = _websocket()
+        manager.add_connection("silent", websocket, RoomType.PARKING, "1")
+        await manager.start_sweeper()
+        await asyncio.sleep(0.2)
+        await manager.stop_sweeper()
+
+        assert manager.count_connections() == 0
+        assert "parking:1" not in manager.room_connections
+        websocket.close.assert_awaited_once_with(code=1001)
+
+    asyncio.run(run())
+
+
+def test_ping_timeout_zero_disables_liveness_checks():
+    async def run():
+        manager = ConnectionManager(ping_timeout=0)
+        manager.add_connection("client1", _websocket(), RoomType.ALL)
+        manager.clients["client1"].last_seen = 0
+
+        await manager.start_sweeper()
+        assert manager._sweeper is None
+        assert manager.cleanup_connections() == 0
+        assert manager.count_connections() == 1
+
+    asyncio.run(run())
@@ -0,0 +1,169 @@
+"""
+WebSocket istemci başına giden mesaj kuyrukları ve yavaş istemci çıkarma testleri
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.websocket import ConnectionManager, RoomType
+
+
+class FakeWebSocket:
+    """Gönderimi isteğe bağlı olarak bir olay ayarlanana kadar bekleten WebSocket taklidi"""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.release = asyncio.Event()
+        if not blocked:
+            self.release.set()
+
+    async def send_text(self, text):
+        await self.release.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def _connect(manager, **websockets):
+    for client_id, websocket in websockets.items():
+        manager.add_connection(client_id, websocket, RoomType.ADMIN)
+
+
+async def _settle():
+    # Yazıcı görevlerinin hazır mesajları göndermesine fırsat ver
+    await asyncio.sleep(0.01)
+
+
+def test_slow_client_does_not_delay_fast_clients():
+    async def run():
+        manager = ConnectionManager(send_queue_size=10, send_timeout=0)
+        fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+        _connect(manager, fast=fast, slow=slow)
+
+        started = time.perf_counter()
+        for i in range(3):
+            assert await manager.broadcast({"type": "info", "n": i}, RoomType.ADMIN)
+        elapsed = time.perf_counter() - started
+        await _settle()
+
+        assert [message["n"] for message in fast.sent] == [0, 1, 2]
+        assert slow.sent == []
+        assert elapsed < 0.5
+
+        slow.release.set()
+        await manager.flush(timeout=1)
+        assert [message["n"] for message in slow.sent] == [0, 1, 2]
+
+    asyncio.run(run())
+
+
+def test_drop_oldest_keeps_latest_messages_for_slow_client():
+    async def run():
+        manager = ConnectionManager(send_queue_size=2, overflow_policy="drop_oldest", send_timeout=0)
+        slow = FakeWebSocket(blocked=True)
+        _connect(manager, slow=slow)
+
+        for i in range(5):
+            await manager.broadcast({"type": "info", "n": i}, RoomType.ADMIN)
+        slow.release.set()
+        await manager.flush(timeout=1)
+
+        # 0 gönderimdeydi; kuyrukta kalan son iki mesaj gönderilir
+        assert [message["n"] for message in slow.sent] == [0, 3, 4]
+        assert manager.count_connections(RoomType.ADMIN) == 1
+
+    asyncio.run(run())
+
+
+def test_coalesce_replaces_pending_update_for_same_record():
+    async def run():
+        manager = ConnectionManager(send_queue_size=1, overflow_policy="coalesce", send_timeout=0)
+        slow = FakeWebSocket(blocked=True)
+        _connect(manager, slow=slow)
+
+        await manager.send_parking_record_update({"id": 1, "action": "entry"})  # Gönderimde
+        await manager.send_parking_record_update({"id": 2, "action": "entry"})  # Kuyrukta
+        await manager.send_parking_record_update({"id": 2, "action": "exit"})  # 2'nin yerine geçer
+        slow.release.set()
+        await manager.flush(timeout=1)
+
+        assert [(m["data"]["id"], m["data"]["action"]) for m in slow.sent] == [(1, "entry"), (2, "exit")]
+
+    asyncio.run(run())
+
+
+def test_disconnect_policy_evicts_client_with_full_queue():
+    async def run():
+        manager = ConnectionManager(send_queue_size=2, overflow_policy="disconnect", send_timeout=0)
+        fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+        _connect(manager, fast=fast, slow=slow)
+
+        # slow: 0 gönderimde, 1 ve 2 kuyrukta, 3 sığmaz
+        for i in range(4):
+            await manager.broadcast({"type": "info", "n": i}, RoomType.ADMIN)
+            await _settle()
+
+        assert manager.get_connections(RoomType.ADMIN) == ["fast"]
+        assert slow.closed_with == 1013
+        assert manager.evictions == 1
+        assert [message["n"] for message in fast.sent] == [0, 1, 2, 3]
+
+    asyncio.run(run())
+
+
+def test_send_timeout_evicts_stuck_client():
+    async def run():
+        manager = ConnectionManager(send_queue_size=10, send_timeout=0.05)
+        stuck = FakeWebSocket(blocked=True)
+        _connect(manager, stuck=stuck)
+
+        await manager.broadcast({"type": "info"}, RoomType.ADMIN)
+        await asyncio.sleep(0.2)
+
+        assert manager.count_connections(RoomType.ADMIN) == 0
+        assert stuck.closed_with == 1013
+        assert manager.get_connection_status()["queued_messages"] == 0
+
+    asyncio.run(run())
+
+
+def test_send_error_is_queued_behind_pending_messages():
+    async def run():
+        manager = ConnectionManager(send_queue_size=2, overflow_policy="disconnect", send_timeout=0)
+        slow = FakeWebSocket(blocked=True)
+        _connect(manager, slow=slow)
+
+        await manager.broadcast({"type": "info", "n": 0}, RoomType.ADMIN)  # Gönderimde
+        await manager.broadcast({"type": "info", "n": 1}, RoomType.ADMIN)  # Kuyrukta
+        # Hata mesajı sokete doğrudan yazılmaz, yazıcı görevinin sırasına girer
+        assert await manager.send_error("slow", "Geçersiz mesaj") is True
+        assert slow.sent == []
+        assert await manager.send_error("unknown", "Geçersiz mesaj") is False
+
+        slow.release.set()
+        await manager.flush(timeout=1)
+        assert [message["type"] for message in slow.sent] == ["info", "info", "error"]
+        assert slow.sent[2]["message"] == "Geçersiz mesaj"
+
+        # Kuyruk doluysa taşma politikası hata mesajına da uygulanır
+        slow.release.clear()
+        for i in range(3):
+            await manager.broadcast({"type": "info", "n": i}, RoomType.ADMIN)
+        assert await manager.send_error("slow", "Geçersiz mesaj") is False
+        assert manager.count_connections(RoomType.ADMIN) == 0
+
+    asyncio.run(run())
+
+
+def test_invalid_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ConnectionManager(overflow_policy="block")